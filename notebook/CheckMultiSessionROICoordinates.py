@@ -46,6 +46,8 @@ class CheckMultiSessionROICoordinatesGUI(QMainWindow):
         # File paths lists
         self.list_path_fall = []
         self.list_path_roi_curation = []
+        # loader of the current sessions, loaded arrays are backed by its shared memory
+        self.session_loader = None
         
         # Show file loader dialog first
         self.showFileLoaderDialog()
@@ -290,7 +292,8 @@ class CheckMultiSessionROICoordinatesGUI(QMainWindow):
         dialog = MultiSessionFileLoaderDialog(
             self, 
             self.config_manager.gui_defaults,
-            require_roi_curation=True
+            require_roi_curation=True,
+            load_parallel=True
         )
         
         if dialog.exec_():
@@ -298,9 +301,14 @@ class CheckMultiSessionROICoordinatesGUI(QMainWindow):
             file_paths = dialog.getFilePaths()
             self.list_path_fall = file_paths['list_path_fall']
             self.list_path_roi_curation = file_paths['list_path_roi_curation']
+            # keep loader alive, loaded arrays are backed by its shared memory
+            session_loader_old, self.session_loader = self.session_loader, dialog.loader
             
             # Load data and initialize UI
-            success = self.loadMultiSessionData()
+            success = self.loadMultiSessionData(dialog.list_dict_Fall, dialog.list_roi_curation)
+            # arrays of the previous sessions are replaced
+            if session_loader_old is not None:
+                session_loader_old.close()
             if success:
                 self.initUI()
                 self.setup_complete = True
@@ -323,13 +331,14 @@ class CheckMultiSessionROICoordinatesGUI(QMainWindow):
     """
     Function for bindFunc
     """
-    def loadROICurationMat(self, app_key: str, path_roi_curation: str):
-        from scipy.io import loadmat
-        import numpy as np
-        mat_roicheck = loadmat(path_roi_curation, simplify_cells=True)
-        date = list(mat_roicheck["manualROIcheck"].keys())[-1] # get last date as default
+    def loadROICurationMat(self, app_key: str, path_roi_curation: str, manual_roicheck: dict = None):
+        # manual_roicheck: already parsed "manualROIcheck" of ROICuration.mat
+        if manual_roicheck is None:
+            from optic.io.snapshot_io import loadSnapshotRoot
+            manual_roicheck = loadSnapshotRoot(path_roi_curation, "manualROIcheck")
+        date = list(manual_roicheck.keys())[-1] # get last date as default
         # select saved date
-        dict_roicheck = mat_roicheck["manualROIcheck"][date]
+        dict_roicheck = manual_roicheck[date]
         dict_roicheck = {k.replace(" ", "_"): v for k, v in dict_roicheck.items()} # this is temporary fix for old ROIcheck files !!!
         # MATLAB convert [1] to 1
         # so, convert 1 to [1]
@@ -346,9 +355,10 @@ class CheckMultiSessionROICoordinatesGUI(QMainWindow):
         self.data_manager.dict_roi_visibility[app_key] = np.array([index_to_label[i] for i in range(max(index_to_label) + 1)])
 
 
-    def loadMultiSessionData(self):
+    def loadMultiSessionData(self, list_dict_Fall: list = None, list_roi_curation: list = None):
         """
         Load data from multiple sessions
+        list_dict_Fall, list_roi_curation: sessions already parsed by MultiSessionFileLoaderDialog
         """
         # set app keys
         self.app_keys = []
@@ -357,23 +367,26 @@ class CheckMultiSessionROICoordinatesGUI(QMainWindow):
             session_key = f"session_{i}"
 
             # Load Fall.mat
-            success, e = self.data_manager.loadFallMat(
-                app_key=session_key,
-                path_fall=path_fall,
-                config_manager=self.config_manager
-            )
+            if list_dict_Fall:
+                self.data_manager.setDictFall(session_key, list_dict_Fall[i], config_manager=self.config_manager)
+                success, e = True, None
+            else:
+                success, e = self.data_manager.loadFallMat(
+                    app_key=session_key,
+                    path_fall=path_fall,
+                    config_manager=self.config_manager
+                )
+            if not success:
+                raise Exception(f"Failed to load Fall.mat for {session_key}: {e}")
             # Load ROICuration.mat
             self.loadROICurationMat(
                 app_key=session_key,
-                path_roi_curation=path_roi
+                path_roi_curation=path_roi,
+                manual_roicheck=list_roi_curation[i] if list_roi_curation else None
             )
             if i == 0: # Exception handling for primary app key # HARD-CODED !!!
-                success, e = self.data_manager.loadFallMat(
-                    app_key=self.app_key_pri,
-                    path_fall=path_fall
-                )
-            if not success:
-                raise Exception(f"Failed to load Fall.mat for {session_key}: {e}")
+                # share session 0 data instead of parsing the same Fall.mat again
+                self.data_manager.setDictFall(self.app_key_pri, self.data_manager.dict_Fall[session_key])
             
             # set ROI visibility dict
             self.data_manager.dict_roi_visibility[session_key] = {roi_id: True for roi_id in self.data_manager.getDictROICoords(session_key).keys()}
@@ -388,18 +401,20 @@ class CheckMultiSessionROICoordinatesGUI(QMainWindow):
     def updateView_CheckMultiSessionROICoordinates(self) -> None:
         """
         Update view for CheckMultiSessionROICoordinates
+        Background and ROI layers of each session are cached in SessionCompositor,
+        a change of display settings only re-renders the layers whose source changed.
         """
-        from optic.utils.view_utils import colorizeGrayscale, alphaBlend, alphaBlendImage, getROIMask
+        from optic.visualization.session_compositor import SessionCompositor
         ALPHA_ROI = 128
 
         # Get image size from first session
         height, width = self.data_manager.getImageSize("pri") # HARDCODED !!!
         view_control = self.control_manager.view_controls[self.app_key_pri] # HARDCODED !!!
-        
-        # Initialize result image (black background)
-        result = np.zeros((height, width, 3), dtype=np.uint8)
+        if getattr(self, "session_compositor", None) is None or self.session_compositor.shape != (height, width):
+            self.session_compositor = SessionCompositor((height, width))
         
         # Process each session
+        list_layer = []
         for session_key, session_color in zip(self.data_manager.session_keys, self.data_manager.session_colors):
             # Check bg checkbox and draw background
             bg_checkbox_key = f"{session_key}_display_bg"
@@ -410,31 +425,33 @@ class CheckMultiSessionROICoordinatesGUI(QMainWindow):
                 else:
                     bg_image = self.data_manager.getDictBackgroundImage(session_key).get(bg_image_type)
                 if bg_image is not None:
-                    colored_bg = colorizeGrayscale(bg_image, session_color)
-                    bg_mask = np.ones((height, width), dtype=np.uint8)
-                    result = alphaBlendImage(result, colored_bg, bg_mask, alpha=ALPHA_ROI)
+                    list_layer.append(self.session_compositor.getBackgroundLayer(session_key, bg_image, session_color, ALPHA_ROI))
             
             # Get ROI data
             dict_roi = self.data_manager.getDictROICoords(session_key)
             dict_roi_visibility = self.data_manager.dict_roi_visibility.get(session_key)
             
-            # Draw ROI mask
-            roi_mask = getROIMask(dict_roi, dict_roi_visibility, (height, width))
-            result = alphaBlend(result, roi_mask, session_color, alpha=ALPHA_ROI)
+            # Draw ROI layer
+            list_layer.append(self.session_compositor.getROILayer(session_key, dict_roi, dict_roi_visibility, session_color, ALPHA_ROI))
+        result = self.session_compositor.composite(list_layer)
         
-        # Update view
+        # Update view, scaled by the view instead of resampling the image on every update
         qimage = QImage(result.data, width, height, width * 3, QImage.Format_RGB888)
-        pixmap = QPixmap.fromImage(qimage)
-        view = view_control.q_view
-        scaled_pixmap = pixmap.scaled(
-            view.viewport().size(),
-            Qt.KeepAspectRatio,
-            Qt.SmoothTransformation
-        )
-        view_control.layer_bg.setPixmap(scaled_pixmap)
-        
-        # Fit scene to view
-        view_control.q_scene.setSceneRect(QRectF(scaled_pixmap.rect()))
+        view_control.layer_bg.setTransformationMode(Qt.SmoothTransformation)
+        view_control.layer_bg.setPixmap(QPixmap.fromImage(qimage))
+        
+        # Fit scene to view, only when the image size changes to keep the zoom
+        scene_rect = QRectF(0, 0, width, height)
+        if view_control.q_scene.sceneRect() != scene_rect:
+            view_control.q_scene.setSceneRect(scene_rect)
+            view_control.q_view.fitInView(scene_rect, Qt.KeepAspectRatio)
+
+    # release shared memory of the loaded sessions at exit
+    def closeEvent(self, event):
+        if self.session_loader is not None:
+            self.session_loader.close()
+            self.session_loader = None
+        super().closeEvent(event)
 
     """
     bindFunc Functions
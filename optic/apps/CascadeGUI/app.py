@@ -27,6 +27,7 @@ from optic.gui.canvas_layouts import makeLayoutCanvasTracePlot, makeLayoutLightP
 from optic.gui.io_layouts import makeLayoutLoadFileExitHelp
 from optic.gui.table_layouts import makeLayoutTableROICountLabel
 from optic.manager import WidgetManager, ConfigManager, DataManager, ControlManager, LayoutManager, initManagers
+from optic.manager.task_manager import runTaskWithMessage
 from optic.gui.bind_func import bindFuncExit, bindFuncTableSelectionChanged, bindFuncCanvasMouseEvent, bindFuncButtonExportFigure
 from optic.gui.table_setup import setupWidgetROITable
 from optic.utils.layout_utils import clearLayout
@@ -138,12 +139,13 @@ class CascadeGUI(QMainWindow):
         )
         # setup TableControl
         self.control_manager.table_controls[self.app_key_pri].setLenRow(self.data_manager.getNROIswithF(self.app_key_pri))
-        self.control_manager.table_controls[self.app_key_pri].q_table, self.control_manager.table_controls[self.app_key_pri].groups_celltype = \
-            setupWidgetROITable(
-                q_table=self.widget_manager.dict_table[self.app_key_pri],
-                len_row=self.data_manager.getNROIswithF(self.app_key_pri),
-                table_columns=self.config_manager.table_columns[self.app_key_pri],
-            )
+        q_table, table_model = setupWidgetROITable(
+            q_table=self.widget_manager.dict_table[self.app_key_pri],
+            len_row=self.data_manager.getNROIswithF(self.app_key_pri),
+            table_columns=self.config_manager.table_columns[self.app_key_pri],
+        )
+        self.control_manager.table_controls[self.app_key_pri].q_table = q_table
+        self.control_manager.table_controls[self.app_key_pri].setTableModel(table_model)
         
         self.control_manager.canvas_controls[self.app_key_pri] = CanvasControl(
             app_key=self.app_key_pri,
@@ -289,18 +291,31 @@ class CascadeGUI(QMainWindow):
         q_combobox,
     ):
         def _runCascade(q_combobox):
-            spike_prob, spike_events = runCascade(
-                traces=self.data_manager.dict_Fall[self.app_key_pri]["F"],
-                model_name=q_combobox.currentText()
-            )
-            self.data_manager.dict_cascade = {
-                self.app_key_pri: {
-                    "cascade_spike_prob": spike_prob,
-                    "cascade_spike_events": spike_events,
+            traces = self.data_manager.dict_Fall[self.app_key_pri]["F"]
+            model_name = q_combobox.currentText()
+
+            def _setCascadeResult(result):
+                spike_prob, spike_events = result
+                self.data_manager.dict_cascade = {
+                    self.app_key_pri: {
+                        "cascade_spike_prob": spike_prob,
+                        "cascade_spike_events": spike_events,
+                    }
                 }
-            }
 
-            QMessageBox.information(self, "Cascade Run", "Cascade run completed successfully!")
+            # inference runs in worker thread, the result is set in GUI thread
+            # progress is reported per ROI chunk, the task can be cancelled between chunks
+            runTaskWithMessage(
+                self, "Cascade", lambda task: runCascade(
+                    traces=traces, 
+                    model_name=model_name,
+                    callback_progress=lambda done, total: task.setProgress(done, total, f"{done}/{total} ROIs"),
+                    ),
+                on_result=_setCascadeResult,
+                msg_success=("Cascade Run", "Cascade run completed successfully!"),
+                lock_keys=["dict_cascade"],
+                widgets_busy=[q_button],
+                )
         q_button.clicked.connect(lambda: _runCascade(q_combobox))
 
 
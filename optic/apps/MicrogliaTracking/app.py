@@ -1,6 +1,5 @@
 import sys
 import os
-from itertools import combinations
 
 dir_notebook = os.path.dirname(os.path.abspath("__file__"))
 dir_parent = os.path.dirname(dir_notebook)
@@ -27,7 +26,7 @@ from optic.gui.view_layouts import (
 from optic.manager import WidgetManager, ConfigManager, DataManager, ControlManager, LayoutManager, initManagers
 from optic.gui.bind_func import (
     bindFuncExit, bindFuncButtonsROIManagerForTable, bindFuncButtonRunElastixForMicrogliaXYCTStackRegistration,
-    bindFuncLoadFileWidget, bindFuncSliderSpinBoxROIEditConfig, bindFuncPlaneTSliderWithXYCTTracking,
+    bindFuncLoadFileWidget, bindFuncSliderSpinBoxROIEditConfig, bindFuncPlaneTSliderWithXYCTTracking, bindFuncPlaybackButton,
     bindFuncTableSelectionChangedWithTracking, bindFuncTableCellChangedWithMicrogliaTracking,
     bindFuncOpacitySlider, bindFuncROIMaskNpyIO, bindFuncROIManagerZipIO,
     bindFuncHighlightOpacitySlider, bindFuncBackgroundContrastSlider, bindFuncBackgroundVisibilityCheckbox, 
@@ -38,6 +37,7 @@ from optic.gui.bind_func import (
     bindFuncCheckboxShowRegisteredROIImage, bindFuncCheckboxShowRegisteredStack
 )
 from optic.utils.layout_utils import clearLayout
+from optic.utils.roi_tracks import ROITracks
 
 class MicrogliaTrackingGUI(QMainWindow):
     def __init__(self):
@@ -109,10 +109,13 @@ class MicrogliaTrackingGUI(QMainWindow):
         self.setupUI_done = True
 
     def loadData(self):
+        data_load_settings = self.config_manager.gui_defaults["DATA_LOAD_SETTINGS"]
         for app_key in self.app_keys:
             success, e = self.data_manager.loadTiffStack(
                 app_key=app_key, 
-                path_tiff=self.widget_manager.dict_lineedit[f"path_tiff"].text()
+                path_tiff=self.widget_manager.dict_lineedit[f"path_tiff"].text(),
+                lazy=data_load_settings["LAZY_LOAD_TIFF"],
+                plane_cache_mb=data_load_settings["PLANE_CACHE_MB"],
             )
         return success, e
 
@@ -157,17 +160,10 @@ class MicrogliaTrackingGUI(QMainWindow):
         for plane_t in range(self.data_manager.getSizeOfT(self.app_keys[0])):
             self.data_manager.dict_roi_coords_xyct[plane_t] = {}
             self.data_manager.dict_roi_coords_xyct_reg[plane_t] = {}
-            self.data_manager.dict_roi_matching["id"][plane_t] = []
             for app_key in self.app_keys:
                 self.control_manager.view_controls[app_key].roi_colors_xyct[plane_t] = {}
-
-        list_plane_combi = list(combinations(range(self.data_manager.getSizeOfT(self.app_keys[0])), 2))
-        for plane_pri, plane_sec in list_plane_combi:
-            # Initialize the nested dictionaries if not already present
-            if plane_pri not in self.data_manager.dict_roi_matching["match"]:
-                self.data_manager.dict_roi_matching["match"][plane_pri] = {}
-            if plane_sec not in self.data_manager.dict_roi_matching["match"][plane_pri]:
-                self.data_manager.dict_roi_matching["match"][plane_pri][plane_sec] = {}
+        # ROI IDs and tracks of all t_planes, matches of t_plane pairs are derived from tracks
+        self.data_manager.dict_roi_matching = ROITracks(self.data_manager.getSizeOfT(self.app_keys[0]))
 
 
     """
@@ -199,6 +195,8 @@ class MicrogliaTrackingGUI(QMainWindow):
             key_label_t=f"{app_key}_plane_t",
             key_slider_t=f"{app_key}_plane_t",
             stack_size_t=self.data_manager.getSizeOfT(app_key),
+            playback=True,
+            playback_fps=self.config_manager.gui_defaults["VIEW_SETTINGS"]["PLAYBACK_FPS"],
             )
         return layout
     
@@ -451,6 +449,13 @@ class MicrogliaTrackingGUI(QMainWindow):
                 view_control=self.control_manager.view_controls[app_key],
             )
 
+        # T playback
+        for app_key in self.app_keys:
+            bindFuncPlaybackButton(
+                q_button=self.widget_manager.dict_button[f"{app_key}_plane_t_play"],
+                q_spinbox_fps=self.widget_manager.dict_spinbox[f"{app_key}_plane_t_fps"],
+                q_slider=self.widget_manager.dict_slider[f"{app_key}_plane_t"],
+            )
         # T slider
         bindFuncPlaneTSliderWithXYCTTracking(
             q_slider_pri=self.widget_manager.dict_slider[f"{self.app_keys[0]}_plane_t"],
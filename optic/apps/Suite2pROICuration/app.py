@@ -105,16 +105,22 @@ class Suite2pROICurationGUI(QMainWindow):
         self.setupUI_done = True
 
     def loadData(self):
+        data_load_settings = self.config_manager.gui_defaults["DATA_LOAD_SETTINGS"]
         # check whether the input file is Suite2p Fall.mat file or Caiman HDF5 file
         if self.widget_manager.dict_lineedit[f"path_fall_{self.app_key_pri}"].text().endswith(Extension.HDF5):
             success, e = self.data_manager.loadCaimanHDF5(
                 app_key=self.app_key_pri, 
-                path_hdf5=self.widget_manager.dict_lineedit[f"path_fall_{self.app_key_pri}"].text()
+                path_hdf5=self.widget_manager.dict_lineedit[f"path_fall_{self.app_key_pri}"].text(),
+                use_cache=data_load_settings["USE_SIDECAR_CACHE"],
+                cache_max_bytes=int(data_load_settings["SIDECAR_CACHE_MAX_GB"] * 1024**3)
             )
         elif self.widget_manager.dict_lineedit[f"path_fall_{self.app_key_pri}"].text().endswith(Extension.MAT):
             success, e = self.data_manager.loadFallMat(
                 app_key=self.app_key_pri, 
-                path_fall=self.widget_manager.dict_lineedit[f"path_fall_{self.app_key_pri}"].text()
+                path_fall=self.widget_manager.dict_lineedit[f"path_fall_{self.app_key_pri}"].text(),
+                lazy=data_load_settings["LAZY_LOAD_FALL"],
+                use_cache=data_load_settings["USE_SIDECAR_CACHE"],
+                cache_max_bytes=int(data_load_settings["SIDECAR_CACHE_MAX_GB"] * 1024**3)
             )
         # Load reference Tiff image if provided
         if self.widget_manager.dict_lineedit[f"path_reftif_{self.app_key_pri}"].text() != "" and self.widget_manager.dict_lineedit[f"path_reftif_{self.app_key_pri}"].text() != "":
@@ -313,6 +319,7 @@ class Suite2pROICurationGUI(QMainWindow):
             self.widget_manager, 
             key_button_save=f"roicuration_save_{self.app_key_pri}",
             key_button_load=f"roicuration_load_{self.app_key_pri}",
+            key_button_export=f"roicuration_export_{self.app_key_pri}",
         ))
         return layout
 
@@ -420,6 +427,7 @@ class Suite2pROICurationGUI(QMainWindow):
             q_lineedit=self.widget_manager.dict_lineedit[f"path_fall_{self.app_key_pri}"], 
             q_button_save=self.widget_manager.dict_button[f"roicuration_save_{self.app_key_pri}"], 
             q_button_load=self.widget_manager.dict_button[f"roicuration_load_{self.app_key_pri}"], 
+            q_button_export=self.widget_manager.dict_button[f"roicuration_export_{self.app_key_pri}"],
             q_table=self.widget_manager.dict_table[f"{self.app_key_pri}"], 
             widget_manager=self.widget_manager,
             config_manager=self.config_manager,
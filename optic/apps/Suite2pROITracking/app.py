@@ -87,6 +87,8 @@ class Suite2pROITrackingGUI(QMainWindow):
         self.layout_file_load.addWidget(file_load_widget)
 
     def loadFilePathsandInitialize(self):
+        if not self.validateFilePairs():
+            return
         self.control_manager, self.data_manager = initManagers(self.control_manager, self.data_manager)
         success, e = self.loadData()
         if success:
@@ -96,6 +98,25 @@ class Suite2pROITrackingGUI(QMainWindow):
             QMessageBox.warning(self, "File Load Error", f"Failed to load the file. \n {e}")
             return
 
+    # compare headers of pri / sec files before loading them
+    def validateFilePairs(self) -> bool:
+        from optic.io.metadata_io import peekFileMetadata, compareMetadata
+        try:
+            list_metadata = [peekFileMetadata(self.widget_manager.dict_lineedit[f"path_fall_{app_key}"].text()) for app_key in self.app_keys]
+        except Exception as e:
+            QMessageBox.warning(self, "File Load Error", f"Failed to read the file header. \n {e}")
+            return False
+        list_mismatch = compareMetadata(*list_metadata)
+        if list_mismatch:
+            reply = QMessageBox.question(
+                self, 
+                "Image Size Mismatch", 
+                "Image size of the two sessions differs.\n" + "\n".join(list_mismatch) + "\nLoad anyway?",
+                QMessageBox.Yes | QMessageBox.No
+            )
+            return reply == QMessageBox.Yes
+        return True
+
     def setupMainUI(self):
         if self.setupUI_done:
             # メインUIのクリア
@@ -111,19 +132,25 @@ class Suite2pROITrackingGUI(QMainWindow):
 
     def loadData(self):
         from optic.config.constants import Extension
+        data_load_settings = self.config_manager.gui_defaults["DATA_LOAD_SETTINGS"]
         for app_key in self.app_keys:
             # check whether the input file is Suite2p Fall.mat file or Caiman HDF5 file
             if self.widget_manager.dict_lineedit[f"path_fall_{app_key}"].text().endswith(Extension.HDF5):
                 success, e = self.data_manager.loadCaimanHDF5(
                     app_key=app_key, 
                     path_hdf5=self.widget_manager.dict_lineedit[f"path_fall_{app_key}"].text(),
-                    config_manager=self.config_manager
+                    config_manager=self.config_manager,
+                    use_cache=data_load_settings["USE_SIDECAR_CACHE"],
+                    cache_max_bytes=int(data_load_settings["SIDECAR_CACHE_MAX_GB"] * 1024**3)
                 )
             elif self.widget_manager.dict_lineedit[f"path_fall_{app_key}"].text().endswith(Extension.MAT):
                 success, e = self.data_manager.loadFallMat(
                     app_key=app_key, 
                     path_fall=self.widget_manager.dict_lineedit[f"path_fall_{app_key}"].text(),
-                    config_manager=self.config_manager
+                    config_manager=self.config_manager,
+                    lazy=data_load_settings["LAZY_LOAD_FALL"],
+                    use_cache=data_load_settings["USE_SIDECAR_CACHE"],
+                    cache_max_bytes=int(data_load_settings["SIDECAR_CACHE_MAX_GB"] * 1024**3)
                 )
         return success, e
 
@@ -255,6 +282,7 @@ class Suite2pROITrackingGUI(QMainWindow):
             self.widget_manager, 
             key_button_save=f"roicuration_save_{app_key}",
             key_button_load=f"roicuration_load_{app_key}",
+            key_button_export=f"roicuration_export_{app_key}",
         ))
         return layout
 
@@ -440,6 +468,7 @@ class Suite2pROITrackingGUI(QMainWindow):
                 q_lineedit=self.widget_manager.dict_lineedit[f"path_fall_{app_key}"], 
                 q_button_save=self.widget_manager.dict_button[f"roicuration_save_{app_key}"], 
                 q_button_load=self.widget_manager.dict_button[f"roicuration_load_{app_key}"], 
+                q_button_export=self.widget_manager.dict_button[f"roicuration_export_{app_key}"],
                 q_table=self.widget_manager.dict_table[f"{app_key}"], 
                 widget_manager=self.widget_manager,
                 config_manager=self.config_manager,
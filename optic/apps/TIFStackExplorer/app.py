@@ -79,9 +79,12 @@ class TIFStackExplorerGUI(QMainWindow):
         self.setupUI_done = True
 
     def loadData(self):
+        data_load_settings = self.config_manager.gui_defaults["DATA_LOAD_SETTINGS"]
         success = self.data_manager.loadTiffStack(
             app_key=self.app_key_pri,
             path_tiff=self.widget_manager.dict_lineedit[f"{self.app_key_pri}_path_tiff"].text(),
+            lazy=data_load_settings["LAZY_LOAD_TIFF"],
+            plane_cache_mb=data_load_settings["PLANE_CACHE_MB"],
             )
         return success
 
@@ -119,6 +122,8 @@ class TIFStackExplorerGUI(QMainWindow):
             key_slider_t=f"{self.app_key_pri}_plane_t",
             stack_size_z=self.data_manager.getSizeOfZ(self.app_key_pri),
             stack_size_t=self.data_manager.getSizeOfT(self.app_key_pri),
+            playback=True,
+            playback_fps=self.config_manager.gui_defaults["VIEW_SETTINGS"]["PLAYBACK_FPS"],
             )
         return layout
     
@@ -269,6 +274,13 @@ class TIFStackExplorerGUI(QMainWindow):
         # Z,T plane slider
         bindFuncPlaneZSlider(self.widget_manager.dict_slider[f"{self.app_key_pri}_plane_z"], self.control_manager.view_controls[self.app_key_pri])
         bindFuncPlaneTSlider(self.widget_manager.dict_slider[f"{self.app_key_pri}_plane_t"], self.control_manager.view_controls[self.app_key_pri])
+        # Z,T playback
+        for key_slider in (f"{self.app_key_pri}_plane_z", f"{self.app_key_pri}_plane_t"):
+            bindFuncPlaybackButton(
+                q_button=self.widget_manager.dict_button[f"{key_slider}_play"],
+                q_spinbox_fps=self.widget_manager.dict_spinbox[f"{key_slider}_fps"],
+                q_slider=self.widget_manager.dict_slider[key_slider],
+            )
         
         # Slider Contrast valueChanged, Checkbox show channel stateChanged
         for channel in self.config_manager.gui_defaults["CHANNELS"]:
@@ -56,6 +56,7 @@ class GuiDefaults:
         "VIEW_SETTINGS": {
             "DEFAULT_CONTRAST_MIN": 0,
             "DEFAULT_CONTRAST_MAX": 255,
+            "BG_PIXMAP_CACHE_MB": 128, # LRU cache of background pixmaps per view, 0 to disable
         },
         "ROI_VISUAL_SETTINGS": {
             "COLOR_MIN": 100,
@@ -70,6 +71,11 @@ class GuiDefaults:
             "YLIM_RECTANGLE": (-0.05, 1.05),
             "PLOT_POINTS": 10,
         },
+        "DATA_LOAD_SETTINGS": {
+            "LAZY_LOAD_FALL": True, # read traces of Fall.mat row by row on demand
+            "USE_SIDECAR_CACHE": True, # reopen Fall.mat / CaImAn HDF5 from .optic_cache next to the source file
+            "SIDECAR_CACHE_MAX_GB": 50,
+        },
         "TABLE_COLUMNS": {
             AppKeys.PRI: {
                 "Cell_ID"   : {"order": 0, "type": "id",       "width": 80,  "removable": False, "name_fixed": True, "editable": False},
@@ -174,6 +180,7 @@ class GuiDefaults:
         "VIEW_SETTINGS": {
             "DEFAULT_CONTRAST_MIN": 0,
             "DEFAULT_CONTRAST_MAX": 255,
+            "BG_PIXMAP_CACHE_MB": 128, # LRU cache of background pixmaps per view, 0 to disable
         },
         "ROI_THRESHOLDS": {
             "npix": "(50, 200)",
@@ -190,6 +197,11 @@ class GuiDefaults:
             "DEFAULT_HIGHLIGHT_OPACITY": 255,
         },
         "ROI_MATCHING_METHOD": ["None", "affine", "bspline"],
+        "DATA_LOAD_SETTINGS": {
+            "LAZY_LOAD_FALL": True, # read traces of Fall.mat row by row on demand
+            "USE_SIDECAR_CACHE": True, # reopen Fall.mat / CaImAn HDF5 from .optic_cache next to the source file
+            "SIDECAR_CACHE_MAX_GB": 50,
+        },
         "TABLE_COLUMNS": {
             AppKeys.PRI: {
                 "Cell_ID"       : {"order": 0, "type": "id",       "width": 80,  "removable": False, "name_fixed": True, "editable": False},
@@ -331,6 +343,11 @@ class GuiDefaults:
         "VIEW_SETTINGS": {
             "DEFAULT_CONTRAST_MIN": 0,
             "DEFAULT_CONTRAST_MAX": 255,
+            "BG_PIXMAP_CACHE_MB": 128, # LRU cache of background pixmaps per view, 0 to disable
+            "PREFETCH_PLANES": 4, # planes rendered ahead of the Z/T slider in the background
+            "PREFETCH_CACHE_MB": 256, # LRU cache of prefetched planes, 0 to disable
+            "PLAYBACK_FPS": 10, # default frame rate of Z/T playback
+            "PYRAMID_CACHE_MB": 256, # LRU cache of 2x-downsampled planes shown when zoomed out, 0 to always show full resolution
         },
         "ROI_VISUAL_SETTINGS": {
             "COLOR_MIN": 100,
@@ -339,6 +356,10 @@ class GuiDefaults:
             "DEFAULT_HIGHLIGHT_OPACITY": 255,
         },
         "ROI_MATCHING_METHOD": ["None", "affine", "bspline"],
+        "DATA_LOAD_SETTINGS": {
+            "LAZY_LOAD_TIFF": True, # read planes of TIFF stack on demand (memory-mapped / zarr / page by page)
+            "PLANE_CACHE_MB": 512, # LRU cache of decoded planes, 0 to disable
+        },
         "TABLE_COLUMNS": {
             AppKeys.PRI: {
                 "Cell_ID"       : {"order": 0, "type": "id",       "width": 120,  "removable": False, "name_fixed": True, "editable": False},
@@ -409,6 +430,11 @@ class GuiDefaults:
         "VIEW_SETTINGS": {
             "DEFAULT_CONTRAST_MIN": 0,
             "DEFAULT_CONTRAST_MAX": 255,
+            "BG_PIXMAP_CACHE_MB": 128, # LRU cache of background pixmaps per view, 0 to disable
+            "PREFETCH_PLANES": 4, # planes rendered ahead of the Z/T slider in the background
+            "PREFETCH_CACHE_MB": 256, # LRU cache of prefetched planes, 0 to disable
+            "PLAYBACK_FPS": 10, # default frame rate of Z/T playback
+            "PYRAMID_CACHE_MB": 256, # LRU cache of 2x-downsampled planes shown when zoomed out, 0 to always show full resolution
         },
         "ROI_VISUAL_SETTINGS": {
             "COLOR_MIN": 100,
@@ -427,6 +453,10 @@ class GuiDefaults:
             },
         },
         "REGISTRATION_METHOD": ["None", "affine", "bspline"],
+        "DATA_LOAD_SETTINGS": {
+            "LAZY_LOAD_TIFF": True, # read planes of TIFF stack on demand (memory-mapped / zarr / page by page)
+            "PLANE_CACHE_MB": 512, # LRU cache of decoded planes, 0 to disable
+        },
     }
 
     """
@@ -526,6 +556,7 @@ class GuiDefaults:
         "VIEW_SETTINGS": {
             "DEFAULT_CONTRAST_MIN": 0,
             "DEFAULT_CONTRAST_MAX": 255,
+            "BG_PIXMAP_CACHE_MB": 128, # LRU cache of background pixmaps per view, 0 to disable
         },
         "ROI_VISUAL_SETTINGS": {
             "COLOR_MIN": 100,
@@ -1,9 +1,11 @@
 from __future__ import annotations
 from ..type_definitions import *
-from PyQt5.QtWidgets import QRadioButton, QButtonGroup, QMessageBox, QAbstractItemView, QTableWidget, QTableWidgetItem
+from PyQt5.QtWidgets import QMessageBox, QAbstractItemView
 from PyQt5.QtCore import Qt
 import numpy as np
 from ..handlers.table_handler import TableHandler
+from ..gui.table_model import ROITableModel
+from ..utils.roi_classification import ROIClassification
 from ..visualization.info_visual import updateROIPropertyDisplay, updateROICountDisplay
 from ..utils.dialog_utils import showConfirmationDialog
 from ..utils.info_utils import extractRangeValues
@@ -13,7 +15,7 @@ class TableControl:
     def __init__(
             self, 
             app_key         : str, 
-            q_table         : QTableWidget,             
+            q_table         : Union[QTableView, QTableWidget],             
             data_manager    : DataManager, 
             widget_manager  : WidgetManager, 
             config_manager  : ConfigManager, 
@@ -31,7 +33,8 @@ class TableControl:
             self.key_function_map   : Dict[Qt.Key, Any] = self.config_manager.getKeyFunctionMap(self.app_key).getAllMappings()
         else:
             self.key_function_map                       = {}
-        self.groups_celltype        : Dict[int, QButtonGroup] = {}
+        # ROI table of Suite2p / Cascade apps, None for the QTableWidget of MicrogliaTracking
+        self.table_model            : Optional[ROITableModel] = None
         self.selected_row           : int = 0
         self.selected_column        : int = 0
         self.len_row                : int = 0
@@ -44,9 +47,9 @@ class TableControl:
     def setupWidgetROITable(self, app_key: str) -> None:
         from ..gui.table_setup import setupWidgetROITable
         self.setLenRow(len(self.data_manager.getStat(self.app_key))) # for Suite2p
-        self.q_table, self.groups_celltype = setupWidgetROITable(self.q_table, self.len_row, self.table_columns, key_event_ignore=True)
+        self.q_table, table_model = setupWidgetROITable(self.q_table, self.len_row, self.table_columns)
+        self.setTableModel(table_model)
         self.setKeyPressEvent()
-        self.initalizeSharedAttr_DictROIDisplay()
         self.initalizeSharedAttr_CelltypeVisibility()
         self.initalizeSharedAttr_CheckboxVisibility()
         # set celltype with TableColumns
@@ -59,17 +62,17 @@ class TableControl:
 
     def setupWidgetDynamicTable(self, app_key: str) -> None:
         from ..gui.table_setup import setupWidgetDynamicTable
-        self.q_table, self.groups_celltype = setupWidgetDynamicTable(self.q_table, self.table_columns, self.len_row)
+        self.q_table = setupWidgetDynamicTable(self.q_table, self.table_columns, self.len_row)
         self.setKeyPressEvent()
 
     def updateWidgetROITable(self) -> None:
         from ..gui.table_setup import setupWidgetROITable
-        self.q_table.clear()
-        self.q_table, groups_celltype = setupWidgetROITable(self.q_table, self.len_row, self.table_columns, key_event_ignore=True)
+        self.q_table, table_model = setupWidgetROITable(self.q_table, self.len_row, self.table_columns)
+        self.setTableModel(table_model)
 
     def updateWidgetDynamicTableWithT(
         self, 
-        dict_roi_matching: Dict[str, Dict[int, List[int] | Dict[int, Dict[int, Optional[int]]]]],
+        dict_roi_matching: ROITracks,
         t_plane_pri: int, 
         t_plane_sec: int, 
         use_match: bool = True
@@ -89,8 +92,8 @@ class TableControl:
     # change table cell selection
     def onSelectionChanged(self, selected: QItemSelection, deselected: QItemSelection) -> None:
         if selected.indexes():
-            row: int = self.q_table.currentRow()
-            column: int = self.q_table.currentColumn()
+            row: int = self.getCurrentRow()
+            column: int = self.getCurrentColumn()
             
             self.setSelectedRow(row)
             self.setSelectedColumn(column)
@@ -104,8 +107,8 @@ class TableControl:
 
     def onSelectionChangedWithTracking(self, selected: QItemSelection, deselected: QItemSelection) -> None:
         if selected.indexes():
-            row: int = self.q_table.currentRow()
-            column: int = self.q_table.currentColumn()
+            row: int = self.getCurrentRow()
+            column: int = self.getCurrentColumn()
             
             self.setSelectedRow(row)
             self.setSelectedColumn(column)
@@ -127,6 +130,19 @@ class TableControl:
     
     def getLenRow(self) -> int:
         return self.len_row
+
+    # QTableView API, works for both ROITableModel and QTableWidget
+    def getRowCount(self) -> int:
+        return self.q_table.model().rowCount()
+
+    def getColumnCount(self) -> int:
+        return self.q_table.model().columnCount()
+
+    def getCurrentRow(self) -> int:
+        return self.q_table.currentIndex().row()
+
+    def getCurrentColumn(self) -> int:
+        return self.q_table.currentIndex().column()
     
     # if "Cell ID Match" column is empty, return None
     def getCellIdMatchFromRow(self, row: int) -> Optional[int]:
@@ -138,31 +154,20 @@ class TableControl:
                 return None
                 
             col_name, col_info = id_match_columns[0]
+            if self.table_model is not None:
+                id_match = int(self.table_model.id_match[row])
+                return id_match if id_match >= 0 else None
             item = self.q_table.item(row, col_info['order'])
             if not item or not item.text().strip():
                 return None
                 
             return int(item.text())
-        except (ValueError, AttributeError):
+        except (ValueError, AttributeError, IndexError):
             return None
         
     def getPlaneT(self) -> int:
         return self.plane_t
     
-    # get "Cell ID" from table row
-    def getCellIdFromRow(self, row: int) -> Optional[int]:
-        try:
-            # Get first column with type 'id'
-            id_columns = [(col_name, col_info) for col_name, col_info in self.table_columns.getColumns().items() 
-                        if col_info['type'] == 'id']
-            if not id_columns:
-                return None
-                
-            col_name, col_info = id_columns[0]
-            return int(self.q_table.item(row, col_info['order']).text())
-        except (ValueError, AttributeError):
-            return None
-        
     # get Table Column name from table column
     def getTableColumnNameFromColumn(self, column: int) -> str:
         for col_name, col_info in self.table_columns.getColumns().items():
@@ -198,6 +203,27 @@ class TableControl:
     def setKeyPressEvent(self) -> None:
         self.q_table.keyPressEvent = self.table_handler.handleKeyPress
 
+    # ROIClassification of the model is shared with DataManager, renewed on every reset of the model
+    def setTableModel(self, table_model: ROITableModel) -> None:
+        if table_model is not self.table_model:
+            self.table_model = table_model
+            self.table_model.modelReset.connect(self.registerROIClassification)
+        self.registerROIClassification()
+
+    def registerROIClassification(self) -> None:
+        self.data_manager.dict_roi_classification[self.app_key] = self.table_model.roi_classification
+
+    def getROIClassification(self) -> Optional[ROIClassification]:
+        return None if self.table_model is None else self.table_model.roi_classification
+
+    # select and scroll to the cell
+    def setCurrentCell(self, row: int, column: int, hint: QAbstractItemView.ScrollHint=QAbstractItemView.EnsureVisible) -> None:
+        index = self.q_table.model().index(row, column)
+        if not index.isValid():
+            return
+        self.q_table.setCurrentIndex(index)
+        self.q_table.scrollTo(index, hint)
+
     def setTableColumns(self, table_columns: TableColumns) -> None:
         self.table_columns = table_columns
 
@@ -229,20 +255,11 @@ class TableControl:
     def getSharedAttr_ROIMatch(self) -> int:
         return self.control_manager.getSharedAttr(self.app_key, 'roi_match_id')
     
-    def setSharedAttr_DictROIDisplay(self, dict_roi_display: Dict[int, Dict[str, bool]]) -> None:
-        self.control_manager.setSharedAttr(self.app_key, 'dict_roi_display', dict_roi_display)
-
-    def getSharedAttr_DictROIDisplay(self) -> Dict[int, Dict[str, bool]]:
-        return self.control_manager.getSharedAttr(self.app_key, 'dict_roi_display')
-
-    def initalizeSharedAttr_DictROIDisplay(self) -> None:
-        dict_roi_display = {
-            roi_id: {
-                "celltype": True,
-                "checkbox": True,
-            } for roi_id in range(self.len_row)
-        }
-        self.control_manager.setSharedAttr(self.app_key, 'dict_roi_display', dict_roi_display)
+    # (len_row,) bool, ROIs displayed with celltype_visibility and checkbox_visibility
+    def getROIDisplayMask(self) -> np.ndarray:
+        if self.table_model is None:
+            return np.ones(self.getRowCount(), dtype=bool)
+        return self.getROIClassification().getDisplayMask()
 
     def getSharedAttr_CelltypeVisibility(self) -> Dict[str, bool]:
         return self.control_manager.getSharedAttr(self.app_key, 'celltype_visibility')
@@ -268,72 +285,33 @@ class TableControl:
 
     # with dict_checkbox["{app_key}_display_celltype"] change
     def updateROIDisplayWithCelltype(self, dict_celltype_visibility: Dict[str, bool]) -> None:
-        dict_roi_display = self.getSharedAttr_DictROIDisplay()
-        # if all checkboxes of celltype are not checked
-        if not any(dict_celltype_visibility.values()):
-            for roi_id in dict_roi_display.keys():
-                dict_roi_display[roi_id]["celltype"] = False
-        else:
-            # check each ROI celltype is in list_checked_celltype
-            for roi_id in dict_roi_display.keys():
-                current_celltype = self.getCurrentCellTypeOfRow(roi_id)
-                dict_roi_display[roi_id]["celltype"] = dict_celltype_visibility.get(current_celltype, False)
-        
-        self.setSharedAttr_DictROIDisplay(dict_roi_display)
+        # unclassified ROIs and, if all checkboxes of celltype are not checked, all ROIs are hidden
+        if self.table_model is not None:
+            self.getROIClassification().updateDisplayWithCelltype(dict_celltype_visibility)
         self.setSharedAttr_CelltypeVisibility(dict_celltype_visibility)
 
     # with dict_checkbox["{app_key}_display_checkbox"] change
     def updateROIDisplayWithCheckbox(self, dict_checkbox_visibility: Dict[str, bool]) -> None:
-        dict_roi_display = self.getSharedAttr_DictROIDisplay()
-        # if all checkboxes of checkboxes are not checked
-        if not any(dict_checkbox_visibility.values()):
-            for roi_id in dict_roi_display.keys():
-                dict_roi_display[roi_id]["checkbox"] = True
-        else:
-            # check each ROI's checkbox states
-            for roi_id in dict_roi_display.keys():
-                row = self.getRowFromCellId(roi_id)
-                # get all checkbox states for this row
-                checkbox_states = self.getCheckboxStatesOfRow(row)
-                # check the ROI's checkbox states with dict_checkbox_visibility
-                is_visible = True
-                for checkbox, is_visible_checkbox in dict_checkbox_visibility.items():
-                    if is_visible_checkbox and not checkbox_states.get(checkbox, False):
-                        is_visible = False
-                        break
-                        
-                dict_roi_display[roi_id]["checkbox"] = is_visible
-        
-        self.setSharedAttr_DictROIDisplay(dict_roi_display)
+        # ROIs with all of the visible checkboxes checked, all ROIs if all checkboxes are not checked
+        if self.table_model is not None:
+            self.getROIClassification().updateDisplayWithCheckbox(dict_checkbox_visibility)
         self.setSharedAttr_CheckboxVisibility(dict_checkbox_visibility)
 
+    # recompute display of all ROIs, after bulk edits of the table
+    def refreshROIDisplay(self) -> None:
+        self.updateROIDisplayWithCelltype(self.getSharedAttr_CelltypeVisibility())
+        self.updateROIDisplayWithCheckbox(self.getSharedAttr_CheckboxVisibility())
+        view_control = self.control_manager.view_controls.get(self.app_key)
+        if view_control is not None:
+            view_control.updateView()
+
     # with table's "celltype" radiobutton change
     def changeRadiobuttonOfTable(self, row: int) -> None:
-        dict_roi_display = self.getSharedAttr_DictROIDisplay()
-        # check celltype of changed ROI
-        new_cell_type = self.getCurrentCellTypeOfRow(row)
-        dict_celltype_visibility = self.getSharedAttr_CelltypeVisibility()
-        dict_roi_display[row]["celltype"] = dict_celltype_visibility.get(new_cell_type, False)
-        self.setSharedAttr_DictROIDisplay(dict_roi_display)
+        self.getROIClassification().updateDisplayOfRow(row, self.getSharedAttr_CelltypeVisibility(), self.getSharedAttr_CheckboxVisibility())
 
     # with table's "checkbox" checkbox change
     def changeCheckboxOfTable(self, row: int) -> None:
-        dict_roi_display = self.getSharedAttr_DictROIDisplay()
-        # check checkbox of changed ROI
-        dict_checkbox_visibility: Dict[str, bool] = self.getSharedAttr_CheckboxVisibility()
-        # get all checkbox states for this row
-        checkbox_states_row: Dict[str, bool] = self.getCheckboxStatesOfRow(row)
-        # check the ROI's checkbox states with dict_checkbox_visibility
-        is_visible = True
-        for checkbox_name, check_checkbox in dict_checkbox_visibility.items():
-            if check_checkbox:
-                if checkbox_states_row[checkbox_name]:
-                    pass
-                else:
-                    is_visible = False
-                    break
-        dict_roi_display[row]["checkbox"] = is_visible
-        self.setSharedAttr_DictROIDisplay(dict_roi_display)
+        self.getROIClassification().updateDisplayOfRow(row, self.getSharedAttr_CelltypeVisibility(), self.getSharedAttr_CheckboxVisibility())
 
     # with View mousePressEvent
     def updateSelectedROI(self, roi_id: int) -> None:
@@ -341,11 +319,12 @@ class TableControl:
         # roi_id and row are not always the same
         if roi_id is not None:
             row = self.getRowFromCellId(roi_id)
+            if row is None:
+                return
             self.q_table.selectRow(row)
             self.setSelectedRow(row)
             self.setSharedAttr_ROISelected(roi_id)
-            self.q_table.scrollToItem(self.q_table.item(row, 0), QAbstractItemView.PositionAtTop)
-            self.q_table.setCurrentCell(row, 0)
+            self.setCurrentCell(row, 0, QAbstractItemView.PositionAtTop)
             
     """
     Sub Function
@@ -353,31 +332,26 @@ class TableControl:
             
     # get celltype of radiobutton, Neruon/Astrocyte/...
     def getCurrentCellTypeOfRow(self, row: int) -> str:
-        button_group = self.groups_celltype.get(row)
-        if button_group:
-            checked_button = button_group.checkedButton()
-            if checked_button:
-                for col_name, col_info in self.table_columns.getColumns().items():
-                    if col_info['type'] == 'celltype' and self.q_table.cellWidget(row, col_info['order']) == checked_button:
-                        return col_name
-        return None
+        if self.table_model is None or not 0 <= row < self.table_model.rowCount():
+            return None
+        return self.table_model.getCelltypeOfRow(row)
     
     # get checkbox state of the table, Check/Tracking/...
     def getCheckboxStatesOfRow(self, row: int) -> Dict[str, bool]:
-        table_columns_ = self.table_columns.getColumns()
-        dict_checkbox_state = {}
-        for column_name in table_columns_.keys():
-            if table_columns_[column_name]["type"] == "checkbox":
-                dict_checkbox_state[column_name] = self.getCheckboxStatesOfColumn(column_name)[row]
-        return dict_checkbox_state
+        return self.table_model.getCheckboxStatesOfRow(row)
+
+    # ROIs not selectable by click, True for rows whose checked celltype or checkbox is in skip_roi_types
+    # cached by ROIClassification until the next edit
+    def getROISkipMask(self, skip_roi_types: Dict[str, bool]) -> np.ndarray:
+        if self.table_model is None:
+            return np.zeros(self.getRowCount(), dtype=bool)
+        return self.getROIClassification().getSkipMask(skip_roi_types)
 
     # detect "Check" is checked or not
     def getRowChecked(self, row: int) -> bool:
-        for col_name, col_info in self.table_columns.getColumns().items():
-            if col_info['type'] == 'checkbox' and col_name == 'Check': # hardcoded !!!
-                check_box_item = self.q_table.item(row, col_info['order'])
-                return check_box_item.checkState() == Qt.Checked if check_box_item else False
-        return False
+        if self.table_model is None or 'Check' not in self.table_model.list_checkbox: # hardcoded !!!
+            return False
+        return self.table_model.isRowOfColumn(row, 'Check')
     
     """
     Button-binding Function
@@ -390,7 +364,7 @@ class TableControl:
             idx_max: Optional[int] = None
         ) -> None:
         checkbox_columns = self.getCheckboxColumns()
-        skip_states = {}
+        mask_skip = np.zeros(self.len_row, dtype=bool)
         
         # Check if user wants to skip checked ROIs for each checkbox column
         for column in checkbox_columns:
@@ -400,39 +374,23 @@ class TableControl:
                 f"Skip {column} checked ROI ? (ROI {idx_min} to {idx_max})"
             )
             if result == QMessageBox.Yes:
-                skip_states[column] = self.getCheckboxStatesOfColumn(column)
+                mask_skip |= self.getCheckboxStatesOfColumn(column)
             elif result == QMessageBox.Cancel:
                 return  # 処理を中断
-            else:  # No の場合
-                skip_states[column] = [False] * self.len_row
                 
-        col_order: int = self.table_columns.getColumns()[celltype]["order"]
-        for row in range(idx_min, idx_max+1):
-            if all(not skip_states[col][row] for col in checkbox_columns):
-                button_group = self.groups_celltype.get(row)
-                if button_group:
-                    button = self.q_table.cellWidget(row, col_order)
-                    if isinstance(button, QRadioButton):
-                        button.setChecked(True)
-                        self.changeRadiobuttonOfTable(row)
+        rows = np.arange(max(idx_min, 0), min(idx_max + 1, self.len_row))
+        rows = rows[~mask_skip[rows]]
+        self.table_model.setCelltypeOfRows(rows, celltype)
+        self.updateROIDisplayWithCelltype(self.getSharedAttr_CelltypeVisibility())
         updateROICountDisplay(self.widget_manager, self.config_manager, self.app_key)
 
     def getCheckboxColumns(self) -> List[str]:
         return [col_name for col_name, col_info in self.table_columns.getColumns().items() if col_info['type'] == 'checkbox']
 
-    def getCheckboxStatesOfColumn(self, column_name: str) -> List[bool]:
-        col_info = self.table_columns.getColumns()[column_name]
-        if col_info['type'] != 'checkbox':
-            return []
-        
-        states = []
-        for row in range(self.len_row):
-            item = self.q_table.item(row, col_info['order'])
-            if item:
-                states.append(item.checkState() == Qt.Checked)
-            else:
-                states.append(False)
-        return states
+    def getCheckboxStatesOfColumn(self, column_name: str) -> np.ndarray:
+        if self.table_model.getColumnType(column_name) != 'checkbox':
+            return np.zeros(0, dtype=bool)
+        return self.table_model.getCheckboxStatesOfColumn(column_name).copy()
     
     # toggle "Checkbox" of All ROIs
     def toggleSelectedROICheckbox(
@@ -449,13 +407,9 @@ class TableControl:
             f"{dict_text[toggle]} {checkbox} for ROI {idx_min} to {idx_max} ?"
         )
         if result == QMessageBox.Yes:
-            col_index = self.table_columns.getColumns()[checkbox]['order']
-            check_state = Qt.Checked if toggle else Qt.Unchecked
-
-            for row in range(idx_min, idx_max+1):
-                item = self.q_table.item(row, col_index)
-                if item:
-                    item.setCheckState(check_state)
+            rows = np.arange(max(idx_min, 0), min(idx_max + 1, self.len_row))
+            self.table_model.setCheckboxOfRows(rows, checkbox, toggle)
+            self.refreshROIDisplay()
         
     # Filter ROIs, set celltype radiobutton "Not Cell" (column with the highest order)
     def filterROI(self, thresholds: Dict[str, Tuple[float, float]]) -> None:
@@ -467,15 +421,15 @@ class TableControl:
         if result == QMessageBox.Yes:
             celltype_columns = [col for col, info in self.table_columns.getColumns().items() if info['type'] == 'celltype']
             target_celltype = max(celltype_columns, key=lambda col: self.table_columns.getColumns()[col]['order']) # Not_Cell column should be the last column of "celltype" columns
-            target_column = self.table_columns.getColumns()[target_celltype]['order']
-
-            for row in range(self.q_table.rowCount()):
-                roi_stat = self.data_manager.getStat(self.app_key)[row]
-                if not all(min_val <= roi_stat[param] <= max_val for param, (min_val, max_val) in thresholds.items()):
-                    radio_button: QRadioButton = self.q_table.cellWidget(row, target_column)
-                    if radio_button:
-                        radio_button.setChecked(True)
-                        self.changeRadiobuttonOfTable(row)
+
+            stat = self.data_manager.getStat(self.app_key)
+            n_row = self.table_model.rowCount()
+            mask_pass = np.ones(n_row, dtype=bool)
+            for param, (min_val, max_val) in thresholds.items():
+                values = np.array([stat[row][param] for row in range(n_row)], dtype=np.float64)
+                mask_pass &= (min_val <= values) & (values <= max_val)
+            self.table_model.setCelltypeOfRows(np.flatnonzero(~mask_pass), target_celltype)
+            self.refreshROIDisplay()
             updateROICountDisplay(self.widget_manager, self.config_manager, self.app_key)
         else:
             return
@@ -484,6 +438,8 @@ class TableControl:
     """
     # get row from cell id
     def getRowFromCellId(self, cell_id: int) -> Optional[int]:
+        if self.table_model is not None:
+            return self.getROIClassification().getRowFromId(cell_id)
         col_id = self.table_columns.getColumns()['Cell_ID']['order'] # hardcoded !!!
         dict_row_cellid = {row: int(self.q_table.item(row, col_id).text()) for row in range(self.len_row)}
         dict_cellid_row = {v: k for k, v in dict_row_cellid.items()}
@@ -491,6 +447,8 @@ class TableControl:
     
     # get cell id from row
     def getCellIdFromRow(self, row: int) -> Optional[int]:
+        if self.table_model is not None:
+            return int(self.table_model.cell_ids[row])
         col_id = self.table_columns.getColumns()['Cell_ID']['order']
         return int(self.q_table.item(row, col_id).text())
     
@@ -502,64 +460,30 @@ class TableControl:
         celltype_neg: str = "Not_Cell",
         app_key: AppKeys = "pri"
     ) -> None:
-        # Get column indices
-        columns = self.table_columns.getColumns()
-        pos_col_idx = columns.get(celltype_pos, {}).get('order')
-        neg_col_idx = columns.get(celltype_neg, {}).get('order')
-
+        array_bool = np.asarray(array_bool).astype(bool)[:self.table_model.rowCount()]
         # Update classifications and initialize ROI celltype
-        self.data_manager.dict_roi_celltype[app_key] = {}
-        for row, is_positive in enumerate(array_bool):
-            self.data_manager.dict_roi_celltype[app_key][row] = celltype_pos if is_positive else celltype_neg
-            target_col = pos_col_idx if is_positive else neg_col_idx
-            radio_button = self.q_table.cellWidget(row, target_col)
-            if radio_button:
-                radio_button.setChecked(True)
-                self.changeRadiobuttonOfTable(row)
+        self.data_manager.dict_roi_celltype[app_key] = {row: celltype_pos if is_positive else celltype_neg for row, is_positive in enumerate(array_bool.tolist())}
+        rows = np.arange(len(array_bool))
+        self.table_model.setCelltypeOfRows(rows[array_bool], celltype_pos)
+        self.table_model.setCelltypeOfRows(rows[~array_bool], celltype_neg)
+        self.updateROIDisplayWithCelltype(self.getSharedAttr_CelltypeVisibility())
                 
         # Update display
         updateROICountDisplay(self.widget_manager, self.config_manager, self.app_key)
 
     # update Cell ID Match column values based on matching dictionary
     def updateMatchedROIPairs(self, matches: Dict[int, int]) -> None:
-        col_id = self.table_columns.getColumns()['Cell_ID']['order'] # hardcoded !!!
-        col_id_match = self.table_columns.getColumns()['Cell_ID_Match']['order'] # hardcoded !!!
-        
-        for row in range(self.q_table.rowCount()):
-            try:
-                cell_id = int(self.q_table.item(row, col_id).text())
-                if cell_id in matches:
-                    # Create new item with the matching ID
-                    match_item = QTableWidgetItem(str(matches[cell_id]))
-                    self.q_table.setItem(row, col_id_match, match_item)
-                else:
-                    # Clear the match if no matching exists
-                    self.q_table.setItem(row, col_id_match, QTableWidgetItem(""))
-            except (ValueError, AttributeError):
-                continue
+        # Clear the match if no matching exists
+        id_match = np.full(self.table_model.rowCount(), -1, dtype=np.int64)
+        for cell_id, cell_id_match in matches.items():
+            row = self.getRowFromCellId(int(cell_id))
+            if row is not None:
+                id_match[row] = int(cell_id_match)
+        self.table_model.setIdMatch(id_match)
 
     # if "Match Cell ID" is filled, get ROI pair
     def getMatchedROIPairs(self, table_control_sec: TableControl) -> List[Tuple[int, int]]:
-        matched_pairs = []
-
-        col_id = self.table_columns.getColumns()['Cell_ID']['order'] # hardcoded !!!
-        col_id_match = self.table_columns.getColumns()['Cell_ID_Match']['order'] # hardcoded !!!
-        
-        for row in range(self.len_row):
-            try:
-                cell_id = int(self.q_table.item(row, col_id).text())
-                cell_id_match_item = self.q_table.item(row, col_id_match)
-                
-                if not cell_id_match_item or not cell_id_match_item.text().strip():
-                    continue
-                    
-                cell_id_match = int(cell_id_match_item.text())
-                # Skip invalid values, below 0 or above the number of "sec" ROIs
-                if (cell_id_match < 0 or cell_id_match >= table_control_sec.len_row):
-                    continue
-                
-                matched_pairs.append((cell_id, cell_id_match))
-            except (ValueError, AttributeError):
-                continue
-                
-        return matched_pairs
\ No newline at end of file
+        id_match = self.table_model.id_match[:self.len_row]
+        # Skip invalid values, below 0 or above the number of "sec" ROIs
+        rows = np.flatnonzero((id_match >= 0) & (id_match < table_control_sec.len_row))
+        return list(zip(self.table_model.cell_ids[rows].tolist(), id_match[rows].tolist()))
@@ -2,17 +2,24 @@ from __future__ import annotations
 from ..type_definitions import *
 from ..handlers.view_handler import ViewHandler
 from ..visualization.view_visual import updateView_Suite2pROICuration, updateView_TIFStackExplorer, updateView_Suite2pROITracking, updateView_MicrogliaTracking, zoomView, resetZoomView
-from ..visualization.view_visual_roi import findClosestROI, shouldSkipROI
+from ..visualization.view_visual_roi import updateLayerROI_Suite2pROICuration, updateLayerROI_Suite2pROITracking, updateLayerROI_MicrogliaTracking, updateLayerROI_TIFStackExplorer
 from ..visualization.view_visual_rectangle import initializeDragRectangle, updateDragRectangle
 from ..visualization.info_visual import updateZPlaneDisplay, updateTPlaneDisplay
 from ..preprocessing.preprocessing_roi import updateROIImage, updateROIImageForXYCT
 from ..gui.view_setup import setViewSize
 from ..config.constants import BGImageTypeList, Extension
 from ..utils.view_utils import generateRandomColor
-from collections import defaultdict
+from ..utils.roi_store import ROIStore, toROIStore
+from ..visualization.roi_overlay import ROIOverlay
+from ..visualization.plane_prefetch import PlanePrefetcher
+from ..utils.image_pyramid import ImagePyramidCache
+from ..utils.roi_contour import CONTOUR_METHODS, getROIContourCache, computeROIContours
+from ..preprocessing.preprocessing_tiff import calculateTiffStackStats
+from collections import defaultdict, OrderedDict
 from PyQt5.QtCore import Qt
 from PyQt5.QtWidgets import QGraphicsView, QGraphicsScene, QGraphicsRectItem, QGraphicsPathItem, QGraphicsPixmapItem
 import random
+import weakref
 import numpy as np
 
 class ViewControl:
@@ -70,6 +77,30 @@ class ViewControl:
         self.tiff_shape:            Tuple[int, int, int, int, int]  = ()
         self.plane_z:               int                             = 0
         self.plane_t:               int                             = 0
+        # numpy ROI overlays, (reg, t_plane) -> ROIOverlay
+        self.dict_roi_overlay:      Dict[Tuple[bool, Optional[int]], ROIOverlay] = {}
+        # key of the pixmap of layer_roi, the layer is re-rendered only when the key changes
+        self.layer_roi_key:         Optional[Tuple[Any, ...]]       = None
+        # RGB buffer of the background layer, reused between redraws
+        self.bg_image_buffer:       Optional[np.ndarray]            = None
+        # LRU cache of background pixmaps, keys refer to images by id, valid while image_version of DataManager is unchanged
+        self.dict_bg_pixmap:        OrderedDict[Tuple[Any, ...], QPixmap] = OrderedDict()
+        self.bg_pixmap_cache_bytes: int                             = int(config_manager.gui_defaults["VIEW_SETTINGS"]["BG_PIXMAP_CACHE_MB"] * 1024**2)
+        self.bg_pixmap_bytes:       int                             = 0
+        self.layer_bg_key:          Optional[Tuple[Any, ...]]       = None
+        # RGB planes of TIFF stacks rendered ahead of the Z/T slider, disabled for apps without PREFETCH_CACHE_MB
+        self.plane_prefetcher:      PlanePrefetcher                 = PlanePrefetcher(
+            cache_mb=config_manager.gui_defaults["VIEW_SETTINGS"].get("PREFETCH_CACHE_MB", 0),
+            n_plane=config_manager.gui_defaults["VIEW_SETTINGS"].get("PREFETCH_PLANES", 0),
+            )
+        # 2x-downsampled planes of TIFF stacks shown when zoomed out, disabled for apps without PYRAMID_CACHE_MB
+        self.image_pyramid_cache:   ImagePyramidCache               = ImagePyramidCache(
+            cache_mb=config_manager.gui_defaults["VIEW_SETTINGS"].get("PYRAMID_CACHE_MB", 0),
+            )
+        # TIFF stacks whose stats task was started, by id, weak references so that replaced stacks are freed
+        self.dict_stats_started:    Dict[int, weakref.ref]          = {}
+        # image_version of DataManager the render caches were built from
+        self.image_version:         int                             = data_manager.getImageVersion()
         self.rect:                  QGraphicsRectItem               = None
         self.rect_range:            List[int, int, int, int, int, int, int, int] = None
         self.rect_highlight:        QGraphicsRectItem               = None
@@ -99,6 +130,7 @@ class ViewControl:
             self.setTIFFShape()
 
     def updateView(self) -> None:
+        self.checkImageVersion()
         if self.config_manager.current_app == "SUITE2P_ROI_CURATION":
             updateView_Suite2pROICuration(self.q_scene, self.q_view, self, self.data_manager, self.control_manager, self.app_key)
         elif self.config_manager.current_app == "SUITE2P_ROI_TRACKING":
@@ -107,6 +139,20 @@ class ViewControl:
             updateView_MicrogliaTracking(self.q_scene, self.q_view, self, self.data_manager, self.control_manager, self.app_key, self.app_key_sec)  
         elif self.config_manager.current_app == "TIFSTACK_EXPLORER":
             updateView_TIFStackExplorer(self.q_scene, self.q_view, self, self.data_manager, self.control_manager, self.app_key)
+
+    # update only ROI layers, e.g. when the selected ROI changed, the background is kept
+    def updateViewROI(self) -> None:
+        if self.config_manager.current_app == "SUITE2P_ROI_CURATION":
+            updateLayerROI_Suite2pROICuration(self, self.data_manager, self.control_manager, self.app_key)
+        elif self.config_manager.current_app == "SUITE2P_ROI_TRACKING":
+            updateLayerROI_Suite2pROITracking(self, self.data_manager, self.control_manager, self.app_key, self.app_key_sec)
+        elif self.config_manager.current_app == "MICROGLIA_TRACKING":
+            try:
+                updateLayerROI_MicrogliaTracking(self, self.data_manager, self.control_manager, self.app_key, self.app_key_sec)
+            except AttributeError:
+                pass
+        elif self.config_manager.current_app == "TIFSTACK_EXPLORER":
+            updateLayerROI_TIFStackExplorer(self, self.data_manager, self.control_manager, self.app_key)
         
 
     """
@@ -135,15 +181,18 @@ class ViewControl:
     def initializeImageLayers(self) -> None:
         self.layer_bg = QGraphicsPixmapItem()  # for background image
         self.layer_roi = QGraphicsPixmapItem()  # for ROI 
+        self.layer_roi_highlight = QGraphicsPixmapItem()  # for selected ROI, bounding box only
         self.layer_roi_edit = QGraphicsPixmapItem()  # for ROI edit
 
         self.q_scene.addItem(self.layer_bg)
         self.q_scene.addItem(self.layer_roi)
+        self.q_scene.addItem(self.layer_roi_highlight)
         self.q_scene.addItem(self.layer_roi_edit)
-        # bg -> roi -> roi_edit
+        # bg -> roi -> roi_highlight -> roi_edit
         self.layer_bg.setZValue(0)
         self.layer_roi.setZValue(1)
-        self.layer_roi_edit.setZValue(2)
+        self.layer_roi_highlight.setZValue(2)
+        self.layer_roi_edit.setZValue(3)
 
         # set scene to view
         self.q_view.setScene(self.q_scene)
@@ -265,6 +314,111 @@ class ViewControl:
     def setROIDisplayProp(self, prop: str, value: bool) -> None:
         self.roi_display_prop[prop] = value
 
+    # ROI overlay of roi_store, shares the label image with the hit-testing index of the store
+    def getROIOverlay(self, roi_store: ROIStore, reg: bool=False, t_plane: Optional[int]=None) -> ROIOverlay:
+        roi_index = self.data_manager.getROIHitIndex(self.app_key, roi_store, reg, t_plane)
+        key = (reg, t_plane)
+        roi_overlay = self.dict_roi_overlay.get(key)
+        if roi_overlay is None or roi_overlay.roi_index is not roi_index:
+            roi_overlay = ROIOverlay(roi_index)
+            self.dict_roi_overlay[key] = roi_overlay
+            # new store, loaded or registered
+            self.startROIContourFill(roi_store, CONTOUR_METHODS if t_plane is not None else ("dilate",))
+        return roi_overlay
+
+    # contours of roi_store are computed in bulk in background tasks, "edge" contours are only needed for ImageJ export of XYCT ROIs
+    def startROIContourFill(self, roi_store: ROIStore, methods: Tuple[str, ...]=("dilate",)) -> None:
+        from ..manager.task_manager import runTaskWithMessage
+        roi_contour_cache = getROIContourCache(roi_store)
+        for method in methods:
+            version, list_roi = roi_contour_cache.getMissingROIs(method)
+            if not list_roi:
+                continue
+            runTaskWithMessage(
+                self.q_view, f"ROI Contours ({method})",
+                lambda task, list_roi=list_roi, method=method: computeROIContours(list_roi, method),
+                on_result=lambda dict_contour, method=method, version=version: roi_contour_cache.setContours(method, dict_contour, version),
+                cancellable=False,
+                )
+
+    # per-channel stats of a TIFF stack are computed once in a background task, the view is redrawn with them when ready
+    # a cancelled task is not restarted, the view keeps the range of each plane
+    def startTiffStackStats(self, app_key: AppKeys, img_stack: np.ndarray) -> None:
+        from ..manager.task_manager import getTaskManager
+        ref_stack = self.dict_stats_started.get(id(img_stack))
+        if ref_stack is not None and ref_stack() is img_stack:
+            return
+        self.dict_stats_started = {id_stack: ref for id_stack, ref in self.dict_stats_started.items() if ref() is not None}
+        self.dict_stats_started[id(img_stack)] = weakref.ref(img_stack)
+        def _onResult(stats):
+            self.data_manager.setTiffStackStats(app_key, img_stack, stats)
+            self.updateView()
+        getTaskManager(self.q_view).runTask(
+            "Stack Statistics",
+            lambda task: calculateTiffStackStats(img_stack, callback_progress=lambda done, total: task.setProgress(done, total, "planes")),
+            on_result=_onResult,
+            on_error=lambda e: print(f"Stack statistics failed: {e}"),
+            )
+
+    # (height, width, 3) uint8, QPixmap.fromImage copies the data so the buffer can be overwritten on the next redraw
+    def getBackgroundImageBuffer(self, height: int, width: int) -> np.ndarray:
+        if self.bg_image_buffer is None or self.bg_image_buffer.shape != (height, width, 3):
+            self.bg_image_buffer = np.zeros((height, width, 3), dtype=np.uint8)
+        return self.bg_image_buffer
+
+    # set the background pixmap of key, rendered only if not cached
+    # pixmaps of pyramid level are 2**level times smaller than the image and scaled back on the scene
+    def setBackgroundPixmap(self, key: Tuple[Any, ...], func_render: Callable[[], QPixmap], level: int=0) -> None:
+        if key == self.layer_bg_key:
+            return
+        self.layer_bg.setScale(1 << level)
+        if key in self.dict_bg_pixmap:
+            self.dict_bg_pixmap.move_to_end(key)
+            pixmap = self.dict_bg_pixmap[key]
+        else:
+            pixmap = func_render()
+            self.addBackgroundPixmapToCache(key, pixmap)
+        self.layer_bg.setPixmap(pixmap)
+        self.layer_bg_key = key
+
+    def addBackgroundPixmapToCache(self, key: Tuple[Any, ...], pixmap: QPixmap) -> None:
+        nbytes = pixmap.width() * pixmap.height() * pixmap.depth() // 8
+        if nbytes > self.bg_pixmap_cache_bytes:
+            return
+        self.dict_bg_pixmap[key] = pixmap
+        self.bg_pixmap_bytes += nbytes
+        while self.bg_pixmap_bytes > self.bg_pixmap_cache_bytes:
+            _, pixmap_old = self.dict_bg_pixmap.popitem(last=False)
+            self.bg_pixmap_bytes -= pixmap_old.width() * pixmap_old.height() * pixmap_old.depth() // 8
+
+    # e.g. after images were modified in place
+    def clearBackgroundPixmapCache(self) -> None:
+        self.dict_bg_pixmap.clear()
+        self.bg_pixmap_bytes = 0
+        self.layer_bg_key = None
+
+    # drop render caches when images or stacks were loaded or replaced, ids of freed images may be reused
+    def checkImageVersion(self) -> None:
+        image_version = self.data_manager.getImageVersion()
+        if image_version == self.image_version:
+            return
+        self.clearBackgroundPixmapCache()
+        self.image_pyramid_cache.clearCache()
+        self.plane_prefetcher.clearCache()
+        self.image_version = image_version
+
+    # pyramid level of TIFF stacks for the current zoom, the largest level with at least one image pixel per screen pixel
+    def getPyramidLevel(self) -> int:
+        if self.image_pyramid_cache.cache_bytes_max <= 0:
+            return 0
+        scale = self.q_view.transform().m11()
+        if not 0 < scale <= 0.5:
+            return 0
+        level = int(np.floor(np.log2(1 / scale)))
+        # keep at least 64 pixels along the shorter side
+        size_min = min(self.getImageSize())
+        return max(0, min(level, int(np.log2(max(size_min, 1))) - 6))
+
     def setImageSize(self) -> None:
         self.image_sizes = self.data_manager.getImageSize(self.app_key)
 
@@ -309,39 +463,40 @@ class ViewControl:
     def wheelEvent(self, event: QWheelEvent) -> None:
         self.view_handler.handleWheelEvent(event)
 
-    # With click, get the closest ROI id and update view
+    # With click, get the ROI under the cursor or the closest ROI id and update view
     def getROIwithClick(self, x:int, y:int, reg:bool=False, xyct:bool=False, roi_skip:bool=True) -> None:
+        # plain dict coordinates are converted to ROIStore once and put back, so that the hit index can follow later edits
         if xyct: # for Microglia Tracking XYCT
             if reg:
-                dict_roi_coords = self.data_manager.getDictROICoordsXYCTRegistered()
+                dict_roi_coords_xyct = self.data_manager.getDictROICoordsXYCTRegistered()
             else:
-                dict_roi_coords = self.data_manager.getDictROICoordsXYCT()
-            if dict_roi_coords is not None:
-                dict_roi_coords = dict_roi_coords.get(self.getPlaneT())
+                dict_roi_coords_xyct = self.data_manager.getDictROICoordsXYCT()
+            if dict_roi_coords_xyct is None:
+                return # No ROI data
+            t_plane = self.getPlaneT()
+            roi_store = dict_roi_coords_xyct.get(t_plane)
+            if roi_store is not None and not isinstance(roi_store, ROIStore):
+                roi_store = dict_roi_coords_xyct[t_plane] = toROIStore(roi_store)
         else: # for Suite2pROICuration, Suite2pROITracking
-            if reg:
-                dict_roi_coords = self.data_manager.getDictROICoordsRegistered(self.app_key)
-            else:
-                dict_roi_coords = self.data_manager.getDictROICoords(self.app_key)
-        if dict_roi_coords is None:
+            t_plane = None
+            dict_roi_coords_app = self.data_manager.dict_roi_coords_reg if reg else self.data_manager.dict_roi_coords
+            roi_store = dict_roi_coords_app.get(self.app_key)
+            if roi_store is not None and not isinstance(roi_store, ROIStore):
+                roi_store = dict_roi_coords_app[self.app_key] = toROIStore(roi_store)
+        if roi_store is None:
             return # No ROI data
 
-        dict_roi_med = {roi_id: dict_roi_coords[roi_id]["med"] for roi_id in dict_roi_coords.keys()}
-        
+        roi_index = self.data_manager.getROIHitIndex(self.app_key, roi_store, reg, t_plane)
         if roi_skip: # skip celltype, checkbox
             skip_roi_types = self.control_manager.getSharedAttr(self.app_key, "skip_roi_types")
-            dict_roi_skip = {roi_id: shouldSkipROI(roi_id, 
-                                                self.config_manager.getTableColumns(self.app_key),
-                                                self.widget_manager.dict_table[self.app_key],
-                                                skip_roi_types) 
-                            for roi_id in dict_roi_med.keys()}
+            mask_skip = self.control_manager.table_controls[self.app_key].getROISkipMask(skip_roi_types)
         else:
-            dict_roi_skip = None
+            mask_skip = None
             
-        closest_roi_id = findClosestROI(x, y, dict_roi_med, dict_roi_skip)
+        closest_roi_id = roi_index.findROI(x, y, mask_skip)
         if closest_roi_id is not None:
             self.control_manager.setSharedAttr(self.app_key, 'roi_selected_id', closest_roi_id)
-            self.updateView()
+            self.updateViewROI()
 
     def getRectRangeFromQRectF(self, rect: QRectF) -> List[int, int, int, int, int, int, int, int]:
         x_start = int(rect.left())
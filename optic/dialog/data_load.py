@@ -1,12 +1,14 @@
 from __future__ import annotations
 from ..type_definitions import *
-from PyQt5.QtWidgets import QDialog, QVBoxLayout
+from PyQt5.QtWidgets import QDialog, QVBoxLayout, QMessageBox
+import os
 from PyQt5.QtCore import Qt
 from ..manager.init_managers import initManagers
 from ..manager.widget_manager import WidgetManager
 from ..gui.io_layouts import makeLayoutLoadFileWidget, makeLayoutLoadFileExitHelp
 from ..config.constants import Extension
 from ..gui.bind_func import bindFuncLoadFileWidget
+from ..io.metadata_io import peekFileMetadata, formatMetadata, compareMetadata
 
 # Data load
 # This dialog is used to load data, such as Fall.mat, tif files, ROICuration.mat etc.
@@ -53,6 +55,8 @@ class DataLoadDialog(QDialog):
                 key_lineedit=key, 
                 key_button=key
             ))
+            # metadata of the selected file, read from its header
+            layout.addWidget(self.widget_manager.makeWidgetLabel(key=f"info_{key}", label=""))
         # Button
         layout.addLayout(makeLayoutLoadFileExitHelp(self.widget_manager))
 
@@ -62,6 +66,9 @@ class DataLoadDialog(QDialog):
 
     def loadData(self) -> None:
         dict_path_file = self.getFilePaths()
+        # check headers before loading the whole files
+        if not self.validateFiles(dict_path_file):
+            return
         # check if the file load is successful
         print(dict_path_file)
         success = self.parent().loadData(dict_path_file)
@@ -70,6 +77,46 @@ class DataLoadDialog(QDialog):
         if success:
             self.accept()  # Close the dialog
 
+    # peek metadata of the file and show it below the lineedit
+    def updateFileInfo(self, key: str) -> None:
+        path = self.widget_manager.dict_lineedit[key].text()
+        if not os.path.isfile(path):
+            self.widget_manager.dict_label[f"info_{key}"].setText("")
+            return
+        try:
+            self.widget_manager.dict_label[f"info_{key}"].setText(formatMetadata(peekFileMetadata(path)))
+        except Exception as e:
+            self.widget_manager.dict_label[f"info_{key}"].setText(f"cannot read header: {e}")
+
+    # required files are readable, "_pri" / "_sec" pairs have the same image size
+    def validateFiles(self, dict_path_file: Dict[str, str]) -> bool:
+        dict_metadata = {}
+        list_error = []
+        for key, is_optional in zip(self.list_key, self.list_optional):
+            path = dict_path_file.get(key, "")
+            if not path:
+                if not is_optional:
+                    list_error.append(f"{key}: file path is required.")
+                continue
+            if not os.path.isfile(path):
+                list_error.append(f"{key}: file does not exist: {path}")
+                continue
+            try:
+                dict_metadata[key] = peekFileMetadata(path)
+            except ValueError: # no metadata peek for this file type, e.g. ROI Manager zip
+                continue
+            except Exception as e:
+                list_error.append(f"{key}: cannot read file header: {e}")
+        for key, metadata in dict_metadata.items():
+            key_sec = key[:-len("_pri")] + "_sec" if key.endswith("_pri") else None
+            if key_sec in dict_metadata:
+                for mismatch in compareMetadata(metadata, dict_metadata[key_sec]):
+                    list_error.append(f"{key} / {key_sec}: {mismatch}")
+        if list_error:
+            QMessageBox.warning(self, "File Load Error", "\n".join(list_error))
+            return False
+        return True
+
     def getFilePaths(self) -> Dict[str, str]:
         dict_path_file = {}
         for key in self.list_key:
@@ -86,6 +133,7 @@ class DataLoadDialog(QDialog):
                 q_lineedit=self.widget_manager.dict_lineedit[key], 
                 filetype=extension
             )
+            self.widget_manager.dict_lineedit[key].textChanged.connect(lambda text, key=key: self.updateFileInfo(key))
         # try load data
         self.widget_manager.dict_button["load_file"].clicked.connect(self.loadData)
         # exit
@@ -1,15 +1,19 @@
 from __future__ import annotations
 from PyQt5.QtWidgets import QDialog, QVBoxLayout, QHBoxLayout, QWidget, QMessageBox
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, pyqtSignal
 from ..manager import WidgetManager, initManagers
 from ..config.constants import Extension
 from ..gui.io_layouts import makeLayoutLoadFileWidget
 from ..gui.bind_func import bindFuncLoadFileWidget
 from ..utils.layout_utils import clearLayout
+from ..io.parallel_io import MultiSessionLoader
 import os
 
 class MultiSessionFileLoaderDialog(QDialog):
-    def __init__(self, parent: QWidget, gui_defaults: dict, require_roi_curation: bool = False):
+    # (session_idx, status) from the loading task, delivered to the GUI thread
+    session_progress = pyqtSignal(int, str)
+
+    def __init__(self, parent: QWidget, gui_defaults: dict, require_roi_curation: bool = False, load_parallel: bool = False, max_workers: int = None):
         """
         Parameters:
         -----------
@@ -19,6 +23,12 @@ class MultiSessionFileLoaderDialog(QDialog):
             GUI default settings
         require_roi_curation : bool
             If True, ROICuration.mat files are required and must match Fall.mat files count
+        load_parallel : bool
+            If True, files are parsed in worker processes when Load Files is clicked,
+            results are stored in list_dict_Fall and list_roi_curation, the dialog is accepted when all files are loaded.
+            The caller owns self.loader afterwards and closes it when the data is no longer used.
+        max_workers : int
+            Number of worker processes, None for the number of CPUs
         """
         super().__init__(parent)
         self.widget_manager = initManagers(WidgetManager())
@@ -29,6 +39,13 @@ class MultiSessionFileLoaderDialog(QDialog):
         # Lists to store file paths
         self.list_path_fall = []
         self.list_path_roi_curation = []
+
+        # Parallel loading
+        self.load_parallel = load_parallel
+        self.loader = MultiSessionLoader(max_workers=max_workers)
+        self.list_dict_Fall = []
+        self.list_roi_curation = []
+        self.layout_progress_section = None
         
         # Row counters
         self.row_count_fall = 1
@@ -80,6 +97,10 @@ class MultiSessionFileLoaderDialog(QDialog):
         layout_upper.addLayout(self.layout_roi_curation_section)
         
         layout_main.addLayout(layout_upper)
+
+        # Middle section: per-session loading progress
+        self.layout_progress_section = QVBoxLayout()
+        layout_main.addLayout(self.layout_progress_section)
         
         # Bottom section: Load Files / Cancel buttons
         layout_main.addLayout(self.makeLayoutDialogButtons())
@@ -339,11 +360,46 @@ class MultiSessionFileLoaderDialog(QDialog):
             if path:  # Only check if path is provided
                 if not os.path.exists(path):
                     error_messages.append(f"ROICuration.mat file {i} does not exist: {path}")
-                elif not path.endswith(Extension.MAT):
+                elif not path.endswith((Extension.MAT, Extension.H5)): # .h5: append-only ROICuration store
                     error_messages.append(f"ROICuration.mat file {i} has incorrect extension: {path}")
         
+        if not error_messages:
+            error_messages.extend(self.validateFileHeaders(file_paths))
+        
         is_valid = len(error_messages) == 0
         return is_valid, error_messages
+
+    def validateFileHeaders(self, file_paths: dict):
+        """
+        Compare the headers of the files without loading them
+        - All Fall.mat files must have the same image size
+        - ROI count of ROICuration.mat must match its Fall.mat
+
+        Returns:
+        --------
+        error_messages : list[str]
+        """
+        from ..io.metadata_io import peekFileMetadata, peekROICuration, compareMetadata
+        error_messages = []
+        list_metadata_fall = []
+        for i, path in enumerate(file_paths['list_path_fall'], 1):
+            try:
+                list_metadata_fall.append(peekFileMetadata(path))
+            except Exception as e:
+                error_messages.append(f"Fall.mat file {i} cannot be read: {e}")
+                return error_messages
+        for i, metadata in enumerate(list_metadata_fall[1:], 2):
+            for mismatch in compareMetadata(list_metadata_fall[0], metadata):
+                error_messages.append(f"Fall.mat file {i} differs from file 1: {mismatch}")
+        for i, (path, metadata_fall) in enumerate(zip(file_paths['list_path_roi_curation'], list_metadata_fall), 1):
+            try:
+                metadata_roi_curation = peekROICuration(path)
+            except Exception as e:
+                error_messages.append(f"ROICuration.mat file {i} cannot be read: {e}")
+                continue
+            for mismatch in compareMetadata(metadata_fall, metadata_roi_curation, keys=["nROIs"]):
+                error_messages.append(f"ROICuration.mat file {i} does not match Fall.mat file {i}: {mismatch}")
+        return error_messages
     
     def loadFiles(self):
         """
@@ -356,8 +412,62 @@ class MultiSessionFileLoaderDialog(QDialog):
             QMessageBox.warning(self, "Validation Error", f"File validation failed:\n\n{error_text}")
             return
         
+        if self.load_parallel:
+            # accepted when the loading task finishes
+            self.loadSessionsParallel()
+            return
+
         # If validation passed, accept the dialog
         self.accept()
+
+    def loadSessionsParallel(self):
+        """
+        Parse all sessions in worker processes as a background task, showing per-session progress.
+        The dialog is accepted when all files are loaded, a failure is shown as warning.
+        """
+        from ..manager.task_manager import getTaskManager
+        clearLayout(self.layout_progress_section)
+        for i in range(len(self.list_path_fall)):
+            self.layout_progress_section.addWidget(
+                self.widget_manager.makeWidgetLabel(
+                    key=f"progress_session_{i}",
+                    label=f"Session {i}: waiting"
+                )
+            )
+
+        def _onResult(result):
+            self.list_dict_Fall, self.list_roi_curation = result
+            self.accept()
+        def _onError(e):
+            QMessageBox.warning(self, "Load Error", f"Failed to load files:\n\n{e}")
+
+        # the job only emits session_progress, labels are updated on the GUI thread
+        getTaskManager(self).runTask(
+            "Load sessions",
+            lambda task, list_path_fall, list_path_roi_curation: self.loader.loadSessions(
+                list_path_fall, list_path_roi_curation, callback_progress=self.session_progress.emit
+                ),
+            list(self.list_path_fall),
+            list(self.list_path_roi_curation),
+            on_result=_onResult,
+            on_error=_onError,
+            widgets_busy=[self.widget_manager.dict_button["load_files"], self.widget_manager.dict_button["cancel"]],
+            )
+
+    def updateSessionProgress(self, session_idx: int, status: str):
+        """
+        Update progress label of a session
+
+        Parameters:
+        -----------
+        session_idx : int
+            Session index
+        status : str
+            "loading", "done" or "failed"
+        """
+        key = f"progress_session_{session_idx}"
+        if key in self.widget_manager.dict_label:
+            self.widget_manager.dict_label[key].setText(f"Session {session_idx}: {status}")
     
     """
     Bind functions
@@ -377,7 +487,7 @@ class MultiSessionFileLoaderDialog(QDialog):
             q_widget=self,
             q_button=self.widget_manager.dict_button[key],
             q_lineedit=self.widget_manager.dict_lineedit[key],
-            filetype=[Extension.MAT]
+            filetype=[Extension.MAT] if key_prefix == "path_fall" else [Extension.MAT, Extension.H5]
         )
     
     def bindFuncAllWidget(self):
@@ -417,4 +527,9 @@ class MultiSessionFileLoaderDialog(QDialog):
         
         # Bind dialog buttons
         self.widget_manager.dict_button["load_files"].clicked.connect(self.loadFiles)
-        self.widget_manager.dict_button["cancel"].clicked.connect(self.reject)
\ No newline at end of file
+        self.widget_manager.dict_button["cancel"].clicked.connect(self.reject)
+
+        # Loading progress, emitted from the loading task
+        self.session_progress.connect(self.updateSessionProgress)
+        # shared memory of a dialog which was not accepted is released
+        self.rejected.connect(self.loader.close)
\ No newline at end of file
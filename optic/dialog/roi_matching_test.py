@@ -100,12 +100,13 @@ class ROIMatchingTestDialog(QDialog):
 
     # get med coordinates of ROIs
     def getMedCoords(self):
+        from ..utils.roi_store import getROIMedArray
         if self.reg: # registered
-            self.med_coords_pri = np.array([self.data_manager.getDictROICoordsRegistered(self.app_key_pri)[idx]["med"] for idx in self.idx_roi_pri])
-            self.med_coords_sec = np.array([self.data_manager.getDictROICoordsRegistered(self.app_key_sec)[idx]["med"] for idx in self.idx_roi_sec])
+            self.med_coords_pri = getROIMedArray(self.data_manager.getDictROICoordsRegistered(self.app_key_pri), self.idx_roi_pri)
+            self.med_coords_sec = getROIMedArray(self.data_manager.getDictROICoordsRegistered(self.app_key_sec), self.idx_roi_sec)
         else: # not registered
-            self.med_coords_pri = np.array([self.data_manager.getDictROICoords(self.app_key_pri)[idx]["med"] for idx in self.idx_roi_pri])
-            self.med_coords_sec = np.array([self.data_manager.getDictROICoords(self.app_key_sec)[idx]["med"] for idx in self.idx_roi_sec])
+            self.med_coords_pri = getROIMedArray(self.data_manager.getDictROICoords(self.app_key_pri), self.idx_roi_pri)
+            self.med_coords_sec = getROIMedArray(self.data_manager.getDictROICoords(self.app_key_sec), self.idx_roi_sec)
 
     # get ROI shape parameters
     def getROIParams(self):
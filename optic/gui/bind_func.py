@@ -184,9 +184,10 @@ def bindFuncROICheckIO(
     config_manager: 'ConfigManager',
     control_manager: 'ControlManager',
     app_key: str,
-    local_var: bool = True
+    local_var: bool = True,
+    q_button_export: Optional['QPushButton'] = None,
 ) -> None:
-    from ..io.data_io import saveROICheck, loadROICheck
+    from ..io.data_io import saveROICheck, loadROICheck, exportROICheckToMat
     from ..visualization.info_visual import updateROICountDisplay
 
     gui_defaults = config_manager.gui_defaults
@@ -198,6 +199,8 @@ def bindFuncROICheckIO(
         updateROICountDisplay(widget_manager, config_manager, app_key)
     q_button_save.clicked.connect(lambda: saveROICheck(q_window, q_lineedit, q_table, gui_defaults, table_columns, json_config, local_var))
     q_button_load.clicked.connect(lambda: _loadROICheck())
+    if q_button_export is not None:
+        q_button_export.clicked.connect(lambda: exportROICheckToMat(q_window, q_lineedit))
 
 # -> io_layouts.makeLayoutROITrackingIO
 def bindFuncROITrackingIO(
@@ -302,13 +305,14 @@ def bindFuncMicrogliaTrackingIO(
             gui_defaults, 
         )
         # no ROI data, temporary fix
-        if len(dict_roi_matching["id"]) == 0:
+        if dict_roi_matching.getNumPlanes() == 0:
             pass
         else:
             data_manager.dict_roi_matching = dict_roi_matching
             data_manager.dict_roi_coords_xyct = dict_roi_coords_xyct
             data_manager.dict_roi_coords_xyct_reg = dict_roi_coords_xyct_reg
-        data_manager.dict_tiff_reg = dict_tiff_reg
+        for app_key, img_stack_reg in dict_tiff_reg.items():
+            data_manager.setTiffStackRegistered(app_key, img_stack_reg)
         # hardcoded !!!
         # initialize ROI XYCT Colors
         for plane_t in data_manager.dict_roi_coords_xyct.keys():
@@ -384,7 +388,8 @@ def bindFuncROIManagerZipIO(
     control_manager: 'ControlManager',
 ) -> None:
     from ..io.data_io import saveROIManagerZip, loadROIManagerZip
-    from ..preprocessing.preprocessing_imagej import convertDictROIMatchingAndDictROICoordsToImagejRoi, convertImagejRoiToDictROIMatchingAndDictROICoords
+    from ..manager.task_manager import runTaskWithMessage
+    from ..preprocessing.preprocessing_imagej import convertImagejRoiToDictROIMatchingAndDictROICoords
     from ..utils.view_utils import generateRandomColor
 
     def _saveROIManagerZip(is_roi_reg: bool) -> None:
@@ -393,11 +398,11 @@ def bindFuncROIManagerZipIO(
             dict_roi_coords_xyct = data_manager.dict_roi_coords_xyct_reg
         else:
             dict_roi_coords_xyct = data_manager.dict_roi_coords_xyct
-        list_roi = convertDictROIMatchingAndDictROICoordsToImagejRoi(dict_roi_matching, dict_roi_coords_xyct)
         saveROIManagerZip(
             q_window,
             q_lineedit,
-            list_roi,
+            dict_roi_matching,
+            dict_roi_coords_xyct,
             is_roi_reg,
         )
 
@@ -410,37 +415,50 @@ def bindFuncROIManagerZipIO(
             return
 
         rois = data_manager.list_roi_imagej
-        dict_roi_matching = data_manager.getDictROIMatching()
-        dict_roi_coords_xyct = data_manager.getDictROICoordsXYCT()
+        dict_roi_matching = deepcopy(data_manager.getDictROIMatching())
+        dict_roi_coords_xyct = deepcopy(data_manager.getDictROICoordsXYCT())
         # hardcoded !!!
         width, height = data_manager.getImageSize("pri")
 
-        dict_roi_matching, dict_roi_coords_xyct = convertImagejRoiToDictROIMatchingAndDictROICoords(
-            rois, 
-            dict_roi_matching,
-            dict_roi_coords_xyct,
-            width,
-            height
-        )
+        # runs in worker thread, rasterization is spread over worker processes
+        def _convertROIManagerZip(task):
+            task.setProgress(0, 1, f"{len(rois)} ROIs")
+            return convertImagejRoiToDictROIMatchingAndDictROICoords(
+                rois, 
+                dict_roi_matching,
+                dict_roi_coords_xyct,
+                width,
+                height
+            )
 
-        data_manager.dict_roi_coords_xyct = dict_roi_coords_xyct
-        data_manager.dict_roi_coords_xyct_reg = deepcopy(data_manager.dict_roi_coords_xyct)
-        data_manager.dict_roi_matching = dict_roi_matching
+        # runs in GUI thread
+        def _applyROIManagerZip(result):
+            dict_roi_matching, dict_roi_coords_xyct = result
+            data_manager.dict_roi_coords_xyct = dict_roi_coords_xyct
+            data_manager.dict_roi_coords_xyct_reg = deepcopy(data_manager.dict_roi_coords_xyct)
+            data_manager.dict_roi_matching = dict_roi_matching
 
-        # initialize ROI XYCT Colors
-        for plane_t in data_manager.dict_roi_coords_xyct.keys():
-            for roi_id in data_manager.dict_roi_coords_xyct[plane_t].keys():
-                control_manager.view_controls["pri"].roi_colors_xyct[plane_t][roi_id] = generateRandomColor()
-                control_manager.view_controls["sec"].roi_colors_xyct[plane_t][roi_id] = control_manager.view_controls["pri"].roi_colors_xyct[plane_t][roi_id]
+            # initialize ROI XYCT Colors
+            for plane_t in data_manager.dict_roi_coords_xyct.keys():
+                for roi_id in data_manager.dict_roi_coords_xyct[plane_t].keys():
+                    control_manager.view_controls["pri"].roi_colors_xyct[plane_t][roi_id] = generateRandomColor()
+                    control_manager.view_controls["sec"].roi_colors_xyct[plane_t][roi_id] = control_manager.view_controls["pri"].roi_colors_xyct[plane_t][roi_id]
 
-        control_manager.view_controls["pri"].updateView()
-        control_manager.view_controls["sec"].updateView()
+            control_manager.view_controls["pri"].updateView()
+            control_manager.view_controls["sec"].updateView()
 
-        t_plane_pri = control_manager.view_controls["pri"].getPlaneT()
-        t_plane_sec = control_manager.view_controls["sec"].getPlaneT()
-        
-        control_manager.table_controls["pri"].updateWidgetDynamicTableWithT(data_manager.dict_roi_matching, t_plane_pri, t_plane_sec, True)
-        control_manager.table_controls["sec"].updateWidgetDynamicTableWithT(data_manager.dict_roi_matching, t_plane_pri, t_plane_sec, False)
+            t_plane_pri = control_manager.view_controls["pri"].getPlaneT()
+            t_plane_sec = control_manager.view_controls["sec"].getPlaneT()
+            
+            control_manager.table_controls["pri"].updateWidgetDynamicTableWithT(data_manager.dict_roi_matching, t_plane_pri, t_plane_sec, True)
+            control_manager.table_controls["sec"].updateWidgetDynamicTableWithT(data_manager.dict_roi_matching, t_plane_pri, t_plane_sec, False)
+
+        runTaskWithMessage(
+            q_window, "ROI Manager zip load", _convertROIManagerZip,
+            on_result=_applyROIManagerZip,
+            lock_keys=["dict_roi_matching"],
+            widgets_busy=[q_button_load],
+            )
 
     q_button_save.clicked.connect(lambda: _saveROIManagerZip(is_roi_reg=False))
     q_button_save_reg.clicked.connect(lambda: _saveROIManagerZip(is_roi_reg=True))
@@ -667,6 +685,7 @@ def bindFuncButtonRunElastixForFall(
         path_points_txt: str="points_tmp.txt",
         output_directory: str="./elastix"
 ) -> None:
+    from ..manager.task_manager import runTaskWithMessage
     from ..processing.elastix import (
         convertDictToElastixFormat, makeElastixParameterObject, calculateSingleTransform, applySingleTransform,
         applyDictROICoordsTransform
@@ -679,7 +698,8 @@ def bindFuncButtonRunElastixForFall(
         print(f"{elastix_method} transform")
         dict_params = config_manager.json_config.get("elastix_params")[elastix_method]
         data_manager.dict_parameter_map[app_key] = convertDictToElastixFormat(dict_params)
-        parameter_object = makeElastixParameterObject(data_manager.getParameterMap(app_key))
+        parameter_map = data_manager.getParameterMap(app_key)
+        parameter_object = makeElastixParameterObject(parameter_map)
         
         print("Elastix Parameters", dict_params)
 
@@ -688,41 +708,61 @@ def bindFuncButtonRunElastixForFall(
         img_fix = data_manager.getDictBackgroundImage(app_key).get(img_type_pri)
         img_type_sec = control_manager.view_controls[app_key_sec].getBackgroundImageType()
         img_mov = data_manager.getDictBackgroundImage(app_key_sec).get(img_type_sec)
-        # run elastix
-        transform_parameters = calculateSingleTransform(img_fix, img_mov, parameter_object, output_directory)
-        data_manager.dict_transform_parameters[app_key] = transform_parameters
-        # apply transform parameters to image
-        # background image
-        dict_im_bg_reg_mov = {}
-        for key_im in data_manager.getDictBackgroundImage(app_key_sec).keys():
-            dict_im_bg_reg_mov[key_im] = applySingleTransform(data_manager.getDictBackgroundImage(app_key_sec).get(key_im), transform_parameters, output_directory)
-        data_manager.dict_im_bg_reg[app_key_sec] = dict_im_bg_reg_mov
-        # ROI image
+        dict_im_bg_mov = dict(data_manager.getDictBackgroundImage(app_key_sec))
         img_roi_mov = deepcopy(data_manager.getDictROIImage(app_key_sec).get("all"))
-        val_max = np.max(img_roi_mov)
-        img_roi_mov_reg = applySingleTransform(img_roi_mov, transform_parameters, output_directory)
-        img_roi_mov_reg_clipped = np.minimum(img_roi_mov_reg, val_max) # avoid making contours of ROIs
-        data_manager.dict_im_roi_reg[app_key_sec]["all"] = img_roi_mov_reg_clipped
-        
-        # ROI coordinates
-        path_transform_parameters_file = os.path.join(output_directory,"TransformParameters.0.txt") # hardcoded !!!
         dict_roi_coords = data_manager.getDictROICoords(app_key_sec)
-        dict_roi_coords_reg = applyDictROICoordsTransform(
-            img_fix, img_mov, 
-            dict_roi_coords, 
-            data_manager.getParameterMap(app_key),
-            path_transform_parameters_file, 
-            path_points_txt, 
-            output_directory
-            )
-        data_manager.dict_roi_coords_reg[app_key_sec] = dict_roi_coords_reg
 
-        control_manager.view_controls[app_key].updateView()
-        control_manager.view_controls[app_key_sec].updateView()
+        # runs in worker thread
+        def _calculateRegistration(task):
+            # run elastix
+            transform_parameters = calculateSingleTransform(img_fix, img_mov, parameter_object, output_directory)
+            task.setProgress(1, 4, "transform calculated")
+            # apply transform parameters to image
+            # background image
+            dict_im_bg_reg_mov = {}
+            for key_im, im_bg in dict_im_bg_mov.items():
+                dict_im_bg_reg_mov[key_im] = applySingleTransform(im_bg, transform_parameters, output_directory)
+            task.setProgress(2, 4, "background images")
+            # ROI image
+            val_max = np.max(img_roi_mov)
+            img_roi_mov_reg = applySingleTransform(img_roi_mov, transform_parameters, output_directory)
+            img_roi_mov_reg_clipped = np.minimum(img_roi_mov_reg, val_max) # avoid making contours of ROIs
+            task.setProgress(3, 4, "ROI image")
+            
+            # ROI coordinates
+            path_transform_parameters_file = os.path.join(output_directory,"TransformParameters.0.txt") # hardcoded !!!
+            dict_roi_coords_reg = applyDictROICoordsTransform(
+                img_fix, img_mov, 
+                dict_roi_coords, 
+                parameter_map,
+                path_transform_parameters_file, 
+                path_points_txt, 
+                output_directory
+                )
+            task.setProgress(4, 4, "ROI coordinates")
+            shutil.rmtree(output_directory)
+            os.remove(path_points_txt)
+            return transform_parameters, dict_im_bg_reg_mov, img_roi_mov_reg_clipped, dict_roi_coords_reg
+
+        # runs in GUI thread
+        def _applyRegistration(result):
+            transform_parameters, dict_im_bg_reg_mov, img_roi_mov_reg_clipped, dict_roi_coords_reg = result
+            data_manager.dict_transform_parameters[app_key] = transform_parameters
+            data_manager.dict_im_bg_reg[app_key_sec] = dict_im_bg_reg_mov
+            data_manager.dict_im_roi_reg[app_key_sec]["all"] = img_roi_mov_reg_clipped
+            data_manager.dict_roi_coords_reg[app_key_sec] = dict_roi_coords_reg
+            data_manager.updateImageVersion()
 
-        shutil.rmtree(output_directory)
-        os.remove(path_points_txt)
-        QMessageBox.information(q_widget, "Image Registration Finish", "Image Registration Finished!")
+            control_manager.view_controls[app_key].updateView()
+            control_manager.view_controls[app_key_sec].updateView()
+
+        runTaskWithMessage(
+            q_widget, "Image Registration", _calculateRegistration,
+            on_result=_applyRegistration,
+            msg_success=("Image Registration Finish", "Image Registration Finished!"),
+            lock_keys=[os.path.abspath(output_directory), f"registration_{app_key_sec}"],
+            widgets_busy=[q_button],
+            )
     q_button.clicked.connect(lambda: _runElastix())
 
 # -> processing_image_layouts.makeLayoutStackRegistration
@@ -738,6 +778,8 @@ def bindFuncButtonRunElastixForSingleStack(
         axis: Literal["t", "z"],
         output_directory: str="./elastix"
 ) -> None:
+    from ..manager.task_manager import runTaskWithMessage
+    from ..preprocessing.preprocessing_tiff import calculateTiffStackStats
     from ..processing.elastix import (
         convertDictToElastixFormat, makeElastixParameterObject, runStackRegistration
     )
@@ -758,13 +800,27 @@ def bindFuncButtonRunElastixForSingleStack(
         parameter_object = makeElastixParameterObject(data_manager.getParameterMap(app_key))
         print("Elastix Parameters", dict_params)
 
-        # stack registration
-        dict_transform_parameters, img_stack_reg = runStackRegistration(img_stack, parameter_object, channel_ref, idx_ref, axis, output_directory)
-        data_manager.dict_transform_parameters[app_key] = dict_transform_parameters
-        data_manager.dict_tiff_reg[app_key] = img_stack_reg
-        shutil.rmtree(output_directory)
+        # stack registration, runs in worker thread
+        def _runStackRegistration(task):
+            dict_transform_parameters, img_stack_reg = runStackRegistration(
+                img_stack, parameter_object, channel_ref, idx_ref, axis, output_directory,
+                callback_progress=lambda step, done, total: task.setProgress(done, total, step)
+                )
+            shutil.rmtree(output_directory)
+            return dict_transform_parameters, img_stack_reg, calculateTiffStackStats(img_stack_reg)
 
-        QMessageBox.information(q_widget, "Image Registration Finish", "Image Registration Finished!")
+        def _applyStackRegistration(result):
+            dict_transform_parameters, img_stack_reg, stats_reg = result
+            data_manager.dict_transform_parameters[app_key] = dict_transform_parameters
+            data_manager.setTiffStackRegistered(app_key, img_stack_reg, stats_reg)
+
+        runTaskWithMessage(
+            q_widget, "Stack Registration", _runStackRegistration,
+            on_result=_applyStackRegistration,
+            msg_success=("Image Registration Finish", "Image Registration Finished!"),
+            lock_keys=[os.path.abspath(output_directory), f"registration_{app_key}"],
+            widgets_busy=[q_button],
+            )
     q_button.clicked.connect(lambda: _runElastix())
 
 # -> processing_image_layouts.makeLayoutStackRegistration
@@ -812,6 +868,8 @@ def bindFuncButtonApplyElastixTransform_XYCTtoXYCZT(
     app_key: AppKeys,
     output_directory: str="./elastix"
 ) -> None:
+    from ..manager.task_manager import runTaskWithMessage
+    from ..preprocessing.preprocessing_tiff import calculateTiffStackStats
     from ..processing.elastix import loadElastixTransformParameters, duplicateTransformParameters, applyStackTransform
     
     def _applyElastixTransform_XYCTtoXYCZT():
@@ -821,12 +879,27 @@ def bindFuncButtonApplyElastixTransform_XYCTtoXYCZT(
         transform_parameters_XYCT = loadElastixTransformParameters(q_widget)
         num_z = data_manager.getSizeOfZ(app_key)
         transform_parameters_XYCZT = duplicateTransformParameters(transform_parameters_XYCT, axis="z", num_z=num_z)
-        img_stack_reg = applyStackTransform(img_stack, transform_parameters_XYCZT, output_directory)
-        data_manager.dict_transform_parameters[app_key] = transform_parameters_XYCZT
-        data_manager.dict_tiff_reg[app_key] = img_stack_reg
-        shutil.rmtree(output_directory)
 
-        QMessageBox.information(q_widget, "Image Registration Finish", "Image Registration Finished!")
+        def _applyStackTransform(task):
+            img_stack_reg = applyStackTransform(
+                img_stack, transform_parameters_XYCZT, output_directory,
+                callback_progress=lambda done, total: task.setProgress(done, total, "apply")
+                )
+            shutil.rmtree(output_directory)
+            return img_stack_reg, calculateTiffStackStats(img_stack_reg)
+
+        def _setStackRegistered(result):
+            img_stack_reg, stats_reg = result
+            data_manager.dict_transform_parameters[app_key] = transform_parameters_XYCZT
+            data_manager.setTiffStackRegistered(app_key, img_stack_reg, stats_reg)
+
+        runTaskWithMessage(
+            q_widget, "Apply Transform", _applyStackTransform,
+            on_result=_setStackRegistered,
+            msg_success=("Image Registration Finish", "Image Registration Finished!"),
+            lock_keys=[os.path.abspath(output_directory), f"registration_{app_key}"],
+            widgets_busy=[q_button],
+            )
     q_button.clicked.connect(_applyElastixTransform_XYCTtoXYCZT)
 
 # -> processing_image_layouts.makeLayoutMicrogliaXYCTStackRegistration
@@ -842,6 +915,8 @@ def bindFuncButtonRunElastixForMicrogliaXYCTStackRegistration(
         path_points_txt: str="./elastix/points_tmp.txt",
         output_directory: str="./elastix"
 ) -> None:
+    from ..manager.task_manager import runTaskWithMessage
+    from ..preprocessing.preprocessing_tiff import calculateTiffStackStats
     from ..processing.elastix import convertDictToElastixFormat, makeElastixParameterObject, runStackRegistration, applyDictROICoordsTransform
 
     def _runElastix():
@@ -863,44 +938,64 @@ def bindFuncButtonRunElastixForMicrogliaXYCTStackRegistration(
         parameter_object = makeElastixParameterObject(data_manager.getParameterMap(app_key_pri))
         print("Elastix Parameters", dict_params)
 
-        dict_transform_parameters, img_stack_reg = runStackRegistration(img_stack, parameter_object, channel_ref, idx_ref, axis, output_directory)
+        parameter_map = data_manager.getParameterMap(app_key_pri)
+        dict_roi_coords_xyct = dict(data_manager.dict_roi_coords_xyct)
 
-        for app_key in app_keys:
-            data_manager.dict_transform_parameters[app_key] = dict_transform_parameters
-            # background image
-            data_manager.dict_tiff_reg[app_key] = img_stack_reg
-
-            # # ROI image
-            # img_roi_mov = deepcopy(data_manager.getDictROIImage(app_key_sec).get("all"))
-            # val_max = np.max(img_roi_mov)
-            # img_roi_mov_reg = applySingleTransform(img_roi_mov, transform_parameters, output_directory)
-            # img_roi_mov_reg_clipped = np.minimum(img_roi_mov_reg, val_max) # avoid making contours of ROIs
-            # data_manager.dict_im_roi_reg[app_key_sec]["all"] = img_roi_mov_reg_clipped
-            
-        # ROI coordinates
-        # save transform parameters for applying ROI transform
-        for zt_plane in dict_transform_parameters.keys(): # zt_plane: z0_t0, z0_t1, z0_t2, ...
-            t_plane_pri = int(zt_plane.split("t")[1])
-            param = dict_transform_parameters[zt_plane]
-            path_dst = f"{output_directory}/TransformParameters_{zt_plane}.txt"
-            param.WriteParameterFile(param, path_dst)
-
-            img_fix = data_manager.getImageFromXYCZTTiffStack(app_keys[0], z_ref, t_plane_pri, c_ref)
-            img_mov = img_fix.copy() # tmp
-            dict_roi_coords_xyct_reg_singlet = applyDictROICoordsTransform(
-                img_fix, img_mov, 
-                data_manager.dict_roi_coords_xyct[t_plane_pri], 
-                data_manager.getParameterMap(app_key_pri),
-                path_dst, 
-                path_points_txt, 
-                output_directory,
-                xy_reverse=True # xy reversed
+        # runs in worker thread
+        def _runStackRegistration(task):
+            dict_transform_parameters, img_stack_reg = runStackRegistration(
+                img_stack, parameter_object, channel_ref, idx_ref, axis, output_directory,
+                callback_progress=lambda step, done, total: task.setProgress(done, total, step)
                 )
 
-            data_manager.dict_roi_coords_xyct_reg[t_plane_pri] = dict_roi_coords_xyct_reg_singlet
-        # shutil.rmtree(output_directory)
-
-        QMessageBox.information(q_widget, "Image Registration Finish", "Image Registration Finished!")
+            # ROI coordinates
+            # save transform parameters for applying ROI transform
+            dict_roi_coords_xyct_reg = {}
+            for i, zt_plane in enumerate(dict_transform_parameters.keys()): # zt_plane: z0_t0, z0_t1, z0_t2, ...
+                t_plane_pri = int(zt_plane.split("t")[1])
+                param = dict_transform_parameters[zt_plane]
+                path_dst = f"{output_directory}/TransformParameters_{zt_plane}.txt"
+                param.WriteParameterFile(param, path_dst)
+
+                img_fix = np.asarray(img_stack[:, :, c_ref, z_ref, t_plane_pri])
+                img_mov = img_fix.copy() # tmp
+                dict_roi_coords_xyct_reg[t_plane_pri] = applyDictROICoordsTransform(
+                    img_fix, img_mov, 
+                    dict_roi_coords_xyct[t_plane_pri], 
+                    parameter_map,
+                    path_dst, 
+                    path_points_txt, 
+                    output_directory,
+                    xy_reverse=True # xy reversed
+                    )
+                task.setProgress(i + 1, len(dict_transform_parameters), "ROI coordinates")
+            # shutil.rmtree(output_directory)
+            return dict_transform_parameters, img_stack_reg, dict_roi_coords_xyct_reg, calculateTiffStackStats(img_stack_reg)
+
+        # runs in GUI thread
+        def _applyStackRegistration(result):
+            dict_transform_parameters, img_stack_reg, dict_roi_coords_xyct_reg, stats_reg = result
+            for app_key in app_keys:
+                data_manager.dict_transform_parameters[app_key] = dict_transform_parameters
+                # background image
+                data_manager.setTiffStackRegistered(app_key, img_stack_reg, stats_reg)
+
+                # # ROI image
+                # img_roi_mov = deepcopy(data_manager.getDictROIImage(app_key_sec).get("all"))
+                # val_max = np.max(img_roi_mov)
+                # img_roi_mov_reg = applySingleTransform(img_roi_mov, transform_parameters, output_directory)
+                # img_roi_mov_reg_clipped = np.minimum(img_roi_mov_reg, val_max) # avoid making contours of ROIs
+                # data_manager.dict_im_roi_reg[app_key_sec]["all"] = img_roi_mov_reg_clipped
+            for t_plane_pri, dict_roi_coords_xyct_reg_singlet in dict_roi_coords_xyct_reg.items():
+                data_manager.dict_roi_coords_xyct_reg[t_plane_pri] = dict_roi_coords_xyct_reg_singlet
+
+        runTaskWithMessage(
+            q_widget, "Stack Registration", _runStackRegistration,
+            on_result=_applyStackRegistration,
+            msg_success=("Image Registration Finish", "Image Registration Finished!"),
+            lock_keys=[os.path.abspath(output_directory)] + [f"registration_{app_key}" for app_key in app_keys],
+            widgets_busy=[q_button],
+            )
     q_button.clicked.connect(lambda: _runElastix())
 
 """
@@ -917,6 +1012,8 @@ def bindFuncButtonRunROIMatching(
 ):
     from ..processing.optimal_transport import calculateROIMatching
     from ..utils.dialog_utils import showConfirmationDialog
+    from ..utils.roi_store import getROIMedArray
+    from ..manager.task_manager import runTaskWithMessage
 
     def _runROIMatching():
         view_control_pri = control_manager.view_controls[app_key_pri]
@@ -930,22 +1027,20 @@ def bindFuncButtonRunROIMatching(
         )
         # use registered coordinates if show_reg_im_roi is True
         if view_control_pri.show_reg_im_roi:
-            array_src = np.array([data_manager.getDictROICoordsRegistered(app_key_pri)[idx]["med"] for idx in range(data_manager.getNROIs(app_key_pri))])
-            array_tgt = np.array([data_manager.getDictROICoordsRegistered(app_key_sec)[idx]["med"] for idx in range(data_manager.getNROIs(app_key_sec))])
+            array_src = getROIMedArray(data_manager.getDictROICoordsRegistered(app_key_pri), range(data_manager.getNROIs(app_key_pri)))
+            array_tgt = getROIMedArray(data_manager.getDictROICoordsRegistered(app_key_sec), range(data_manager.getNROIs(app_key_sec)))
         else:
-            array_src = np.array([data_manager.getDictROICoords(app_key_pri)[idx]["med"] for idx in range(data_manager.getNROIs(app_key_pri))])
-            array_tgt = np.array([data_manager.getDictROICoords(app_key_sec)[idx]["med"] for idx in range(data_manager.getNROIs(app_key_sec))])
+            array_src = getROIMedArray(data_manager.getDictROICoords(app_key_pri), range(data_manager.getNROIs(app_key_pri)))
+            array_tgt = getROIMedArray(data_manager.getDictROICoords(app_key_sec), range(data_manager.getNROIs(app_key_sec)))
         
         if result == QMessageBox.Yes:
-            dict_roi_display_pri = control_manager.getSharedAttr(app_key_pri, "dict_roi_display")
-            dict_roi_display_sec = control_manager.getSharedAttr(app_key_sec, "dict_roi_display")
-            roi_display_pri = [all(dict_val.values()) for dict_val in dict_roi_display_pri.values()]
-            roi_display_sec = [all(dict_val.values()) for dict_val in dict_roi_display_sec.values()]
+            roi_display_pri = control_manager.table_controls[app_key_pri].getROIDisplayMask()
+            roi_display_sec = control_manager.table_controls[app_key_sec].getROIDisplayMask()
             array_src = array_src[roi_display_pri]
             array_tgt = array_tgt[roi_display_sec]
         elif result == QMessageBox.No: # all ROI
-            roi_display_pri = [True for roi_id in control_manager.getSharedAttr(app_key_pri, "dict_roi_display").keys()]
-            roi_display_sec = [True for roi_id in control_manager.getSharedAttr(app_key_sec, "dict_roi_display").keys()]
+            roi_display_pri = np.ones(control_manager.table_controls[app_key_pri].getRowCount(), dtype=bool)
+            roi_display_sec = np.ones(control_manager.table_controls[app_key_sec].getRowCount(), dtype=bool)
         elif result == QMessageBox.Cancel:
             return 
 
@@ -957,26 +1052,37 @@ def bindFuncButtonRunROIMatching(
         threshold = float(widget_manager.dict_lineedit["ot_threshold_transport"].text())
         max_cost = float(widget_manager.dict_lineedit["ot_threshold_cost"].text())
 
-        roi_matching = calculateROIMatching(
-                    array_src=array_src,
-                    array_tgt=array_tgt,
-                    method=method,
-                    metric=metric,
-                    p=p,
-                    mass=mass,
-                    reg=reg,
-                    threshold=threshold,
-                    max_cost=max_cost,
-                )
-
-        # convert roi_matching id to original id
-        true_idxs_pri = np.nonzero(roi_display_pri)[0][list(roi_matching.keys())]
-        true_idxs_sec = np.nonzero(roi_display_sec)[0][list(roi_matching.values())]
-        roi_matching = dict(zip(true_idxs_pri, true_idxs_sec))
-
-        control_manager.table_controls[app_key_pri].updateMatchedROIPairs(roi_matching)
-        control_manager.view_controls[app_key_pri].updateView()
-        QMessageBox.information(q_widget, "ROI Matching Finish", "ROI Matching Finished!")
+        # runs in worker thread
+        def _calculateROIMatching(task):
+            roi_matching = calculateROIMatching(
+                        array_src=array_src,
+                        array_tgt=array_tgt,
+                        method=method,
+                        metric=metric,
+                        p=p,
+                        mass=mass,
+                        reg=reg,
+                        threshold=threshold,
+                        max_cost=max_cost,
+                    )
+
+            # convert roi_matching id to original id
+            true_idxs_pri = np.nonzero(roi_display_pri)[0][list(roi_matching.keys())]
+            true_idxs_sec = np.nonzero(roi_display_sec)[0][list(roi_matching.values())]
+            return dict(zip(true_idxs_pri, true_idxs_sec))
+
+        def _applyROIMatching(roi_matching):
+            control_manager.table_controls[app_key_pri].updateMatchedROIPairs(roi_matching)
+            control_manager.view_controls[app_key_pri].updateView()
+
+        runTaskWithMessage(
+            q_widget, "ROI Matching", _calculateROIMatching,
+            on_result=_applyROIMatching,
+            msg_success=("ROI Matching Finish", "ROI Matching Finished!"),
+            lock_keys=[f"roi_matching_{app_key_pri}"],
+            widgets_busy=[q_button],
+            cancellable=False, # single OT solve
+            )
     q_button.clicked.connect(_runROIMatching)
 
 # Microglia XYCT ROI Matching
@@ -992,8 +1098,11 @@ def bindFuncButtonRunROIMatchingForXYCT(
 ):
     from ..processing.optimal_transport import calculateROIMatching
     from ..utils.dialog_utils import showConfirmationDialog
+    from ..utils.roi_tracks import MSG_NON_ADJACENT_PAIR
+    from ..manager.task_manager import runTaskWithMessage
 
-    def _ROIMatching(widget_manager: WidgetManager, data_manager: DataManager, view_control_pri: ViewControl, t_plane_pri: int, t_plane_sec: int):
+    # inputs of one t plane pair, read in GUI thread
+    def _getROIMatchingInputs(widget_manager: WidgetManager, data_manager: DataManager, view_control_pri: ViewControl, t_plane_pri: int, t_plane_sec: int) -> Dict[str, Any]:
         # use registered coordinates if show_reg_im_roi is True
         if view_control_pri.show_reg_im_roi:
             array_src = np.array([data_manager.getDictROICoordsXYCTRegistered()[t_plane_pri][roi_id]["med"] for roi_id in data_manager.getDictROICoordsXYCTRegistered()[t_plane_pri].keys()])
@@ -1002,68 +1111,85 @@ def bindFuncButtonRunROIMatchingForXYCT(
             array_src = np.array([data_manager.getDictROICoordsXYCT()[t_plane_pri][roi_id]["med"] for roi_id in data_manager.getDictROICoordsXYCT()[t_plane_pri].keys()])
             array_tgt = np.array([data_manager.getDictROICoordsXYCT()[t_plane_sec][roi_id]["med"] for roi_id in data_manager.getDictROICoordsXYCT()[t_plane_sec].keys()])
         
-        method = widget_manager.dict_combobox["ot_method"].currentText()
-        metric = "minkowski"
-        p = float(widget_manager.dict_lineedit["ot_dist_exp"].text())
-        mass = float(widget_manager.dict_lineedit["ot_partial_mass"].text())
-        reg = float(widget_manager.dict_lineedit["ot_partial_reg"].text())
-        threshold = float(widget_manager.dict_lineedit["ot_threshold_transport"].text())
-        max_cost = float(widget_manager.dict_lineedit["ot_threshold_cost"].text())
+        return dict(
+            array_src=array_src,
+            array_tgt=array_tgt,
+            method=widget_manager.dict_combobox["ot_method"].currentText(),
+            metric="minkowski",
+            p=float(widget_manager.dict_lineedit["ot_dist_exp"].text()),
+            mass=float(widget_manager.dict_lineedit["ot_partial_mass"].text()),
+            reg=float(widget_manager.dict_lineedit["ot_partial_reg"].text()),
+            threshold=float(widget_manager.dict_lineedit["ot_threshold_transport"].text()),
+            max_cost=float(widget_manager.dict_lineedit["ot_threshold_cost"].text()),
+        )
 
-        roi_matching: Dict[int, int] = calculateROIMatching(
-                    array_src=array_src,
-                    array_tgt=array_tgt,
-                    method=method,
-                    metric=metric,
-                    p=p,
-                    mass=mass,
-                    reg=reg,
-                    threshold=threshold,
-                    max_cost=max_cost,
-                )
-        
-        # clear ROI Matching
-        dict_roi_matching_ = data_manager.dict_roi_matching["match"][t_plane_pri][t_plane_sec]
-        data_manager.dict_roi_matching["match"][t_plane_pri][t_plane_sec] = {roi_id: None for roi_id in dict_roi_matching_.keys()}
-        # convert roi_matching id to original id
-        for row_pri, row_sec in roi_matching.items():
-            roi_id_pri = data_manager.dict_roi_matching["id"][t_plane_pri][row_pri]
-            roi_id_sec = data_manager.dict_roi_matching["id"][t_plane_sec][row_sec]
-            data_manager.dict_roi_matching["match"][t_plane_pri][t_plane_sec][roi_id_pri] = roi_id_sec
+    # write result of one t plane pair, in GUI thread
+    def _setROIMatching(data_manager: DataManager, t_plane_pri: int, t_plane_sec: int, roi_matching: Dict[int, int]):
+        # convert roi_matching id to original id, previous matches of the pair are replaced
+        roi_ids_pri = data_manager.dict_roi_matching.getROIIdList(t_plane_pri)
+        roi_ids_sec = data_manager.dict_roi_matching.getROIIdList(t_plane_sec)
+        data_manager.dict_roi_matching.setMatches(
+            t_plane_pri, t_plane_sec, {roi_ids_pri[row_pri]: roi_ids_sec[row_sec] for row_pri, row_sec in roi_matching.items()}
+            )
 
-    def _runROIMatchingAllTPlanes():
+    # runs in worker thread, {(t_plane_pri, t_plane_sec): roi_matching}
+    def _calculateROIMatchings(task, dict_inputs: Dict[Tuple[int, int], Dict[str, Any]]) -> Dict[Tuple[int, int], Dict[int, int]]:
+        dict_roi_matching_result = {}
+        for i, (key_t, inputs) in enumerate(dict_inputs.items()):
+            dict_roi_matching_result[key_t] = calculateROIMatching(**inputs)
+            task.setProgress(i + 1, len(dict_inputs), f"t{key_t[0]} - t{key_t[1]}")
+        return dict_roi_matching_result
+
+    def _runROIMatchingTask(dict_inputs: Dict[Tuple[int, int], Dict[str, Any]]):
         view_control_pri = control_manager.view_controls[app_key_pri]
         view_control_sec = control_manager.view_controls[app_key_sec]
         table_control_pri = control_manager.table_controls[app_key_pri]
         table_control_sec = control_manager.table_controls[app_key_sec]
 
+        def _applyROIMatchings(dict_roi_matching_result):
+            for (t_plane_pri, t_plane_sec), roi_matching in dict_roi_matching_result.items():
+                _setROIMatching(data_manager, t_plane_pri, t_plane_sec, roi_matching)
+            # update Table, View
+            t_plane_pri = view_control_pri.getPlaneT()
+            t_plane_sec = view_control_sec.getPlaneT()
+            table_control_pri.updateWidgetDynamicTableWithT(data_manager.dict_roi_matching, t_plane_pri, t_plane_sec, True)
+            table_control_sec.updateWidgetDynamicTableWithT(data_manager.dict_roi_matching, t_plane_pri, t_plane_sec, False)
+            view_control_pri.updateView()
+
+        runTaskWithMessage(
+            q_widget, "ROI Matching", _calculateROIMatchings, dict_inputs,
+            on_result=_applyROIMatchings,
+            msg_success=("ROI Matching Finish", "ROI Matching Finished!"),
+            lock_keys=["dict_roi_matching"],
+            widgets_busy=[q_button_run, q_button_run_all_tplanes],
+            )
+
+    def _runROIMatchingAllTPlanes():
+        view_control_pri = control_manager.view_controls[app_key_pri]
+
         result = showConfirmationDialog(
             q_widget,
             'Confirmation',
-            f"Match ROIs for all t planes?"
+            f"Match ROIs of consecutive t planes for all t planes?\nMatches across gaps (e.g. t0 - t2) are derived from the resulting tracks."
         )
         if result != QMessageBox.Yes:
             return 
 
-        for t_plane_pri in data_manager.dict_roi_matching["match"].keys():
-            for t_plane_sec in data_manager.dict_roi_matching["match"][t_plane_pri].keys():
-                _ROIMatching(widget_manager, data_manager, view_control_pri, t_plane_pri, t_plane_sec)
-
-        # update Table, View
-        t_plane_pri = view_control_pri.getPlaneT()
-        t_plane_sec = view_control_sec.getPlaneT()
-        table_control_pri.updateWidgetDynamicTableWithT(data_manager.dict_roi_matching, t_plane_pri, t_plane_sec, True)
-        table_control_sec.updateWidgetDynamicTableWithT(data_manager.dict_roi_matching, t_plane_pri, t_plane_sec, False)
-        view_control_pri.updateView()
-        QMessageBox.information(q_widget, "ROI Matching Finish", "ROI Matching Finished!")
+        # consecutive t planes, matches of other pairs follow from the tracks
+        dict_inputs = {}
+        t_planes = data_manager.dict_roi_matching.getPlanes()
+        for t_plane_pri, t_plane_sec in zip(t_planes[:-1], t_planes[1:]):
+            dict_inputs[(t_plane_pri, t_plane_sec)] = _getROIMatchingInputs(widget_manager, data_manager, view_control_pri, t_plane_pri, t_plane_sec)
+        _runROIMatchingTask(dict_inputs)
 
     def _runROIMatching():
         view_control_pri = control_manager.view_controls[app_key_pri]
         view_control_sec = control_manager.view_controls[app_key_sec]
-        table_control_pri = control_manager.table_controls[app_key_pri]
-        table_control_sec = control_manager.table_controls[app_key_sec]
         t_plane_pri = view_control_pri.getPlaneT()
         t_plane_sec = view_control_sec.getPlaneT()
+        if not data_manager.dict_roi_matching.isAdjacentPair(t_plane_pri, t_plane_sec):
+            QMessageBox.warning(q_widget, "ROI Matching", MSG_NON_ADJACENT_PAIR)
+            return
 
         result = showConfirmationDialog(
             q_widget,
@@ -1073,13 +1199,7 @@ def bindFuncButtonRunROIMatchingForXYCT(
         if result != QMessageBox.Yes:
             return 
         
-        _ROIMatching(widget_manager, data_manager, view_control_pri, t_plane_pri, t_plane_sec)
-
-        # update Table, View
-        table_control_pri.updateWidgetDynamicTableWithT(data_manager.dict_roi_matching, t_plane_pri, t_plane_sec, True)
-        table_control_sec.updateWidgetDynamicTableWithT(data_manager.dict_roi_matching, t_plane_pri, t_plane_sec, False)
-        view_control_pri.updateView()
-        QMessageBox.information(q_widget, "ROI Matching Finish", "ROI Matching Finished!")
+        _runROIMatchingTask({(t_plane_pri, t_plane_sec): _getROIMatchingInputs(widget_manager, data_manager, view_control_pri, t_plane_pri, t_plane_sec)})
     q_button_run.clicked.connect(_runROIMatching)
     q_button_run_all_tplanes.clicked.connect(_runROIMatchingAllTPlanes)
 
@@ -1091,6 +1211,8 @@ def bindFuncButtonClearROIMatching(
     app_key_pri: str,
     app_key_sec: str,
 ):
+    from ..utils.roi_tracks import MSG_NON_ADJACENT_PAIR
+
     def _clearROIMatching():
         view_control_pri = control_manager.view_controls[app_key_pri]
         view_control_sec = control_manager.view_controls[app_key_sec]
@@ -1098,10 +1220,12 @@ def bindFuncButtonClearROIMatching(
         table_control_sec = control_manager.table_controls[app_key_sec]
         t_plane_pri = view_control_pri.getPlaneT()
         t_plane_sec = view_control_sec.getPlaneT()
+        if not data_manager.dict_roi_matching.isAdjacentPair(t_plane_pri, t_plane_sec):
+            QMessageBox.warning(q_button, "ROI Matching", MSG_NON_ADJACENT_PAIR)
+            return
 
         # clear ROI Matching
-        dict_roi_matching = data_manager.dict_roi_matching["match"][t_plane_pri][t_plane_sec]
-        data_manager.dict_roi_matching["match"][t_plane_pri][t_plane_sec] = {roi_id: None for roi_id in dict_roi_matching.keys()}
+        data_manager.dict_roi_matching.clearMatch(t_plane_pri, t_plane_sec)
 
         # update Table, View
         table_control_pri.updateWidgetDynamicTableWithT(data_manager.dict_roi_matching, t_plane_pri, t_plane_sec, True)
@@ -1129,10 +1253,11 @@ def bindFuncButtonsROIManagerForTable(
             view_control.q_view.setFocus()
             print("roi_edit_mode:", view_control.roi_edit_mode)
 
-            if not data_manager.dict_roi_matching["id"][view_control.getPlaneT()]:
+            roi_ids = data_manager.dict_roi_matching.getROIIds(view_control.getPlaneT())
+            if len(roi_ids) == 0:
                 roi_id_edit = 0
             else:
-                roi_id_edit = max(data_manager.dict_roi_matching["id"][view_control.getPlaneT()]) + 1 # new roi id, last ID+1
+                roi_id_edit = int(roi_ids.max()) + 1 # new roi id, last ID+1
             view_control.view_handler.handler.roi_id_edit = roi_id_edit # for adding new roi
 
             plane_t_pri = control_manager.view_controls[app_key_pri].getPlaneT()
@@ -1152,21 +1277,10 @@ def bindFuncButtonsROIManagerForTable(
             plane_t_pri = control_manager.view_controls[app_key_pri].getPlaneT()
             plane_t_sec = control_manager.view_controls[app_key_sec].getPlaneT()
             plane_t = plane_t_pri if view_control.app_key == app_key_pri else plane_t_sec # pri or sec
-            plane_t_max = data_manager.getSizeOfT(app_key_pri) - 1
             # remove selected roi from dict_roi_matching, dict_roi_coords_xyct
             if isinstance(roi_selected_id, int):
-                data_manager.dict_roi_matching["id"][plane_t].remove(roi_selected_id)
-                # remove all sec ROI of pri-sec pair
-                for plane_t_pri_tmp in data_manager.dict_roi_matching["match"].keys(): # search all plane_t_pri
-                    for plane_t_sec_tmp in data_manager.dict_roi_matching["match"][plane_t_pri_tmp].keys(): # search all plane_t_sec
-                        if plane_t == plane_t_sec_tmp: # selected plane_t
-                            for roi_pri, roi_sec in data_manager.dict_roi_matching["match"][plane_t_pri_tmp][plane_t].items():
-                                if roi_sec == roi_selected_id:
-                                    data_manager.dict_roi_matching["match"][plane_t_pri_tmp][plane_t_sec_tmp][roi_pri] = None
-                # remove all pri ROI of pri-sec pair
-                if plane_t < plane_t_max: # last plane_t does not have cell_id_match
-                    for plane_t_sec_tmp in data_manager.dict_roi_matching["match"][plane_t].keys():
-                        del data_manager.dict_roi_matching["match"][plane_t][plane_t_sec_tmp][roi_selected_id]
+                # ROIs of other planes in the track stay matched with each other
+                data_manager.dict_roi_matching.removeROI(plane_t, roi_selected_id)
 
                 del data_manager.dict_roi_coords_xyct[plane_t][roi_selected_id]
                 del data_manager.dict_roi_coords_xyct_reg[plane_t][roi_selected_id]
@@ -1237,6 +1351,7 @@ def bindFuncButtonRunCellposeForXYCT(
     from ..processing.cellpose import runCellposeDenoiseForMonoImage
     from ..preprocessing.preprocessing_cellpose import convertCellposeMaskToDictROICoords, convertSingleCellposeMaskToDictROIMatching
     from ..utils.view_utils import generateRandomColor
+    from ..manager.task_manager import runTaskWithMessage
     
     def runCellpose():
         t_plane = int(q_combobox_t_plane.currentText())
@@ -1245,45 +1360,50 @@ def bindFuncButtonRunCellposeForXYCT(
         restore_type = q_combobox_restore.currentText()
         diam = int(q_spinbox_diameter.value())
         get_reg = control_manager.view_controls["pri"].getShowRegStack() # hardcoded !!!
+        img_stack = data_manager.getTiffStackRegistered("pri") if get_reg else data_manager.getTiffStack("pri")
+        num_t = data_manager.getSizeOfT("pri")
         # run cellpose for all t_planes
-        if t_plane == -1:
-            for t_plane in range(data_manager.getSizeOfT("pri")):
-                only_id = (t_plane == data_manager.getSizeOfT("pri") - 1) # last t_plane, only dict_roi_matching["id"]
-                img = data_manager.getImageFromXYCZTTiffStack("pri", 0, t_plane, channel, get_reg)
+        list_t_plane = list(range(num_t)) if t_plane == -1 else [t_plane]
+
+        # runs in worker thread
+        def _runCellposeForTPlanes(task):
+            list_result = []
+            for i, t_plane in enumerate(list_t_plane):
+                img = img_stack[:, :, channel, 0, t_plane]
                 mask, flow, style, img_dn = runCellposeDenoiseForMonoImage(img, diam, model_type, restore_type)
                 mask = mask.T # (x, y) -> (y, x)
-                data_manager.dict_roi_coords_xyct[t_plane] = convertCellposeMaskToDictROICoords(mask)
+                list_result.append((t_plane, mask, convertCellposeMaskToDictROICoords(mask)))
+                task.setProgress(i + 1, len(list_t_plane), f"t{t_plane}")
+            return list_result
+
+        # runs in GUI thread
+        def _applyCellposeMasks(list_result):
+            for t_plane, mask, dict_roi_coords in list_result:
+                data_manager.dict_roi_coords_xyct[t_plane] = dict_roi_coords
                 data_manager.dict_roi_coords_xyct_reg[t_plane] = data_manager.dict_roi_coords_xyct[t_plane].copy()
-                data_manager.dict_roi_matching = convertSingleCellposeMaskToDictROIMatching(data_manager.dict_roi_matching, mask, t_plane, only_id)
+                data_manager.dict_roi_matching = convertSingleCellposeMaskToDictROIMatching(data_manager.dict_roi_matching, mask, t_plane)
                 # initialize ROI XYCT Colors
-                for roi_id in data_manager.dict_roi_matching["id"][t_plane]:
+                for roi_id in data_manager.dict_roi_matching.getROIIdList(t_plane):
                     # hardcoded !!!
                     control_manager.view_controls["pri"].roi_colors_xyct[t_plane][roi_id] = generateRandomColor()
                     control_manager.view_controls["sec"].roi_colors_xyct[t_plane][roi_id] = control_manager.view_controls["pri"].roi_colors_xyct[t_plane][roi_id]
-        else:
-            # hardcoded !!!
-            only_id = (t_plane == data_manager.getSizeOfT("pri") - 1) # last t_plane, only dict_roi_matching["id"]
-            img = data_manager.getImageFromXYCZTTiffStack("pri", 0, t_plane, channel, get_reg)
-            mask, flow, style, img_dn = runCellposeDenoiseForMonoImage(img, diam, model_type, restore_type)
-            mask = mask.T # (x, y) -> (y, x)
-            data_manager.dict_roi_coords_xyct[t_plane] = convertCellposeMaskToDictROICoords(mask)
-            data_manager.dict_roi_coords_xyct_reg[t_plane] = data_manager.dict_roi_coords_xyct[t_plane].copy()
-            data_manager.dict_roi_matching = convertSingleCellposeMaskToDictROIMatching(data_manager.dict_roi_matching, mask, t_plane, only_id)
-            # initialize ROI XYCT Colors
-            for roi_id in data_manager.dict_roi_matching["id"][t_plane]:
-                # hardcoded !!!
-                control_manager.view_controls["pri"].roi_colors_xyct[t_plane][roi_id] = generateRandomColor()
-                control_manager.view_controls["sec"].roi_colors_xyct[t_plane][roi_id] = control_manager.view_controls["pri"].roi_colors_xyct[t_plane][roi_id]
 
-        # update Table, View
-        # hardcoded !!!
-        t_plane_pri = control_manager.view_controls["pri"].getPlaneT()
-        t_plane_sec = control_manager.view_controls["sec"].getPlaneT()
-        for app_key, use_match in zip(config_manager.gui_defaults["APP_KEYS"], [True, False]):
-            control_manager.table_controls[app_key].setSharedAttr_ROISelected(None) # clear selected roi to avoid error
-            control_manager.view_controls[app_key].updateView()
-            control_manager.table_controls[app_key].updateWidgetDynamicTableWithT(data_manager.dict_roi_matching, t_plane_pri, t_plane_sec, use_match)
-        QMessageBox.information(q_button_run, "Cellpose Finish", "Cellpose Finished!")
+            # update Table, View
+            # hardcoded !!!
+            t_plane_pri = control_manager.view_controls["pri"].getPlaneT()
+            t_plane_sec = control_manager.view_controls["sec"].getPlaneT()
+            for app_key, use_match in zip(config_manager.gui_defaults["APP_KEYS"], [True, False]):
+                control_manager.table_controls[app_key].setSharedAttr_ROISelected(None) # clear selected roi to avoid error
+                control_manager.view_controls[app_key].updateView()
+                control_manager.table_controls[app_key].updateWidgetDynamicTableWithT(data_manager.dict_roi_matching, t_plane_pri, t_plane_sec, use_match)
+
+        runTaskWithMessage(
+            q_button_run, "Cellpose", _runCellposeForTPlanes,
+            on_result=_applyCellposeMasks,
+            msg_success=("Cellpose Finish", "Cellpose Finished!"),
+            lock_keys=["cellpose", "dict_roi_matching"],
+            widgets_busy=[q_button_run],
+            )
     q_button_run.clicked.connect(runCellpose)
 
 # -> processing_roi_layouts.makeLayoutROIEditConfig
@@ -1366,6 +1486,45 @@ def bindFuncPlaneTSlider(
         view_control.updateView()
     q_slider.valueChanged.connect(onTChanged)
 
+# -> view_layouts.makeLayoutPlayback, play/pause the Z/T slider at the fps of the spinbox
+def bindFuncPlaybackButton(
+    q_button: 'QPushButton',
+    q_spinbox_fps: 'QSpinBox',
+    q_slider: 'QSlider',
+) -> None:
+    from PyQt5.QtCore import QTimer, QElapsedTimer
+    timer = QTimer(q_button)
+    q_elapsed = QElapsedTimer()
+    dict_state = {"value_start": 0}
+
+    # the slider jumps to the frame of the elapsed time, frames not drawn in time are dropped instead of queued
+    def onTimeout() -> None:
+        n_frame = q_slider.maximum() - q_slider.minimum() + 1
+        frame = int(q_elapsed.elapsed() * q_spinbox_fps.value() / 1000)
+        value = q_slider.minimum() + (dict_state["value_start"] - q_slider.minimum() + frame) % n_frame
+        if value != q_slider.value():
+            q_slider.setValue(value)
+    def restart() -> None:
+        dict_state["value_start"] = q_slider.value()
+        q_elapsed.start()
+        timer.start(max(1, int(1000 / q_spinbox_fps.value())))
+    def stop() -> None:
+        timer.stop()
+        q_button.setText("Play")
+    def onClicked() -> None:
+        if timer.isActive():
+            stop()
+        else:
+            restart()
+            q_button.setText("Pause")
+    def onFpsChanged(value: int) -> None:
+        if timer.isActive():
+            restart()
+    timer.timeout.connect(onTimeout)
+    q_button.clicked.connect(onClicked)
+    q_spinbox_fps.valueChanged.connect(onFpsChanged)
+    q_slider.sliderPressed.connect(stop) # dragging the slider pauses playback
+
 # -> view_layouts.makeLayoutViewWithZTSlider for Microglia Tracking
 def bindFuncPlaneTSliderWithXYCTTracking(
     q_slider_pri: 'QSlider',
@@ -1461,7 +1620,7 @@ def bindFuncTableSelectionChanged(
         if selected.indexes():
             table_control.onSelectionChanged(selected, deselected)
             if view_control:
-                view_control.updateView()
+                view_control.updateViewROI()
             if canvas_control: # for canvas_control
                 canvas_control.updatePlotWithROISelect()
     q_table.selectionModel().selectionChanged.connect(_onSelectionChanged)
@@ -1482,14 +1641,14 @@ def bindFuncTableSelectionChangedWithTracking(
             table_control_pri.onSelectionChangedWithTracking(selected, deselected)
             row = table_control_pri.getSharedAttr_ROIMatch()
             table_control_sec.updateSelectedROI(row)
-            view_control_pri.updateView()
-            view_control_sec.updateView()
+            view_control_pri.updateViewROI()
+            view_control_sec.updateViewROI()
             if canvas_control_pri: # for canvas_control
                 canvas_control_pri.updatePlotWithROISelect()
     def _onSelectionChanged(selected, deselected) -> None: # for "sec" table
         if selected.indexes():
             table_control_sec.onSelectionChanged(selected, deselected)
-            view_control_sec.updateView()
+            view_control_sec.updateViewROI()
             if canvas_control_sec: # for canvas_control
                 canvas_control_sec.updatePlotWithROISelect()
     q_table_pri.selectionModel().selectionChanged.connect(_onSelectionChangedWithTracking)
@@ -1500,32 +1659,19 @@ def bindFuncRadiobuttonOfTableChanged(
     table_control: 'TableControl', 
     view_control: 'ViewControl',
 ) -> None:
-    def __onButtonClicked(row: int) -> Callable[[QPushButton], None]:
-        def _onButtonClicked(button: 'QPushButton') -> None:
-            table_control.changeRadiobuttonOfTable(row)
-            view_control.updateView()
-        return _onButtonClicked
+    def _onCelltypeChanged(row: int) -> None:
+        table_control.changeRadiobuttonOfTable(row)
+        view_control.updateView()
 
-    for row, button_group in table_control.groups_celltype.items():
-        handler = __onButtonClicked(row)
-        button_group.buttonClicked.connect(handler)
+    table_control.table_model.celltypeChanged.connect(_onCelltypeChanged)
 
 # -> table_layouts.makeLayoutTableROICountLabel
 def bindFuncCheckboxOfTableChanged(table_control, view_control):
-    def onItemChanged(item):
-        # check if the item is a checkbox
-        col = item.column()
-        is_checkbox = False
-        for col_name, col_info in table_control.table_columns.getColumns().items():
-            if col_info['type'] == 'checkbox' and col_info['order'] == col:
-                is_checkbox = True
-                break
-        if is_checkbox:
-            row = item.row()
-            table_control.changeCheckboxOfTable(row)
-            view_control.updateView()
+    def _onCheckboxChanged(row: int) -> None:
+        table_control.changeCheckboxOfTable(row)
+        view_control.updateView()
     
-    table_control.q_table.itemChanged.connect(onItemChanged)
+    table_control.table_model.checkboxChanged.connect(_onCheckboxChanged)
 
 # -> table_layouts.makeLayoutROIFilterButton
 def bindFuncButtonFilterROI(
@@ -1546,6 +1692,8 @@ def bindFuncTableCellChangedWithMicrogliaTracking(
     control_manager: 'ControlManager',
     data_manager: 'DataManager',
 ) -> None:
+    from ..utils.roi_tracks import MSG_NON_ADJACENT_PAIR
+
     def _onEditingFinished() -> None:
         try:
             current_row = q_table_pri.currentRow()
@@ -1553,6 +1701,9 @@ def bindFuncTableCellChangedWithMicrogliaTracking(
             # get the maximum roi id of the secondary plane
             t_plane_pri = control_manager.view_controls["pri"].getPlaneT()
             t_plane_sec = control_manager.view_controls["sec"].getPlaneT()
+            if not data_manager.dict_roi_matching.isAdjacentPair(t_plane_pri, t_plane_sec):
+                print(f"t{t_plane_pri} - t{t_plane_sec}: {MSG_NON_ADJACENT_PAIR}")
+                return
 
             # get the new value
             item_pri_id = q_table_pri.item(current_row, 0)
@@ -1562,21 +1713,21 @@ def bindFuncTableCellChangedWithMicrogliaTracking(
                 return
             else:
                 if item_pri_id_match is None: # set blank
-                    data_manager.dict_roi_matching["match"][t_plane_pri][t_plane_sec][roi_id_pri] = None
+                    data_manager.dict_roi_matching.setMatch(t_plane_pri, t_plane_sec, roi_id_pri, None)
                     return
             roi_id_pri = item_pri_id.text()
             roi_id_sec = item_pri_id_match.text()
             if roi_id_sec == "": # set blank
                 roi_id_pri = int(roi_id_pri)
-                data_manager.dict_roi_matching["match"][t_plane_pri][t_plane_sec][roi_id_pri] = None
+                data_manager.dict_roi_matching.setMatch(t_plane_pri, t_plane_sec, roi_id_pri, None)
                 return
 
             roi_id_pri = int(roi_id_pri)
             roi_id_sec = int(roi_id_sec)
 
             # check the validity of the roi id
-            if roi_id_sec in data_manager.dict_roi_matching["id"][t_plane_sec]:
-                data_manager.dict_roi_matching["match"][t_plane_pri][t_plane_sec][roi_id_pri] = roi_id_sec
+            if data_manager.dict_roi_matching.hasROI(t_plane_sec, roi_id_sec):
+                data_manager.dict_roi_matching.setMatch(t_plane_pri, t_plane_sec, roi_id_pri, roi_id_sec)
         except ValueError as e:
             print("Invalid input: not an integer")
             raise e
@@ -1585,7 +1736,7 @@ def bindFuncTableCellChangedWithMicrogliaTracking(
             raise e
         except AttributeError as e: # set blank
             print(f"AttributeError: {e}")
-            data_manager.dict_roi_matching["match"][t_plane_pri][t_plane_sec][roi_id_pri] = None
+            data_manager.dict_roi_matching.setMatch(t_plane_pri, t_plane_sec, roi_id_pri, None)
             raise e
         except IndexError as e:
             print(f"IndexError: {e}")
@@ -26,10 +26,15 @@ def makeLayoutROICheckIO(
         widget_manager: WidgetManager, 
         key_button_save: str,
         key_button_load: str,
+        key_button_export: Optional[str]=None,
         )-> QHBoxLayout:
     layout = QHBoxLayout()
     list_key = [key_button_save, key_button_load]
     list_label = ["Save ROICheck", "Load ROICheck"]
+    # export of .h5 snapshot store to legacy .mat
+    if key_button_export:
+        list_key.append(key_button_export)
+        list_label.append("Export ROICuration (.mat)")
     for key, label in zip(list_key, list_label):
         layout.addWidget(widget_manager.makeWidgetButton(key=key, label=label))
     return layout
@@ -4,11 +4,11 @@ from PyQt5.QtWidgets import QVBoxLayout, QHBoxLayout, QGridLayout
 from .base_layouts import makeLayoutLineEditLabel
 from .info_layouts import makeLayoutROICount
 
-# TableWidgetとROI数のラベル
+# TableViewとROI数のラベル
 def makeLayoutTableROICountLabel(widget_manager: WidgetManager, key_label: str, key_table: str, table_columns: TableColumns) -> QVBoxLayout:
     layout = QVBoxLayout()
-    # table
-    q_table = widget_manager.makeWidgetTable(key=key_table)
+    # table, ROITableModel is set in TableControl
+    q_table = widget_manager.makeWidgetTableView(key=key_table)
     
     # label
     layout_label = makeLayoutROICount(widget_manager, key_label, table_columns)
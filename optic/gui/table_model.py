@@ -0,0 +1,297 @@
+from __future__ import annotations
+from ..type_definitions import *
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, QEvent, QRect, pyqtSignal
+from PyQt5.QtWidgets import QApplication, QStyle, QStyledItemDelegate, QStyleOptionButton, QStyleOptionViewItem
+import numpy as np
+from ..utils.roi_classification import ROIClassification
+
+class ROITableModel(QAbstractTableModel):
+    """
+    ROI table of Suite2pROICuration, Suite2pROITracking and CascadeGUI, backed by numpy arrays.
+    Celltype codes and checkbox states are held by ROIClassification,
+    one str per row and string column, one int per row for "id_match" (-1 for empty).
+    Celltype and checkbox cells are painted by RadioButtonDelegate and CheckBoxDelegate,
+    so the view only renders the visible rows.
+
+    Args:
+        table_columns (TableColumns): column definitions, sorted by "order".
+        len_row (int): number of ROIs.
+    """
+    # single cell edits from the view or TableHandler, bulk setters only emit dataChanged
+    celltypeChanged = pyqtSignal(int)
+    checkboxChanged = pyqtSignal(int)
+
+    def __init__(self, table_columns: TableColumns, len_row: int=0, parent: Any=None):
+        super().__init__(parent)
+        self.setTableColumns(table_columns)
+        self.initializeArrays(len_row)
+
+    # column names and types, the index of each celltype / checkbox / string column in its array
+    def setTableColumns(self, table_columns: TableColumns) -> None:
+        col_sorted = sorted(table_columns.getColumns().items(), key=lambda x: x[1]['order'])
+        self.list_col_name: List[str] = [col_name for col_name, _ in col_sorted]
+        self.list_col_type: List[str] = [col_info['type'] for _, col_info in col_sorted]
+        self.list_col_default: List[bool] = [bool(col_info.get('default', False)) for _, col_info in col_sorted]
+        self.list_col_width: List[int] = [col_info['width'] for _, col_info in col_sorted]
+        self.list_celltype: List[str] = [name for name, type_ in zip(self.list_col_name, self.list_col_type) if type_ == 'celltype']
+        self.list_checkbox: List[str] = [name for name, type_ in zip(self.list_col_name, self.list_col_type) if type_ == 'checkbox']
+        self.list_string: List[str] = [name for name, type_ in zip(self.list_col_name, self.list_col_type) if type_ == 'string']
+        self.list_col_key: List[int] = []
+        for name, type_ in zip(self.list_col_name, self.list_col_type):
+            if type_ == 'celltype':
+                self.list_col_key.append(self.list_celltype.index(name))
+            elif type_ == 'checkbox':
+                self.list_col_key.append(self.list_checkbox.index(name))
+            elif type_ == 'string':
+                self.list_col_key.append(self.list_string.index(name))
+            else:
+                self.list_col_key.append(-1)
+
+    def initializeArrays(self, len_row: int) -> None:
+        self.len_row = len_row
+        self.id_match: np.ndarray = np.full(len_row, -1, dtype=np.int64)
+        code_default = -1
+        for celltype in self.list_celltype:
+            if self.list_col_default[self.list_col_name.index(celltype)]:
+                code_default = self.list_celltype.index(celltype)
+        checkbox_default = [self.list_col_default[self.list_col_name.index(checkbox)] for checkbox in self.list_checkbox]
+        # a new object, TableControl registers it to DataManager on modelReset
+        self.roi_classification = ROIClassification(self.list_celltype, self.list_checkbox, len_row, code_default, checkbox_default)
+        self.strings: np.ndarray = np.full((len_row, len(self.list_string)), "", dtype=object)
+
+    # arrays of ROIClassification
+    @property
+    def cell_ids(self) -> np.ndarray:
+        return self.roi_classification.cell_ids
+
+    @property
+    def celltype_codes(self) -> np.ndarray:
+        return self.roi_classification.celltype_codes
+
+    @property
+    def checkbox_states(self) -> np.ndarray:
+        return self.roi_classification.checkbox_states
+
+    # rebuild the table with new rows / columns
+    def resetData(self, len_row: int, table_columns: Optional[TableColumns]=None) -> None:
+        self.beginResetModel()
+        if table_columns is not None:
+            self.setTableColumns(table_columns)
+        self.initializeArrays(len_row)
+        self.endResetModel()
+
+    """
+    QAbstractTableModel Functions
+    """
+    def rowCount(self, parent: QModelIndex=QModelIndex()) -> int:
+        return 0 if parent.isValid() else self.len_row
+
+    def columnCount(self, parent: QModelIndex=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.list_col_name)
+
+    def headerData(self, section: int, orientation: Qt.Orientation, role: int=Qt.DisplayRole) -> Any:
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            return self.list_col_name[section] if 0 <= section < len(self.list_col_name) else None
+        return str(section + 1)
+
+    def flags(self, index: QModelIndex) -> Qt.ItemFlags:
+        if not index.isValid():
+            return Qt.NoItemFlags
+        flags = Qt.ItemIsEnabled | Qt.ItemIsSelectable
+        if self.list_col_type[index.column()] in ['id_match', 'string']:
+            flags |= Qt.ItemIsEditable
+        return flags
+
+    def data(self, index: QModelIndex, role: int=Qt.DisplayRole) -> Any:
+        if not index.isValid():
+            return None
+        row, col = index.row(), index.column()
+        col_type, col_key = self.list_col_type[col], self.list_col_key[col]
+        if role in [Qt.DisplayRole, Qt.EditRole]:
+            if col_type == 'id':
+                return str(self.cell_ids[row])
+            elif col_type == 'id_match':
+                return "" if self.id_match[row] < 0 else str(self.id_match[row])
+            elif col_type == 'string':
+                return self.strings[row, col_key]
+        elif role == Qt.CheckStateRole:
+            if col_type == 'celltype':
+                return Qt.Checked if self.celltype_codes[row] == col_key else Qt.Unchecked
+            elif col_type == 'checkbox':
+                return Qt.Checked if self.checkbox_states[row, col_key] else Qt.Unchecked
+        return None
+
+    def setData(self, index: QModelIndex, value: Any, role: int=Qt.EditRole) -> bool:
+        if not index.isValid():
+            return False
+        row, col = index.row(), index.column()
+        col_type, col_key = self.list_col_type[col], self.list_col_key[col]
+        if role == Qt.CheckStateRole and col_type == 'celltype':
+            if value != Qt.Checked or not self.roi_classification.setCelltypeOfRow(row, col_key):
+                return False
+            self.emitRowsChanged(row, row)
+            self.celltypeChanged.emit(row)
+            return True
+        elif role == Qt.CheckStateRole and col_type == 'checkbox':
+            self.roi_classification.setCheckboxOfRow(row, col_key, value == Qt.Checked)
+            self.dataChanged.emit(index, index, [Qt.CheckStateRole])
+            self.checkboxChanged.emit(row)
+            return True
+        elif role == Qt.EditRole and col_type == 'id_match':
+            self.id_match[row] = self.parseIdMatch(value)
+            self.dataChanged.emit(index, index, [Qt.DisplayRole, Qt.EditRole])
+            return True
+        elif role == Qt.EditRole and col_type == 'string':
+            self.strings[row, col_key] = "" if value is None else str(value)
+            self.dataChanged.emit(index, index, [Qt.DisplayRole, Qt.EditRole])
+            return True
+        return False
+
+    # "id_match" cell text -> int, -1 for empty or invalid
+    @staticmethod
+    def parseIdMatch(value: Any) -> int:
+        try:
+            value = int(str(value).strip())
+        except ValueError:
+            return -1
+        return value if value >= 0 else -1
+
+    def emitRowsChanged(self, row_start: int, row_end: int) -> None:
+        if self.len_row == 0 or row_end < row_start:
+            return
+        self.dataChanged.emit(self.index(row_start, 0), self.index(row_end, self.columnCount() - 1))
+
+    """
+    get Functions
+    """
+    def getColumnIndex(self, col_name: str) -> int:
+        return self.list_col_name.index(col_name)
+
+    def getColumnType(self, col_name: str) -> Optional[str]:
+        if col_name not in self.list_col_name:
+            return None
+        return self.list_col_type[self.list_col_name.index(col_name)]
+
+    def getCelltypeOfRow(self, row: int) -> Optional[str]:
+        return self.roi_classification.getCelltypeOfRow(row)
+
+    def getCheckboxStatesOfRow(self, row: int) -> Dict[str, bool]:
+        return self.roi_classification.getCheckboxStatesOfRow(row)
+
+    def getCheckboxStatesOfColumn(self, checkbox: str) -> np.ndarray:
+        return self.checkbox_states[:, self.list_checkbox.index(checkbox)]
+
+    def getStringsOfColumn(self, string: str) -> np.ndarray:
+        return self.strings[:, self.list_string.index(string)]
+
+    # (len_row,) bool, True for rows of the celltype / with the checkbox checked
+    def getMaskOfColumn(self, col_name: str) -> np.ndarray:
+        return self.roi_classification.getMaskOfColumn(col_name)
+
+    def isRowOfColumn(self, row: int, col_name: str) -> bool:
+        return self.roi_classification.isRowOfColumn(row, col_name)
+
+    # number of ROIs of each celltype, "Unclassified" for code -1
+    def countCelltypes(self) -> Dict[str, int]:
+        return self.roi_classification.getCounts()
+
+    """
+    set Functions, bulk edits emit a single dataChanged
+    """
+    def setCelltypeOfRows(self, rows: np.ndarray, celltype: str) -> None:
+        rows = np.asarray(rows, dtype=np.int64)
+        if len(rows) == 0:
+            return
+        self.roi_classification.setCelltypeOfRows(rows, self.list_celltype.index(celltype))
+        self.emitRowsChanged(int(rows.min()), int(rows.max()))
+
+    def setCelltypeCodes(self, celltype_codes: np.ndarray) -> None:
+        self.roi_classification.setCelltypeCodes(celltype_codes)
+        self.emitRowsChanged(0, self.len_row - 1)
+
+    def setCheckboxOfRows(self, rows: np.ndarray, checkbox: str, state: Union[bool, np.ndarray]) -> None:
+        rows = np.asarray(rows, dtype=np.int64)
+        if len(rows) == 0:
+            return
+        self.roi_classification.setCheckboxOfRows(rows, self.list_checkbox.index(checkbox), state)
+        self.emitRowsChanged(int(rows.min()), int(rows.max()))
+
+    def setStringOfRows(self, rows: np.ndarray, string: str, values: Union[str, List[str]]) -> None:
+        rows = np.asarray(rows, dtype=np.int64)
+        if len(rows) == 0:
+            return
+        self.strings[rows, self.list_string.index(string)] = values
+        self.emitRowsChanged(int(rows.min()), int(rows.max()))
+
+    # -1 for empty
+    def setIdMatch(self, id_match: np.ndarray) -> None:
+        self.id_match[:] = id_match
+        self.emitRowsChanged(0, self.len_row - 1)
+
+    # clear "id_match" / "string" column
+    def clearColumn(self, col: int) -> None:
+        col_type, col_key = self.list_col_type[col], self.list_col_key[col]
+        if col_type == 'id_match':
+            self.id_match[:] = -1
+        elif col_type == 'string':
+            self.strings[:, col_key] = ""
+        else:
+            return
+        if self.len_row:
+            self.dataChanged.emit(self.index(0, col), self.index(self.len_row - 1, col))
+
+# paint check indicator centered in the cell, toggle on click
+class CheckIndicatorDelegate(QStyledItemDelegate):
+    primitive = QStyle.PE_IndicatorCheckBox
+    sub_element = QStyle.SE_CheckBoxIndicator
+
+    def getIndicatorRect(self, option: QStyleOptionViewItem) -> QRect:
+        style = option.widget.style() if option.widget else QApplication.style()
+        opt = QStyleOptionButton()
+        size = style.subElementRect(self.sub_element, opt, option.widget).size()
+        return QRect(
+            option.rect.x() + (option.rect.width() - size.width()) // 2,
+            option.rect.y() + (option.rect.height() - size.height()) // 2,
+            size.width(),
+            size.height(),
+        )
+
+    # the default check indicator of CheckStateRole is not drawn, paint draws the centered one
+    def initStyleOption(self, option: QStyleOptionViewItem, index: QModelIndex) -> None:
+        super().initStyleOption(option, index)
+        option.features &= ~QStyleOptionViewItem.HasCheckIndicator
+        option.checkState = Qt.Unchecked
+
+    def paint(self, painter: QPainter, option: QStyleOptionViewItem, index: QModelIndex) -> None:
+        # background and selection
+        super().paint(painter, option, index)
+        style = option.widget.style() if option.widget else QApplication.style()
+        opt = QStyleOptionButton()
+        opt.rect = self.getIndicatorRect(option)
+        opt.state = QStyle.State_Enabled
+        opt.state |= QStyle.State_On if index.data(Qt.CheckStateRole) == Qt.Checked else QStyle.State_Off
+        style.drawPrimitive(self.primitive, opt, painter, option.widget)
+
+    def editorEvent(self, event: QEvent, model: QAbstractItemModel, option: QStyleOptionViewItem, index: QModelIndex) -> bool:
+        if event.type() == QEvent.MouseButtonDblClick:
+            return True
+        if event.type() == QEvent.MouseButtonRelease and event.button() == Qt.LeftButton and option.rect.contains(event.pos()):
+            return model.setData(index, self.getNextState(index), Qt.CheckStateRole)
+        return False
+
+    def getNextState(self, index: QModelIndex) -> Qt.CheckState:
+        return Qt.Unchecked if index.data(Qt.CheckStateRole) == Qt.Checked else Qt.Checked
+
+# checkbox column
+class CheckBoxDelegate(CheckIndicatorDelegate):
+    pass
+
+# celltype column, a click always checks, the other celltype of the row is unchecked by the model
+class RadioButtonDelegate(CheckIndicatorDelegate):
+    primitive = QStyle.PE_IndicatorRadioButton
+    sub_element = QStyle.SE_RadioButtonIndicator
+
+    def getNextState(self, index: QModelIndex) -> Qt.CheckState:
+        return Qt.Checked
@@ -1,8 +1,8 @@
 from __future__ import annotations
 from ..type_definitions import *
 from PyQt5.QtCore import Qt
-from PyQt5.QtWidgets import QAbstractItemView, QTableWidgetItem, QRadioButton, QButtonGroup
-from ..controls.event_filters import applyKeyPressEventIgnore
+from PyQt5.QtWidgets import QAbstractItemView, QTableWidgetItem, QHeaderView
+from .table_model import ROITableModel, RadioButtonDelegate, CheckBoxDelegate
 import numpy as np
 
 # set TableWidget size
@@ -22,61 +22,38 @@ def setTableSize(
     if height_max:
         q_table.setMaximumHeight(height_max)
 
-# for Suite2pROICuration, Suite2pROITracking
+# for Suite2pROICuration, Suite2pROITracking, CascadeGUI
+# q_table is a QTableView, celltype and checkbox cells are painted by delegates
 def setupWidgetROITable(
-        q_table: QTableWidget, 
+        q_table: QTableView, 
         len_row: int, 
         table_columns: TableColumns, 
-        key_event_ignore: bool=True
-        ):
+        ) -> Tuple[QTableView, ROITableModel]:
     # initialize table
     q_table.clearSelection()
 
-    q_table.setRowCount(len_row)
-    # sort columns by order
-    col_sorted = sorted(table_columns.getColumns().items(), key=lambda x: x[1]['order'])
-    q_table.setColumnCount(len(col_sorted))
-
-    # set column names
-    q_table.setHorizontalHeaderLabels([col[0] for col in col_sorted])
+    table_model = q_table.model()
+    if isinstance(table_model, ROITableModel):
+        table_model.resetData(len_row, table_columns)
+    else:
+        table_model = ROITableModel(table_columns, len_row, parent=q_table)
+        q_table.setModel(table_model)
     # set selection mode
     q_table.setSelectionMode(QAbstractItemView.SingleSelection)
+    # fixed row height, rows are laid out without measuring contents
+    q_table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
 
-    # set column width
-    for col_name, col_info in col_sorted:
-        q_table.setColumnWidth(col_info['order'], col_info['width'])
-
-    groups_celltype = {}
-
-    for cellid in range(len_row):
-        groups_celltype[cellid] = QButtonGroup(q_table)
-        for col_name, col_info in col_sorted:
-            cell_type = col_info["type"]
-            
-            if cell_type == "id":
-                cell = QTableWidgetItem(str(cellid))
-                cell.setFlags(cell.flags() & ~Qt.ItemIsEditable) # make cell not editable
-                q_table.setItem(cellid, col_info['order'], cell)
-            elif cell_type == "id_match":
-                cell = QTableWidgetItem()
-                q_table.setItem(cellid, col_info['order'], cell)
-            elif cell_type == "celltype":
-                cell = QRadioButton()
-                if col_info.get("default", False):
-                    cell.setChecked(True)
-                if key_event_ignore:
-                    cell = applyKeyPressEventIgnore(cell)
-                groups_celltype[cellid].addButton(cell)
-                q_table.setCellWidget(cellid, col_info['order'], cell)
-            elif cell_type == "checkbox":
-                cell = QTableWidgetItem()
-                cell.setCheckState(Qt.Checked if col_info.get("default", False) else Qt.Unchecked)
-                q_table.setItem(cellid, col_info['order'], cell)
-            elif cell_type == "string":
-                cell = QTableWidgetItem()
-                q_table.setItem(cellid, col_info['order'], cell)
+    # set column width and delegates
+    for col, (col_type, col_width) in enumerate(zip(table_model.list_col_type, table_model.list_col_width)):
+        q_table.setColumnWidth(col, col_width)
+        if col_type == "celltype":
+            q_table.setItemDelegateForColumn(col, RadioButtonDelegate(q_table))
+        elif col_type == "checkbox":
+            q_table.setItemDelegateForColumn(col, CheckBoxDelegate(q_table))
+        else:
+            q_table.setItemDelegateForColumn(col, None)
 
-    return q_table, groups_celltype
+    return q_table, table_model
 
 # for MicrogliaTracking, empty table
 def setupWidgetDynamicTable(
@@ -97,10 +74,7 @@ def setupWidgetDynamicTable(
     for col_name, col_info in col_sorted:
         q_table.setColumnWidth(col_info['order'], col_info['width'])
 
-    groups_celltype = {}
-
-    for cellid in range(len_row):
-        groups_celltype[cellid] = QButtonGroup(q_table)
+    for cellid in range(len_row or 0):
         for col_name, col_info in col_sorted:
             cell_type = col_info["type"]
             
@@ -112,67 +86,66 @@ def setupWidgetDynamicTable(
                 cell = QTableWidgetItem()
                 q_table.setItem(cellid, col_info['order'], cell)
 
-    return q_table, groups_celltype
+    return q_table
 
 # dict_roicheckの内容をtableに反映
 def applyDictROICheckToTable(
-        q_table: QTableWidget, 
+        q_table: QTableView, 
         table_columns: TableColumns, 
         dict_roicheck: Dict[str, Any]
         ):
-    row_count = q_table.rowCount()
+    table_model: ROITableModel = q_table.model()
+    row_count = table_model.rowCount()
 
     for col_name, col_info in table_columns.getColumns().items():
-        # radio button
+        if col_name not in dict_roicheck:
+            continue
+        # radio button, rows of later celltypes overwrite, rows of no celltype are kept
         if col_info['type'] == 'celltype':
-            if col_name in dict_roicheck:
-                selected_rows = dict_roicheck[col_name]
-                for row in range(row_count):
-                    radio_button = q_table.cellWidget(row, col_info['order'])
-                    if radio_button:
-                        radio_button.setChecked(any(row == sr for sr in selected_rows))
+            selected_rows = np.asarray(dict_roicheck[col_name]).ravel().astype(np.int64)
+            selected_rows = selected_rows[(selected_rows >= 0) & (selected_rows < row_count)]
+            table_model.setCelltypeOfRows(selected_rows, col_name)
 
         # checkbox or string
         elif col_info['type'] in ['checkbox', 'string']:
-            if col_name in dict_roicheck:
-                data = dict_roicheck[col_name]
-                for row in range(min(row_count, len(data))):
-                    item = q_table.item(row, col_info['order'])
-                    if item:
-                        if col_info['type'] == 'checkbox':
-                            item.setCheckState(Qt.Checked if data[row] else Qt.Unchecked)
-                        else:  # string
-                            value = str(data[row])
-                            if value == '[]' or value == '':
-                                value = ''
-                            item.setText(value)
+            data = dict_roicheck[col_name]
+            rows = np.arange(min(row_count, len(data)))
+            if col_info['type'] == 'checkbox':
+                values = np.asarray(data, dtype=bool).reshape(len(data), -1)[:len(rows), 0]
+                table_model.setCheckboxOfRows(rows, col_name, values)
+            else:  # string, (n, 1) of a table not saved yet
+                if isinstance(data, np.ndarray) and data.ndim == 2:
+                    data = data[:, 0]
+                values = [str(data[row]) for row in rows]
+                values = ['' if value == '[]' else value for value in values]
+                table_model.setStringOfRows(rows, col_name, values)
 
 # apply dict_roi_tracking to table
 def applyDictROITrackingToTable(
-        q_table: QTableWidget, 
+        q_table: QTableView, 
         table_columns: TableColumns, 
         dict_roi_tracking: Dict[str, Any]
         ):
     applyDictROICheckToTable(q_table, table_columns, dict_roi_tracking)
-    row_count = q_table.rowCount()
+    table_model: ROITableModel = q_table.model()
+    row_count = table_model.rowCount()
 
-    # Cell_ID_Match
+    # Cell_ID_Match, NaN rows are kept
     for col_name, col_info in table_columns.getColumns().items():
         if col_info['type'] == 'id_match':
             if col_name in dict_roi_tracking:
                 data = dict_roi_tracking[col_name]
-                for row in range(min(row_count, len(data))):
-                    item = q_table.item(row, col_info['order'])
-                    if item:
-                        value = data[row]
-                        if not np.isnan(value):
-                            item.setText(str(int(value)))
+                values = np.asarray(data, dtype=np.float64).reshape(len(data), -1)[:row_count, 0]
+                id_match = table_model.id_match.copy()
+                mask_valid = ~np.isnan(values)
+                id_match[:len(values)][mask_valid] = np.where(values[mask_valid] >= 0, values[mask_valid], -1).astype(np.int64)
+                table_model.setIdMatch(id_match)
 
 # apply dict_roi_matching to table
 def applyDictROIMatchingToTable(
     q_table: QTableWidget,
     table_columns: TableColumns,
-    dict_roi_matching: Dict[str, Dict[int, List[int] | Dict[int, Dict[int, Optional[int]]]]],
+    dict_roi_matching: ROITracks,
     t_plane_pri: int,
     t_plane_sec: int,
     use_match: bool = True
@@ -183,16 +156,19 @@ def applyDictROIMatchingToTable(
     Parameters:
         q_table (QTableWidget): The widget table to update.
         table_columns (TableColumns): Column definitions.
-        dict_roi_matching (Dict): ROI matching data structure.
+        dict_roi_matching (ROITracks): ROI IDs and tracks of all T planes.
         t_plane_pri (int): Primary T plane.
         t_plane_sec (int): Secondary T plane.
-        use_match (bool): Whether to use "match" (True) or "id" (False) data.
+        use_match (bool): Whether to use matches of t_plane_pri (True) or ROI IDs of t_plane_sec (False).
     """
     # Retrieve the relevant data based on the use_match flag
     if use_match:
-        matching_data = dict_roi_matching["match"].get(t_plane_pri, {}).get(t_plane_sec, {})
+        if dict_roi_matching.hasPair(t_plane_pri, t_plane_sec):
+            matching_data = dict_roi_matching.getMatch(t_plane_pri, t_plane_sec)
+        else:
+            matching_data = {}
     else:
-        matching_data = {roi_id: roi_id for roi_id in dict_roi_matching["id"].get(t_plane_sec, [])}
+        matching_data = {roi_id: roi_id for roi_id in dict_roi_matching.getROIIdList(t_plane_sec)}
 
     # Adjust the table row count
     q_table.setRowCount(len(matching_data))
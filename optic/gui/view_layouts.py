@@ -18,7 +18,12 @@ def makeLayoutViewWithZTSlider(
         key_slider_t: str = "",
         stack_size_z: int = 1,
         stack_size_t: int = 1,
+        playback: bool = False,
+        playback_fps: int = 10,
 ) -> QVBoxLayout:
+    """
+    playback: add play/pause button "{key_slider}_play" and fps spinbox "{key_slider}_fps" to each slider
+    """
     layout = QVBoxLayout()
 
     q_view = widget_manager.makeWidgetView(key=key_view, width_min=256, height_min=256)
@@ -28,7 +33,10 @@ def makeLayoutViewWithZTSlider(
     if slider_z:
         # add label
         label = widget_manager.makeWidgetLabel(key=key_label_z, label="Z: 0")
-        layout.addWidget(label)
+        if playback:
+            layout.addLayout(makeLayoutPlayback(widget_manager, label, key_slider_z, playback_fps))
+        else:
+            layout.addWidget(label)
         slider = widget_manager.makeWidgetSlider(
             key=key_slider_z,
             value_min=0,
@@ -40,7 +48,10 @@ def makeLayoutViewWithZTSlider(
     # add t slider
     if slider_t:
         label = widget_manager.makeWidgetLabel(key=key_label_t, label="T: 0")
-        layout.addWidget(label)
+        if playback:
+            layout.addLayout(makeLayoutPlayback(widget_manager, label, key_slider_t, playback_fps))
+        else:
+            layout.addWidget(label)
         slider = widget_manager.makeWidgetSlider(
             key=key_slider_t,
             value_min=0,
@@ -51,6 +62,21 @@ def makeLayoutViewWithZTSlider(
 
     return layout
 
+# plane label, play/pause button, fps spinbox of a Z/T slider
+def makeLayoutPlayback(
+        widget_manager: WidgetManager,
+        q_label: QLabel,
+        key_slider: str,
+        playback_fps: int = 10,
+) -> QHBoxLayout:
+    layout = QHBoxLayout()
+    layout.addWidget(q_label)
+    layout.addStretch()
+    layout.addWidget(widget_manager.makeWidgetButton(key=f"{key_slider}_play", label="Play"))
+    layout.addWidget(widget_manager.makeWidgetLabel(key=f"{key_slider}_fps", label="fps"))
+    layout.addWidget(widget_manager.makeWidgetSpinBox(key=f"{key_slider}_fps", value_min=1, value_max=60, value_set=playback_fps))
+    return layout
+
 # Displayed ROI's Threshold checkbox, lineedit
 def makeLayoutROIThresholds(
         widget_manager: WidgetManager, 
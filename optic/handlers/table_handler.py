@@ -2,9 +2,10 @@ from __future__ import annotations
 from ..type_definitions import *
 from PyQt5.QtCore import Qt
 from PyQt5.QtGui import QKeyEvent
-from PyQt5.QtWidgets import QTableWidgetItem
+from PyQt5.QtWidgets import QMessageBox
 from ..visualization.info_visual import updateROICountDisplay
-from ..visualization.view_visual_roi import shouldSkipROI
+from ..utils.roi_tracks import MSG_NON_ADJACENT_PAIR
+import numpy as np
 
 class TableHandler:
     """
@@ -28,16 +29,10 @@ class TableHandler:
         if self.table_control.selected_row is not None and event.key() in self.key_function_map:
             action = self.key_function_map[event.key()]
             self.executeAction(action)
-            self.table_control.q_table.setCurrentCell(
+            self.table_control.setCurrentCell(
                 self.table_control.selected_row, 
                 self.table_control.selected_column
             )
-            self.table_control.q_table.scrollToItem(
-                self.table_control.q_table.item(
-                    self.table_control.selected_row, 
-                    self.table_control.selected_column
-                )
-            )
 
     def executeAction(self, action: Tuple) -> None:
         """
@@ -63,11 +58,11 @@ class TableHandler:
         if move_type == 'up':
             table_control.selected_row = max(0, table_control.selected_row - step)
         elif move_type == 'down':
-            table_control.selected_row = min(table_control.q_table.rowCount() - 1, table_control.selected_row + step)
+            table_control.selected_row = min(table_control.getRowCount() - 1, table_control.selected_row + step)
         elif move_type == 'left':
             table_control.selected_column = max(0, table_control.selected_column - step)
         elif move_type == 'right':
-            table_control.selected_column = min(table_control.q_table.columnCount() - 1, table_control.selected_column + step)
+            table_control.selected_column = min(table_control.getColumnCount() - 1, table_control.selected_column + step)
         elif move_type == 'cell_type':
             self.moveToSameCellType(table_control.selected_row, step)
         elif move_type == 'skip_roi':
@@ -82,22 +77,21 @@ class TableHandler:
         table_control = self.table_control
         for col_name, col_info in table_control.table_columns.getColumns().items():
             if col_info['order'] == col_order:
+                table_model = table_control.table_model
+                if table_model is None or not 0 <= row < table_model.rowCount():
+                    break
+                index = table_model.index(row, col_order)
                 if col_info['type'] == 'celltype':
-                    button_group = table_control.groups_celltype.get(row)
-                    if button_group:
-                        for button in button_group.buttons():
-                            if table_control.q_table.cellWidget(row, col_order) == button:
-                                button.setChecked(True)
-                                table_control.changeRadiobuttonOfTable(row)
-                                # update data_manager.dict_roi_celltype
-                                self.data_manager.dict_roi_celltype[self.app_key][row] = col_name
-                                break
+                    # celltypeChanged of the model updates the display mask
+                    table_model.setData(index, Qt.Checked, Qt.CheckStateRole)
+                    # update data_manager.dict_roi_celltype
+                    self.data_manager.dict_roi_celltype[self.app_key][row] = col_name
                 elif col_info['type'] == 'checkbox':
-                    check_box_item = table_control.q_table.item(row, col_order)
-                    if check_box_item:
-                        check_box_item.setCheckState(
-                            Qt.Unchecked if check_box_item.checkState() == Qt.Checked else Qt.Checked
-                        )
+                    table_model.setData(
+                        index, 
+                        Qt.Unchecked if index.data(Qt.CheckStateRole) == Qt.Checked else Qt.Checked, 
+                        Qt.CheckStateRole
+                    )
                 break
 
     def moveToSameCellType(self, start_row: int, direction: Literal[-1, 1]) -> None:
@@ -105,57 +99,38 @@ class TableHandler:
         Move to the next/previous cell with the same cell type
         """
         table_control = self.table_control
-        current_cell_type = table_control.getCurrentCellTypeOfRow(start_row)
-        total_rows = table_control.q_table.rowCount()
-        new_row = start_row
-
-        while True:
-            new_row = (new_row + direction) % total_rows
-            if new_row == start_row:
-                break
-            if table_control.getCurrentCellTypeOfRow(new_row) == current_cell_type:
-                table_control.selected_row = new_row
-                return
+        if table_control.table_model is None:
+            return
+        celltype_codes = table_control.table_model.celltype_codes
+        self.moveToNextRowOfMask(start_row, direction, celltype_codes == celltype_codes[start_row])
             
     def moveSkippingROI(self, start_row: int, direction: Literal[-1, 1]) -> None:
         """
         Move to find ROIs that don't match the skip condition
         """
         table_control = self.table_control
-        total_rows = table_control.q_table.rowCount()
-        new_row = start_row
-
-        while True:
-            new_row = (new_row + direction) % total_rows
-            if new_row == start_row:
-                break
-
-            # Select ROI if it's not skipped
-            if not shouldSkipROI(
-                roi_id=new_row,
-                table_columns=table_control.table_columns,
-                q_table=table_control.q_table,
-                skip_roi_types=table_control.control_manager.getSharedAttr(self.app_key, "skip_roi_types")
-            ):
-                table_control.selected_row = new_row
-                return
+        # Select ROI if it's not skipped
+        mask_skip = table_control.getROISkipMask(table_control.control_manager.getSharedAttr(self.app_key, "skip_roi_types"))
+        self.moveToNextRowOfMask(start_row, direction, ~mask_skip)
             
+    def moveToNextRowOfMask(self, start_row: int, direction: Literal[-1, 1], mask_row: np.ndarray) -> None:
+        """
+        Move to the next/previous row with mask_row True, wrapping around the table
+        """
+        total_rows = len(mask_row)
+        if total_rows == 0:
+            return
+        # rows in the order of moving, start_row excluded
+        rows = (start_row + direction * np.arange(1, total_rows)) % total_rows
+        rows_valid = rows[mask_row[rows]]
+        if len(rows_valid):
+            self.table_control.selected_row = int(rows_valid[0])
+
     def moveToSelectedType(self, start_row: int, direction: Literal[-1, 1]) -> None:
         """
         Move to the next/previous ROI of the selected type
         """
-        table_control = self.table_control
-        dict_roi_display = table_control.getSharedAttr_DictROIDisplay()
-        total_rows = table_control.q_table.rowCount()
-        new_row = start_row
-
-        while True:
-            new_row = (new_row + direction) % total_rows
-            if new_row == start_row:
-                break
-            if dict_roi_display[new_row]:
-                table_control.selected_row = new_row
-                return
+        self.moveToNextRowOfMask(start_row, direction, self.table_control.getROIDisplayMask())
             
     def setSelectedROIMatch(self) -> None:
         """
@@ -169,6 +144,12 @@ class TableHandler:
         sec_roi_id = self.control_manager.getSharedAttr("sec", "roi_selected_id")
         if sec_roi_id is None:
             return
+        # matches across gaps follow from the tracks
+        roi_tracks = self.data_manager.dict_roi_matching
+        pri_plane_t, sec_plane_t = table_control_pri.getPlaneT(), table_control_sec.getPlaneT()
+        if roi_tracks.hasPair(pri_plane_t, sec_plane_t) and not roi_tracks.isAdjacentPair(pri_plane_t, sec_plane_t):
+            QMessageBox.warning(table_control_pri.q_table, "ROI Matching", MSG_NON_ADJACENT_PAIR)
+            return
             
         # get column of "id_match"
         id_match_col_order = None
@@ -185,19 +166,18 @@ class TableHandler:
         if pri_row is None:
             return
             
-        # update "ROI Match ID"
-        item = QTableWidgetItem(str(sec_roi_id))
-        table_control_pri.q_table.setItem(pri_row, id_match_col_order, item)
+        # update "ROI Match ID", QTableWidget of MicrogliaTracking or ROITableModel
+        model_pri = table_control_pri.q_table.model()
+        model_pri.setData(model_pri.index(pri_row, id_match_col_order), str(sec_roi_id), Qt.EditRole)
         
-        # update dict_roi_matching["match"]
+        # update ROI tracks
         pri_roi_id = table_control_pri.getCellIdFromRow(pri_row)
         if pri_roi_id is not None:
             pri_plane_t = table_control_pri.getPlaneT()
             sec_plane_t = table_control_sec.getPlaneT()
             
-            if pri_plane_t in self.data_manager.dict_roi_matching["match"] and \
-               sec_plane_t in self.data_manager.dict_roi_matching["match"][pri_plane_t]:
-                self.data_manager.dict_roi_matching["match"][pri_plane_t][sec_plane_t][pri_roi_id] = sec_roi_id
+            if self.data_manager.dict_roi_matching.hasPair(pri_plane_t, sec_plane_t):
+                self.data_manager.dict_roi_matching.setMatch(pri_plane_t, sec_plane_t, pri_roi_id, sec_roi_id)
         
         # update view
         for app_key in self.control_manager.view_controls:
@@ -227,10 +227,7 @@ class ViewHandler:
                         # WARNING: With adding ROI, the coordinates of ROI and that of Registred ROI are the same.
                         self.data_manager.dict_roi_coords_xyct[self.plane_t][self.roi_id_edit] = dict_roi_coords_xyct_edit 
                         self.data_manager.dict_roi_coords_xyct_reg[self.plane_t][self.roi_id_edit] = dict_roi_coords_xyct_edit
-                        self.data_manager.dict_roi_matching["id"][self.plane_t] += [self.roi_id_edit]
-                        if self.plane_t < self.plane_t_max: # last plane_t does not have cell_id_match
-                            for plane_t_sec in self.data_manager.dict_roi_matching["match"][self.plane_t].keys(): # for all sec planes
-                                self.data_manager.dict_roi_matching["match"][self.plane_t][plane_t_sec][self.roi_id_edit] = None
+                        self.data_manager.dict_roi_matching.addROI(self.plane_t, self.roi_id_edit) # new track, not matched
                         # hardcoded !!!
                         self.control_manager.view_controls["pri"].roi_colors_xyct[self.plane_t][self.roi_id_edit] = generateRandomColor()
                         self.control_manager.view_controls["sec"].roi_colors_xyct[self.plane_t][self.roi_id_edit] = self.control_manager.view_controls["pri"].roi_colors_xyct[self.plane_t][self.roi_id_edit]
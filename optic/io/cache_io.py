@@ -0,0 +1,318 @@
+from __future__ import annotations
+from ..type_definitions import *
+import os
+import re
+import json
+import time
+import shutil
+import hashlib
+import threading
+import numpy as np
+
+# sidecar cache of Fall.mat / CaImAn HDF5 inputs
+# <dir of source>/.optic_cache/<file name>.<path hash>/
+#   manifest.json : fingerprint of source, ops scalars and strings, stat layout, fields read from the source
+#   *.npy         : traces (float32), ROI stat columns (values + offsets), numeric ops arrays, uint8 images
+CACHE_DIR_NAME = ".optic_cache"
+CACHE_VERSION = 2
+CACHE_MANIFEST = "manifest.json"
+CACHE_TRACE_KEYS = ["F", "Fneu", "spks", "F_chan2", "Fneu_chan2"]
+CACHE_ARRAY_KEYS = ["iscell", "redcell"]
+# entries and manifests are written under <path>.tmp<pid>_<thread id> and renamed when complete
+CACHE_TMP_PATTERN = re.compile(r"\.tmp\d+_\d+$")
+# temporary entries older than this are left over from a crashed session
+CACHE_TMP_MAX_AGE_S = 24 * 3600
+
+# fingerprint of source file, any change of size or modification time invalidates the cache
+def getFileFingerprint(path_src: str) -> Dict[str, Any]:
+    st = os.stat(path_src)
+    return {
+        "path": os.path.abspath(path_src).replace("\\", "/"),
+        "size": st.st_size,
+        "mtime_ns": st.st_mtime_ns,
+        }
+
+def getSidecarCacheDir(path_src: str) -> str:
+    return os.path.join(os.path.dirname(os.path.abspath(path_src)), CACHE_DIR_NAME).replace("\\", "/")
+
+def getSidecarCachePath(path_src: str) -> str:
+    path_abs = os.path.abspath(path_src).replace("\\", "/")
+    key = hashlib.blake2b(path_abs.encode(), digest_size=6).hexdigest()
+    return f"{getSidecarCacheDir(path_src)}/{os.path.basename(path_abs)}.{key}"
+
+def getTmpPath(path: str) -> str:
+    return f"{path}.tmp{os.getpid()}_{threading.get_ident()}"
+
+def getDirectorySize(path_dir: str) -> int:
+    return sum(entry.stat().st_size for entry in os.scandir(path_dir) if entry.is_file())
+
+"""
+ROI stat <-> columns
+"""
+# stat keys whose values are scalars (numbers or strings) become one column, numeric 1d arrays are concatenated with offsets
+# (columns, layout, keys of other stat fields, e.g. object arrays, which are read from the source)
+def convertStatToColumns(stat: Dict[int, Dict[str, Any]]) -> Tuple[Dict[str, np.ndarray], Dict[str, str], List[str]]:
+    list_stat = [stat[roi_id] for roi_id in sorted(stat.keys())]
+    dict_column, dict_layout, list_key_source = {}, {}, []
+    keys = list(dict.fromkeys(key for roi_stat in list_stat for key in roi_stat.keys()))
+    for key in keys:
+        try:
+            values = [np.asarray(roi_stat[key]) for roi_stat in list_stat]
+        except KeyError:
+            list_key_source.append(key)
+            continue
+        if any(v.dtype == object or v.dtype.kind == "V" for v in values):
+            list_key_source.append(key)
+            continue
+        if any(v.dtype.kind in "US" for v in values):
+            if all(v.ndim == 0 for v in values):
+                dict_column[f"stat_{key}"] = np.array(values)
+                dict_layout[key] = "scalar"
+            else:
+                list_key_source.append(key)
+            continue
+        if all(v.ndim == 0 for v in values):
+            dict_column[f"stat_{key}"] = np.array(values)
+            dict_layout[key] = "scalar"
+        elif key == "med":
+            dict_column["stat_med"] = np.array([v.ravel()[:2] for v in values])
+            dict_layout[key] = "med"
+        elif all(v.ndim <= 1 for v in values):
+            lengths = np.array([v.size for v in values], dtype=np.int64)
+            dict_column[f"stat_{key}"] = np.concatenate([v.ravel() for v in values]) if values else np.array([])
+            dict_column[f"stat_{key}_offsets"] = np.concatenate([[0], np.cumsum(lengths)])
+            dict_layout[key] = "ragged"
+        else:
+            list_key_source.append(key)
+    return dict_column, dict_layout, list_key_source
+
+# ops values as (JSON scalars and strings, numeric arrays saved as .npy, keys of other values which are read from the source)
+def splitOpsForCache(ops: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, np.ndarray], List[str]]:
+    dict_scalar, dict_array, list_key_source = {}, {}, []
+    for key, value in ops.items():
+        if isinstance(value, (bool, int, float, str, np.number, np.bool_)):
+            dict_scalar[key] = value.item() if isinstance(value, np.generic) else value
+        elif isinstance(value, np.ndarray) and value.dtype.kind in "biuf":
+            dict_array[key] = value
+        else:
+            list_key_source.append(key)
+    return dict_scalar, dict_array, list_key_source
+
+# per-ROI stat dicts hold views into the cached columns, no copy
+def convertColumnsToStat(dict_column: Dict[str, np.ndarray], dict_layout: Dict[str, str], n_roi: int) -> Dict[int, Dict[str, Any]]:
+    stat = {roi_id: {} for roi_id in range(n_roi)}
+    for key, layout in dict_layout.items():
+        values = dict_column[f"stat_{key}"]
+        if layout == "scalar":
+            for roi_id, value in enumerate(values.tolist()):
+                stat[roi_id][key] = value
+        elif layout == "med":
+            for roi_id in range(n_roi):
+                stat[roi_id][key] = values[roi_id]
+        elif layout == "ragged":
+            offsets = dict_column[f"stat_{key}_offsets"]
+            for roi_id in range(n_roi):
+                stat[roi_id][key] = values[offsets[roi_id]:offsets[roi_id + 1]]
+    return stat
+
+"""
+save / load
+"""
+# write float32 trace matrix without materializing lazy traces
+def saveTraceArray(path_npy: str, traces: Any, chunk_rows: int=256) -> None:
+    shape = tuple(traces.shape)
+    mm = np.lib.format.open_memmap(path_npy, mode="w+", dtype=np.float32, shape=shape)
+    for start in range(0, shape[0], chunk_rows):
+        stop = min(start + chunk_rows, shape[0])
+        if hasattr(traces, "getRows"):
+            mm[start:stop] = traces.getRows(start, stop)
+        else:
+            mm[start:stop] = np.asarray(traces[start:stop], dtype=np.float32)
+    mm.flush()
+    del mm
+
+# write cache entry of loaded Fall data, None if fields which can not be cached would have to be read from a non-.mat source
+def saveSidecarCache(
+        path_src        : str,
+        dict_Fall       : Dict[str, Any],
+        dict_im_bg      : Dict[str, np.ndarray[np.uint8, Tuple[int, int]]],
+        dict_im_bg_chan2: Dict[str, np.ndarray[np.uint8, Tuple[int, int]]]=None,
+        dict_im_roi     : Dict[str, np.ndarray[np.uint8, Tuple[int, int]]]=None,
+        max_bytes       : Optional[int]=None,
+        ) -> Optional[str]:
+    path_cache = getSidecarCachePath(path_src)
+    # fields which can not be cached are read from the source on load, only possible for Fall.mat
+    ops = dict_Fall.get("ops", {})
+    dict_column, dict_layout, list_stat_key_source = convertStatToColumns(dict_Fall["stat"])
+    dict_ops_scalar, dict_ops_array, list_ops_key_source = splitOpsForCache(ops)
+    if (list_stat_key_source or list_ops_key_source) and not path_src.lower().endswith(".mat"):
+        return None
+    fingerprint = getFileFingerprint(path_src)
+    path_tmp = getTmpPath(path_cache)
+    os.makedirs(path_tmp, exist_ok=True)
+    try:
+        for key in CACHE_TRACE_KEYS:
+            if key in dict_Fall:
+                saveTraceArray(f"{path_tmp}/{key}.npy", dict_Fall[key])
+        for key in CACHE_ARRAY_KEYS:
+            if key in dict_Fall:
+                np.save(f"{path_tmp}/{key}.npy", np.asarray(dict_Fall[key]))
+        for key, arr in dict_column.items():
+            np.save(f"{path_tmp}/{key}.npy", arr)
+        dict_image = {"im_bg": dict_im_bg or {}, "im_bg_chan2": dict_im_bg_chan2 or {}, "im_roi": dict_im_roi or {}}
+        for prefix, dict_im in dict_image.items():
+            for key_im, img in dict_im.items():
+                np.save(f"{path_tmp}/{prefix}_{key_im}.npy", np.asarray(img, dtype=np.uint8))
+        for key, arr in dict_ops_array.items():
+            np.save(f"{path_tmp}/ops_{key}.npy", arr)
+        manifest = {
+            "version": CACHE_VERSION,
+            # taken before the data was written, a source modified meanwhile invalidates the entry
+            "source": fingerprint,
+            "n_roi": len(dict_Fall["stat"]),
+            "ops": dict_ops_scalar,
+            "ops_arrays": list(dict_ops_array.keys()),
+            "ops_source_keys": list_ops_key_source,
+            "stat_layout": dict_layout,
+            "stat_source_keys": list_stat_key_source,
+            "images": {prefix: list(dict_im.keys()) for prefix, dict_im in dict_image.items()},
+            "last_access": time.time(),
+            }
+        with open(f"{path_tmp}/{CACHE_MANIFEST}", "w") as f:
+            json.dump(manifest, f)
+        if os.path.exists(path_cache):
+            shutil.rmtree(path_cache, ignore_errors=True)
+        os.replace(path_tmp, path_cache)
+    finally:
+        if os.path.exists(path_tmp):
+            shutil.rmtree(path_tmp, ignore_errors=True)
+    if max_bytes is not None:
+        evictSidecarCache(getSidecarCacheDir(path_src), max_bytes, keep=[path_cache])
+    return path_cache
+
+# check cache against source file, an in-place rewrite of the same size still changes the modification time
+def isSidecarCacheValid(path_src: str, manifest: Dict[str, Any]) -> bool:
+    if manifest.get("version") != CACHE_VERSION:
+        return False
+    source = manifest["source"]
+    fingerprint = getFileFingerprint(path_src)
+    return all(source.get(key) == fingerprint[key] for key in ("path", "size", "mtime_ns"))
+
+# "ops" or "stat" of the source Fall.mat, for fields which are not cached
+def loadFallVariableFromSource(path_src: str, key_var: Literal["ops", "stat"]) -> Any:
+    from .lazy_mat import isMatV73, convertH5MatNodeToPython
+    if isMatV73(path_src):
+        import h5py
+        with h5py.File(path_src, "r") as h5file:
+            value = convertH5MatNodeToPython(h5file, h5file[key_var])
+    else:
+        from scipy.io import loadmat
+        value = loadmat(path_src, simplify_cells=True, variable_names=[key_var])[key_var]
+    if key_var == "stat" and isinstance(value, dict): # single ROI
+        value = [value]
+    return value
+
+# load cache, return None if missing or stale, traces are memory-mapped
+# ops and stat fields which are not cached are read from the source
+def loadSidecarCache(path_src: str) -> Optional[Dict[str, Any]]:
+    path_cache = getSidecarCachePath(path_src)
+    path_manifest = f"{path_cache}/{CACHE_MANIFEST}"
+    if not os.path.exists(path_manifest):
+        return None
+    try:
+        with open(path_manifest) as f:
+            manifest = json.load(f)
+        if not isSidecarCacheValid(path_src, manifest):
+            return None
+
+        dict_Fall = {}
+        for key in CACHE_TRACE_KEYS:
+            if os.path.exists(f"{path_cache}/{key}.npy"):
+                dict_Fall[key] = np.load(f"{path_cache}/{key}.npy", mmap_mode="r")
+        for key in CACHE_ARRAY_KEYS:
+            if os.path.exists(f"{path_cache}/{key}.npy"):
+                dict_Fall[key] = np.load(f"{path_cache}/{key}.npy")
+        dict_Fall["ops"] = dict(manifest["ops"])
+        for key in manifest["ops_arrays"]:
+            dict_Fall["ops"][key] = np.load(f"{path_cache}/ops_{key}.npy")
+        if manifest["ops_source_keys"]:
+            ops_src = loadFallVariableFromSource(path_src, "ops")
+            dict_Fall["ops"].update({key: ops_src[key] for key in manifest["ops_source_keys"] if key in ops_src})
+        dict_column = {}
+        for key, layout in manifest["stat_layout"].items():
+            dict_column[f"stat_{key}"] = np.load(f"{path_cache}/stat_{key}.npy")
+            if layout == "ragged":
+                dict_column[f"stat_{key}_offsets"] = np.load(f"{path_cache}/stat_{key}_offsets.npy")
+        dict_Fall["stat"] = convertColumnsToStat(dict_column, manifest["stat_layout"], manifest["n_roi"])
+        if manifest["stat_source_keys"]:
+            stat_src = loadFallVariableFromSource(path_src, "stat")
+            for roi_id, roi_stat_src in enumerate(stat_src[:manifest["n_roi"]]):
+                dict_Fall["stat"][roi_id].update({key: roi_stat_src[key] for key in manifest["stat_source_keys"] if key in roi_stat_src})
+
+        dict_cache = {"dict_Fall": dict_Fall}
+        for prefix, list_key_im in manifest["images"].items():
+            dict_cache[prefix] = {key_im: np.load(f"{path_cache}/{prefix}_{key_im}.npy") for key_im in list_key_im}
+
+        manifest["last_access"] = time.time()
+        writeManifest(path_manifest, manifest)
+        return dict_cache
+    except (OSError, ValueError, KeyError):
+        return None
+
+# replace manifest atomically, readers and evictSidecarCache never see a partly written file
+# a failed write keeps the previous manifest, only its last access time is lost
+def writeManifest(path_manifest: str, manifest: Dict[str, Any]) -> None:
+    path_tmp = getTmpPath(path_manifest)
+    try:
+        with open(path_tmp, "w") as f:
+            json.dump(manifest, f)
+        os.replace(path_tmp, path_manifest)
+    except OSError:
+        try:
+            os.remove(path_tmp)
+        except OSError:
+            pass
+
+# keep cache directory below max_bytes, remove orphaned entries first, then least recently used
+# temporary entries of saves in progress are skipped, those of crashed sessions are orphans
+def evictSidecarCache(dir_cache: str, max_bytes: int, keep: List[str]=None) -> None:
+    if not os.path.isdir(dir_cache):
+        return
+    keep = [os.path.abspath(path) for path in (keep or [])]
+    list_entry = []
+    for entry in os.scandir(dir_cache):
+        if not entry.is_dir():
+            continue
+        path_entry = entry.path.replace("\\", "/")
+        if CACHE_TMP_PATTERN.search(entry.name):
+            try:
+                if time.time() - entry.stat().st_mtime < CACHE_TMP_MAX_AGE_S:
+                    continue
+            except OSError: # renamed by its writer meanwhile
+                continue
+            list_entry.append([path_entry, getDirectorySize(path_entry), 0, True])
+            continue
+        try:
+            with open(f"{path_entry}/{CACHE_MANIFEST}") as f:
+                manifest = json.load(f)
+            last_access = manifest.get("last_access", 0)
+            is_orphan = not os.path.exists(manifest["source"]["path"])
+        except (OSError, ValueError, KeyError):
+            last_access, is_orphan = 0, True # broken or unfinished entry
+        list_entry.append([path_entry, getDirectorySize(path_entry), last_access, is_orphan])
+
+    total_bytes = sum(entry[1] for entry in list_entry)
+    # orphans first, then oldest access
+    for path_entry, n_bytes, last_access, is_orphan in sorted(list_entry, key=lambda e: (not e[3], e[2])):
+        if total_bytes <= max_bytes and not is_orphan:
+            break
+        if os.path.abspath(path_entry) in keep:
+            continue
+        try:
+            shutil.rmtree(path_entry)
+            total_bytes -= n_bytes
+        except OSError: # memory-mapped by another session
+            continue
+
+def clearSidecarCache(path_src: str) -> None:
+    shutil.rmtree(getSidecarCachePath(path_src), ignore_errors=True)
@@ -0,0 +1,283 @@
+from __future__ import annotations
+from ..type_definitions import *
+import os
+import sqlite3
+
+# local catalog of Fall.mat, CaImAn HDF5, ROIcuration, ROItracking, Microgliatracking and TIFF files
+# dirs  : one row per scanned directory, a directory is listed again only when its mtime changed
+# files : one row per cataloged file, header metadata (metadata_io) and Fall.mat / TIFF paths it refers to
+DEFAULT_CATALOG_PATH = os.path.join(os.path.expanduser("~"), ".optic", "catalog.sqlite")
+CATALOG_VERSION = 2 # 2: saved files matched by substring
+FILE_KINDS = ["fall", "caiman", "roicuration", "roitracking", "microgliatracking", "tiff"]
+METADATA_COLUMNS = ["Lx", "Ly", "nROIs", "nframes", "nchannels", "nplanes", "fs"]
+REFERENCE_COLUMNS = ["path_fall", "path_fall_pri", "path_fall_sec", "path_tif"]
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS dirs (
+    path        TEXT PRIMARY KEY,
+    parent      TEXT,
+    mtime       REAL
+);
+CREATE INDEX IF NOT EXISTS idx_dirs_parent ON dirs(parent);
+CREATE TABLE IF NOT EXISTS files (
+    path        TEXT PRIMARY KEY,
+    dir         TEXT NOT NULL,
+    name        TEXT NOT NULL,
+    kind        TEXT NOT NULL,
+    size        INTEGER,
+    mtime       REAL,
+    {", ".join(f"{col} REAL" for col in METADATA_COLUMNS)},
+    {", ".join(f"{col} TEXT" for col in REFERENCE_COLUMNS)},
+    error       TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_files_dir ON files(dir);
+CREATE INDEX IF NOT EXISTS idx_files_kind ON files(kind);
+CREATE INDEX IF NOT EXISTS idx_files_path_fall ON files(path_fall);
+CREATE INDEX IF NOT EXISTS idx_files_path_fall_pri ON files(path_fall_pri);
+CREATE INDEX IF NOT EXISTS idx_files_path_fall_sec ON files(path_fall_sec);
+"""
+
+def normalizeCatalogPath(path: str) -> str:
+    return os.path.abspath(path).replace("\\", "/")
+
+# kind of file from its name, None if the file is not cataloged
+# saved files are matched by substring like getMatchedPaths, ROIcuration wins over ROItracking as the notebooks exclude "ROIcuration_"
+def getFileKind(name: str) -> Optional[str]:
+    name_lower = name.lower()
+    ext = os.path.splitext(name_lower)[1]
+    if ext in [".tif", ".tiff"]:
+        return "tiff"
+    if "roicuration" in name_lower and ext in [".mat", ".h5", ".hdf5"]:
+        return "roicuration"
+    if "roitracking" in name_lower and ext in [".mat", ".h5", ".hdf5"]:
+        return "roitracking"
+    if "microgliatracking" in name_lower and ext in [".mat", ".h5", ".hdf5"]:
+        return "microgliatracking"
+    if ext == ".mat" and name_lower.startswith("fall"):
+        return "fall"
+    if ext == ".hdf5":
+        return "caiman"
+    return None
+
+# header of saved ROIcuration / ROItracking / Microgliatracking file, snapshots are not read
+def readSaveFileHeader(path: str) -> Dict[str, Any]:
+    from .snapshot_io import isSnapshotStore, loadSnapshotHeader
+    if isSnapshotStore(path):
+        return loadSnapshotHeader(path)
+    from scipy.io import loadmat
+    list_key = ["NumberOfROI", "NumberOfROI_pri", "path_Fall", "path_Fall_pri", "path_Fall_sec", "path_tif"]
+    return loadmat(path, simplify_cells=True, variable_names=list_key)
+
+# catalog row values of one file, metadata errors are recorded instead of raised
+def readFileRecord(path: str, kind: str) -> Dict[str, Any]:
+    from .metadata_io import peekFileMetadata
+    dict_record = {}
+    try:
+        if kind in ["fall", "caiman", "tiff"]:
+            dict_record.update(peekFileMetadata(path))
+        else:
+            header = readSaveFileHeader(path)
+            dict_record["nROIs"] = header.get("NumberOfROI", header.get("NumberOfROI_pri"))
+            dict_record["path_fall"] = header.get("path_Fall")
+            dict_record["path_fall_pri"] = header.get("path_Fall_pri")
+            dict_record["path_fall_sec"] = header.get("path_Fall_sec")
+            dict_record["path_tif"] = header.get("path_tif")
+    except Exception as e:
+        dict_record["error"] = str(e)
+    # referenced paths are stored normalized, so that they can be joined with files.path
+    for col in REFERENCE_COLUMNS:
+        value = dict_record.get(col)
+        dict_record[col] = value.replace("\\", "/") if isinstance(value, str) and value else None
+    return {col: dict_record.get(col) for col in METADATA_COLUMNS + REFERENCE_COLUMNS + ["error"]}
+
+class SessionCatalog:
+    """
+    SQLite catalog of analysis files under one or more data directories.
+    scan() lists only directories whose mtime changed since the last scan, and reads headers only of new or changed files.
+
+    Args:
+        path_db (str): catalog file, kept on a local disk (SQLite on network shares is slow and unsafe).
+    """
+    def __init__(self, path_db: str=DEFAULT_CATALOG_PATH):
+        os.makedirs(os.path.dirname(os.path.abspath(path_db)), exist_ok=True)
+        self.path_db = path_db
+        self.conn = sqlite3.connect(path_db)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(SCHEMA)
+        # catalog of older version, all directories are listed again at the next scan, unchanged file headers are kept
+        if self.conn.execute("PRAGMA user_version").fetchone()[0] < CATALOG_VERSION:
+            with self.conn:
+                self.conn.execute("DELETE FROM dirs")
+        self.conn.execute(f"PRAGMA user_version = {CATALOG_VERSION}")
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self) -> SessionCatalog:
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    """
+    scan
+    """
+    def scan(
+            self,
+            dir_root            : str,
+            check_files         : bool=False,
+            callback_progress   : Optional[Callable[[str], None]]=None,
+            ) -> Dict[str, int]:
+        """
+        Update the catalog below dir_root.
+
+        Args:
+            check_files (bool): also stat cataloged files in unchanged directories, to catch files rewritten in place.
+            callback_progress: called with each directory which is listed.
+        Returns:
+            counts of listed / skipped directories and added, updated, removed files.
+        """
+        dict_count = {"dir_listed": 0, "dir_skipped": 0, "file_added": 0, "file_updated": 0, "file_removed": 0}
+        dir_root = normalizeCatalogPath(dir_root)
+        with self.conn:
+            if not os.path.isdir(dir_root):
+                self.removeDirectoryTree(dir_root, dict_count)
+                return dict_count
+            list_dir = [(dir_root, os.path.dirname(dir_root))]
+            while list_dir:
+                dir_path, dir_parent = list_dir.pop()
+                try:
+                    mtime = os.stat(dir_path).st_mtime
+                except OSError:
+                    self.removeDirectoryTree(dir_path, dict_count)
+                    continue
+                row = self.conn.execute("SELECT mtime FROM dirs WHERE path = ?", (dir_path,)).fetchone()
+                if row is not None and row["mtime"] == mtime:
+                    # unchanged directory, children are taken from the catalog
+                    dict_count["dir_skipped"] += 1
+                    if check_files:
+                        self.updateKnownFiles(dir_path, dict_count)
+                    list_dir.extend((child["path"], dir_path) for child in self.conn.execute("SELECT path FROM dirs WHERE parent = ?", (dir_path,)))
+                    continue
+                dict_count["dir_listed"] += 1
+                if callback_progress:
+                    callback_progress(dir_path)
+                list_subdir = self.updateDirectory(dir_path, dict_count)
+                self.conn.execute("INSERT OR REPLACE INTO dirs (path, parent, mtime) VALUES (?, ?, ?)", (dir_path, dir_parent, mtime))
+                list_dir.extend((subdir, dir_path) for subdir in list_subdir)
+        return dict_count
+
+    # list one directory, update its files and drop vanished entries, return its subdirectories
+    def updateDirectory(self, dir_path: str, dict_count: Dict[str, int]) -> List[str]:
+        list_subdir = []
+        dict_file_stat = {}
+        with os.scandir(dir_path) as it:
+            for entry in it:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        list_subdir.append(f"{dir_path}/{entry.name}")
+                    elif entry.is_file() and getFileKind(entry.name):
+                        dict_file_stat[f"{dir_path}/{entry.name}"] = entry.stat()
+                except OSError:
+                    continue
+        # subdirectories which disappeared
+        for row in self.conn.execute("SELECT path FROM dirs WHERE parent = ?", (dir_path,)).fetchall():
+            if row["path"] not in list_subdir:
+                self.removeDirectoryTree(row["path"], dict_count)
+        # files which disappeared
+        dict_file_known = {row["path"]: row for row in self.conn.execute("SELECT path, size, mtime FROM files WHERE dir = ?", (dir_path,))}
+        for path in set(dict_file_known) - set(dict_file_stat):
+            self.conn.execute("DELETE FROM files WHERE path = ?", (path,))
+            dict_count["file_removed"] += 1
+        for path, stat in dict_file_stat.items():
+            self.updateFile(path, stat, dict_file_known.get(path), dict_count)
+        return list_subdir
+
+    # stat cataloged files of an unchanged directory
+    def updateKnownFiles(self, dir_path: str, dict_count: Dict[str, int]) -> None:
+        for row in self.conn.execute("SELECT path, size, mtime FROM files WHERE dir = ?", (dir_path,)).fetchall():
+            try:
+                stat = os.stat(row["path"])
+            except OSError:
+                self.conn.execute("DELETE FROM files WHERE path = ?", (row["path"],))
+                dict_count["file_removed"] += 1
+                continue
+            self.updateFile(row["path"], stat, row, dict_count)
+
+    # read header of new or changed file
+    def updateFile(self, path: str, stat: os.stat_result, row_known: Optional[sqlite3.Row], dict_count: Dict[str, int]) -> None:
+        if row_known is not None and row_known["size"] == stat.st_size and row_known["mtime"] == stat.st_mtime:
+            return
+        dir_path, name = path.rsplit("/", 1)
+        kind = getFileKind(name)
+        dict_record = readFileRecord(path, kind)
+        columns = ["path", "dir", "name", "kind", "size", "mtime"] + list(dict_record.keys())
+        values = [path, dir_path, name, kind, stat.st_size, stat.st_mtime] + list(dict_record.values())
+        self.conn.execute(f"INSERT OR REPLACE INTO files ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})", values)
+        dict_count["file_updated" if row_known is not None else "file_added"] += 1
+
+    def removeDirectoryTree(self, dir_path: str, dict_count: Dict[str, int]) -> None:
+        pattern = dir_path.replace("!", "!!").replace("%", "!%").replace("_", "!_") + "/%"
+        n_removed = self.conn.execute("DELETE FROM files WHERE dir = ? OR dir LIKE ? ESCAPE '!'", (dir_path, pattern)).rowcount
+        self.conn.execute("DELETE FROM dirs WHERE path = ? OR path LIKE ? ESCAPE '!'", (dir_path, pattern))
+        dict_count["file_removed"] += n_removed
+
+    """
+    query
+    """
+    def queryFiles(
+            self,
+            kind        : Optional[str]=None,
+            dir_root    : Optional[str]=None,
+            **kwargs
+            ) -> List[Dict[str, Any]]:
+        """
+        Cataloged files as dicts, filtered by kind, directory and equality on columns, e.g. queryFiles("fall", Lx=512).
+        """
+        list_where, list_value = [], []
+        if kind is not None:
+            list_where.append("kind = ?")
+            list_value.append(kind)
+        if dir_root is not None:
+            dir_root = normalizeCatalogPath(dir_root)
+            list_where.append("(dir = ? OR dir LIKE ? ESCAPE '!')")
+            list_value += [dir_root, dir_root.replace("!", "!!").replace("%", "!%").replace("_", "!_") + "/%"]
+        for col, value in kwargs.items():
+            if col not in METADATA_COLUMNS + REFERENCE_COLUMNS + ["name", "dir"]:
+                raise ValueError(f"unknown catalog column: {col}")
+            list_where.append(f"{col} = ?")
+            list_value.append(value)
+        sql = "SELECT * FROM files" + (" WHERE " + " AND ".join(list_where) if list_where else "") + " ORDER BY path"
+        return [dict(row) for row in self.conn.execute(sql, list_value)]
+
+    # same filtering as path_utils.getMatchedPaths, on cataloged paths instead of a directory walk
+    def queryPaths(
+            self,
+            kind                : Optional[str]=None,
+            dir_root            : Optional[str]=None,
+            list_str_include    : List[str]=None,
+            list_str_exclude    : List[str]=None,
+            match_include       : Literal["and", "or"]="and",
+            match_exclude       : Literal["and", "or"]="or",
+            case_sensitive      : bool=True,
+            ) -> List[str]:
+        from ..utils.path_utils import getMatchedPaths
+        list_path = [row["path"] for row in self.queryFiles(kind, dir_root)]
+        if not list_str_include and not list_str_exclude:
+            return list_path
+        return getMatchedPaths(list_path, list_str_include, list_str_exclude, match_include, match_exclude, case_sensitive)
+
+    # (path_roi_tracking, path_Fall_pri, path_Fall_sec) from the catalog, no ROItracking file is opened
+    # files whose header could not be read are left out, see getErrors
+    def getROITrackingPairs(self, dir_root: Optional[str]=None) -> List[Tuple[str, str, str]]:
+        return [(row["path"], row["path_fall_pri"], row["path_fall_sec"]) for row in self.queryFiles("roitracking", dir_root) if not row["error"]]
+
+    # ROIcuration / ROItracking files which refer to the Fall.mat
+    def getFilesReferringTo(self, path_fall: str) -> List[Dict[str, Any]]:
+        path_fall = path_fall.replace("\\", "/")
+        sql = "SELECT * FROM files WHERE path_fall = ? OR path_fall_pri = ? OR path_fall_sec = ? ORDER BY path"
+        return [dict(row) for row in self.conn.execute(sql, (path_fall, path_fall, path_fall))]
+
+    # files whose header could not be read at the last scan
+    def getErrors(self, dir_root: Optional[str]=None) -> List[Tuple[str, str]]:
+        return [(row["path"], row["error"]) for row in self.queryFiles(dir_root=dir_root) if row["error"]]
@@ -8,6 +8,7 @@ import tifffile
 import datetime
 import numpy as np
 from .file_dialog import openFileDialog, saveFileDialog
+from .snapshot_io import isSnapshotStore, appendSnapshots, loadSnapshotHeader, listSnapshotDates, loadSnapshot
 from ..config.constants import Extension
 
 if TYPE_CHECKING:
@@ -16,9 +17,15 @@ if TYPE_CHECKING:
 # load Suite2p Fall.mat data
 def loadFallMat(
         path_fall       : str, 
-        preprocessing   : bool=True
+        preprocessing   : bool=True,
+        lazy            : bool=False
         ) -> Dict[str, Any]:
-    Fall = loadmat(path_fall, simplify_cells=True)
+    # lazy: traces (F, Fneu, spks, ...) are read row by row from disk on demand
+    if lazy:
+        from .lazy_mat import loadFallMatLazy
+        Fall = loadFallMatLazy(path_fall)
+    else:
+        Fall = loadmat(path_fall, simplify_cells=True)
     if preprocessing:
         from ..preprocessing.preprocessing_fall import convertMatToDictFall
         dict_Fall = convertMatToDictFall(Fall)
@@ -72,25 +79,50 @@ def saveTiffStack(
         imagej          : bool=True,
         metadata        : Dict[str, Any] = None
         ) -> None:
-    # To save as ImageJ format, move axes to the last
     path_dst, is_overwrite = saveFileDialog(q_widget=q_widget, file_type=".tif", title="Save TIFF image stack file", initial_dir=path_dst)
     if path_dst:
-        if imagej:
-            data_ijformat = np.moveaxis(tiff_stack, [0,1,2,3,4], [4,3,2,1,0])
-            tifffile.imwrite(path_dst, data_ijformat, imagej=imagej, metadata=metadata)
-        else:
-            tifffile.imwrite(path_dst, tiff_stack)
+        def _writeTiffStack():
+            writeTiffStackByPlane(path_dst, tiff_stack, imagej=imagej, metadata=metadata)
+        runFileWriteTask(q_widget, path_dst, _writeTiffStack, msg_success=("File save", "TIFF image stack file saved!"))
     else:
         return
 
+# write XYCZT stack as TZCYX pages one (Y, X) plane at a time, a lazy stack is never loaded as a whole
+def writeTiffStackByPlane(
+        path_dst        : str,
+        tiff_stack      : np.array[Any, Any, Any, Any, Any],
+        imagej          : bool=True,
+        metadata        : Dict[str, Any] = None
+        ) -> None:
+    from ..preprocessing.preprocessing_tiff import getPlaneFromXYCZTStack
+    size_x, size_y, size_c, size_z, size_t = tiff_stack.shape
+    iter_plane = (
+        np.asarray(getPlaneFromXYCZTStack(tiff_stack, plane_z, plane_t, channel)).T
+        for plane_t in range(size_t) for plane_z in range(size_z) for channel in range(size_c)
+        )
+    # axes of non-ImageJ files are kept in the shaped description
+    with tifffile.TiffWriter(path_dst, imagej=imagej) as tif:
+        tif.write(
+            iter_plane,
+            shape=(size_t, size_z, size_c, size_y, size_x),
+            dtype=tiff_stack.dtype,
+            metadata=metadata if imagej else {"axes": "TZCYX"},
+            )
+
 # load tiff stack data (XYCZT)
 def loadTiffStack(
         path_tiff       : str, 
         preprocessing   : bool=True, 
-        axes_tgt        : str="XYCZT"
+        axes_tgt        : str="XYCZT",
+        lazy            : bool=False,
+        plane_cache_mb  : float=0
         ) -> np.ndarray:
     if path_tiff:
-        if preprocessing:
+        if lazy:
+            # planes are read from disk on demand
+            from .lazy_tiff import openLazyTiffStack
+            im, metadata = openLazyTiffStack(path_tiff, axes_tgt=axes_tgt, plane_cache_mb=plane_cache_mb)
+        elif preprocessing:
             from ..preprocessing.preprocessing_tiff import standardizeTIFFStack
             with tifffile.TiffFile(path_tiff) as tif:
                 series = tif.series[0]
@@ -114,17 +146,20 @@ def loadEventFilesNPY(
     list_path_eventfile = [path.replace("\\", "/") for path in list_path_eventfile]
 
     if len(list_path_eventfile) > 0:
+        # check lengths (first axis, as len() of the array) from the npy headers before loading any file
+        from .metadata_io import readNPYShape
+        len_Fall = data_manager.getLengthOfData(app_key)
+        for path_eventfile in list_path_eventfile:
+            shape = readNPYShape(path_eventfile)
+            len_eventfile = shape[0] if len(shape) > 0 else None
+            if not len_eventfile == len_Fall:
+                QMessageBox.warning(q_window, "File load failed", f"Length of data does not match! \nFall: {len_Fall}, eventfile: {len_eventfile}\n{path_eventfile}")
+                return False
         data_manager.clearDictEventfile(app_key) # initialize dict_eventfile
         for path_eventfile in list_path_eventfile:
             eventfile = np.load(path_eventfile)
-            len_eventfile = len(eventfile)
-            len_Fall = data_manager.getLengthOfData(app_key)
             eventfile_name = path_eventfile.split("/")[-1].split(".")[0]
-            if not len_eventfile == len_Fall:
-                QMessageBox.warning(q_window, "File load failed", f"Length of data does not match! \nFall: {len_Fall}, eventfile: {len_eventfile}")
-                return False
-            else:
-                data_manager.dict_eventfile[app_key][eventfile_name] = eventfile
+            data_manager.dict_eventfile[app_key][eventfile_name] = eventfile
         return True
     else:
         return False
@@ -160,12 +195,13 @@ def loadCellposeMaskNPY(
     
 # save imagej ROI Manager zip file
 def saveROIManagerZip(
-        q_window        : QMainWindow, 
-        q_lineedit      : QLineEdit, 
-        list_roi        : List[ImagejRoi],
-        is_save_reg     : bool=False,
+        q_window                : QMainWindow, 
+        q_lineedit              : QLineEdit, 
+        dict_roi_matching       : ROITracks,
+        dict_roi_coords_xyct    : Dict[int, Dict[int, Dict[Literal["xpix", "ypix", "med"], np.ndarray]]],
+        is_save_reg             : bool=False,
         ) -> None:
-    from roifile import roiwrite
+    from ..preprocessing.preprocessing_imagej import writeImagejRoiZip
 
     path_src = q_lineedit.text()
     if is_save_reg:
@@ -175,11 +211,21 @@ def saveROIManagerZip(
     path_dst, is_overwrite = saveFileDialog(q_widget=q_window, file_type=".zip", title="Save ROI Manager zip File", initial_dir=path_dst)
     
     if path_dst:
-        try:
-            roiwrite(path_dst, list_roi, mode='w')
-            QMessageBox.information(q_window, "File save", f"ROI set zip file saved.")
-        except Exception as e:
-            QMessageBox.warning(q_window, "File save failed", f"Error saving ROICheck file: {e}")
+        # cached contours are reused, the rest are computed in the save task, on a copy of the ROI state edited in GUI thread
+        from copy import deepcopy
+        from ..utils.roi_store import ROIStore
+        from ..utils.roi_contour import getROIContourCache
+        dict_contour_xyct = {
+            t_plane: getROIContourCache(roi_store).getCachedContours("edge")
+            for t_plane, roi_store in dict_roi_coords_xyct.items() if isinstance(roi_store, ROIStore)
+            }
+        dict_roi_matching = deepcopy(dict_roi_matching)
+        dict_roi_coords_xyct = deepcopy(dict_roi_coords_xyct)
+        runFileWriteTask(
+            q_window, path_dst, lambda: writeImagejRoiZip(path_dst, dict_roi_matching, dict_roi_coords_xyct, dict_contour_xyct=dict_contour_xyct),
+            msg_success=("File save", f"ROI set zip file saved."),
+            msg_fail=("File save failed", "Error saving ROICheck file"),
+            )
     
 # load imagej ROI Manager zip file
 def loadROIManagerZip(        
@@ -236,19 +282,42 @@ def generateSavePath(
     path_dst = os.path.join(dir_src, name_ext_dst).replace("\\", "/")
     return path_dst
 
+# write file in background task, writes to the same file are queued
+def runFileWriteTask(
+        q_window        : QWidget,
+        path_dst        : str,
+        func_write      : Callable[[], None],
+        msg_success     : Tuple[str, str],
+        msg_fail        : Tuple[str, str]=("File save failed", "Error saving file"),
+        list_path_read  : Optional[List[str]]=None,
+        ) -> None:
+    # list_path_read: files read by func_write, queued after pending writes to them
+    from ..manager.task_manager import getTaskManager
+    def _onError(e):
+        QMessageBox.warning(q_window, msg_fail[0], f"{msg_fail[1]}: {e}")
+    list_path_lock = [path_dst] + [path for path in (list_path_read or []) if path != path_dst]
+    getTaskManager(q_window).runTask(
+        f"Save {os.path.basename(path_dst)}", lambda task: func_write(),
+        on_result=lambda _: QMessageBox.information(q_window, *msg_success),
+        on_error=_onError,
+        lock_keys=[f"file_{os.path.normcase(os.path.abspath(path))}" for path in list_path_lock],
+        cancellable=False,
+        )
+
 # save table content as ROIcheck.mat
 def saveROICheck(
         q_window        : QMainWindow, 
         q_lineedit      : QLineEdit, 
-        q_table         : QTableWidget, 
+        q_table         : QTableView, 
         gui_defaults    : GuiDefaults,
         table_columns   : TableColumns,
         json_config     : JsonConfig, 
         local_var       : bool=True
         ) -> None:
     path_src = q_lineedit.text()
-    path_dst = generateSavePath(path_src, prefix="ROIcuration_", remove_strings="Fall_", new_extension=Extension.MAT) # .tif -> ROIcheck_.mat
-    path_dst, is_overwrite = saveFileDialog(q_widget=q_window, file_type=".mat", title="Save ROIcheck mat File", initial_dir=path_dst)
+    path_dst = generateSavePath(path_src, prefix="ROIcuration_", remove_strings="Fall_", new_extension=Extension.H5) # .tif -> ROIcheck_.h5
+    # .h5: append-only store, .mat: legacy layout for MATLAB users
+    path_dst, is_overwrite = saveFileDialog(q_widget=q_window, file_type=[Extension.H5, Extension.MAT], title="Save ROIcheck File", initial_dir=path_dst)
     
     if path_dst:
         try:
@@ -259,45 +328,93 @@ def saveROICheck(
                 dialog.getUser()
                 user = dialog.user
             now = f"save_{datetime.datetime.now().strftime('%y%m%d_%H%M%S')}"
-            if is_overwrite:
-                mat_roicheck = loadmat(path_dst, simplify_cells=True)
-                dict_roicheck = convertTableDataToDictROICheck(q_table, table_columns, local_var)
-                mat_roicheck = convertDictROICheckToMatROICheck(
-                    dict_roicheck,
-                    mat_roicheck=mat_roicheck,
-                    date=now,
-                    user=user,
-                    path_fall=path_src,
-                    )
-            else:
-                dict_roicheck = convertTableDataToDictROICheck(q_table, table_columns, local_var)
-                mat_roicheck = convertDictROICheckToMatROICheck(
-                    dict_roicheck,
-                    date=now,
-                    user=user,
-                    n_roi=q_table.rowCount(),
-                    path_fall=path_src,
-                    )
-                
-            # WARNING !!!
-            # "savemat" can not save np.array([[1]]) as [1], automatically convert to 1  
-            savemat(path_dst, mat_roicheck)
-            QMessageBox.information(q_window, "File save", f"ROICheck file saved!\nuser: {user}, date: {now}")
+            # table is read here, the file is written in background task
+            dict_roicheck = convertTableDataToDictROICheck(q_table, table_columns, local_var)
+            n_roi = q_table.model().rowCount()
+
+            def _writeROICheck():
+                if isSnapshotStore(path_dst):
+                    # only the new snapshot is written
+                    mat_roicheck = convertDictROICheckToMatROICheck(
+                        dict_roicheck,
+                        date=now,
+                        user=user,
+                        n_roi=n_roi,
+                        path_fall=path_src,
+                        )
+                    appendSnapshots(path_dst, mat_roicheck, root_key="manualROIcheck")
+                    return
+                if is_overwrite:
+                    # read inside the task, after previous writes to the same file
+                    mat_roicheck = loadmat(path_dst, simplify_cells=True)
+                    mat_roicheck = convertDictROICheckToMatROICheck(
+                        dict_roicheck,
+                        mat_roicheck=mat_roicheck,
+                        date=now,
+                        user=user,
+                        path_fall=path_src,
+                        )
+                else:
+                    mat_roicheck = convertDictROICheckToMatROICheck(
+                        dict_roicheck,
+                        date=now,
+                        user=user,
+                        n_roi=n_roi,
+                        path_fall=path_src,
+                        )
+                    
+                # WARNING !!!
+                # "savemat" can not save np.array([[1]]) as [1], automatically convert to 1  
+                savemat(path_dst, mat_roicheck)
+
+            runFileWriteTask(
+                q_window, path_dst, _writeROICheck,
+                msg_success=("File save", f"ROICheck file saved!\nuser: {user}, date: {now}"),
+                msg_fail=("File save failed", "Error saving ROICheck file"),
+                )
         except Exception as e:
             QMessageBox.warning(q_window, "File save failed", f"Error saving ROICheck file: {e}")
 
+# export ROIcheck .h5 snapshot store to legacy ROIcheck .mat for MATLAB users
+def exportROICheckToMat(
+        q_window        : QMainWindow,
+        q_lineedit      : QLineEdit,
+        ) -> None:
+    path_fall = q_lineedit.text()
+    initial_dir = generateSavePath(path_fall, prefix="ROIcuration_", remove_strings="Fall_", new_extension=Extension.H5) if path_fall else ""
+    path_src = openFileDialog(q_widget=q_window, file_type=Extension.H5, title="Open ROIcheck File", initial_dir=initial_dir)
+    if not path_src:
+        return
+    if not isSnapshotStore(path_src):
+        QMessageBox.warning(q_window, "File export failed", f"Not a ROIcheck snapshot store: {path_src}")
+        return
+    path_dst, _ = saveFileDialog(q_widget=q_window, file_type=Extension.MAT, title="Export ROIcheck File", initial_dir=os.path.splitext(path_src)[0] + Extension.MAT)
+    if path_dst:
+        from .snapshot_io import exportSnapshotStoreToMat
+        runFileWriteTask(
+            q_window, path_dst, lambda: exportSnapshotStoreToMat(path_src, path_dst, root_key="manualROIcheck"),
+            msg_success=("File export", f"ROICheck file exported!\n{path_dst}"),
+            msg_fail=("File export failed", "Error exporting ROICheck file"),
+            list_path_read=[path_src],
+            )
+
 # load ROIcheck.mat
 def loadROICheck(
         q_window        : QMainWindow, 
-        q_table         : QTableWidget, 
+        q_table         : QTableView, 
         gui_defaults    : GuiDefaults,
         table_columns   : TableColumns,
         table_control   : TableControl,
         ) -> Union[Dict[str, Any], None]:
-    path_roicheck = openFileDialog(q_widget=q_window, file_type=".mat", title="Open ROIcheck mat File")
+    path_roicheck = openFileDialog(q_widget=q_window, file_type=[Extension.MAT, Extension.H5], title="Open ROIcheck File")
     if path_roicheck:
         try:
-            mat_roicheck = loadmat(path_roicheck, simplify_cells=True)
+            if isSnapshotStore(path_roicheck):
+                # header and date index only, the selected snapshot is read below
+                mat_roicheck = loadSnapshotHeader(path_roicheck)
+                mat_roicheck["manualROIcheck"] = {date: None for date in listSnapshotDates(path_roicheck, "manualROIcheck")}
+            else:
+                mat_roicheck = loadmat(path_roicheck, simplify_cells=True)
             # check number of ROIs between of Fall file and of ROICheck file
             if table_control.len_row != mat_roicheck["NumberOfROI"]:
                 QMessageBox.warning(
@@ -314,6 +431,8 @@ def loadROICheck(
                 date = dialog.date
             
             # select saved date
+            if isSnapshotStore(path_roicheck):
+                mat_roicheck["manualROIcheck"][date] = loadSnapshot(path_roicheck, "manualROIcheck", date)
             dict_roicheck = mat_roicheck["manualROIcheck"][date]
             dict_roicheck = {k.replace(" ", "_"): v for k, v in dict_roicheck.items()} # this is temporary fix for old ROIcheck files !!!
 
@@ -340,6 +459,7 @@ def loadROICheck(
 
             from ..gui.table_setup import applyDictROICheckToTable
             applyDictROICheckToTable(q_table, table_columns, dict_roicheck)
+            table_control.refreshROIDisplay()
             QMessageBox.information(q_window, "File load", "ROICheck file loaded!")
         except Exception as e:
             QMessageBox.warning(q_window, "File load failed", f"Error loading ROICheck file: {e}")
@@ -349,8 +469,8 @@ def saveROITracking(
         q_window         : QMainWindow, 
         q_lineedit_pri   : QLineEdit, 
         q_lineedit_sec   : QLineEdit,
-        q_table_pri      : QTableWidget, 
-        q_table_sec      : QTableWidget,
+        q_table_pri      : QTableView, 
+        q_table_sec      : QTableView,
         gui_defaults     : GuiDefaults,
         table_column_pri : TableColumns,
         table_column_sec : TableColumns,
@@ -359,8 +479,9 @@ def saveROITracking(
         ) -> None:
     path_src_pri = q_lineedit_pri.text()
     path_src_sec = q_lineedit_sec.text()
-    path_dst = generateSavePath(path_src_pri, prefix="ROItracking_", remove_strings="Fall_", new_extension=Extension.MAT)
-    path_dst, is_overwrite = saveFileDialog(q_widget=q_window, file_type=".mat", title="Save ROItracking mat File", initial_dir=path_dst)
+    path_dst = generateSavePath(path_src_pri, prefix="ROItracking_", remove_strings="Fall_", new_extension=Extension.H5)
+    # .h5: append-only store, .mat: legacy layout for MATLAB users
+    path_dst, is_overwrite = saveFileDialog(q_widget=q_window, file_type=[Extension.H5, Extension.MAT], title="Save ROItracking File", initial_dir=path_dst)
     
     if path_dst:
         try:
@@ -371,35 +492,57 @@ def saveROITracking(
                 dialog.getUser()
                 user = dialog.user
             now = f"save_{datetime.datetime.now().strftime('%y%m%d_%H%M%S')}" # key of struct
-            if is_overwrite:
-                mat_roi_tracking = loadmat(path_dst, simplify_cells=True)
-                dict_roi_tracking_pri = convertTableDataToDictROITracking(q_table_pri, q_table_sec, table_column_pri, local_var)
-                dict_roi_check_sec = convertTableDataToDictROICheck(q_table_sec, table_column_sec)
-                mat_roi_tracking = convertDictROITrackingToMatROITracking(
-                    dict_roi_tracking_pri,
-                    dict_roi_check_sec,
-                    mat_roi_tracking=mat_roi_tracking,
-                    date=now,
-                    user=user,
-                    path_fall_pri=path_src_pri,
-                    path_fall_sec=path_src_sec,
-                    )
-            else:
-                dict_roi_tracking_pri = convertTableDataToDictROITracking(q_table_pri, q_table_sec, table_column_pri, local_var)
-                dict_roi_check_sec = convertTableDataToDictROICheck(q_table_sec, table_column_sec)
-                mat_roi_tracking = convertDictROITrackingToMatROITracking(
-                    dict_roi_tracking_pri,
-                    dict_roi_check_sec,
-                    date=now,
-                    user=user,
-                    n_roi_pri=q_table_pri.rowCount(),
-                    n_roi_sec=q_table_sec.rowCount(),
-                    path_fall_pri=path_src_pri,
-                    path_fall_sec=path_src_sec
-                    )
-            
-            savemat(path_dst, mat_roi_tracking)
-            QMessageBox.information(q_window, "File save", f"ROI Tracking file saved!\nuser: {user}, date: {now}")
+            # tables are read here, the file is written in background task
+            dict_roi_tracking_pri = convertTableDataToDictROITracking(q_table_pri, q_table_sec, table_column_pri, local_var)
+            dict_roi_check_sec = convertTableDataToDictROICheck(q_table_sec, table_column_sec)
+            n_roi_pri, n_roi_sec = q_table_pri.model().rowCount(), q_table_sec.model().rowCount()
+
+            def _writeROITracking():
+                if isSnapshotStore(path_dst):
+                    # only the new snapshot is written
+                    mat_roi_tracking = convertDictROITrackingToMatROITracking(
+                        dict_roi_tracking_pri,
+                        dict_roi_check_sec,
+                        date=now,
+                        user=user,
+                        n_roi_pri=n_roi_pri,
+                        n_roi_sec=n_roi_sec,
+                        path_fall_pri=path_src_pri,
+                        path_fall_sec=path_src_sec
+                        )
+                    appendSnapshots(path_dst, mat_roi_tracking, root_key="ROITracking")
+                    return
+                if is_overwrite:
+                    # read inside the task, after previous writes to the same file
+                    mat_roi_tracking = loadmat(path_dst, simplify_cells=True)
+                    mat_roi_tracking = convertDictROITrackingToMatROITracking(
+                        dict_roi_tracking_pri,
+                        dict_roi_check_sec,
+                        mat_roi_tracking=mat_roi_tracking,
+                        date=now,
+                        user=user,
+                        path_fall_pri=path_src_pri,
+                        path_fall_sec=path_src_sec,
+                        )
+                else:
+                    mat_roi_tracking = convertDictROITrackingToMatROITracking(
+                        dict_roi_tracking_pri,
+                        dict_roi_check_sec,
+                        date=now,
+                        user=user,
+                        n_roi_pri=n_roi_pri,
+                        n_roi_sec=n_roi_sec,
+                        path_fall_pri=path_src_pri,
+                        path_fall_sec=path_src_sec
+                        )
+                
+                savemat(path_dst, mat_roi_tracking)
+
+            runFileWriteTask(
+                q_window, path_dst, _writeROITracking,
+                msg_success=("File save", f"ROI Tracking file saved!\nuser: {user}, date: {now}"),
+                msg_fail=("File save failed", "Error saving ROI Tracking file"),
+                )
         except Exception as e:
             # raise e
             QMessageBox.warning(q_window, "File save failed", f"Error saving ROI Tracking file: {e}")
@@ -407,18 +550,23 @@ def saveROITracking(
 # load ROITracking.mat
 def loadROITracking(
         q_window           : QMainWindow, 
-        q_table_pri        : QTableWidget, 
-        q_table_sec        : QTableWidget,
+        q_table_pri        : QTableView, 
+        q_table_sec        : QTableView,
         gui_defaults       : GuiDefaults,
         table_column_pri   : TableColumns,
         table_column_sec   : TableColumns,
         table_control_pri  : TableControl,
         table_control_sec  : TableControl,
         ) -> None:
-    path_roi_tracking = openFileDialog(q_widget=q_window, file_type=".mat", title="Open ROItracking mat File")
+    path_roi_tracking = openFileDialog(q_widget=q_window, file_type=[Extension.MAT, Extension.H5], title="Open ROItracking File")
     if path_roi_tracking:
         try:
-            mat_roi_tracking = loadmat(path_roi_tracking, simplify_cells=True)
+            if isSnapshotStore(path_roi_tracking):
+                # header and date index only, the selected snapshot is read below
+                mat_roi_tracking = loadSnapshotHeader(path_roi_tracking)
+                mat_roi_tracking["ROITracking"] = {date: None for date in listSnapshotDates(path_roi_tracking, "ROITracking")}
+            else:
+                mat_roi_tracking = loadmat(path_roi_tracking, simplify_cells=True)
             # check number of ROIs between of Fall file and of ROI tracking file
             if table_control_pri.len_row != mat_roi_tracking["NumberOfROI_pri"]:
                 QMessageBox.warning(q_window, "File load failed", f"Length of data does not match! \npri Table: {table_control_pri.len_row}, pri ROICheck: {mat_roi_tracking['NumberOfROI_pri']}")
@@ -434,6 +582,8 @@ def loadROITracking(
                 date = dialog.date
             
             # select saved date
+            if isSnapshotStore(path_roi_tracking):
+                mat_roi_tracking["ROITracking"][date] = loadSnapshot(path_roi_tracking, "ROITracking", date)
             dict_roi_tracking_pri = mat_roi_tracking["ROITracking"][date]["pri"]
             dict_roi_check_sec = mat_roi_tracking["ROITracking"][date]["sec"]
             dict_roi_tracking_pri = {k.replace(" ", "_"): v for k, v in dict_roi_tracking_pri.items()} # this is temporary fix for old ROIcheck files !!!
@@ -451,6 +601,8 @@ def loadROITracking(
             from ..gui.table_setup import applyDictROICheckToTable, applyDictROITrackingToTable
             applyDictROITrackingToTable(q_table_pri, table_column_pri, dict_roi_tracking_pri)
             applyDictROICheckToTable(q_table_sec, table_column_sec, dict_roi_check_sec)
+            table_control_pri.refreshROIDisplay()
+            table_control_sec.refreshROIDisplay()
             QMessageBox.information(q_window, "File load", "ROICheck file loaded!")
         except Exception as e:
             QMessageBox.warning(q_window, "File load failed", f"Error loading ROICheck file: {e}")
@@ -477,8 +629,10 @@ def saveRegisteredROICoordsAndBGImage(
             "dict_roi_coords_reg": arr_roi_coords_reg,
         }
 
-        savemat(path_dst, mat_roi_img_reg)
-        QMessageBox.information(q_window, "File save", f"Registered ROI coordinates and BG Image file saved!")
+        runFileWriteTask(
+            q_window, path_dst, lambda: savemat(path_dst, mat_roi_img_reg),
+            msg_success=("File save", f"Registered ROI coordinates and BG Image file saved!"),
+            )
 
 # load registered ROI coordinates and background images
 def loadRegisteredROICoordsAndBGImage(
@@ -493,10 +647,12 @@ def loadRegisteredROICoordsAndBGImage(
         mat_roi_img_reg = loadmat(path_roi_img_reg, simplify_cells=True)
         dict_img_bg_reg = mat_roi_img_reg["dict_img_bg_reg"]
         mat_roi_coords_reg = mat_roi_img_reg["dict_roi_coords_reg"]
-        dict_roi_coords_reg = {i: coords for i, coords in enumerate(mat_roi_coords_reg)}
+        from ..utils.roi_store import ROIStore
+        dict_roi_coords_reg = ROIStore.fromDictROICoords({i: coords for i, coords in enumerate(mat_roi_coords_reg)})
 
         data_manager.dict_im_bg_reg[app_key] = dict_img_bg_reg
         data_manager.dict_roi_coords_reg[app_key] = dict_roi_coords_reg
+        data_manager.updateImageVersion()
 
         QMessageBox.information(q_window, "File load", f"Registered ROI coordinates and BG Image file loaded!")
 
@@ -506,14 +662,15 @@ def saveMicrogliaTracking(
         q_lineedit                  : QLineEdit, 
         gui_defaults                : GuiDefaults,
         json_config                 : JsonConfig, 
-        dict_roi_matching           : Dict[str, Dict[int, List[int] | Dict[int, Dict[int, Optional[int]]]]],
+        dict_roi_matching           : ROITracks,
         dict_roi_coords_xyct        : Dict[int, Dict[int, Dict[Literal["xpix", "ypix", "med"], np.ndarray[np.int32]]]],
         dict_roi_coords_xyct_reg    : Dict[int, Dict[int, Dict[Literal["xpix", "ypix", "med"], np.ndarray[np.int32]]]],
         dict_tiff_reg               : Dict[AppKeys, np.ndarray[np.int32]]
         ) -> None:
     path_src = q_lineedit.text()
-    path_dst = generateSavePath(path_src, prefix="Microgliatracking_", remove_strings="Fall_", new_extension=".mat") # .tif -> MicrogliaTracking_.mat
-    path_dst, is_overwrite = saveFileDialog(q_widget=q_window, file_type=".mat", title="Save Microglia tracking mat File", initial_dir=path_dst)
+    path_dst = generateSavePath(path_src, prefix="Microgliatracking_", remove_strings="Fall_", new_extension=Extension.H5) # .tif -> MicrogliaTracking_.h5
+    # .h5: append-only store with deduplicated registered stacks, .mat: legacy layout for MATLAB users
+    path_dst, is_overwrite = saveFileDialog(q_widget=q_window, file_type=[Extension.H5, Extension.MAT], title="Save Microglia tracking File", initial_dir=path_dst)
     
     if path_dst:
         try:
@@ -524,52 +681,78 @@ def saveMicrogliaTracking(
                 dialog.getUser()
                 user = dialog.user
             now = f"save_{datetime.datetime.now().strftime('%y%m%d_%H%M%S')}" # key of struct
-            if is_overwrite:
-                mat_microglia_tracking = loadmat(path_dst, simplify_cells=True)
-
-                # load ROITracking, ROICoords of all dates
-                for date_ in mat_microglia_tracking["ROI"].keys():
-                    dict_roi_matching_, dict_roi_coords_xyct_, dict_roi_coords_xyct_reg_ = convertMatMicrogliaTrackingToDictROIMatchingAndDictROICoords(mat_microglia_tracking["ROI"][date_])
-                    dict_tiff_reg_ = mat_microglia_tracking["ROI"][date_]["BGImageRegistered"]
-                    # loaded TIF shape is XYCT, so convert to XYCZT
-                    from ..preprocessing.preprocessing_tiff import standardizeTIFFStack
-                    for app_key in dict_tiff_reg_.keys():
-                        dict_tiff_reg_[app_key] = standardizeTIFFStack(dict_tiff_reg_[app_key], "XYCT", "XYCZT")
-                    user_ = mat_microglia_tracking["ROI"][date_]["user"]
-                    dict_roi_matching_converted_, arr_roi_coords_xyct_, arr_roi_coords_xyct_reg_ = convertContentsOfDictROIMatchingAndDictROICoordsToArray(
-                        dict_roi_matching_, dict_roi_coords_xyct_, dict_roi_coords_xyct_reg_
+            # file is written in background task, on a copy of the ROI state edited in GUI thread
+            from copy import deepcopy
+            dict_roi_matching = deepcopy(dict_roi_matching)
+            dict_roi_coords_xyct = deepcopy(dict_roi_coords_xyct)
+            dict_roi_coords_xyct_reg = deepcopy(dict_roi_coords_xyct_reg)
+            dict_tiff_reg = dict(dict_tiff_reg)
+            def _writeMicrogliaTracking():
+                if isSnapshotStore(path_dst):
+                    # only the new snapshot is written, registered stacks are stored once per content
+                    mat_microglia_tracking = convertDictROIMatchingAndDictROICoordsToMatMicrogliaTracking(
+                        dict_roi_matching,
+                        dict_roi_coords_xyct,
+                        dict_roi_coords_xyct_reg,
+                        dict_tiff_reg,
+                        date=now,
+                        user=user,
+                        path_tif=path_src,
+                    )
+                    appendSnapshots(path_dst, mat_microglia_tracking, root_key="ROI", blob_keys=["BGImageRegistered"])
+                    return
+                if is_overwrite:
+                    # read inside the task, after previous writes to the same file
+                    mat_microglia_tracking = loadmat(path_dst, simplify_cells=True)
+
+                    # load ROITracking, ROICoords of all dates
+                    for date_ in mat_microglia_tracking["ROI"].keys():
+                        dict_roi_matching_, dict_roi_coords_xyct_, dict_roi_coords_xyct_reg_ = convertMatMicrogliaTrackingToDictROIMatchingAndDictROICoords(mat_microglia_tracking["ROI"][date_])
+                        dict_tiff_reg_ = mat_microglia_tracking["ROI"][date_]["BGImageRegistered"]
+                        # loaded TIF shape is XYCT, so convert to XYCZT
+                        from ..preprocessing.preprocessing_tiff import standardizeTIFFStack
+                        for app_key in dict_tiff_reg_.keys():
+                            dict_tiff_reg_[app_key] = standardizeTIFFStack(dict_tiff_reg_[app_key], "XYCT", "XYCZT")
+                        user_ = mat_microglia_tracking["ROI"][date_]["user"]
+                        dict_roi_matching_converted_, arr_roi_coords_xyct_, arr_roi_coords_xyct_reg_ = convertContentsOfDictROIMatchingAndDictROICoordsToArray(
+                            dict_roi_matching_, dict_roi_coords_xyct_, dict_roi_coords_xyct_reg_
+                        )
+                        mat_microglia_tracking["ROI"][date_] = {
+                            "ROITracking": dict_roi_matching_converted_, 
+                            "ROICoords": arr_roi_coords_xyct_, 
+                            "ROICoordsRegistered": arr_roi_coords_xyct_reg_,
+                            "BGImageRegistered": dict_tiff_reg_,
+                            "user": user_
+                            }
+
+                    mat_microglia_tracking = convertDictROIMatchingAndDictROICoordsToMatMicrogliaTracking(
+                        dict_roi_matching,
+                        dict_roi_coords_xyct,
+                        dict_roi_coords_xyct_reg,
+                        dict_tiff_reg,
+                        mat_microglia_tracking,
+                        date=now,
+                        user=user,
+                        path_tif=path_src,
+                    )
+                else:
+                    mat_microglia_tracking = convertDictROIMatchingAndDictROICoordsToMatMicrogliaTracking(
+                        dict_roi_matching,
+                        dict_roi_coords_xyct,
+                        dict_roi_coords_xyct_reg,
+                        dict_tiff_reg,
+                        date=now,
+                        user=user,
+                        path_tif=path_src,
                     )
-                    mat_microglia_tracking["ROI"][date_] = {
-                        "ROITracking": dict_roi_matching_converted_, 
-                        "ROICoords": arr_roi_coords_xyct_, 
-                        "ROICoordsRegistered": arr_roi_coords_xyct_reg_,
-                        "BGImageRegistered": dict_tiff_reg_,
-                        "user": user_
-                        }
-
-                mat_microglia_tracking = convertDictROIMatchingAndDictROICoordsToMatMicrogliaTracking(
-                    dict_roi_matching,
-                    dict_roi_coords_xyct,
-                    dict_roi_coords_xyct_reg,
-                    dict_tiff_reg,
-                    mat_microglia_tracking,
-                    date=now,
-                    user=user,
-                    path_tif=path_src,
-                )
-            else:
-                mat_microglia_tracking = convertDictROIMatchingAndDictROICoordsToMatMicrogliaTracking(
-                    dict_roi_matching,
-                    dict_roi_coords_xyct,
-                    dict_roi_coords_xyct_reg,
-                    dict_tiff_reg,
-                    date=now,
-                    user=user,
-                    path_tif=path_src,
-                )
             
-            savemat(path_dst, mat_microglia_tracking)
-            QMessageBox.information(q_window, "File save", f"Microglia Tracking file saved!\nuser: {user}, date: {now}")
+                savemat(path_dst, mat_microglia_tracking)
+
+            runFileWriteTask(
+                q_window, path_dst, _writeMicrogliaTracking,
+                msg_success=("File save", f"Microglia Tracking file saved!\nuser: {user}, date: {now}"),
+                msg_fail=("File save failed", "Error saving Microglia Tracking file"),
+                )
         except Exception as e:
             raise e
             # QMessageBox.warning(q_window, "File save failed", f"Error saving Microglia Tracking file: {e}")
@@ -578,28 +761,51 @@ def saveMicrogliaTracking(
 def loadMicrogliaTracking(
         q_window        : QMainWindow, 
         gui_defaults    : GuiDefaults,
-        ) -> Union[Tuple[Dict[str, Dict[int, List[int] | Dict[int, Dict[int, Optional[int]]]]], Dict[int, Dict[int, Dict[Literal["xpix", "ypix", "med"], np.ndarray[np.int32]]]], Dict[AppKeys, np.ndarray[Tuple[int, int, int, int, int]]]], None]:
-    path_src = openFileDialog(q_widget=q_window, file_type=".mat", title="Open Microglia Tracking mat File")
+        ) -> Union[Tuple[ROITracks, Dict[int, Dict[int, Dict[Literal["xpix", "ypix", "med"], np.ndarray[np.int32]]]], Dict[AppKeys, np.ndarray[Tuple[int, int, int, int, int]]]], None]:
+    path_src = openFileDialog(q_widget=q_window, file_type=[Extension.MAT, Extension.H5], title="Open Microglia Tracking File")
     if path_src:
         try:
             from ..dialog.date_select import DateSelectDialog
             from ..preprocessing.preprocessing_table import convertMatMicrogliaTrackingToDictROIMatchingAndDictROICoords
-            mat_microglia_tracking = loadmat(path_src, simplify_cells=True)
-            mat_microglia_tracking_roi = mat_microglia_tracking["ROI"]
+            from ..utils.roi_tracks import toROITracks, formatChangedMatches
+            if isSnapshotStore(path_src):
+                list_date = listSnapshotDates(path_src, "ROI")
+            else:
+                mat_microglia_tracking = loadmat(path_src, simplify_cells=True)
+                mat_microglia_tracking_roi = mat_microglia_tracking["ROI"]
+                list_date = list(mat_microglia_tracking_roi.keys())
 
-            list_date = list(mat_microglia_tracking_roi.keys())
             dialog = DateSelectDialog(parent=q_window, gui_defaults=gui_defaults, list_date=list_date)
             if dialog.exec_() == QDialog.Accepted:
                 date = dialog.date
             
             # select saved date
-            mat_microglia_tracking_roi_date = mat_microglia_tracking_roi[date]
+            if isSnapshotStore(path_src):
+                mat_microglia_tracking_roi_date = loadSnapshot(path_src, "ROI", date)
+            else:
+                mat_microglia_tracking_roi_date = mat_microglia_tracking_roi[date]
             dict_roi_matching, dict_roi_coords_xyct, dict_roi_coords_xyct_reg = convertMatMicrogliaTrackingToDictROIMatchingAndDictROICoords(mat_microglia_tracking_roi_date)
+            # pairwise matches of the file -> tracks, conflicting or non-transitive matches are changed
+            roi_tracks = toROITracks(dict_roi_matching)
+            list_change = roi_tracks.getChangedMatches(dict_roi_matching)
+            if list_change:
+                print(f"{len(list_change)} ROI matches of {path_src} ({date}) changed to make tracks:\n{formatChangedMatches(list_change)}")
+                reply = QMessageBox.question(
+                    q_window,
+                    "ROI matching changed",
+                    f"{len(list_change)} ROI matches are not consistent across t_planes and are changed (t_plane_pri ROI - t_plane_sec: file -> loaded):\n\n"
+                    f"{formatChangedMatches(list_change, max_lines=20)}\n\nDo you want to load it anyway?",
+                    QMessageBox.Yes | QMessageBox.No,
+                    )
+                if reply == QMessageBox.No:
+                    return
+            dict_roi_matching = roi_tracks
             dict_tiff_reg = mat_microglia_tracking_roi_date["BGImageRegistered"]
-            # loaded TIF shape is XYCT, so convert to XYCZT
-            from ..preprocessing.preprocessing_tiff import standardizeTIFFStack
-            for app_key in dict_tiff_reg.keys():
-                dict_tiff_reg[app_key] = standardizeTIFFStack(dict_tiff_reg[app_key], "XYCT", "XYCZT")
+            # loaded TIF shape of .mat is XYCT, so convert to XYCZT, .h5 keeps XYCZT
+            if not isSnapshotStore(path_src):
+                from ..preprocessing.preprocessing_tiff import standardizeTIFFStack
+                for app_key in dict_tiff_reg.keys():
+                    dict_tiff_reg[app_key] = standardizeTIFFStack(dict_tiff_reg[app_key], "XYCT", "XYCZT")
 
             QMessageBox.information(q_window, "File load", "Microglia Tracking file loaded!")
             return dict_roi_matching, dict_roi_coords_xyct, dict_roi_coords_xyct_reg, dict_tiff_reg
@@ -46,17 +46,27 @@ def openFileDialog(
 # return flie save path and bool value of overwriting
 def saveFileDialog(
         q_widget            : QWidget, 
-        file_type           : str, 
+        file_type           : Union[str, List[str]], 
         title               : str="Save File", 
         initial_dir         : str=""
         ) -> Tuple[Optional[str], bool]:
     from ..config.constants import FILE_FILTERS
     options = QFileDialog.Options()
-    file_filter = FILE_FILTERS.get(file_type, "All Files (*)")
+    # Handle single or multiple file types, the first one is the default
+    if isinstance(file_type, list):
+        list_file_type = file_type
+        file_filter = ";;".join([FILE_FILTERS.get(ft, f"*{ft}") for ft in file_type])
+    else:
+        list_file_type = [file_type]
+        file_filter = FILE_FILTERS.get(file_type, "All Files (*)")
     while True:
-        file_path, _ = QFileDialog.getSaveFileName(q_widget, title, initial_dir, file_filter, options=options)
+        file_path, selected_filter = QFileDialog.getSaveFileName(q_widget, title, initial_dir, file_filter, options=options)
         if not file_path:
             return None, False
+        # add extension of selected filter if not typed
+        if len(list_file_type) > 1 and os.path.splitext(file_path)[1].lower() not in list_file_type:
+            ext = next((ft for ft in list_file_type if FILE_FILTERS.get(ft, f"*{ft}") == selected_filter), list_file_type[0])
+            file_path = f"{file_path}{ext}"
         
         if os.path.exists(file_path):
             reply = QMessageBox.question(q_widget, 'File overwrite',
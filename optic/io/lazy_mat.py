@@ -0,0 +1,280 @@
+from __future__ import annotations
+from ..type_definitions import *
+from collections import OrderedDict
+import struct
+import numpy as np
+from scipy.io import loadmat
+
+# Fall.mat variables which hold (nROIs, nframes) trace matrices
+FALL_TRACE_KEYS = ["F", "Fneu", "spks", "F_chan2", "Fneu_chan2"]
+# Fall.mat variables which are small enough to load eagerly
+FALL_EAGER_KEYS = ["stat", "ops", "iscell", "redcell"]
+
+# MAT v5 data types and array classes
+MI_INT8, MI_MATRIX, MI_COMPRESSED = 1, 14, 15
+MI_DTYPES = {1: "i1", 2: "u1", 3: "i2", 4: "u2", 5: "i4", 6: "u4", 7: "f4", 9: "f8", 12: "i8", 13: "u8"}
+MX_DTYPES = {6: "f8", 7: "f4", 8: "i1", 9: "u1", 10: "i2", 11: "u2", 12: "i4", 13: "u4", 14: "i8", 15: "u8"}
+MX_COMPLEX_FLAG = 0x0800
+
+class LazyTraceArray:
+    """
+    Read-only (nROIs, nframes) trace matrix whose rows are read from disk on demand.
+    Recently accessed rows are kept in a small LRU cache, so resident memory follows the ROIs actually viewed.
+
+    Args:
+        dataset: np.memmap with (nROIs, nframes) layout, or h5py.Dataset with MATLAB (nframes, nROIs) layout.
+        transposed (bool): True if the dataset is stored as (nframes, nROIs).
+        n_cache_rows (int): maximum number of rows kept in memory.
+        file_handle: opened file the dataset is read from (h5py.File), closed by close().
+    """
+    def __init__(self, dataset: Any, transposed: bool=False, n_cache_rows: int=256, file_handle: Any=None):
+        self.dataset = dataset
+        self.file_handle = file_handle
+        self.transposed = transposed
+        self.n_cache_rows = n_cache_rows
+        self.cache_rows: OrderedDict[int, np.ndarray] = OrderedDict()
+        shape = tuple(dataset.shape)
+        self.shape = shape[::-1] if transposed else shape
+        self.dtype = np.dtype(dataset.dtype).newbyteorder("=")
+
+    @property
+    def ndim(self) -> int:
+        return len(self.shape)
+
+    def __len__(self) -> int:
+        return self.shape[0]
+
+    def __iter__(self):
+        for roi_id in range(len(self)):
+            yield self.getRow(roi_id)
+
+    # only the selected rows are read, further indices apply to them, e.g. traces[idx_roi, :n_frame] or traces[mask_cell]
+    def __getitem__(self, key: Any) -> np.ndarray:
+        if isinstance(key, (int, np.integer)):
+            return self.getRow(int(key))
+        if isinstance(key, slice):
+            return self.getRows(*key.indices(len(self)))
+        key_row, key_other = (key[0], key[1:]) if isinstance(key, tuple) and key else (key, ())
+        if key_row is Ellipsis and len(key_other) <= 1:
+            key_row = slice(None)
+        # new axes and n-d boolean masks select across rows
+        if key_row is None or key_row is Ellipsis or isinstance(key_row, tuple) or (np.ndim(key_row) > 1 and np.asarray(key_row).dtype == bool):
+            return np.asarray(self)[key]
+        rows, key_row_read = self.readRowsOfKey(key_row)
+        return rows[(key_row_read,) + key_other]
+
+    # (rows read for key_row, index of the requested rows within them), numpy indexing rules are kept by indexing the rows read
+    def readRowsOfKey(self, key_row: Any) -> Tuple[np.ndarray, Any]:
+        if isinstance(key_row, (int, np.integer)):
+            return self.getRow(int(key_row))[np.newaxis], 0
+        if isinstance(key_row, slice):
+            return self.getRows(*key_row.indices(len(self))), slice(None)
+        idx = np.asarray(key_row)
+        if idx.dtype == bool:
+            if idx.shape != (len(self),):
+                raise IndexError(f"boolean index of shape {idx.shape} does not match {len(self)} rows")
+            idx = np.flatnonzero(idx)
+        elif idx.dtype.kind not in "iu":
+            raise IndexError(f"unsupported index: {key_row!r}")
+        idx = np.where(idx < 0, idx + len(self), idx)
+        if idx.size and (idx.min() < 0 or idx.max() >= len(self)):
+            raise IndexError(f"index out of bounds for {len(self)} rows")
+        # each distinct row is read once, in increasing order as h5py requires
+        idx_unique, idx_inverse = np.unique(idx, return_inverse=True)
+        if not idx_unique.size:
+            rows = np.empty((0, self.shape[1]), dtype=self.dtype)
+        elif self.transposed:
+            rows = np.asarray(self.dataset[:, idx_unique], dtype=self.dtype).T
+        else:
+            rows = np.asarray(self.dataset[idx_unique], dtype=self.dtype)
+        return rows, idx_inverse.reshape(idx.shape)
+
+    def __array__(self, dtype: Any=None, copy: Any=None) -> np.ndarray:
+        arr = self.getRows(0, len(self))
+        return arr if dtype is None else arr.astype(dtype)
+
+    # read one ROI trace, served from cache if possible
+    def getRow(self, roi_id: int) -> np.ndarray:
+        if roi_id < 0:
+            roi_id += len(self)
+        if roi_id in self.cache_rows:
+            self.cache_rows.move_to_end(roi_id)
+            return self.cache_rows[roi_id]
+        if self.transposed:
+            row = np.asarray(self.dataset[:, roi_id], dtype=self.dtype)
+        else:
+            row = np.array(self.dataset[roi_id], dtype=self.dtype)
+        row.flags.writeable = False
+        self.cache_rows[roi_id] = row
+        if len(self.cache_rows) > self.n_cache_rows:
+            self.cache_rows.popitem(last=False)
+        return row
+
+    # read a block of ROI traces, bypassing the cache
+    def getRows(self, start: int, stop: int, step: int=1) -> np.ndarray:
+        if self.transposed:
+            return np.ascontiguousarray(np.asarray(self.dataset[:, start:stop:step], dtype=self.dtype).T)
+        return np.array(self.dataset[start:stop:step], dtype=self.dtype)
+
+    # chunked reduction, so np.mean(traces, axis=0) does not materialize the whole matrix
+    def mean(self, axis: Optional[int]=None, dtype: Any=None, out: Any=None, chunk_rows: int=256, **kwargs) -> np.ndarray:
+        n_rows = len(self)
+        acc = np.zeros(self.shape[1], dtype=np.float64)
+        for start in range(0, n_rows, chunk_rows):
+            acc += self.getRows(start, min(start + chunk_rows, n_rows)).sum(axis=0, dtype=np.float64)
+        if axis == 0:
+            return (acc / max(n_rows, 1)).astype(dtype or self.dtype)
+        if axis is None:
+            return acc.sum() / max(n_rows * self.shape[1], 1)
+        return np.asarray(self).mean(axis=axis, dtype=dtype)
+
+    def clearCache(self) -> None:
+        self.cache_rows.clear()
+
+    # release the file, memmaps are unmapped once the dataset is dropped, rows can not be read afterwards
+    def close(self) -> None:
+        self.clearCache()
+        if self.file_handle is not None:
+            self.file_handle.close()
+            self.file_handle = None
+        self.dataset = None
+
+    def __enter__(self) -> LazyTraceArray:
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+# close lazy traces of Fall data, e.g. when the data of an app_key is replaced
+def closeLazyFall(Fall: Optional[Dict[str, Any]]) -> None:
+    if not isinstance(Fall, dict):
+        return
+    for value in Fall.values():
+        if isinstance(value, LazyTraceArray):
+            value.close()
+
+"""
+MAT v7.3 (HDF5)
+"""
+def isMatV73(path_mat: str) -> bool:
+    import h5py
+    return h5py.is_hdf5(path_mat)
+
+# convert MATLAB HDF5 node to python object, same simplification as loadmat(simplify_cells=True)
+def convertH5MatNodeToPython(h5file: Any, node: Any) -> Any:
+    import h5py
+    if isinstance(node, h5py.Group):
+        return {key: convertH5MatNodeToPython(h5file, child) for key, child in node.items() if not key.startswith("#")}
+
+    matlab_class = node.attrs.get("MATLAB_class", b"")
+    matlab_class = matlab_class.decode() if isinstance(matlab_class, bytes) else str(matlab_class)
+    if node.attrs.get("MATLAB_empty", 0):
+        return np.array([])
+    data = node[()]
+    if h5py.check_dtype(ref=node.dtype) is not None:
+        cells = [convertH5MatNodeToPython(h5file, h5file[ref]) for ref in np.asarray(data).T.ravel()]
+        return cells[0] if len(cells) == 1 else cells
+    if matlab_class == "char":
+        return "".join(chr(c) for c in np.asarray(data).T.ravel())
+    arr = np.squeeze(np.asarray(data).T)
+    if matlab_class == "logical":
+        arr = arr.astype(bool)
+    return arr[()] if arr.ndim == 0 else arr
+
+# load Fall.mat v7.3, traces are kept as h5py datasets
+# the file stays open while traces are used, closeLazyFall closes it
+def loadFallMatV73Lazy(path_fall: str, n_cache_rows: int=256) -> Dict[str, Any]:
+    import h5py
+    h5file = h5py.File(path_fall, "r")
+    try:
+        Fall = {}
+        for key in FALL_EAGER_KEYS:
+            if key in h5file:
+                Fall[key] = convertH5MatNodeToPython(h5file, h5file[key])
+        if isinstance(Fall.get("stat"), dict): # single ROI
+            Fall["stat"] = [Fall["stat"]]
+        for key in FALL_TRACE_KEYS:
+            if key in h5file:
+                Fall[key] = LazyTraceArray(h5file[key], transposed=True, n_cache_rows=n_cache_rows, file_handle=h5file)
+    except Exception:
+        h5file.close()
+        raise
+    if not any(isinstance(value, LazyTraceArray) for value in Fall.values()):
+        h5file.close()
+    return Fall
+
+"""
+MAT v5
+"""
+# read a data element tag, return (data type, number of bytes, data offset, is small element)
+def readMat5Tag(f: Any, byteorder: str) -> Tuple[int, int, int, bool]:
+    offset = f.tell()
+    raw = f.read(8)
+    if len(raw) < 8:
+        raise EOFError
+    mdtype, nbytes = struct.unpack(f"{byteorder}II", raw)
+    if mdtype >> 16: # small data element format
+        return mdtype & 0xFFFF, mdtype >> 16, offset + 4, True
+    return mdtype, nbytes, offset + 8, False
+
+# scan top level variables of MAT v5 file, return offset, shape and dtype of uncompressed numeric matrices
+def findMat5NumericVariables(path_mat: str) -> Dict[str, Tuple[int, Tuple[int, ...], str]]:
+    dict_var = {}
+    with open(path_mat, "rb") as f:
+        header = f.read(128)
+        byteorder = "<" if header[126:128] == b"IM" else ">"
+        while True:
+            try:
+                mdtype, nbytes, offset_data, _ = readMat5Tag(f, byteorder)
+            except EOFError:
+                break
+            offset_next = offset_data + nbytes + (-nbytes % 8)
+            if mdtype == MI_MATRIX and nbytes > 0:
+                # array flags
+                _, _, offset_flags, _ = readMat5Tag(f, byteorder)
+                flags, = struct.unpack(f"{byteorder}I", f.read(4))
+                f.seek(offset_flags + 8)
+                # dimensions
+                _, nbytes_dims, offset_dims, _ = readMat5Tag(f, byteorder)
+                dims = struct.unpack(f"{byteorder}{nbytes_dims // 4}i", f.read(nbytes_dims))
+                f.seek(offset_dims + nbytes_dims + (-nbytes_dims % 8))
+                # array name
+                mdtype_name, nbytes_name, offset_name, is_small = readMat5Tag(f, byteorder)
+                f.seek(offset_name)
+                name = f.read(nbytes_name).decode("ascii", errors="ignore")
+                f.seek(offset_name + (4 if is_small else nbytes_name + (-nbytes_name % 8)))
+                # real part
+                mdtype_real, nbytes_real, offset_real, is_small = readMat5Tag(f, byteorder)
+                dtype_class = MX_DTYPES.get(flags & 0xFF)
+                if (
+                    dtype_class is not None
+                    and not flags & MX_COMPLEX_FLAG
+                    and not is_small
+                    and MI_DTYPES.get(mdtype_real) == dtype_class
+                    ):
+                    dict_var[name] = (offset_real, tuple(dims), f"{byteorder}{dtype_class}")
+            f.seek(offset_next)
+    return dict_var
+
+# load Fall.mat v5, uncompressed traces are memory-mapped, compressed ones are loaded as usual
+def loadFallMatV5Lazy(path_fall: str, n_cache_rows: int=256) -> Dict[str, Any]:
+    Fall = loadmat(path_fall, simplify_cells=True, variable_names=FALL_EAGER_KEYS)
+    dict_var = findMat5NumericVariables(path_fall)
+    list_key_fallback = []
+    for key in FALL_TRACE_KEYS:
+        if key in dict_var:
+            offset, shape, dtype = dict_var[key]
+            mm = np.memmap(path_fall, dtype=dtype, mode="r", offset=offset, shape=shape, order="F")
+            Fall[key] = LazyTraceArray(mm, transposed=False, n_cache_rows=n_cache_rows)
+        else:
+            list_key_fallback.append(key)
+    if list_key_fallback:
+        Fall.update(loadmat(path_fall, simplify_cells=True, variable_names=list_key_fallback))
+    return Fall
+
+# load Fall.mat without reading trace matrices into memory
+def loadFallMatLazy(path_fall: str, n_cache_rows: int=256) -> Dict[str, Any]:
+    if isMatV73(path_fall):
+        return loadFallMatV73Lazy(path_fall, n_cache_rows=n_cache_rows)
+    else:
+        return loadFallMatV5Lazy(path_fall, n_cache_rows=n_cache_rows)
@@ -0,0 +1,203 @@
+from __future__ import annotations
+from ..type_definitions import *
+from collections import OrderedDict
+import threading
+import numpy as np
+import tifffile
+
+class TiffPageArray:
+    """
+    Minimal array interface over the pages of a TIFF series, decoding only the pages covered by an index.
+    Used when the image data can be neither memory-mapped nor opened as zarr store (e.g. compressed files without zarr).
+    """
+    def __init__(self, tif: tifffile.TiffFile, series: int=0):
+        self.tif = tif
+        self.series = series
+        self.shape = tuple(tif.series[series].shape)
+        self.dtype = np.dtype(tif.series[series].dtype)
+        self.n_page_axes = len(self.shape) - 2 # YX are stored in each page
+
+    def __getitem__(self, key: Tuple[Any, ...]) -> np.ndarray:
+        key_page, key_plane = key[:self.n_page_axes], key[self.n_page_axes:]
+        # page indices covered by the leading axes
+        list_idx = [np.arange(size)[k] for size, k in zip(self.shape, key_page)]
+        grid = np.meshgrid(*[np.atleast_1d(idx) for idx in list_idx], indexing="ij")
+        idx_pages = np.ravel_multi_index([g.ravel() for g in grid], self.shape[:self.n_page_axes]) if list_idx else np.array([0])
+        planes = [self.tif.asarray(key=int(i), series=self.series)[key_plane] for i in idx_pages]
+        shape_page = tuple(np.atleast_1d(idx).size for idx in list_idx if np.ndim(idx) > 0)
+        return np.stack(planes).reshape(shape_page + planes[0].shape)
+
+class LazyTiffStack:
+    """
+    XYCZT view of a TIFF stack which reads only the requested part of the file.
+    Indexing follows the same contract as the standardized ndarray, e.g. stack[:, :, channel, plane_z, plane_t].
+
+    Args:
+        array_src: memory-mapped, zarr or page array with the axes of the TIFF series.
+        axes_src (str): axes of array_src, subset of axes_tgt.
+        axes_tgt (str): axes order exposed by this stack.
+        plane_cache_mb (float): budget of the LRU cache of decoded (X, Y) planes, 0 disables the cache.
+        tif (tifffile.TiffFile): opened TIFF file, kept alive while the stack is used.
+    """
+    def __init__(
+            self,
+            array_src: Any,
+            axes_src: str,
+            axes_tgt: str="XYCZT",
+            plane_cache_mb: float=0,
+            tif: Optional[tifffile.TiffFile]=None
+            ):
+        self.array_src = array_src
+        self.axes_src = axes_src.upper()
+        self.axes_tgt = axes_tgt.upper()
+        if any(ax not in self.axes_tgt for ax in self.axes_src):
+            raise ValueError(f"unsupported TIFF axes: {axes_src}")
+        self.tif = tif
+        dict_size = dict(zip(self.axes_src, array_src.shape))
+        self.shape = tuple(int(dict_size.get(ax, 1)) for ax in self.axes_tgt)
+        self.dtype = np.dtype(array_src.dtype)
+        self.plane_cache_bytes = int(plane_cache_mb * 1024**2)
+        self.cache_planes: OrderedDict[Tuple[int, ...], np.ndarray] = OrderedDict()
+        self.cache_bytes = 0
+        self.dict_stats: Dict[str, Any] = {}
+        # the stack may be read from the GUI thread and from background tasks at the same time
+        self.lock = threading.RLock()
+
+    @property
+    def ndim(self) -> int:
+        return len(self.shape)
+
+    @property
+    def size(self) -> int:
+        return int(np.prod(self.shape))
+
+    @property
+    def nbytes(self) -> int:
+        return self.size * self.dtype.itemsize
+
+    def __len__(self) -> int:
+        return self.shape[0]
+
+    def __getitem__(self, key: Any) -> np.ndarray:
+        with self.lock:
+            return self.getItem(key)
+
+    def getItem(self, key: Any) -> np.ndarray:
+        if not isinstance(key, tuple):
+            key = (key,)
+        key = key + (slice(None),) * (self.ndim - len(key))
+        # single (X, Y) plane, served from cache if possible
+        is_plane = all(isinstance(k, slice) and k == slice(None) for k in key[:2]) and all(isinstance(k, (int, np.integer)) for k in key[2:])
+        if is_plane and self.plane_cache_bytes > 0:
+            key_plane = tuple(int(k) % size if -size <= k < size else int(k) for k, size in zip(key[2:], self.shape[2:]))
+            if key_plane in self.cache_planes:
+                self.cache_planes.move_to_end(key_plane)
+                return self.cache_planes[key_plane]
+            plane = self.readData(key)
+            self.addPlaneToCache(key_plane, plane)
+            return plane
+        return self.readData(key)
+
+    def __array__(self, dtype: Any=None, copy: Any=None) -> np.ndarray:
+        with self.lock:
+            arr = self.readData((slice(None),) * self.ndim)
+        return arr if dtype is None else arr.astype(dtype)
+
+    # read data from the source array and reorder axes to axes_tgt
+    def readData(self, key: Tuple[Any, ...]) -> np.ndarray:
+        key_src = tuple(key[self.axes_tgt.index(ax)] for ax in self.axes_src)
+        data = np.array(self.array_src[key_src])
+        axes_remaining = [ax for ax, k in zip(self.axes_src, key_src) if not isinstance(k, (int, np.integer))]
+        # axes missing in the file have size 1
+        for ax, k in zip(self.axes_tgt, key):
+            if ax in self.axes_src:
+                continue
+            if isinstance(k, (int, np.integer)):
+                if k not in (0, -1):
+                    raise IndexError(f"index {k} is out of bounds for axis {ax} with size 1")
+            else:
+                data = np.expand_dims(data, -1)[..., k]
+                axes_remaining.append(ax)
+        order = [axes_remaining.index(ax) for ax in self.axes_tgt if ax in axes_remaining]
+        return np.ascontiguousarray(np.transpose(data, order)) if order != sorted(order) else data
+
+    def addPlaneToCache(self, key_plane: Tuple[int, ...], plane: np.ndarray) -> None:
+        if plane.nbytes > self.plane_cache_bytes:
+            return
+        plane.flags.writeable = False
+        self.cache_planes[key_plane] = plane
+        self.cache_bytes += plane.nbytes
+        while self.cache_bytes > self.plane_cache_bytes:
+            _, plane_old = self.cache_planes.popitem(last=False)
+            self.cache_bytes -= plane_old.nbytes
+
+    def clearCache(self) -> None:
+        with self.lock:
+            self.cache_planes.clear()
+            self.cache_bytes = 0
+
+    # iterate (channel, z, t) planes without loading the whole stack
+    def iterPlanes(self):
+        for c in range(self.shape[2]):
+            for z in range(self.shape[3]):
+                for t in range(self.shape[4]):
+                    with self.lock:
+                        plane = self.readData((slice(None), slice(None), c, z, t))
+                    yield (c, z, t), plane
+
+    # min / max of the whole stack are computed once, plane by plane
+    def calculateStats(self) -> Dict[str, Any]:
+        if not self.dict_stats:
+            val_min, val_max = None, None
+            for _, plane in self.iterPlanes():
+                plane_min, plane_max = plane.min(), plane.max()
+                val_min = plane_min if val_min is None else min(val_min, plane_min)
+                val_max = plane_max if val_max is None else max(val_max, plane_max)
+            self.dict_stats = {"min": val_min, "max": val_max}
+        return self.dict_stats
+
+    def min(self, axis: Any=None, out: Any=None, **kwargs) -> Any:
+        if axis is None:
+            return self.calculateStats()["min"]
+        return np.asarray(self).min(axis=axis, **kwargs)
+
+    def max(self, axis: Any=None, out: Any=None, **kwargs) -> Any:
+        if axis is None:
+            return self.calculateStats()["max"]
+        return np.asarray(self).max(axis=axis, **kwargs)
+
+    def astype(self, dtype: Any, **kwargs) -> np.ndarray:
+        return np.asarray(self).astype(dtype, **kwargs)
+
+    def close(self) -> None:
+        self.clearCache()
+        if self.tif is not None:
+            self.tif.close()
+
+# open TIFF stack lazily, memory-mapped if possible, else via zarr store, else page by page
+def openLazyTiffStack(
+        path_tiff       : str,
+        axes_tgt        : str="XYCZT",
+        plane_cache_mb  : float=0
+        ) -> Tuple[LazyTiffStack, Optional[Dict[str, Any]]]:
+    tif = tifffile.TiffFile(path_tiff)
+    try:
+        series = tif.series[0]
+        axes_src = series.axes
+        metadata = tif.imagej_metadata
+        try:
+            array_src = tifffile.memmap(path_tiff, series=0, mode="r")
+            return LazyTiffStack(array_src, axes_src, axes_tgt, plane_cache_mb), metadata
+        except ValueError: # compressed or non-contiguous image data
+            pass
+        try:
+            import zarr
+            array_src = zarr.open(series.aszarr(), mode="r")
+            if not hasattr(array_src, "shape"): # pyramidal series opens as group
+                array_src = array_src[0]
+        except (ImportError, ValueError, TypeError, KeyError):
+            array_src = TiffPageArray(tif, series=0)
+        return LazyTiffStack(array_src, axes_src, axes_tgt, plane_cache_mb, tif=tif), metadata
+    except Exception:
+        tif.close()
+        raise
@@ -0,0 +1,264 @@
+from __future__ import annotations
+from ..type_definitions import *
+import io
+import os
+import struct
+import zlib
+import numpy as np
+
+# keys of the metadata returned by peekFileMetadata, None if not available in the file
+METADATA_KEYS = ["Lx", "Ly", "nROIs", "nframes", "nchannels", "nplanes", "fs"]
+
+"""
+metadata peek, only headers and small variables are read
+"""
+def makeMetadata(**kwargs) -> Dict[str, Any]:
+    dict_metadata = {key: None for key in METADATA_KEYS}
+    for key, value in kwargs.items():
+        dict_metadata[key] = value.item() if isinstance(value, np.generic) else value
+    return dict_metadata
+
+"""
+MAT v5 struct fields, scipy.io.loadmat can only read whole variables
+"""
+MI_MATRIX = 14
+MI_COMPRESSED = 15
+MX_STRUCT_CLASS = 2
+# MAT v5 data types of numeric data elements -> numpy dtype
+MAT_V5_DTYPES = {1: "i1", 2: "u1", 3: "i2", 4: "u2", 5: "i4", 6: "u4", 7: "f4", 9: "f8", 12: "i8", 13: "u8"}
+
+class MatV5Stream:
+    """
+    Sequential reader of MAT v5 data elements, skipped bytes of compressed variables are decompressed and discarded.
+
+    Args:
+        f (Any): binary file positioned at the first byte to read.
+        byte_order (str): "<" or ">".
+        n_bytes_compressed (int): size of the zlib stream, None for uncompressed data.
+    """
+    def __init__(self, f: Any, byte_order: str, n_bytes_compressed: Optional[int]=None):
+        self.f = f
+        self.byte_order = byte_order
+        self.n_bytes_compressed = n_bytes_compressed
+        self.decompressor = zlib.decompressobj() if n_bytes_compressed is not None else None
+        self.buffer = b""
+
+    def read(self, n: int) -> bytes:
+        if self.decompressor is None:
+            return self.f.read(n)
+        while len(self.buffer) < n and self.n_bytes_compressed > 0:
+            chunk = self.f.read(min(self.n_bytes_compressed, 1 << 16))
+            if not chunk:
+                break
+            self.n_bytes_compressed -= len(chunk)
+            self.buffer += self.decompressor.decompress(chunk)
+        data, self.buffer = self.buffer[:n], self.buffer[n:]
+        return data
+
+    def skip(self, n: int) -> None:
+        if self.decompressor is None:
+            self.f.seek(n, os.SEEK_CUR)
+            return
+        while n > 0:
+            n -= len(self.read(min(n, 1 << 20)))
+
+    # (data type, data) of the next data element, small data elements are packed into the tag
+    def readElement(self) -> Tuple[int, bytes]:
+        mdtype, n_bytes = struct.unpack(f"{self.byte_order}II", self.read(8))
+        if mdtype >> 16:
+            return mdtype & 0xFFFF, struct.pack(f"{self.byte_order}I", n_bytes)[:mdtype >> 16]
+        data = self.read(n_bytes)
+        self.skip(-n_bytes % 8)
+        return mdtype, data
+
+    def readNumeric(self) -> np.ndarray:
+        mdtype, data = self.readElement()
+        if mdtype not in MAT_V5_DTYPES:
+            raise ValueError(f"unsupported MAT v5 data type: {mdtype}")
+        return np.frombuffer(data, dtype=f"{self.byte_order}{MAT_V5_DTYPES[mdtype]}")
+
+    # array flags, dimensions and name of miMATRIX, the stream is left at the array data
+    def readMatrixHeader(self) -> Tuple[int, Tuple[int, ...], str]:
+        flags = self.readNumeric()
+        dims = tuple(int(dim) for dim in self.readNumeric())
+        name = self.readElement()[1].decode("latin-1")
+        return int(flags[0]) & 0xFF, dims, name
+
+# fields of a 1x1 struct variable of MAT v5 file, other variables and fields are skipped without being parsed
+# only real numeric scalars are returned, e.g. ops.Lx, missing or non-scalar fields are left out
+def readMatV5StructFields(path_mat: str, var_name: str, list_field: List[str]) -> Dict[str, Any]:
+    with open(path_mat, "rb") as f:
+        header = f.read(128)
+        byte_order = "<" if header[126:128] == b"IM" else ">"
+        while True:
+            tag = f.read(8)
+            if len(tag) < 8:
+                return {}
+            mdtype, n_bytes = struct.unpack(f"{byte_order}II", tag)
+            pos_next = f.tell() + n_bytes + (-n_bytes % 8 if mdtype != MI_COMPRESSED else 0)
+            if mdtype == MI_COMPRESSED:
+                stream = MatV5Stream(f, byte_order, n_bytes)
+                mdtype, _ = struct.unpack(f"{byte_order}II", stream.read(8))
+            else:
+                stream = MatV5Stream(f, byte_order)
+            if mdtype == MI_MATRIX:
+                mclass, dims, name = stream.readMatrixHeader()
+                if name == var_name:
+                    if mclass != MX_STRUCT_CLASS or int(np.prod(dims)) != 1:
+                        return {}
+                    return readMatV5StructScalars(stream, list_field)
+            f.seek(pos_next)
+
+def readMatV5StructScalars(stream: MatV5Stream, list_field: List[str]) -> Dict[str, Any]:
+    len_name = int(stream.readNumeric()[0])
+    data_name = stream.readElement()[1]
+    list_name = [data_name[i:i + len_name].split(b"\x00")[0].decode("latin-1") for i in range(0, len(data_name), len_name)]
+    dict_value = {}
+    for name in list_name:
+        _, n_bytes = struct.unpack(f"{stream.byte_order}II", stream.read(8)) # miMATRIX of the field
+        if name not in list_field:
+            stream.skip(n_bytes)
+            continue
+        if n_bytes == 0: # empty field
+            continue
+        stream_field = MatV5Stream(io.BytesIO(stream.read(n_bytes)), stream.byte_order)
+        mclass, dims, _ = stream_field.readMatrixHeader()
+        if mclass < 6 or int(np.prod(dims)) != 1: # not numeric or not scalar
+            continue
+        try:
+            dict_value[name] = stream_field.readNumeric()[0].item()
+        except ValueError:
+            continue
+    return dict_value
+
+# Fall.mat v5, shapes of traces from variable headers, Lx / Ly / fs from ops (traces, stat and arrays of ops are skipped)
+def peekFallMatV5(path_fall: str) -> Dict[str, Any]:
+    from scipy.io import whosmat
+    dict_shape = {name: shape for name, shape, _ in whosmat(path_fall)}
+    if "F" not in dict_shape:
+        raise ValueError(f"not a Suite2p Fall.mat file: {path_fall}")
+    ops = readMatV5StructFields(path_fall, "ops", ["Lx", "Ly", "nchannels", "nplanes", "fs"])
+    nROIs, nframes = dict_shape["F"] if len(dict_shape["F"]) == 2 else (dict_shape["F"][0], 1)
+    return makeMetadata(
+        Lx=ops.get("Lx"), Ly=ops.get("Ly"), nROIs=nROIs, nframes=nframes,
+        nchannels=ops.get("nchannels"), nplanes=ops.get("nplanes"), fs=ops.get("fs"),
+        )
+
+# Fall.mat v7.3 (HDF5), MATLAB arrays are stored transposed
+def peekFallMatV73(path_fall: str) -> Dict[str, Any]:
+    import h5py
+    with h5py.File(path_fall, "r") as f:
+        if "F" not in f:
+            raise ValueError(f"not a Suite2p Fall.mat file: {path_fall}")
+        nROIs, nframes = f["F"].shape[::-1]
+        dict_ops = {}
+        if "ops" in f:
+            for key in ["Lx", "Ly", "nchannels", "nplanes", "fs"]:
+                if key in f["ops"] and isinstance(f["ops"][key], h5py.Dataset):
+                    value = np.asarray(f["ops"][key][()]).ravel()[0] # MATLAB saves numbers as double
+                    dict_ops[key] = float(value) if key == "fs" else int(value)
+    return makeMetadata(nROIs=nROIs, nframes=nframes, **dict_ops)
+
+# CaImAn CNMF HDF5, estimates/A is stored as sparse (data, indices, indptr, shape)
+def peekCaimanHDF5(path_hdf5: str) -> Dict[str, Any]:
+    import h5py
+    with h5py.File(path_hdf5, "r") as f:
+        if "estimates" not in f:
+            raise ValueError(f"not a CaImAn HDF5 file: {path_hdf5}")
+        estimates = f["estimates"]
+        nROIs, nframes = None, None
+        if "C" in estimates and estimates["C"].ndim == 2:
+            nROIs, nframes = estimates["C"].shape
+        elif "A" in estimates and "shape" in estimates["A"]:
+            nROIs = int(estimates["A"]["shape"][()][1])
+        dims = estimates["dims"][()] if "dims" in estimates else (f["dims"][()] if "dims" in f else None)
+        fs = f["params/data/fr"][()] if "params/data/fr" in f else None
+    Ly, Lx = (int(dims[0]), int(dims[1])) if dims is not None and np.ndim(dims) > 0 else (None, None)
+    return makeMetadata(Lx=Lx, Ly=Ly, nROIs=nROIs, nframes=nframes, nchannels=1, nplanes=1, fs=fs)
+
+# shape of npy array from its header
+def readNPYShape(path_npy: str) -> Tuple[int, ...]:
+    with open(path_npy, "rb") as f:
+        version = np.lib.format.read_magic(f)
+        if version == (1, 0):
+            shape, _, _ = np.lib.format.read_array_header_1_0(f)
+        else:
+            shape, _, _ = np.lib.format.read_array_header_2_0(f)
+    return tuple(shape)
+
+# npy traces (nROIs, nframes) or event file (nframes,), from the npy header
+def peekNPY(path_npy: str) -> Dict[str, Any]:
+    shape = readNPYShape(path_npy)
+    if len(shape) == 0:
+        return makeMetadata()
+    if len(shape) == 1:
+        return makeMetadata(nframes=shape[0])
+    return makeMetadata(nROIs=shape[0], nframes=shape[-1])
+
+# TIFF stack, from the series and ImageJ metadata of the first IFD
+def peekTiffStack(path_tiff: str) -> Dict[str, Any]:
+    import tifffile
+    from ..preprocessing.preprocessing_tiff import getTiffStackShape
+    x, y, c, z, t = getTiffStackShape(path_tiff)
+    with tifffile.TiffFile(path_tiff) as tif:
+        metadata = tif.imagej_metadata or {}
+    finterval = metadata.get("finterval")
+    fs = 1 / finterval if finterval else None
+    return makeMetadata(Lx=x, Ly=y, nframes=t, nchannels=c, nplanes=z, fs=fs)
+
+# ROICuration file (.h5 snapshot store or legacy .mat), nROIs only
+def peekROICuration(path_roi_curation: str) -> Dict[str, Any]:
+    from .snapshot_io import isSnapshotStore, loadSnapshotHeader
+    if isSnapshotStore(path_roi_curation):
+        return makeMetadata(nROIs=loadSnapshotHeader(path_roi_curation).get("NumberOfROI"))
+    from scipy.io import loadmat
+    return makeMetadata(nROIs=loadmat(path_roi_curation, simplify_cells=True, variable_names=["NumberOfROI"]).get("NumberOfROI"))
+
+# Lx, Ly, nROIs, nframes, nchannels, nplanes, fs of Fall.mat, CaImAn HDF5, npy or TIFF file without loading it
+# ROICuration files (.h5 snapshot store or legacy .mat) give nROIs only
+def peekFileMetadata(path: str) -> Dict[str, Any]:
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".mat":
+        import h5py
+        if h5py.is_hdf5(path):
+            return peekFallMatV73(path)
+        from scipy.io import whosmat
+        if "NumberOfROI" in [name for name, _, _ in whosmat(path)]:
+            return peekROICuration(path)
+        return peekFallMatV5(path)
+    elif ext in [".hdf5", ".h5"]:
+        from .snapshot_io import hasSnapshotFormat
+        return peekROICuration(path) if hasSnapshotFormat(path) else peekCaimanHDF5(path)
+    elif ext == ".npy":
+        return peekNPY(path)
+    elif ext in [".tif", ".tiff"]:
+        return peekTiffStack(path)
+    raise ValueError(f"unsupported file type: {path}")
+
+# short text for the load dialogs, e.g. "512 x 512, 320 ROIs, 9000 frames, 30.0 Hz"
+def formatMetadata(dict_metadata: Dict[str, Any]) -> str:
+    list_text = []
+    if dict_metadata.get("Lx") is not None and dict_metadata.get("Ly") is not None:
+        list_text.append(f"{dict_metadata['Lx']} x {dict_metadata['Ly']}")
+    if dict_metadata.get("nROIs") is not None:
+        list_text.append(f"{dict_metadata['nROIs']} ROIs")
+    if dict_metadata.get("nframes") is not None:
+        list_text.append(f"{dict_metadata['nframes']} frames")
+    if dict_metadata.get("nchannels") is not None:
+        list_text.append(f"{dict_metadata['nchannels']} ch")
+    if dict_metadata.get("fs") is not None:
+        list_text.append(f"{float(dict_metadata['fs']):.1f} Hz")
+    return ", ".join(list_text)
+
+# mismatches of image size and frame count between pri and sec sessions, empty if compatible
+def compareMetadata(
+        dict_metadata_pri   : Dict[str, Any],
+        dict_metadata_sec   : Dict[str, Any],
+        keys                : List[str]=["Lx", "Ly"],
+        ) -> List[str]:
+    list_mismatch = []
+    for key in keys:
+        value_pri, value_sec = dict_metadata_pri.get(key), dict_metadata_sec.get(key)
+        if value_pri is not None and value_sec is not None and value_pri != value_sec:
+            list_mismatch.append(f"{key}: {value_pri} != {value_sec}")
+    return list_mismatch
@@ -0,0 +1,150 @@
+from __future__ import annotations
+from ..type_definitions import *
+import os
+from typing import NamedTuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+import numpy as np
+
+# arrays smaller than this are pickled as usual
+SHARED_ARRAY_MIN_BYTES = 1 << 20
+
+# shared memory blocks created by this worker process, kept open until the pool shuts down,
+# so that the blocks survive until the main process has attached them (Windows frees unreferenced blocks)
+_list_shm_worker: List[SharedMemory] = []
+
+class SharedArrayDescriptor(NamedTuple):
+    name: str
+    shape: Tuple[int, ...]
+    dtype: str
+
+# replace large numeric arrays in nested dict / list by shared memory descriptors
+def exportArraysToSharedMemory(obj: Any, list_shm: List[SharedMemory]) -> Any:
+    if isinstance(obj, np.ndarray) and obj.dtype != object and obj.nbytes >= SHARED_ARRAY_MIN_BYTES:
+        shm = SharedMemory(create=True, size=obj.nbytes)
+        arr = np.ndarray(obj.shape, dtype=obj.dtype, buffer=shm.buf)
+        arr[...] = obj
+        del arr
+        if os.name != "nt":
+            # ownership moves to the main process, which unlinks the block after attaching it
+            resource_tracker.unregister(shm._name, "shared_memory")
+        list_shm.append(shm)
+        return SharedArrayDescriptor(shm.name, tuple(obj.shape), obj.dtype.str)
+    if isinstance(obj, dict):
+        return {key: exportArraysToSharedMemory(value, list_shm) for key, value in obj.items()}
+    if isinstance(obj, list):
+        return [exportArraysToSharedMemory(value, list_shm) for value in obj]
+    return obj
+
+# replace shared memory descriptors by arrays backed by the shared memory, no copy
+def importArraysFromSharedMemory(obj: Any, list_shm: List[SharedMemory]) -> Any:
+    if isinstance(obj, SharedArrayDescriptor):
+        shm = SharedMemory(name=obj.name)
+        if os.name != "nt":
+            shm.unlink() # the mapping stays valid while shm is open
+        list_shm.append(shm)
+        return np.ndarray(obj.shape, dtype=np.dtype(obj.dtype), buffer=shm.buf)
+    if isinstance(obj, dict):
+        return {key: importArraysFromSharedMemory(value, list_shm) for key, value in obj.items()}
+    if isinstance(obj, list):
+        return [importArraysFromSharedMemory(value, list_shm) for value in obj]
+    return obj
+
+# parse one file in worker process
+def loadSessionFileWorker(path: str, file_type: Literal["fall", "roi_curation"]) -> Any:
+    # same as data_io.loadFallMat, without importing Qt in the worker
+    from scipy.io import loadmat
+    if file_type == "fall":
+        from ..preprocessing.preprocessing_fall import convertMatToDictFall
+        data = convertMatToDictFall(loadmat(path, simplify_cells=True))
+    elif file_type == "roi_curation":
+        from .snapshot_io import loadSnapshotRoot
+        data = loadSnapshotRoot(path, "manualROIcheck")
+    else:
+        raise ValueError(f"unknown file type: {file_type}")
+    return exportArraysToSharedMemory(data, _list_shm_worker)
+
+def normalizePath(path: str) -> str:
+    return os.path.normcase(os.path.abspath(path))
+
+class MultiSessionLoader:
+    """
+    Load Fall.mat and ROICuration.mat of multiple sessions in a process pool.
+    Each distinct file is parsed once, large arrays are handed back through shared memory.
+    The shared memory blocks stay attached until close(), call it when the loaded data is no longer used, e.g. at exit.
+    loadSessions blocks until all files are parsed, run it in a background task to keep the GUI responsive.
+
+    Args:
+        max_workers (int): number of worker processes, None for the number of CPUs.
+    """
+    def __init__(self, max_workers: Optional[int]=None):
+        self.max_workers = max_workers
+        self.list_shm: List[SharedMemory] = []
+
+    def loadSessions(
+            self,
+            list_path_fall          : List[str],
+            list_path_roi_curation  : List[str],
+            callback_progress       : Optional[Callable[[int, str], None]]=None,
+            ) -> Tuple[List[Dict[str, Any]], List[Any]]:
+        """
+        Returns:
+            list_dict_Fall, list_roi_curation: per-session data, sessions sharing a file share the same object.
+        callback_progress(session_idx, status) is called with "loading", "done" or "failed" from the calling thread.
+        """
+        # unique files, (file type, normalized path) -> sessions using it
+        dict_task: Dict[Tuple[str, str], List[int]] = {}
+        dict_path: Dict[Tuple[str, str], str] = {}
+        for file_type, list_path in (("fall", list_path_fall), ("roi_curation", list_path_roi_curation)):
+            for session_idx, path in enumerate(list_path):
+                key = (file_type, normalizePath(path))
+                dict_task.setdefault(key, []).append(session_idx)
+                dict_path[key] = path
+
+        n_session = len(list_path_fall)
+        list_n_remaining = [0] * n_session
+        for list_session_idx in dict_task.values():
+            for session_idx in set(list_session_idx):
+                list_n_remaining[session_idx] += 1
+        set_session_failed = set()
+        dict_result: Dict[Tuple[str, str], Any] = {}
+        list_error: List[Exception] = []
+
+        max_workers = min(self.max_workers or os.cpu_count() or 1, len(dict_task)) or 1
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            dict_future = {executor.submit(loadSessionFileWorker, dict_path[key], key[0]): key for key in dict_task}
+            if callback_progress:
+                for session_idx in range(n_session):
+                    callback_progress(session_idx, "loading")
+            for future in as_completed(dict_future):
+                key = dict_future[future]
+                try:
+                    dict_result[key] = importArraysFromSharedMemory(future.result(), self.list_shm)
+                    status = "done"
+                except Exception as e:
+                    list_error.append(e)
+                    status = "failed"
+                for session_idx in sorted(set(dict_task[key])):
+                    list_n_remaining[session_idx] -= 1
+                    if session_idx in set_session_failed:
+                        continue
+                    if status == "failed":
+                        set_session_failed.add(session_idx)
+                    if callback_progress and (status == "failed" or list_n_remaining[session_idx] == 0):
+                        callback_progress(session_idx, status)
+        if list_error:
+            raise list_error[0]
+
+        list_dict_Fall = [dict_result[("fall", normalizePath(path))] for path in list_path_fall]
+        list_roi_curation = [dict_result[("roi_curation", normalizePath(path))] for path in list_path_roi_curation]
+        return list_dict_Fall, list_roi_curation
+
+    # release shared memory, arrays returned by loadSessions must not be used afterwards
+    def close(self) -> None:
+        for shm in self.list_shm:
+            try:
+                shm.close()
+            except BufferError: # still referenced by arrays
+                pass
+        self.list_shm = []
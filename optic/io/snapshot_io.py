@@ -0,0 +1,188 @@
+from __future__ import annotations
+from ..type_definitions import *
+import os
+import numpy as np
+
+# append-only store of dated save snapshots (ROIcheck, ROITracking, MicrogliaTracking)
+# <file>.h5
+#   attrs          : header of legacy .mat (NumberOfROI, path_Fall, ...), format, version
+#   /<root_key>/   : one group per save date, written once and never rewritten
+#     <date>/      : snapshot, arrays as datasets, scalars and strings as attributes, dicts as groups,
+#                    object arrays (ROI coords, ...) as MAT encoded bytes
+#   /blobs/<hash>  : large arrays stored once by content hash, hard-linked from snapshots
+SNAPSHOT_FORMAT = "optic_snapshot"
+SNAPSHOT_VERSION = 1
+SNAPSHOT_EXTENSIONS = [".h5", ".hdf5"]
+BLOB_GROUP = "blobs"
+
+def isSnapshotStore(path: str) -> bool:
+    return os.path.splitext(path)[1].lower() in SNAPSHOT_EXTENSIONS
+
+# existing file written by appendSnapshots, other HDF5 files (e.g. CaImAn) have no format attribute
+def hasSnapshotFormat(path: str) -> bool:
+    import h5py
+    with h5py.File(path, "r") as f:
+        return f.attrs.get("format") == SNAPSHOT_FORMAT
+
+"""
+nested dict <-> HDF5 node
+"""
+def writeNodeHDF5(group: Any, key: str, value: Any) -> None:
+    import h5py
+    key = str(key)
+    if isinstance(value, dict):
+        subgroup = group.create_group(key, track_order=True)
+        for key_, value_ in value.items():
+            writeNodeHDF5(subgroup, key_, value_)
+    elif isinstance(value, (str, bool, int, float, np.generic)):
+        group.attrs[key] = value
+    elif value is None:
+        return
+    else:
+        arr = np.asarray(value)
+        if arr.dtype.kind == "U" or (arr.dtype == object and all(isinstance(v, str) for v in arr.ravel())):
+            arr = np.array([str(v) for v in arr.ravel()], dtype=object).reshape(arr.shape)
+            group.create_dataset(key, data=arr, dtype=h5py.string_dtype())
+        elif arr.dtype == object: # ragged / nested contents, same layout as in legacy .mat
+            group.create_dataset(key, data=encodeMatBytes(arr))
+            group[key].attrs["encoding"] = "mat"
+        else:
+            group.create_dataset(key, data=arr)
+
+def encodeMatBytes(value: Any) -> np.ndarray:
+    import io
+    from scipy.io import savemat
+    buffer = io.BytesIO()
+    savemat(buffer, {"value": value})
+    return np.frombuffer(buffer.getvalue(), dtype=np.uint8)
+
+def decodeMatBytes(arr: np.ndarray) -> Any:
+    import io
+    from scipy.io import loadmat
+    return loadmat(io.BytesIO(arr.tobytes()), simplify_cells=True)["value"]
+
+# blobs are hashed and written in blocks of about this size, lazy arrays are never loaded as a whole
+BLOB_BLOCK_BYTES = 64 * 1024**2
+
+# blocks of arr as (index, ndarray), along the first axis, or the last axis (T) for LazyTiffStack which reads by planes
+def iterArrayBlocks(arr: Any) -> Iterator[Tuple[Tuple[slice, ...], np.ndarray]]:
+    shape = tuple(arr.shape)
+    if not shape:
+        yield (), np.asarray(arr)
+        return
+    axis = len(shape) - 1 if hasattr(arr, "iterPlanes") else 0
+    bytes_per_index = np.dtype(arr.dtype).itemsize * int(np.prod(shape)) // max(shape[axis], 1)
+    step = max(1, BLOB_BLOCK_BYTES // max(bytes_per_index, 1))
+    for start in range(0, shape[axis], step):
+        index = (slice(None),) * axis + (slice(start, min(start + step, shape[axis])),)
+        yield index, np.asarray(arr[index])
+
+# content hash of array, used as blob name, blocks along other axes than the first are tagged with the axis
+def getArrayHash(arr: Any) -> str:
+    import hashlib
+    h = hashlib.blake2b(f"{np.dtype(arr.dtype).str}{tuple(arr.shape)}".encode(), digest_size=20)
+    for index, block in iterArrayBlocks(arr):
+        if len(index) > 1:
+            h.update(f"axis{len(index) - 1}".encode())
+        h.update(memoryview(np.ascontiguousarray(block)).cast("B"))
+    return h.hexdigest()
+
+# write array once per content, return blob path
+# the dataset is created from shape and dtype and filled block by block
+def writeBlobHDF5(f: Any, arr: Any) -> str:
+    group_blob = f.require_group(BLOB_GROUP)
+    key = getArrayHash(arr)
+    if key not in group_blob:
+        dataset = group_blob.create_dataset(key, shape=tuple(arr.shape), dtype=np.dtype(arr.dtype))
+        for index, block in iterArrayBlocks(arr):
+            dataset[index] = block
+        dataset.attrs["blob"] = True
+    return f"{BLOB_GROUP}/{key}"
+
+# arrays are squeezed like loadmat(simplify_cells=True), but kept at least 1d
+def readNodeHDF5(node: Any) -> Any:
+    import h5py
+    if isinstance(node, h5py.Group):
+        dict_node = {}
+        # datasets, groups and attributes are merged in creation order
+        for key, value in node.attrs.items():
+            dict_node[key] = value.item() if isinstance(value, np.generic) else value
+        for key, child in node.items():
+            dict_node[key] = readNodeHDF5(child)
+        return dict_node
+    if node.attrs.get("encoding") == "mat":
+        return decodeMatBytes(node[()])
+    if node.attrs.get("blob", False): # stored as is
+        return node[()]
+    if h5py.check_string_dtype(node.dtype) is not None:
+        arr = node.asstr()[()]
+        arr = np.asarray(arr, dtype=object)
+    else:
+        arr = node[()]
+    return np.atleast_1d(np.squeeze(arr)) if np.ndim(arr) > 0 else arr
+
+"""
+save / load
+"""
+# write new snapshots of mat-like dict, existing snapshots are left untouched
+# blob_keys: snapshot keys of Dict[str, np.ndarray] whose arrays are stored content-addressed
+def appendSnapshots(path_dst: str, mat_snapshot: Dict[str, Any], root_key: str, blob_keys: Optional[List[str]]=None) -> None:
+    import h5py
+    blob_keys = blob_keys or []
+    with h5py.File(path_dst, "a", track_order=True) as f:
+        f.attrs["format"] = SNAPSHOT_FORMAT
+        f.attrs["version"] = SNAPSHOT_VERSION
+        for key, value in mat_snapshot.items():
+            if key != root_key:
+                f.attrs[key] = value
+        group_root = f.require_group(root_key)
+        dict_blob_path = {} # id(array) -> blob path, the same array object is hashed once
+        for date, dict_snapshot in mat_snapshot[root_key].items():
+            if date in group_root: # saved twice within the same second
+                del group_root[date]
+            writeNodeHDF5(group_root, date, {key: value for key, value in dict_snapshot.items() if key not in blob_keys})
+            for key in blob_keys:
+                if key not in dict_snapshot:
+                    continue
+                group_blob_ref = group_root[date].create_group(key, track_order=True)
+                for key_arr, arr in dict_snapshot[key].items():
+                    if id(arr) not in dict_blob_path:
+                        dict_blob_path[id(arr)] = writeBlobHDF5(f, arr)
+                    group_blob_ref[key_arr] = f[dict_blob_path[id(arr)]] # hard link, no copy
+
+# header attributes only, e.g. NumberOfROI
+def loadSnapshotHeader(path_src: str) -> Dict[str, Any]:
+    import h5py
+    with h5py.File(path_src, "r") as f:
+        return {key: (value.item() if isinstance(value, np.generic) else value) for key, value in f.attrs.items() if key not in ["format", "version"]}
+
+# list save dates from the group index, snapshots are not read
+def listSnapshotDates(path_src: str, root_key: str) -> List[str]:
+    import h5py
+    with h5py.File(path_src, "r") as f:
+        return list(f[root_key].keys()) if root_key in f else []
+
+def loadSnapshot(path_src: str, root_key: str, date: str) -> Dict[str, Any]:
+    import h5py
+    with h5py.File(path_src, "r") as f:
+        return readNodeHDF5(f[root_key][date])
+
+# whole store in the legacy .mat layout, {**header, root_key: {date: snapshot}}
+def loadSnapshotStore(path_src: str, root_key: str) -> Dict[str, Any]:
+    import h5py
+    mat_snapshot = loadSnapshotHeader(path_src)
+    with h5py.File(path_src, "r") as f:
+        mat_snapshot[root_key] = {date: readNodeHDF5(node) for date, node in f[root_key].items()} if root_key in f else {}
+    return mat_snapshot
+
+# export to legacy .mat for MATLAB users
+def exportSnapshotStoreToMat(path_src: str, path_dst: str, root_key: str) -> None:
+    from scipy.io import savemat
+    savemat(path_dst, loadSnapshotStore(path_src, root_key))
+
+# load root_key of ROIcheck / ROITracking file, either snapshot store or legacy .mat
+def loadSnapshotRoot(path_src: str, root_key: str) -> Dict[str, Any]:
+    if isSnapshotStore(path_src):
+        return loadSnapshotStore(path_src, root_key)[root_key]
+    from scipy.io import loadmat
+    return loadmat(path_src, simplify_cells=True)[root_key]
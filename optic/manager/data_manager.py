@@ -1,17 +1,25 @@
 from __future__ import annotations
 from ..type_definitions import *
 from collections import defaultdict
+import threading
 import numpy as np
 from ..preprocessing.preprocessing_image import getBGImageFromFall, getBGImageChannel2FromFall, getROIImageFromFall, getBGImageFromCaimanHDF5
 from ..preprocessing.preprocessing_fall import getROICoordsFromDictFall
+from ..preprocessing.preprocessing_tiff import getPlaneFromXYCZTStack
 from ..config.constants import Extension, ImportPackages
 from ..io.data_io import loadFallMat, loadCaimanHDF5, loadTiffStack, loadTifImage
+from ..io.cache_io import loadSidecarCache, saveSidecarCache
+from ..io.lazy_mat import closeLazyFall
 from ..utils.custom_dict import CustomDict
+from ..utils.roi_tracks import ROITracks
 
 from typing import TYPE_CHECKING
 if TYPE_CHECKING: # for type checking
     from itk.elxParameterObjectPython import elastixParameterObject, mapstringvectorstring
     from roifile import ImagejRoi
+    from ..utils.roi_store import ROIStore
+    from ..utils.roi_index import ROIHitIndex
+    from ..utils.roi_classification import ROIClassification
 
 class DataManager:
     def __init__(self):
@@ -20,12 +28,17 @@ class DataManager:
         self.dict_tiff:                 Dict[AppKeys, np.ndarray[Tuple[int, int, int, int, int]]] = {}
         self.dict_tiff_metadata:        Dict[AppKeys, Dict[str, Any]] = {}
         self.dict_tiff_reg:             Dict[AppKeys, np.ndarray[Tuple[int, int, int, int, int]]] = {}
+        # per-channel min, max, histogram of the stacks, computed in background tasks, None until ready
+        self.dict_tiff_stats:           Dict[AppKeys, Dict[str, Any]] = {}
+        self.dict_tiff_stats_reg:       Dict[AppKeys, Dict[str, Any]] = {}
 
         # ROI celltype
         self.dict_roi_celltype:         Dict[AppKeys, Dict[int, str]] = {}
+        # ROI celltype, checkbox arrays of the ROI table, registered by TableControl
+        self.dict_roi_classification:   Dict[AppKeys, ROIClassification] = {}
         # ROI coordinates
-        self.dict_roi_coords:           Dict[AppKeys, Dict[int, Dict[Literal["xpix", "ypix", "med"], np.ndarray[np.int32]]]] = {}
-        self.dict_roi_coords_reg:       Dict[AppKeys, Dict[int, Dict[Literal["xpix", "ypix", "med"], np.ndarray[np.int32]]]] = {}
+        self.dict_roi_coords:           Dict[AppKeys, ROIStore] = {}
+        self.dict_roi_coords_reg:       Dict[AppKeys, ROIStore] = {}
         # background image
         self.dict_im_bg:                Dict[AppKeys, Dict[str, np.ndarray[np.uint8, Tuple[int, int]]]] = defaultdict(dict)
         self.dict_im_bg_chan2:          Dict[AppKeys, Dict[str, np.ndarray[np.uint8, Tuple[int, int]]]] = defaultdict(dict)
@@ -47,7 +60,7 @@ class DataManager:
         self.list_roi_imagej_reg:       List[ImagejRoi] = []
         # for MicrogliaTracking
         # ROI matching, XYCT
-        self.dict_roi_matching:         Dict[str, Dict[int, List[int] | Dict[int, Dict[int, Optional[int]]]]] = {"id": {}, "match": {}}
+        self.dict_roi_matching:         ROITracks = ROITracks()
         self.dict_roi_coords_xyct:      Dict[int, Dict[int, Dict[Literal["xpix", "ypix", "med"], np.ndarray[np.int32]]]] = CustomDict()
         self.dict_roi_coords_xyct_reg:  Dict[int, Dict[int, Dict[Literal["xpix", "ypix", "med"], np.ndarray[np.int32]]]] = CustomDict()
         self.dict_im_roi_xyct:          Dict[int, Dict[str, np.ndarray[np.uint8, Tuple[int, int]]]] = defaultdict(dict)
@@ -57,70 +70,145 @@ class DataManager:
 
         self.dict_eventfile:            Dict[AppKeys, Dict[str, np.ndarray[Tuple[int]]]] = defaultdict(dict)
         self.dict_roicheck:             Dict[AppKeys, Any] = {}
+        # ROI hit-testing index for click, (app_key, registered, t_plane) -> ROIHitIndex
+        self.dict_roi_hit_index:        Dict[Tuple[AppKeys, bool, Optional[int]], ROIHitIndex] = {}
+        # incremented when background images or TIFF stacks are loaded or replaced, views drop their render caches
+        self.image_version:             int = 0
 
     """
     IO Functions
     """
     # load Fall.mat data
-    def loadFallMat(self, app_key: AppKeys, path_fall: str, preprocessing: bool=True, config_manager: ConfigManager=None) -> Tuple[bool, Optional[Exception]]:
+    def loadFallMat(self, app_key: AppKeys, path_fall: str, preprocessing: bool=True, config_manager: ConfigManager=None, lazy: bool=False, use_cache: bool=False, cache_max_bytes: Optional[int]=None) -> Tuple[bool, Optional[Exception]]:
         try:
-            dict_Fall = loadFallMat(path_fall)
-            self.dict_Fall[app_key] = dict_Fall
-            self.dict_data_dtype[app_key] = Extension.MAT
-            self.dict_im_bg[app_key] = getBGImageFromFall(self, app_key)
-            self.dict_roi_coords[app_key] = getROICoordsFromDictFall(dict_Fall)
-            self.dict_im_roi[app_key] = getROIImageFromFall(self, app_key)
-            if self.getNChannels(app_key) == 2:
-                self.dict_im_bg_chan2[app_key] = getBGImageChannel2FromFall(self, app_key)
-            # Suite2pROITracking add registered data dict
-            if config_manager:
-                if config_manager.current_app == "SUITE2P_ROI_TRACKING" or config_manager.current_app == "CHECK_MULTI_SESSION_ROI_COORDINATES":
-                    self.dict_im_bg_reg[app_key] = getBGImageFromFall(self, app_key)
-                    self.dict_roi_coords_reg[app_key] = getROICoordsFromDictFall(dict_Fall)
-                    self.dict_im_roi_reg[app_key] = getROIImageFromFall(self, app_key)
-                    if self.getNChannels(app_key) == 2:
-                        self.dict_im_bg_chan2_reg[app_key] = getBGImageChannel2FromFall(self, app_key)
+            dict_cache = loadSidecarCache(path_fall) if use_cache else None
+            if dict_cache:
+                self.applySidecarCache(app_key, dict_cache, Extension.MAT)
+            else:
+                self.setDictFall(app_key, loadFallMat(path_fall, lazy=lazy))
+                if use_cache:
+                    self.saveSidecarCache(app_key, path_fall, cache_max_bytes)
+            self.setRegisteredDictFall(app_key, config_manager)
             return True, None
         except Exception as e:
             # raise e
             return False, e
+
+    # set already parsed Fall data, e.g. loaded in worker processes
+    def setDictFall(self, app_key: AppKeys, dict_Fall: Dict[str, Any], config_manager: ConfigManager=None) -> None:
+        self.closeDictFall(app_key, dict_Fall)
+        self.dict_Fall[app_key] = dict_Fall
+        self.dict_data_dtype[app_key] = Extension.MAT
+        self.updateImageVersion()
+        self.dict_im_bg[app_key] = getBGImageFromFall(self, app_key)
+        self.dict_roi_coords[app_key] = getROICoordsFromDictFall(dict_Fall)
+        self.dict_im_roi[app_key] = getROIImageFromFall(self, app_key)
+        if self.getNChannels(app_key) == 2:
+            self.dict_im_bg_chan2[app_key] = getBGImageChannel2FromFall(self, app_key)
+        self.setRegisteredDictFall(app_key, config_manager)
+
+    # close lazily read traces of the Fall data of app_key before it is replaced, kept if shared with another app_key
+    def closeDictFall(self, app_key: AppKeys, dict_Fall_new: Optional[Dict[str, Any]]=None) -> None:
+        dict_Fall_old = self.dict_Fall.get(app_key)
+        if dict_Fall_old is None or dict_Fall_old is dict_Fall_new:
+            return
+        if any(dict_Fall is dict_Fall_old for key, dict_Fall in self.dict_Fall.items() if key != app_key):
+            return
+        closeLazyFall(dict_Fall_old)
+
+    # Suite2pROITracking add registered data dict
+    def setRegisteredDictFall(self, app_key: AppKeys, config_manager: ConfigManager=None) -> None:
+        if config_manager:
+            if config_manager.current_app == "SUITE2P_ROI_TRACKING" or config_manager.current_app == "CHECK_MULTI_SESSION_ROI_COORDINATES":
+                self.updateImageVersion()
+                self.dict_im_bg_reg[app_key] = {key_im: img.copy() for key_im, img in self.dict_im_bg[app_key].items()}
+                self.dict_roi_coords_reg[app_key] = getROICoordsFromDictFall(self.dict_Fall[app_key])
+                self.dict_im_roi_reg[app_key] = {key_im: img.copy() for key_im, img in self.dict_im_roi[app_key].items()}
+                if self.getNChannels(app_key) == 2:
+                    self.dict_im_bg_chan2_reg[app_key] = {key_im: img.copy() for key_im, img in self.dict_im_bg_chan2[app_key].items()}
         
     # load Caiman HDF5 data
-    def loadCaimanHDF5(self, app_key: AppKeys, path_hdf5: str, config_manager: ConfigManager=None, threshold_ratio: float=0.2) -> Tuple[bool, Optional[Exception]]:
+    def loadCaimanHDF5(self, app_key: AppKeys, path_hdf5: str, config_manager: ConfigManager=None, threshold_ratio: float=0.2, use_cache: bool=False, cache_max_bytes: Optional[int]=None) -> Tuple[bool, Optional[Exception]]:
         try:
-            dict_Fall = loadCaimanHDF5(path_hdf5)
-            self.dict_Fall[app_key] = dict_Fall
-            self.dict_data_dtype[app_key] = Extension.HDF5
-            self.dict_im_bg[app_key] = getBGImageFromCaimanHDF5(self, app_key)
-            self.dict_roi_coords[app_key] = getROICoordsFromDictFall(dict_Fall) # use same function as Fall.mat
-            self.dict_im_roi[app_key] = getROIImageFromFall(self, app_key) # use same function as Fall.mat
+            dict_cache = loadSidecarCache(path_hdf5) if use_cache else None
+            if dict_cache:
+                self.applySidecarCache(app_key, dict_cache, Extension.HDF5)
+            else:
+                dict_Fall = loadCaimanHDF5(path_hdf5)
+                self.closeDictFall(app_key, dict_Fall)
+                self.dict_Fall[app_key] = dict_Fall
+                self.dict_data_dtype[app_key] = Extension.HDF5
+                self.updateImageVersion()
+                self.dict_im_bg[app_key] = getBGImageFromCaimanHDF5(self, app_key)
+                self.dict_roi_coords[app_key] = getROICoordsFromDictFall(dict_Fall) # use same function as Fall.mat
+                self.dict_im_roi[app_key] = getROIImageFromFall(self, app_key) # use same function as Fall.mat
+                if use_cache:
+                    self.saveSidecarCache(app_key, path_hdf5, cache_max_bytes)
             # Suite2pROITracking add registered data dict
             if config_manager:
                 if config_manager.current_app == "SUITE2P_ROI_TRACKING":
-                    self.dict_im_bg_reg[app_key] = getBGImageFromCaimanHDF5(self, app_key)
-                    self.dict_roi_coords_reg[app_key] = getROICoordsFromDictFall(dict_Fall) # use same function as Fall.mat
-                    self.dict_im_roi_reg[app_key] = getROIImageFromFall(self, app_key) # use same function as Fall.mat
+                    self.updateImageVersion()
+                    self.dict_im_bg_reg[app_key] = {key_im: img.copy() for key_im, img in self.dict_im_bg[app_key].items()}
+                    self.dict_roi_coords_reg[app_key] = getROICoordsFromDictFall(self.dict_Fall[app_key]) # use same function as Fall.mat
+                    self.dict_im_roi_reg[app_key] = {key_im: img.copy() for key_im, img in self.dict_im_roi[app_key].items()}
             return True, None
         except Exception as e:
             raise e
             # return False, e
+
+    # write sidecar cache of loaded Fall data in a background thread, so the first open is not delayed by copying traces
+    # a read-only data directory or data replaced while writing only skips caching
+    def saveSidecarCache(self, app_key: AppKeys, path_src: str, cache_max_bytes: Optional[int]=None) -> threading.Thread:
+        args = (
+            path_src,
+            self.dict_Fall[app_key],
+            self.dict_im_bg.get(app_key),
+            self.dict_im_bg_chan2.get(app_key),
+            self.dict_im_roi.get(app_key),
+            )
+        def _save() -> None:
+            try:
+                saveSidecarCache(*args, max_bytes=cache_max_bytes)
+            except Exception as e:
+                print(f"Sidecar cache of {path_src} was not written: {e}")
+        thread = threading.Thread(target=_save, name=f"sidecar_cache_{app_key}", daemon=True)
+        thread.start()
+        return thread
+
+    # set Fall data from sidecar cache, background and ROI images are already converted
+    def applySidecarCache(self, app_key: AppKeys, dict_cache: Dict[str, Any], data_dtype: str) -> None:
+        dict_Fall = dict_cache["dict_Fall"]
+        self.closeDictFall(app_key, dict_Fall)
+        self.dict_Fall[app_key] = dict_Fall
+        self.dict_data_dtype[app_key] = data_dtype
+        self.updateImageVersion()
+        self.dict_im_bg[app_key] = dict_cache["im_bg"]
+        if dict_cache["im_bg_chan2"]:
+            self.dict_im_bg_chan2[app_key] = dict_cache["im_bg_chan2"]
+        self.dict_roi_coords[app_key] = getROICoordsFromDictFall(dict_Fall)
+        self.dict_im_roi[app_key] = dict_cache["im_roi"]
         
     # load tiff image data (for optional)
     def loadTifImage(self, app_key: AppKeys, path_image: str) -> Tuple[bool, Optional[Exception]]:
         try:
             self.dict_im_bg_optional[app_key] = loadTifImage(path_image)
+            self.updateImageVersion()
             return True, None
         except Exception as e:
             return False, e
         
     # load tiff stack data
-    def loadTiffStack(self, app_key: AppKeys, path_tiff: str) -> Tuple[bool, Optional[Exception]]:
+    def loadTiffStack(self, app_key: AppKeys, path_tiff: str, lazy: bool=False, plane_cache_mb: float=0) -> Tuple[bool, Optional[Exception]]:
         try:
-            tiff, metadata = loadTiffStack(path_tiff)
+            tiff, metadata = loadTiffStack(path_tiff, lazy=lazy, plane_cache_mb=plane_cache_mb)
             self.dict_data_dtype[app_key] = Extension.TIFF
             self.dict_tiff[app_key] = tiff
             self.dict_tiff_metadata[app_key] = metadata
             self.dict_tiff_reg[app_key] = tiff
+            self.updateImageVersion()
+            # views fall back to the range of each plane until the stats task of the view has finished
+            self.dict_tiff_stats[app_key] = None
+            self.dict_tiff_stats_reg[app_key] = None
             return True, None
         except Exception as e:
             return False, e
@@ -131,6 +219,7 @@ class DataManager:
             self.dict_data_dtype[app_key] = Extension.NPY
             # apply to Fall data structure
             arr_trace = np.load(path_npy, allow_pickle=True)
+            self.closeDictFall(app_key)
             self.dict_Fall[app_key] = {
                 "F": arr_trace,
                 "ops": {
@@ -196,6 +285,16 @@ class DataManager:
             }
         return dict_traces
     
+    # hit-testing index of roi_store, rebuilt when the store of the key is replaced, edits are followed by the index
+    def getROIHitIndex(self, app_key: AppKeys, roi_store: ROIStore, reg: bool=False, t_plane: Optional[int]=None) -> ROIHitIndex:
+        from ..utils.roi_index import ROIHitIndex
+        key = (app_key, reg, t_plane)
+        roi_index = self.dict_roi_hit_index.get(key)
+        if roi_index is None or roi_index.roi_store is not roi_store:
+            roi_index = ROIHitIndex(roi_store)
+            self.dict_roi_hit_index[key] = roi_index
+        return roi_index
+
     # get stat
     def getStat(self, app_key: AppKeys) -> Dict[int, Dict[str, Any]]:
         return self.dict_Fall[app_key]["stat"]
@@ -225,10 +324,13 @@ class DataManager:
         if not id_roi == None:
             return self.dict_roi_celltype.get(app_key).get(id_roi)
         return self.dict_roi_celltype.get(app_key)
+    # get ROI celltype, checkbox arrays
+    def getROIClassification(self, app_key: AppKeys) -> Optional[ROIClassification]:
+        return self.dict_roi_classification.get(app_key)
     # get ROI coordinates
-    def getDictROICoords(self, app_key: AppKeys) -> Dict[int, Dict[Literal["xpix", "ypix", "med"], np.ndarray[np.int32], Tuple[int]]]:
+    def getDictROICoords(self, app_key: AppKeys) -> ROIStore:
         return self.dict_roi_coords.get(app_key)
-    def getDictROICoordsRegistered(self, app_key: AppKeys) -> Dict[int, Dict[Literal["xpix", "ypix", "med"], np.ndarray[np.int32], Tuple[int]]]:
+    def getDictROICoordsRegistered(self, app_key: AppKeys) -> ROIStore:
         return self.dict_roi_coords_reg.get(app_key)
         
     "Tiff data"
@@ -238,6 +340,30 @@ class DataManager:
         return self.dict_tiff_metadata.get(app_key, None)
     def getTiffStackRegistered(self, app_key: AppKeys) -> np.ndarray[np.uint8, Tuple[int, int, int, int, int]]:
         return self.dict_tiff_reg.get(app_key, None)
+    def getTiffStackStats(self, app_key: AppKeys, get_reg: bool=False) -> Optional[Dict[str, Any]]:
+        if get_reg:
+            return self.dict_tiff_stats_reg.get(app_key, None)
+        return self.dict_tiff_stats.get(app_key, None)
+    # stats of img_stack computed in a background task, dropped if the stack was replaced in the meantime
+    def setTiffStackStats(self, app_key: AppKeys, img_stack: np.ndarray, stats: Dict[str, Any]) -> None:
+        if img_stack is self.dict_tiff.get(app_key):
+            self.dict_tiff_stats[app_key] = stats
+        if img_stack is self.dict_tiff_reg.get(app_key):
+            self.dict_tiff_stats_reg[app_key] = stats
+    # set registered stack, stats can be computed beforehand in a worker thread, else they are computed when the stack is shown
+    def setTiffStackRegistered(self, app_key: AppKeys, img_stack_reg: np.ndarray, stats: Optional[Dict[str, Any]]=None) -> None:
+        self.dict_tiff_reg[app_key] = img_stack_reg
+        self.updateImageVersion()
+        if img_stack_reg is self.dict_tiff.get(app_key):
+            self.dict_tiff_stats_reg[app_key] = self.dict_tiff_stats.get(app_key)
+        else:
+            self.dict_tiff_stats_reg[app_key] = stats
+
+    # after background images or stacks were replaced, render caches of views keyed by id(image) become stale
+    def updateImageVersion(self) -> None:
+        self.image_version += 1
+    def getImageVersion(self) -> int:
+        return self.image_version
 
     def getSizeOfX(self, app_key: AppKeys) -> int:
         return self.dict_tiff[app_key].shape[0]
@@ -271,11 +397,8 @@ class DataManager:
             img_stack = self.getTiffStackRegistered(app_key)
         else:
             img_stack = self.getTiffStack(app_key)
-        try:
-            return img_stack[:, :, channel, plane_z, plane_t]
-        except IndexError:
-            # out of index, return black image
-            return np.zeros(img_stack.shape[:2], dtype=np.uint8)
+        # out of index, return black image
+        return getPlaneFromXYCZTStack(img_stack, plane_z, plane_t, channel)
     
     def getDictBackgroundImage(self, app_key: AppKeys) -> Dict[str, np.ndarray[np.uint8, Tuple[int, int]]]: # 2d array
         return self.dict_im_bg.get(app_key)
@@ -310,7 +433,7 @@ class DataManager:
     def getDictROICoordsXYCTRegistered(self) -> Dict[int, Dict[int, Dict[Literal["xpix", "ypix", "med"], np.ndarray[np.int32]]]]:
         return self.dict_roi_coords_xyct_reg
     
-    def getDictROIMatching(self) -> Dict[str, Dict[int, List[int] | Dict[int, Dict[int, Optional[int]]]]]:
+    def getDictROIMatching(self) -> ROITracks:
         return self.dict_roi_matching
     
     def getDictROIImageXYCT(self) -> Dict[int, Dict[str, np.ndarray[np.uint8, Tuple[int, int]]]]:
@@ -0,0 +1,261 @@
+from __future__ import annotations
+from ..type_definitions import *
+import threading
+import traceback
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+from PyQt5.QtWidgets import QWidget, QMainWindow, QLabel, QProgressBar, QPushButton, QHBoxLayout, QMessageBox
+
+# raised inside a task when it has been cancelled
+class TaskCancelledError(Exception):
+    pass
+
+# signals emitted from the worker thread, delivered to the GUI thread
+class TaskSignals(QObject):
+    progress = pyqtSignal(int, int, str) # done, total, message
+    result = pyqtSignal(object)
+    error = pyqtSignal(object)
+    cancelled = pyqtSignal()
+    finished = pyqtSignal()
+
+class Task:
+    """
+    Job handed to the worker thread, also passed to the job function as first argument.
+    The job function must not touch Qt widgets or DataManager, results are applied in on_result on the GUI thread.
+
+    Args:
+        name (str): name shown in the status widget.
+        func (Callable): func(task, *args, **kwargs), reports progress with task.setProgress().
+        lock_keys (List[str]): shared state written by this task, tasks sharing a key run one after another.
+        cancellable (bool): False for jobs which never call setProgress, e.g. file writes, they can only be cancelled while queued.
+    """
+    def __init__(self, name: str, func: Callable[..., Any], args: Tuple[Any, ...], kwargs: Dict[str, Any], lock_keys: List[str], cancellable: bool=True):
+        self.name = name
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.lock_keys = list(lock_keys)
+        self.cancellable = cancellable
+        self.signals = TaskSignals()
+        self.event_cancel = threading.Event()
+        self.is_running = False
+
+    def cancel(self) -> None:
+        self.event_cancel.set()
+
+    def isCancelled(self) -> bool:
+        return self.event_cancel.is_set()
+
+    def checkCancelled(self) -> None:
+        if self.isCancelled():
+            raise TaskCancelledError(self.name)
+
+    # report progress, also the point where the job stops when cancelled
+    def setProgress(self, done: int, total: int, message: str="") -> None:
+        self.checkCancelled()
+        self.signals.progress.emit(int(done), int(total), message)
+
+class TaskRunnable(QRunnable):
+    def __init__(self, task: Task):
+        super().__init__()
+        self.task = task
+        self.setAutoDelete(True)
+
+    def run(self) -> None:
+        task = self.task
+        try:
+            task.checkCancelled()
+            result = task.func(task, *task.args, **task.kwargs)
+            task.checkCancelled()
+        except TaskCancelledError:
+            task.signals.cancelled.emit()
+        except Exception as e:
+            traceback.print_exc()
+            task.signals.error.emit(e)
+        else:
+            task.signals.result.emit(result)
+        finally:
+            task.signals.finished.emit()
+
+class TaskManager(QObject):
+    """
+    Run long jobs (registration, segmentation, inference, file writes) on a QThreadPool.
+    Tasks declaring the same lock key are queued in submission order, so conflicting writes never overlap.
+    Callbacks run on the GUI thread.
+
+    Args:
+        parent (QObject): owner, usually the main window.
+        max_workers (int): maximum number of worker threads, None for QThreadPool default.
+    """
+    task_started = pyqtSignal(object)
+    task_progress = pyqtSignal(object, int, int, str)
+    task_finished = pyqtSignal(object)
+
+    def __init__(self, parent: Optional[QObject]=None, max_workers: Optional[int]=None):
+        super().__init__(parent)
+        self.thread_pool = QThreadPool(self)
+        if max_workers:
+            self.thread_pool.setMaxThreadCount(max_workers)
+        self.list_task_pending: List[Task] = []
+        self.list_task_running: List[Task] = []
+        self.set_key_locked: set = set()
+
+    def runTask(
+            self,
+            name            : str,
+            func            : Callable[..., Any],
+            *args,
+            on_result       : Optional[Callable[[Any], None]]=None,
+            on_error        : Optional[Callable[[Exception], None]]=None,
+            on_cancelled    : Optional[Callable[[], None]]=None,
+            on_finished     : Optional[Callable[[], None]]=None,
+            lock_keys       : Optional[List[str]]=None,
+            widgets_busy    : Optional[List[QWidget]]=None,
+            cancellable     : bool=True,
+            **kwargs
+            ) -> Task:
+        lock_keys, widgets_busy = lock_keys or [], widgets_busy or []
+        task = Task(name, func, args, kwargs, lock_keys, cancellable)
+        # widgets are disabled until the task ends, e.g. the run button
+        for widget in widgets_busy:
+            widget.setEnabled(False)
+        if on_result:
+            task.signals.result.connect(on_result)
+        if on_error:
+            task.signals.error.connect(on_error)
+        if on_cancelled:
+            task.signals.cancelled.connect(on_cancelled)
+        task.signals.progress.connect(lambda done, total, message: self.task_progress.emit(task, done, total, message))
+        def _onFinished():
+            for widget in widgets_busy:
+                widget.setEnabled(True)
+            self.releaseTask(task)
+            if on_finished:
+                on_finished()
+        task.signals.finished.connect(_onFinished)
+        self.list_task_pending.append(task)
+        self.startPendingTasks()
+        return task
+
+    # start pending tasks whose lock keys are free, keeping submission order per key
+    def startPendingTasks(self) -> None:
+        set_key_claimed = set(self.set_key_locked)
+        list_task_cancelled = []
+        for task in list(self.list_task_pending):
+            if task.isCancelled(): # cancelled while queued, never started
+                self.list_task_pending.remove(task)
+                list_task_cancelled.append(task)
+                continue
+            if any(key in set_key_claimed for key in task.lock_keys):
+                set_key_claimed.update(task.lock_keys)
+                continue
+            self.list_task_pending.remove(task)
+            set_key_claimed.update(task.lock_keys)
+            self.set_key_locked.update(task.lock_keys)
+            self.list_task_running.append(task)
+            task.is_running = True
+            self.task_started.emit(task)
+            self.thread_pool.start(TaskRunnable(task))
+        for task in list_task_cancelled:
+            task.signals.cancelled.emit()
+            task.signals.finished.emit()
+
+    def releaseTask(self, task: Task) -> None:
+        if task in self.list_task_running:
+            self.list_task_running.remove(task)
+            self.set_key_locked.difference_update(task.lock_keys)
+        task.is_running = False
+        self.task_finished.emit(task)
+        self.startPendingTasks()
+
+    def getActiveTasks(self) -> List[Task]:
+        return self.list_task_running + self.list_task_pending
+
+    def isLocked(self, key: str) -> bool:
+        return key in self.set_key_locked or any(key in task.lock_keys for task in self.list_task_pending)
+
+    # running tasks which are not cancellable are left to finish, their results are applied
+    def cancelAllTasks(self) -> None:
+        for task in self.getActiveTasks():
+            if self.isCancellable(task):
+                task.cancel()
+
+    def isCancellable(self, task: Task) -> bool:
+        return task.cancellable or not task.is_running
+
+    def waitForDone(self, msecs: int=-1) -> bool:
+        return self.thread_pool.waitForDone(msecs)
+
+# progress of running tasks, placed in the status bar of the main window
+class TaskStatusWidget(QWidget):
+    def __init__(self, task_manager: TaskManager, parent: Optional[QWidget]=None):
+        super().__init__(parent)
+        self.task_manager = task_manager
+        self.q_label = QLabel()
+        self.q_progressbar = QProgressBar()
+        self.q_progressbar.setMaximumWidth(200)
+        self.q_button_cancel = QPushButton("Cancel")
+        layout = QHBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addWidget(self.q_label)
+        layout.addWidget(self.q_progressbar)
+        layout.addWidget(self.q_button_cancel)
+        self.q_button_cancel.clicked.connect(self.task_manager.cancelAllTasks)
+        self.task_manager.task_started.connect(lambda task: self.updateStatus())
+        self.task_manager.task_finished.connect(lambda task: self.updateStatus())
+        self.task_manager.task_progress.connect(self.onProgress)
+        self.setVisible(False)
+
+    def updateStatus(self) -> None:
+        list_task = self.task_manager.getActiveTasks()
+        self.setVisible(bool(list_task))
+        if list_task:
+            n_pending = len(self.task_manager.list_task_pending)
+            self.q_label.setText(f"{list_task[0].name}" + (f" (+{n_pending} queued)" if n_pending else ""))
+            self.q_progressbar.setRange(0, 0) # busy until the first progress report
+        self.q_button_cancel.setEnabled(any(self.task_manager.isCancellable(task) for task in list_task))
+
+    def onProgress(self, task: Task, done: int, total: int, message: str) -> None:
+        self.q_label.setText(f"{task.name}: {message}" if message else task.name)
+        if total > 0:
+            self.q_progressbar.setRange(0, total)
+            self.q_progressbar.setValue(done)
+
+# task manager of the window containing q_widget, created with its status widget on first use
+def getTaskManager(q_widget: QWidget) -> TaskManager:
+    q_window = q_widget.window()
+    task_manager = getattr(q_window, "task_manager", None)
+    if task_manager is None:
+        task_manager = TaskManager(q_window)
+        q_window.task_manager = task_manager
+        if isinstance(q_window, QMainWindow):
+            q_window.statusBar().addPermanentWidget(TaskStatusWidget(task_manager))
+    return task_manager
+
+# run task, failures are shown as warning on q_widget
+def runTaskWithMessage(
+        q_widget        : QWidget,
+        name            : str,
+        func            : Callable[..., Any],
+        *args,
+        on_result       : Optional[Callable[[Any], None]]=None,
+        msg_success     : Optional[Tuple[str, str]]=None,
+        lock_keys       : Optional[List[str]]=None,
+        widgets_busy    : Optional[List[QWidget]]=None,
+        cancellable     : bool=True,
+        **kwargs
+        ) -> Task:
+    def _onResult(result):
+        if on_result:
+            on_result(result)
+        if msg_success:
+            QMessageBox.information(q_widget, *msg_success)
+    def _onError(e):
+        QMessageBox.warning(q_widget, f"{name} failed", f"Error in {name}: {e}")
+    def _onCancelled():
+        QMessageBox.information(q_widget, f"{name} cancelled", f"{name} was cancelled.")
+    return getTaskManager(q_widget).runTask(
+        name, func, *args,
+        on_result=_onResult, on_error=_onError, on_cancelled=_onCancelled,
+        lock_keys=lock_keys, widgets_busy=widgets_busy, cancellable=cancellable,
+        **kwargs
+        )
@@ -1,6 +1,6 @@
 from __future__ import annotations
 from ..type_definitions import *
-from PyQt5.QtWidgets import QWidget, QLabel, QCheckBox, QLineEdit, QSlider, QSpinBox, QPushButton, QTableWidget, QListWidget, QComboBox, QGraphicsScene, QGraphicsView, QScrollArea, QAbstractItemView, QButtonGroup, QSizePolicy, QAbstractScrollArea
+from PyQt5.QtWidgets import QWidget, QLabel, QCheckBox, QLineEdit, QSlider, QSpinBox, QPushButton, QTableWidget, QTableView, QListWidget, QComboBox, QGraphicsScene, QGraphicsView, QScrollArea, QAbstractItemView, QButtonGroup, QSizePolicy, QAbstractScrollArea
 from PyQt5.QtGui import QFont, QPainter
 from PyQt5.QtCore import Qt
 
@@ -125,6 +125,15 @@ def makeWidgetTable(
         widget.setObjectName('use-global')
     return widget
 
+# QTableView, for ROI tables with ROITableModel
+def makeWidgetTableView(
+    use_global_style: bool
+) -> QTableView:
+    widget = QTableView()
+    if use_global_style:
+        widget.setObjectName('use-global')
+    return widget
+
 # QTable ListWidget
 def makeWidgetListWidget(
     parent: Any, 
@@ -276,7 +285,7 @@ class WidgetManager:
         self.dict_buttongroup :Dict[str, QButtonGroup] = {}
         self.dict_scene       :Dict[str, QGraphicsScene] = {}
         self.dict_view        :Dict[str, QGraphicsView] = {}
-        self.dict_table       :Dict[str, QTableWidget] = {}
+        self.dict_table       :Dict[str, Union[QTableWidget, QTableView]] = {}
         self.dict_figure      :Dict[str, Figure] = {}
         self.dict_canvas      :Dict[str, FigureCanvasQTAgg] = {}
         self.dict_scrollarea  :Dict[str, QScrollArea] = {}
@@ -361,6 +370,14 @@ class WidgetManager:
     ) -> QTableWidget:
         self.dict_table[key] = makeWidgetTable(use_global_style)
         return self.dict_table[key]
+
+    def makeWidgetTableView(
+        self, 
+        key: str,
+        use_global_style: bool=True
+    ) -> QTableView:
+        self.dict_table[key] = makeWidgetTableView(use_global_style)
+        return self.dict_table[key]
     
     def makeWidgetListWidget(
         self, 
@@ -1,7 +1,7 @@
 from __future__ import annotations
 from ..type_definitions import *
 import numpy as np
-from typing import Dict, Tuple, Any
+from typing import Dict, Tuple, List, Any
 
 
 def convertCaimanHDF5ToDictFall(
@@ -57,28 +57,14 @@ def convertCaimanHDF5ToDictFall(
     """    
     stat = {}
     
-    # Process each ROI
-
-    for idx in np.arange(A.shape[1]):
-        # Get spatial component for specific ROI
-        roi_spatial = A[:, idx].toarray().flatten()
-        
-        # Reshape to 2D image
-        roi_2d = roi_spatial.reshape(dims)
-        
-        # Apply threshold (CaImAn default: 20% of maximum value)
-        threshold = roi_2d.max() * threshold_ratio
-        
-        # Get coordinates of pixels above threshold
-        xpix, ypix = np.where(roi_2d > threshold)
-
-        med = (np.median(xpix), np.median(ypix))
-        
+    # all ROIs in one pass over the sparse footprints
+    list_xpix, list_ypix, arr_med = extractROIPixelsFromSparseFootprints(A, dims, threshold_ratio)
+    for idx, (xpix, ypix) in enumerate(zip(list_xpix, list_ypix)):
         # Create Suite2p format dictionary
         roi_dict = {
             'ypix': ypix,
             'xpix': xpix,
-            'med': med,
+            'med': (arr_med[idx, 0], arr_med[idx, 1]),
             "npix": len(ypix),
         }
         
@@ -91,4 +77,48 @@ def convertCaimanHDF5ToDictFall(
         "ops": ops,
         "stat": stat,
     }
-    return dict_Fall
\ No newline at end of file
+    return dict_Fall
+
+# pixels of each ROI above threshold_ratio * max of its footprint, read directly from CSC (indptr, indices, data)
+def extractROIPixelsFromSparseFootprints(
+        A: Any,
+        dims: Tuple[int, int],
+        threshold_ratio: float = 0.2,
+        ) -> Tuple[List[np.ndarray], List[np.ndarray], np.ndarray]:
+    """
+    Returns:
+        list_xpix, list_ypix: pixel coordinates per ROI, same order as np.where on the dense footprint.
+        arr_med: (N_roi, 2) median of xpix and ypix.
+    """
+    from scipy.sparse import csc_matrix
+    from ..utils.roi_store import calculateSegmentMedian
+    A = csc_matrix(A, copy=True)
+    A.sum_duplicates() # also sorts row indices within each column
+    n_roi = A.shape[1]
+    counts = np.diff(A.indptr)
+    col = np.repeat(np.arange(n_roi), counts)
+
+    # per-ROI max of the dense footprint, implicit zeros count unless the column is full
+    val_max = np.zeros(n_roi, dtype=A.dtype)
+    is_nonempty = counts > 0
+    val_max[is_nonempty] = np.maximum.reduceat(A.data, A.indptr[:-1][is_nonempty])
+    is_sparse = counts < A.shape[0]
+    val_max[is_sparse] = np.maximum(val_max[is_sparse], 0)
+
+    # threshold all entries at once, implicit zeros never pass as the threshold is >= 0 then
+    mask = A.data > (val_max * threshold_ratio)[col]
+    idx_pix = A.indices[mask].astype(np.intp)
+    col = col[mask]
+    xpix_all, ypix_all = np.divmod(idx_pix, dims[1])
+    counts = np.bincount(col, minlength=n_roi)
+    offsets = np.concatenate([[0], np.cumsum(counts)])
+
+    # medians in batch, nan for ROIs without pixels
+    arr_med = np.stack([
+        calculateSegmentMedian(xpix_all, offsets),
+        calculateSegmentMedian(ypix_all, offsets),
+    ], axis=1)
+
+    list_xpix = np.split(xpix_all, offsets[1:-1])
+    list_ypix = np.split(ypix_all, offsets[1:-1])
+    return list_xpix, list_ypix, arr_med
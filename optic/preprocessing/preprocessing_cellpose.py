@@ -1,7 +1,6 @@
 from __future__ import annotations
 from ..type_definitions import *
 import numpy as np
-from itertools import combinations
 
 # convert Cellpose's mask into dict of ROI coordinates
 """
@@ -13,92 +12,39 @@ the matching relationship is managed by the "cell_id_match" column.
 """
 def convertCellposeMaskToDictROICoords(
     masks       : np.ndarray[np.uint16, Tuple[int, int]], 
-    ) -> Dict[int, Dict[int, Dict[Literal["xpix", "ypix", "med"], np.ndarray[np.int32]]]]:
-    dict_roi_coords = {}
-
-    list_roi_id_cellpose = np.delete(np.unique(masks), 0)
-    for roi_id, roi_id_cellpose in enumerate(list_roi_id_cellpose):
-        ypix, xpix = np.where(masks == roi_id_cellpose) # XY reversed
-        xpix, ypix = xpix.astype("uint16"), ypix.astype("uint16")
-
-        med = (int(np.median(xpix)), int(np.median(ypix)))
-        dict_roi_coords[roi_id] = {"xpix": xpix, "ypix": ypix, "med": med}
-    return dict_roi_coords
+    ) -> ROIStore:
+    from ..utils.roi_store import ROIStore
+    return ROIStore.fromLabelImage(masks, dtype="uint16")
 
 def convertCellposeMaskToDictROICoordsXYCT(
     masks       : np.ndarray[np.uint16, Tuple[int, int, int]], 
-    ) -> Dict[int, Dict[int, Dict[Literal["xpix", "ypix", "med"], np.ndarray[np.int32]]]]:
+    ) -> Dict[int, ROIStore]:
+    from ..utils.roi_store import ROIStore
     dict_roi_coords_xyct = {}
     for t_plane, mask in enumerate(masks):
-        dict_roi_coords_xyct[t_plane] = {}
-        list_roi_id_cellpose = np.delete(np.unique(mask), 0)
-        for roi_id, roi_id_cellpose in enumerate(list_roi_id_cellpose):
-            ypix, xpix = np.where(mask == roi_id_cellpose) # XY reversed
-            xpix, ypix = xpix.astype("uint16"), ypix.astype("uint16")
-
-            med = (int(np.median(xpix)), int(np.median(ypix)))
-            dict_roi_coords_xyct[t_plane][roi_id] = {"xpix": xpix, "ypix": ypix, "med": med}
+        dict_roi_coords_xyct[t_plane] = ROIStore.fromLabelImage(mask, dtype="uint16")
     return dict_roi_coords_xyct
 
-# convert single Cellpose mask into dict of ROI matching
+# convert single Cellpose mask into ROI tracks of t_plane, ROIs of t_plane are not matched
 def convertSingleCellposeMaskToDictROIMatching(
-    dict_roi_matching : Dict[str, Dict[int, List[int] | Dict[int, Dict[int, Optional[int]]]]],
+    dict_roi_matching : ROITracks,
     mask              : np.ndarray[np.uint16, Tuple[int, int]], 
     t_plane           : int,
-    only_id           : bool = False
-) -> Dict[str, Dict[int, List[int] | Dict[int, Dict[int, Optional[int]]]]]:
+) -> ROITracks:
     """
-    Convert a Cellpose mask array into a dict_roi_matching structure.
-    Dict["id", Dict[plane_t, List[roi_id]]], "match", Dict[plane_t_pri, Dict[plane_t_sec, Dict[roi_id, Optional[roi_id]]]]
+    Replace the ROIs of t_plane of ROITracks with the ROIs of a Cellpose mask array, each ROI is a new track.
     """
-    # ROI id
-    dict_roi_matching["id"][t_plane] = list(np.arange(len(np.delete(np.unique(mask), 0)))) # cellpose mask's 0 is background
-
-    # ROI match
-    if not only_id:
-        for t_plane_sec in dict_roi_matching["match"][t_plane].keys():
-            dict_roi_matching["match"][t_plane][t_plane_sec] = {roi_id: None for roi_id in dict_roi_matching["id"][t_plane]}
+    labels = np.unique(mask)
+    dict_roi_matching.setPlane(t_plane, np.arange(np.count_nonzero(labels))) # cellpose mask's 0 is background
     return dict_roi_matching
 
-# convert Cellpose's mask into dict of ROI matching with loading cellpose mask
+# convert Cellpose's mask into ROI tracks with loading cellpose mask
 def convertCellposeMasksToDictROIMatching(
     masks       : np.ndarray[np.uint16, Tuple[int, int, int]], 
-) -> Dict[str, Dict[int, List[int] | Dict[int, Dict[int, Optional[int]]]]]:
+) -> ROITracks:
     """
-    Convert a Cellpose mask array into a dict_roi_matching structure.
-    Dict["id", Dict[plane_t, List[roi_id]]], "match", Dict[plane_t_pri, Dict[plane_t_sec, Dict[roi_id, Optional[roi_id]]]]
+    Convert a Cellpose mask array into ROITracks.
+    ROI IDs of each t_plane are given in order of Cellpose labels, ROIs with the same label in different t_planes are one track.
     """
-    dict_roi_matching = {"id": {}, "match": {}}
-    list_plane_combi = list(combinations(range(len(masks)), 2))
-
-    # ROI ID
-    for plane_t, mask in enumerate(masks):
-        dict_roi_matching["id"][plane_t] = list(np.arange(len(np.delete(np.unique(mask), 0))))
-
-    # ROI Matching
-    for plane_pri, plane_sec in list_plane_combi:
-        # Initialize the nested dictionaries if not already present
-        if plane_pri not in dict_roi_matching["match"]:
-            dict_roi_matching["match"][plane_pri] = {}
-        if plane_sec not in dict_roi_matching["match"][plane_pri]:
-            dict_roi_matching["match"][plane_pri][plane_sec] = {}
-
-        # Extract the masks for the primary and secondary planes
-        mask_pri, mask_sec = masks[plane_pri], masks[plane_sec]
-
-        # Get unique ROI IDs, excluding 0 (background)
-        list_roi_id_cellpose_pri = np.delete(np.unique(mask_pri), 0)
-        list_roi_id_cellpose_sec = np.delete(np.unique(mask_sec), 0)
-
-        # Perform ROI matching
-        for roi_id_pri, roi_id_cellpose_pri in enumerate(list_roi_id_cellpose_pri):
-            matched = False
-            for roi_id_sec, roi_id_cellpose_sec in enumerate(list_roi_id_cellpose_sec):
-                if roi_id_cellpose_sec == roi_id_cellpose_pri:
-                    dict_roi_matching["match"][plane_pri][plane_sec][roi_id_pri] = roi_id_sec
-                    matched = True
-                    break
-            if not matched:
-                dict_roi_matching["match"][plane_pri][plane_sec][roi_id_pri] = None
-
-    return dict_roi_matching
+    from ..utils.roi_tracks import ROITracks
+    return ROITracks.fromLabelImages(masks)
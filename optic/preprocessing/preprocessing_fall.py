@@ -32,14 +32,10 @@ def convertMatToDictROICheck(mat):
     return dict_
 
 # get ROI coordination from dict_Fall
-def getROICoordsFromDictFall(dict_Fall: Dict[str, Any]) -> Dict[int, Dict[Literal["xpix", "ypix", "med"], np.ndarray[np.int32], Tuple[int]]]:
-    dict_roi_coords = {}
-    for roi_id in dict_Fall["stat"].keys():
-        xpix = dict_Fall["stat"][roi_id]["xpix"]
-        ypix = dict_Fall["stat"][roi_id]["ypix"]
-        med = dict_Fall["stat"][roi_id]["med"]
-        dict_roi_coords[roi_id] = {"xpix": xpix, "ypix": ypix, "med": med}
-    return dict_roi_coords
+# scalar fields of stat (npix, radius, ...) are kept as ROIStore columns
+def getROICoordsFromDictFall(dict_Fall: Dict[str, Any]) -> ROIStore:
+    from ..utils.roi_store import ROIStore
+    return ROIStore.fromDictROICoords(dict_Fall["stat"], column_keys="all")
 
 # concatenate bg_image and dict_roi_coords and export as FallLike.mat
 def makeFallLikeFromBgImageAndDictROICoords(data_manager: DataManager) -> Dict[str, Any]:
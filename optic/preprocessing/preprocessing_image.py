@@ -67,12 +67,9 @@ def getROIImageFromFall(
         dtype: str="uint8", 
         value: int=50
         ) -> Dict[str, np.ndarray]:
+    from ..utils.roi_store import toROIStore
     dict_im_roi = {}
-    roi_img = np.zeros(data_manager.getImageSize(app_key), dtype=dtype)
-    for coords in data_manager.getDictROICoords(app_key).values():
-        xpix, ypix = coords["xpix"], coords["ypix"]
-        roi_img[ypix, xpix] = value
-    dict_im_roi["all"] = roi_img
+    dict_im_roi["all"] = toROIStore(data_manager.getDictROICoords(app_key)).toImage(data_manager.getImageSize(app_key), value=value, dtype=dtype)
     return dict_im_roi
 
 # make ROI Image from dict_roi_coords, Dict[roi_id, Dict["xpix", "ypix", "med"]]
@@ -119,4 +116,25 @@ def getBGImageFromCaimanHDF5(
         img = convertImageDtypeToINT(data_manager.dict_Fall[app_key]["ops"][key_im], dtype=dtype)
         img = resizeImageShape(img, base_shape)
         dict_im_bg[key_im] = img
-    return dict_im_bg
\ No newline at end of file
+    return dict_im_bg
+
+
+# 2x-downsampled image by 2x2 block mean, odd sizes are padded with the edge, dtype is kept
+def downsampleImage2x(img: np.ndarray) -> np.ndarray:
+    h, w = img.shape[:2]
+    if h % 2 or w % 2:
+        img = np.pad(img, ((0, h % 2), (0, w % 2)), mode="edge")
+    if np.issubdtype(img.dtype, np.integer):
+        img_sum = img[0::2, 0::2].astype(np.int64) + img[1::2, 0::2] + img[0::2, 1::2] + img[1::2, 1::2]
+        return ((img_sum + 2) // 4).astype(img.dtype)
+    return ((img[0::2, 0::2] + img[1::2, 0::2] + img[0::2, 1::2] + img[1::2, 1::2]) / 4).astype(img.dtype)
+
+# pyramid level of image, 2**level times smaller along each axis
+def downsampleImageToLevel(img: np.ndarray, level: int) -> np.ndarray:
+    for _ in range(level):
+        img = downsampleImage2x(img)
+    return img
+
+# (size_0, size_1) of pyramid level of an image of shape
+def getPyramidLevelShape(shape: Tuple[int, int], level: int) -> Tuple[int, int]:
+    return tuple(-(-size // (1 << level)) for size in shape[:2])
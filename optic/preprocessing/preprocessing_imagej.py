@@ -1,7 +1,8 @@
 from __future__ import annotations
 from ..type_definitions import *
-from .preprocessing_roi import getROIContour, convertROIContourToFilled, convertROIContourToFilledForRECT
-from typing import Tuple, Dict, List, Optional, Literal
+from .preprocessing_roi import getROIContour, convertROIContourToFilledInBBox, convertROIContourToFilledForRECTInBBox
+from ..utils.roi_store import toROIStore
+from typing import Tuple, Dict, List, Optional, Literal, Iterator
 from roifile import ImagejRoi
 import numpy as np
 import cv2
@@ -11,174 +12,208 @@ import re
 """
 Read Functions
 """
+# ROIs per worker process task
+IMAGEJ_ROI_CHUNK_SIZE = 500
+
+# MXXX_SXX, mXXX-sXX, "M XXX_S XX" -> MXXX_SXX
+def normalizeImagejRoiName(roi_name: str) -> str:
+    return roi_name.replace(" ", "").upper().replace("-", "_")
+
+# geometry of ImagejRoi needed for rasterization, plain values to keep pickling to workers cheap
+def getImagejRoiGeometry(roi: ImagejRoi) -> Tuple[int, int, int, int, int, Optional[np.ndarray], Optional[np.ndarray]]:
+    roitype = int(roi.roitype)
+    multi_coordinates = roi.multi_coordinates if roitype == 1 else None
+    integer_coordinates = roi.integer_coordinates if roitype in [7, 8] else None
+    return roitype, roi.left, roi.top, roi.right, roi.bottom, multi_coordinates, integer_coordinates
+
+# filled pixels (N, 2) of RECT, TRACED, FREEHAND or OVAL ROI, rasterized inside its bounding box
+def rasterizeImagejRoiGeometry(
+        geometry: Tuple[int, int, int, int, int, Optional[np.ndarray], Optional[np.ndarray]],
+        img_width: int,
+        img_height: int
+        ) -> np.ndarray:
+    from skimage.draw import ellipse
+    roitype, left, top, right, bottom, multi_coordinates, integer_coordinates = geometry
+    # RECT
+    if roitype == 1:
+        # simple rectangle ROI
+        if multi_coordinates is None or len(multi_coordinates) == 0:
+            xpix_contour = np.array([left, right, right, left])
+            ypix_contour = np.array([top, top, bottom, bottom])
+            xpix_ypix_contour = np.column_stack((xpix_contour, ypix_contour))
+            return convertROIContourToFilledInBBox(xpix_ypix_contour, img_width, img_height)
+        # complicated rectangle ROI, segments are separated by (4, 0)
+        roi_xy_coords = np.asarray(multi_coordinates)
+        idx_border = np.flatnonzero((roi_xy_coords[:-1] == 4) & (roi_xy_coords[1:] == 0))
+        list_roi_coords_segment = np.split(roi_xy_coords, idx_border + 1)
+        xpix_contour = np.concatenate([roi_coords_segment[1::3] for roi_coords_segment in list_roi_coords_segment])
+        ypix_contour = np.concatenate([roi_coords_segment[2::3] for roi_coords_segment in list_roi_coords_segment])
+        xpix_ypix_contour = np.column_stack((xpix_contour, ypix_contour))
+        # RECT ROI contour is so complicated !!!
+        # use specialzed function for RECT
+        return convertROIContourToFilledForRECTInBBox(xpix_ypix_contour, img_width, img_height)
+    # TRACED, FREEHAND
+    elif roitype == 7 or roitype == 8:
+        xpix_contour = integer_coordinates[:, 0] + left
+        ypix_contour = integer_coordinates[:, 1] + top
+        xpix_ypix_contour = np.column_stack((xpix_contour, ypix_contour))
+        return convertROIContourToFilledInBBox(xpix_ypix_contour, img_width, img_height)
+    # OVAL, drawn on its own canvas with 5 px margin, not clipped to the image
+    elif roitype == 2:
+        center_x, center_y = (left + right) / 2, (top + bottom) / 2
+        width, height = right - left, bottom - top
+        r_radius, c_radius = height / 2, width / 2
+        canvas_height, canvas_width = int(height + 10), int(width + 10)
+
+        # Adjust center coordinates for skimage.draw.ellipse
+        offset_x = int(-left + 5)
+        offset_y = int(-top + 5)
+        sk_center_y = canvas_height - (center_y + offset_y)
+        sk_center_x = center_x + offset_x
+
+        rr, cc = ellipse(sk_center_y, sk_center_x, r_radius, c_radius, shape=(canvas_height, canvas_width))
+        return np.column_stack((cc - offset_x, (canvas_height - rr) - offset_y)).astype(np.int64)
+    raise ValueError(f"unsupported ROI type: {roitype}")
+
+# worker process task, a chunk of ROIs
+def rasterizeImagejRoiGeometries(
+        list_geometry: List[Tuple[int, int, int, int, int, Optional[np.ndarray], Optional[np.ndarray]]],
+        img_width: int,
+        img_height: int
+        ) -> List[np.ndarray]:
+    return [rasterizeImagejRoiGeometry(geometry, img_width, img_height) for geometry in list_geometry]
+
+# rasterize ROIs in chunks on a process pool, small ROI sets are done in this process
+def rasterizeImagejRois(
+        list_geometry: List[Tuple[int, int, int, int, int, Optional[np.ndarray], Optional[np.ndarray]]],
+        img_width: int,
+        img_height: int,
+        max_workers: Optional[int]=None,
+        chunk_size: int=IMAGEJ_ROI_CHUNK_SIZE,
+        ) -> List[np.ndarray]:
+    import os
+    from concurrent.futures import ProcessPoolExecutor
+    list_chunk = [list_geometry[i:i+chunk_size] for i in range(0, len(list_geometry), chunk_size)]
+    max_workers = min(max_workers or os.cpu_count() or 1, len(list_chunk))
+    if max_workers <= 1:
+        return rasterizeImagejRoiGeometries(list_geometry, img_width, img_height)
+    list_xpix_ypix = []
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        # map keeps the order of the chunks
+        for list_xpix_ypix_chunk in executor.map(rasterizeImagejRoiGeometries, list_chunk, [img_width] * len(list_chunk), [img_height] * len(list_chunk)):
+            list_xpix_ypix.extend(list_xpix_ypix_chunk)
+    return list_xpix_ypix
 
 # convert imageJ roi.zip to dict_roi_coords_xyct, dict_roi_matching
 """
 ROI format of roi.zip is XYCZT, convert to XYCT format
 
-dict_roi_matching: initialized dict_roi_matching
+dict_roi_matching: initialized ROITracks, ROIs with the same "MXXX" name are one track
 dict_roi_coords_xyct: initialized dict_roi_coords_xyct
+max_workers: number of processes for rasterization, 1 to run in this process
 """
 def convertImagejRoiToDictROIMatchingAndDictROICoords(
         rois: List[ImagejRoi],
-        dict_roi_matching: Dict[str, Dict[int, List[int] | Dict[int, Dict[int, Optional[int]]]]],
+        dict_roi_matching: ROITracks,
         dict_roi_coords_xyct: Dict[int, Dict],
         img_width: int,
-        img_height: int
-    ) -> Tuple[Dict[str, Dict[int, List[int] | Dict[int, Dict[int, Optional[int]]]]], 
-               Dict[int, Dict[int, Dict[Literal["x", "y", "med"], np.ndarray]]]]:
-    from skimage.draw import ellipse
+        img_height: int,
+        max_workers: Optional[int]=None,
+    ) -> Tuple[ROITracks, Dict[int, Dict[int, Dict[Literal["x", "y", "med"], np.ndarray]]]]:
+    from collections import Counter
+    from ..utils.roi_tracks import ROITracks
     """
     TEMPORARY WARNING !!!
     """
     dict_error = {}
 
-    # anchor dict for dict_roi_matching["match"]
-    # ex) {"m001": {0: 1, 1: 2, 2: 4, 3: 2}, "m002": {0: 3, 1: 4, 2: 5, 3: 6}}
-    dict_roi_matching_anchor: Dict[str, Dict[int, int]] = {}
+    # track ID of each ROI name, ex) {"M001": 0, "M002": 1}
+    dict_track_id: Dict[str, int] = {}
+    # ROIs already in the planes are kept without matches
+    dict_roi_matching = ROITracks.fromROIIds({t_plane: dict_roi_matching.getROIIds(t_plane) for t_plane in dict_roi_matching.getPlanes()})
+    # t_plane -> {roi_id: track_id}, written to dict_roi_matching once per t_plane
+    dict_plane_track = {
+        t_plane: dict(zip(dict_roi_matching.getROIIdList(t_plane), dict_roi_matching.getTrackIds(t_plane).tolist()))
+        for t_plane in dict_roi_matching.getPlanes()
+        }
 
     # some roi.name are duplicated, so check and skip duplicated roi
-    list_roi_name = [roi.name for roi in rois]
-    list_duplicate_roi_name = [name for name in list_roi_name if list_roi_name.count(name) > 1]
+    counter_roi_name = Counter(roi.name for roi in rois)
 
-    # get roi_matching["id"] and roi_coords_xyct
-    for i, roi in enumerate(rois):
+    # check names first, only valid ROIs are rasterized
+    list_roi_valid: List[Tuple[ImagejRoi, int, int, str]] = [] # roi, roi_t_plane, roi_id, name
+    for roi in rois:
         # skip duplicated roi
-        if roi.name in list_duplicate_roi_name:
+        if counter_roi_name[roi.name] > 1:
             print("ROI load error: ", roi.name)
             print("DUPLICATED")
             dict_error[roi.name] = "DUPLICATED"
             continue
-        roi_name = roi.name # MXXX_SXX
-        roi_name = roi_name.replace(" ", "") # remove space
-        roi_name = roi_name.upper() # mXXX_sXX -> MXXX_SXX
-        roi_name = roi_name.replace("-", "_") # MXXX-SXX -> MXXX_SXX
+        roi_name = normalizeImagejRoiName(roi.name) # MXXX_SXX
 
         # only RECT, TRACED, FREEHAND, OVAL !!!
-        if roi.roitype in [1, 2, 7, 8]:
-            try:
-                # RECT
-                if roi.roitype == 1: 
-                    # simple rectangle ROI
-                    if not roi.multi_coordinates:
-                        xpix_contour = np.array([roi.left, roi.right, roi.right, roi.left])
-                        ypix_contour = np.array([roi.top, roi.top, roi.bottom, roi.bottom])
-                        xpix_ypix_contour = np.column_stack((xpix_contour, ypix_contour))
-                        xpix_ypix = convertROIContourToFilled(xpix_ypix_contour, img_width, img_height)
-                    # complicated rectangle ROI
-                    if roi.multi_coordinates:
-                        roi_xy_coords = roi.multi_coordinates
-                        list_roi_coords_segment = []
-
-                        seg_start = 0
-                        seg_end = len(roi_xy_coords)
-                        for i in range(len(roi_xy_coords)):
-                            try:
-                                # pick up 2 elements
-                                pri, sec = roi_xy_coords[i], roi_xy_coords[i+1]
-                                if pri == 4 and sec == 0: # border of segments (4, 0)
-                                    seg_end = i
-                                    list_roi_coords_segment.append(roi_xy_coords[seg_start:seg_end+1])
-                                    seg_start = i+1
-                            except IndexError: # end of list
-                                seg_end = i
-                                list_roi_coords_segment.append(roi_xy_coords[seg_start:seg_end+1])
-                        xpix_contour = np.concatenate([roi_coords_segment[1::3] for roi_coords_segment in list_roi_coords_segment])
-                        ypix_contour = np.concatenate([roi_coords_segment[2::3] for roi_coords_segment in list_roi_coords_segment])
-                        xpix_ypix_contour = np.column_stack((xpix_contour, ypix_contour))
-                        # RECT ROI contour is so complicated !!!
-                        # use specialzed function for RECT
-                        xpix_ypix = convertROIContourToFilledForRECT(xpix_ypix_contour, img_width, img_height)
-                # TRACED, FREEHAND
-                elif roi.roitype == 7 or roi.roitype == 8: 
-                    roi_x_start = roi.left
-                    roi_y_start = roi.top
-                    roi_xy_coords = roi.integer_coordinates
-
-                    xpix_contour = roi_xy_coords[:, 0] + roi_x_start
-                    ypix_contour = roi_xy_coords[:, 1] + roi_y_start
-                    xpix_ypix_contour = np.column_stack((xpix_contour, ypix_contour))
-                    # convert contour to filled roi
-                    xpix_ypix = convertROIContourToFilled(xpix_ypix_contour, img_width, img_height)
-                # OVAL
-                elif roi.roitype == 2:
-                    center_x, center_y = (roi.left + roi.right) / 2, (roi.top + roi.bottom) / 2
-                    width, height = roi.right - roi.left, roi.bottom - roi.top
-                    r_radius, c_radius = height / 2, width / 2
-                    img_height, img_width = int(height + 10), int(width + 10)
-
-                    # Adjust center coordinates for skimage.draw.ellipse
-                    offset_x = int(-roi.left + 5)
-                    offset_y = int(-roi.top + 5)
-                    sk_center_y = img_height - (center_y + offset_y) 
-                    sk_center_x = center_x + offset_x
-
-                    # skimage.draw.ellipse
-                    rr, cc = ellipse(sk_center_y, sk_center_x, r_radius, c_radius, 
-                                        shape=(img_height, img_width))
-
-                    # Convert to coordinates for plotting
-                    xpix_ypix = []
-                    for i in range(len(rr)):
-                        x = cc[i] - offset_x
-                        y = (img_height - rr[i]) - offset_y 
-                        xpix_ypix.append((x, y))
-                    xpix_ypix = np.array(xpix_ypix)
-                xpix, ypix = xpix_ypix[:, 0], xpix_ypix[:, 1]
-                med = np.array([np.median(xpix).astype("uint16"), np.median(ypix).astype("uint16")])
-
-                roi_z_plane = roi.z_position - 1
-                roi_t_plane = roi.t_position - 1
-                
-                """
-                WARNING !!!
-                Current roi naming rule is "mXXX_sXX" or "MXXX_SXX", m,M : ROI ID, s,S : t_plane number
-                But, this rule is not always correct.
-                """
-                # if naming rule is not correct, skip
-                # MXXX_SXX
-                if not re.match(r'^M\d+_S\d+$', roi_name):
-                    print("ROI load error: ", roi.name)
-                    print("WRONG NAMING")
-                    dict_error[roi.name] = "WRONG NAMING"
-                    continue
-                        
-                if not int(roi_name.split("_")[1].split("S")[1]) == roi_t_plane + 1:
-                    print("ROI load error: ", roi.name)
-                    print("WRONG NAMING AND WRONG T_PLANE")
-                    dict_error[roi.name] = "WRONG NAMING AND WRONG T_PLANE"
-                    continue
-
-                name = roi_name.split("_")[0]
-                roi_id = int(name.split("M")[1]) - 1
-                
-                # Some ROI's z_position and t_position are 0, it's not correct.
-                if roi.t_position == 0:
-                    print("ROI load error: ", roi.name)
-                    print("NOT CONTAIN t_position")
-                    dict_error[roi.name] = "NOT CONTAIN t_position"
-                    continue
-                
-                dict_roi_matching["id"][roi_t_plane].append(roi_id)
-                dict_roi_coords_xyct[roi_t_plane][roi_id] = {
-                    "xpix": xpix,
-                    "ypix": ypix,
-                    "med": med,
-                }
-
-                # store roi name, t_plane number and roi_id
-                if name not in dict_roi_matching_anchor:
-                    dict_roi_matching_anchor[name] = {}
-                dict_roi_matching_anchor[name][roi_t_plane] = roi_id
-            except IndexError as e:
-                raise e
-                print("ROI load error: ", roi.name)
-                print("INDEX ERROR")
-                dict_error[roi.name] = "INDEX ERROR"
-        else:
+        if roi.roitype not in [1, 2, 7, 8]:
             print("ROI load error: ", roi.name)
             print(f"INVALID ROI TYPE {roi.roitype.name}")
             dict_error[roi.name] = f"INVALID ROI TYPE {roi.roitype.name}"
+            continue
+
+        roi_t_plane = roi.t_position - 1
+
+        """
+        WARNING !!!
+        Current roi naming rule is "mXXX_sXX" or "MXXX_SXX", m,M : ROI ID, s,S : t_plane number
+        But, this rule is not always correct.
+        """
+        # if naming rule is not correct, skip
+        # MXXX_SXX
+        if not re.match(r'^M\d+_S\d+$', roi_name):
+            print("ROI load error: ", roi.name)
+            print("WRONG NAMING")
+            dict_error[roi.name] = "WRONG NAMING"
+            continue
+                
+        if not int(roi_name.split("_")[1].split("S")[1]) == roi_t_plane + 1:
+            print("ROI load error: ", roi.name)
+            print("WRONG NAMING AND WRONG T_PLANE")
+            dict_error[roi.name] = "WRONG NAMING AND WRONG T_PLANE"
+            continue
+
+        name = roi_name.split("_")[0]
+        roi_id = int(name.split("M")[1]) - 1
+        
+        # Some ROI's z_position and t_position are 0, it's not correct.
+        if roi.t_position == 0:
+            print("ROI load error: ", roi.name)
+            print("NOT CONTAIN t_position")
+            dict_error[roi.name] = "NOT CONTAIN t_position"
+            continue
+
+        list_roi_valid.append((roi, roi_t_plane, roi_id, name))
+
+    # get ROI tracks and roi_coords_xyct
+    list_xpix_ypix = rasterizeImagejRois([getImagejRoiGeometry(roi) for roi, _, _, _ in list_roi_valid], img_width, img_height, max_workers)
+    for (roi, roi_t_plane, roi_id, name), xpix_ypix in zip(list_roi_valid, list_xpix_ypix):
+        xpix, ypix = xpix_ypix[:, 0], xpix_ypix[:, 1]
+        med = np.array([np.median(xpix).astype("uint16"), np.median(ypix).astype("uint16")])
+
+        dict_roi_coords_xyct[roi_t_plane][roi_id] = {
+            "xpix": xpix,
+            "ypix": ypix,
+            "med": med,
+        }
+
+        # ROIs of one name are one track, later ROIs of the same plane and ID win
+        if name not in dict_track_id:
+            dict_track_id[name] = dict_roi_matching.newTrackId()
+        dict_plane_track.setdefault(roi_t_plane, {})[roi_id] = dict_track_id[name]
+
+    for t_plane, dict_track in dict_plane_track.items():
+        dict_roi_matching.setPlane(t_plane, list(dict_track.keys()), list(dict_track.values()))
+
+    # t_planes as ROIStore, one concatenation per t_plane
+    for t_plane in list(dict_roi_coords_xyct.keys()):
+        dict_roi_coords_xyct[t_plane] = toROIStore(dict_roi_coords_xyct[t_plane])
 
     # """
     # TEMPORARY WARNING !!!
@@ -187,159 +222,142 @@ def convertImagejRoiToDictROIMatchingAndDictROICoords(
     # df_error = pd.DataFrame(dict_error.items(), columns=["roi_name", "error"])
     # df_error.to_csv("ROIManager_load_error.csv", index=False, header=None)
 
-    # initialize roi_matching["match"]
-    for t_plane_pri in list(dict_roi_matching["id"].keys())[:-1]: # except last t_plane 
-        for t_plane_sec in dict_roi_matching["match"][t_plane_pri].keys():
-            dict_roi_matching["match"][t_plane_pri][t_plane_sec] = {roi_id: None for roi_id in dict_roi_matching["id"][t_plane_pri]}
-
-    # get roi_matching["match"]
-    for roi in rois:
-        roi_name = roi.name # MXXX_SXX
-        roi_name = roi_name.replace(" ", "") # remove space
-        roi_name = roi_name.upper() # mXXX_sXX -> MXXX_SXX
-        roi_name = roi_name.replace("-", "_") # MXXX-SXX -> MXXX_SXX
-        name = roi_name.split("_")[0]
-        # single ROI existing multi planes
-        for t_plane_pri in dict_roi_matching["match"].keys():
-            for t_plane_sec in dict_roi_matching["match"][t_plane_pri].keys():
-                try:
-                    roi_id_pri = dict_roi_matching_anchor[name][t_plane_pri]
-                    roi_id_sec = dict_roi_matching_anchor[name][t_plane_sec]
-                    dict_roi_matching["match"][t_plane_pri][t_plane_sec][roi_id_pri] = roi_id_sec
-                except KeyError:
-                    pass
-
     return dict_roi_matching, dict_roi_coords_xyct
 
 
 """
 Write Functions
 """
-# convert dict_roi_coords_xyct, dict_roi_matching to imageJ roi.zip
-def convertDictROIMatchingAndDictROICoordsToImagejRoi(
-        dict_roi_matching: Dict[str, Dict[int, List[int] | Dict[int, Dict[int, Optional[int]]]]], 
-        dict_roi_coords_xyct: Dict[int, Dict[int, Dict[Literal["x", "y", "med"], np.ndarray]]],
-    ) -> List[ImagejRoi]:
-    list_roi = []
-    # create dict_roi_name from dict_roi_matching
+# ImagejRoi of one ROI as .roi bytes, from the contour of its filled pixels, or from its cached "edge" contour
+def convertROICoordsToImagejRoiBytes(
+        xpix: Optional[np.ndarray], 
+        ypix: Optional[np.ndarray], 
+        roi_name: str, 
+        t_plane: int, 
+        contour: Optional[Tuple[np.ndarray, np.ndarray]]=None
+        ) -> bytes:
+    if contour is None:
+        x_contour, y_contour = getROIContour(np.asarray(xpix), np.asarray(ypix), method='edge')
+    else:
+        x_contour, y_contour = contour
+    coords_contour = np.array([x_contour, y_contour]).T
+    roi = ImagejRoi.frompoints(coords_contour)
+    roi.name = roi_name
+    roi.t_position = t_plane + 1
+    return roi.tobytes()
+
+# worker process task, a chunk of (roi_name, t_plane, xpix, ypix, contour), pixels are None if the contour is given
+def convertROICoordsToImagejRoiBytesChunk(list_roi: List[Tuple[str, int, Optional[np.ndarray], Optional[np.ndarray], Optional[Tuple[np.ndarray, np.ndarray]]]]) -> List[Tuple[str, bytes]]:
+    return [(roi_name, convertROICoordsToImagejRoiBytes(xpix, ypix, roi_name, t_plane, contour)) for roi_name, t_plane, xpix, ypix, contour in list_roi]
+
+# (t_plane, roi_id, roi_name) of all ROIs, sorted with MXXX, SXX
+def getSortedImagejRoiNames(
+        dict_roi_matching: ROITracks
+        ) -> List[Tuple[int, int, str]]:
     dict_roi_name = createDictROINameFromDictROIMatching(dict_roi_matching)
+    list_roi_name = [(t_plane, id_roi, roi_name) for t_plane, dict_roi_name_t in dict_roi_name.items() for id_roi, roi_name in dict_roi_name_t.items()]
+    return sorted(list_roi_name, key=lambda item: getImagejRoiNameNumbers(item[2]))
 
-    for t_plane in dict_roi_matching["id"].keys():
-        for id_roi in dict_roi_matching["id"][t_plane]:
-            # make ImagejRoi from ROI's contour coordinates
-            coords = np.array([dict_roi_coords_xyct[t_plane][id_roi]["xpix"], dict_roi_coords_xyct[t_plane][id_roi]["ypix"]]).T
-            x_contour, y_contour = getROIContour(coords[:, 0], coords[:, 1], method='edge')
-            coords_contour = np.array([x_contour, y_contour]).T
-            roi = ImagejRoi.frompoints(coords_contour)
-            # rename ROI's name
-            roi.name = dict_roi_name[t_plane][id_roi]
-            roi.t_position = t_plane + 1
-            list_roi.append(roi)
+# ImagejRoi bytes in sorted order, contours are computed in chunks on a process pool, small ROI sets in this process
+def iterImagejRoiBytes(
+        dict_roi_matching: ROITracks, 
+        dict_roi_coords_xyct: Dict[int, Dict[int, Dict[Literal["x", "y", "med"], np.ndarray]]],
+        max_workers: Optional[int]=None,
+        chunk_size: int=IMAGEJ_ROI_CHUNK_SIZE,
+        dict_contour_xyct: Optional[Dict[int, Dict[int, Tuple[np.ndarray, np.ndarray]]]]=None,
+        ) -> Iterator[Tuple[str, bytes]]:
+    """
+    dict_contour_xyct: precomputed "edge" contours, {t_plane: {roi_id: (xpix, ypix)}}, other ROIs are computed here
+    """
+    import os
+    from concurrent.futures import ProcessPoolExecutor
+    dict_contour_xyct = dict_contour_xyct or {}
+    list_roi = []
+    for t_plane, id_roi, roi_name in getSortedImagejRoiNames(dict_roi_matching):
+        contour = dict_contour_xyct.get(t_plane, {}).get(id_roi)
+        if contour is None:
+            list_roi.append((roi_name, t_plane, dict_roi_coords_xyct[t_plane][id_roi]["xpix"], dict_roi_coords_xyct[t_plane][id_roi]["ypix"], None))
+        else:
+            list_roi.append((roi_name, t_plane, None, None, contour))
+    list_chunk = [list_roi[i:i+chunk_size] for i in range(0, len(list_roi), chunk_size)]
+    max_workers = min(max_workers or os.cpu_count() or 1, len(list_chunk))
+    if max_workers <= 1:
+        for chunk in list_chunk:
+            yield from convertROICoordsToImagejRoiBytesChunk(chunk)
+        return
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        # map keeps the order of the chunks, finished chunks are handed on while the rest are running
+        for list_roi_bytes in executor.map(convertROICoordsToImagejRoiBytesChunk, list_chunk):
+            yield from list_roi_bytes
 
-    # sort with MXXX
-    list_roi = sortRoisByName(list_roi)
+# write dict_roi_coords_xyct, dict_roi_matching to imageJ roi.zip, ROIs are streamed into the zip
+def writeImagejRoiZip(
+        path_dst: str,
+        dict_roi_matching: ROITracks, 
+        dict_roi_coords_xyct: Dict[int, Dict[int, Dict[Literal["x", "y", "med"], np.ndarray]]],
+        max_workers: Optional[int]=None,
+        dict_contour_xyct: Optional[Dict[int, Dict[int, Tuple[np.ndarray, np.ndarray]]]]=None,
+        ) -> None:
+    import zipfile
+    with zipfile.ZipFile(path_dst, mode="w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for roi_name, roi_bytes in iterImagejRoiBytes(dict_roi_matching, dict_roi_coords_xyct, max_workers, dict_contour_xyct=dict_contour_xyct):
+            zf.writestr(f"{roi_name}.roi", roi_bytes)
 
-    return list_roi
+# convert dict_roi_coords_xyct, dict_roi_matching to imageJ roi.zip
+def convertDictROIMatchingAndDictROICoordsToImagejRoi(
+        dict_roi_matching: ROITracks, 
+        dict_roi_coords_xyct: Dict[int, Dict[int, Dict[Literal["x", "y", "med"], np.ndarray]]],
+        max_workers: Optional[int]=None,
+    ) -> List[ImagejRoi]:
+    return [ImagejRoi.frombytes(roi_bytes) for _, roi_bytes in iterImagejRoiBytes(dict_roi_matching, dict_roi_coords_xyct, max_workers)]
 
 # create dict_roi_name for creating ImageJ ROI from dict_roi_matching
+"""
+ROIs of one track are one cell, cells are numbered in order of their first ROI (t_plane, then ROI order).
+dict_roi_matching of the pairwise layout is converted to tracks first.
+"""
 def createDictROINameFromDictROIMatching(
-        dict_roi_matching: Dict[str, Dict[int, List[int] | Dict[int, Dict[int, Optional[int]]]]]
+        dict_roi_matching: ROITracks | Dict[str, Dict[int, List[int] | Dict[int, Dict[int, Optional[int]]]]]
         ) -> Dict[int, Dict[int, str]]:
-    # Set to track processed ROIs
-    processed_rois = set()
-    
-    # List of cell groups (ROIs from the same cell)
-    cell_groups = []
-    
-    # List of time frames
-    t_planes = sorted(dict_roi_matching["id"].keys())
-    
-    # Process each ROI in each time frame
-    for t_plane in t_planes:
-        for roi_id in dict_roi_matching["id"][t_plane]:
-            # Skip if already processed
-            if (t_plane, roi_id) in processed_rois:
-                continue
-            
-            # Collect ROIs related to current ROI
-            related_rois = [(t_plane, roi_id)]
-            processed_rois.add((t_plane, roi_id))
-            
-            # Find other ROIs related to this ROI
-            for t1 in t_planes:
-                if t1 == t_plane:
-                    continue
-                
-                # Check matching from t_plane to t1
-                if t_plane in dict_roi_matching["match"] and t1 in dict_roi_matching["match"][t_plane]:
-                    matched_roi_id = dict_roi_matching["match"][t_plane][t1].get(roi_id)
-                    if matched_roi_id is not None:
-                        related_rois.append((t1, matched_roi_id))
-                        processed_rois.add((t1, matched_roi_id))
-            
-            # Check consistency between related ROIs (complete graph)
-            consistent = True
-            for i, (t1, roi_id1) in enumerate(related_rois):
-                for j, (t2, roi_id2) in enumerate(related_rois[i+1:], i+1):
-                    # Check direct matching
-                    if t1 in dict_roi_matching["match"] and t2 in dict_roi_matching["match"][t1]:
-                        # Matching from t1 to t2
-                        if dict_roi_matching["match"][t1][t2].get(roi_id1) != roi_id2:
-                            consistent = False
-                            break
-                    elif t2 in dict_roi_matching["match"] and t1 in dict_roi_matching["match"][t2]:
-                        # Matching from t2 to t1
-                        if dict_roi_matching["match"][t2][t1].get(roi_id2) != roi_id1:
-                            consistent = False
-                            break
-                    else:
-                        # No direct matching means inconsistency
-                        consistent = False
-                        break
-                
-                if not consistent:
-                    break
-            
-            # Add as one group if consistent
-            if consistent:
-                cell_groups.append(related_rois)
-            else:
-                # Process as separate ROIs if inconsistent
-                for r in related_rois:
-                    if r not in [item for group in cell_groups for item in group]:
-                        cell_groups.append([r])
-    
-    # Initialize dictionary for ROI names
-    dict_roi_name = {t: {} for t in t_planes}
+    from ..utils.roi_tracks import ROITracks, toROITracks, formatChangedMatches
+    roi_tracks = toROITracks(dict_roi_matching)
+    if not isinstance(dict_roi_matching, ROITracks):
+        list_change = roi_tracks.getChangedMatches(dict_roi_matching)
+        if list_change:
+            print(f"{len(list_change)} ROI matches changed to make tracks:\n{formatChangedMatches(list_change)}")
+
+    # M number of each track
+    dict_track_number: Dict[int, int] = {}
+    dict_roi_name = {}
+    for t_plane in roi_tracks.getPlanes():
+        dict_roi_name[t_plane] = {}
+        for roi_id, track_id in zip(roi_tracks.getROIIdList(t_plane), roi_tracks.getTrackIds(t_plane).tolist()):
+            number = dict_track_number.setdefault(track_id, len(dict_track_number) + 1)
+            dict_roi_name[t_plane][roi_id] = f"M{number:03d}_S{t_plane+1:02d}"
+    return dict_roi_name
+
+# (M number, S number) of ROI name in format "Mxxx_Sxx", invalid names sort to end
+def getImagejRoiNameNumbers(roi_name: str) -> Tuple[float, float]:
+    # Extract M and S numbers from name
+    name = roi_name.replace(" ", "").upper()
     
-    # Assign M number to each group
-    for i, group in enumerate(cell_groups, 1):
-        for t, roi_id in group:
-            dict_roi_name[t][roi_id] = f"M{i:03d}_S{t+1:02d}"
+    # Handle possible format variations (M-S or M_S)
+    if "-" in name:
+        parts = name.split("-")
+    else:
+        parts = name.split("_")
+        
+    if len(parts) != 2 or not parts[0].startswith("M") or not parts[1].startswith("S"):
+        return (float('inf'), float('inf'))  # Invalid format sorts to end
     
-    return dict_roi_name
+    try:
+        m_num = int(parts[0][1:])  # Number after 'M'
+        s_num = int(parts[1][1:])  # Number after 'S' 
+        return (m_num, s_num)
+    except ValueError:
+        return (float('inf'), float('inf'))  # Invalid numbers sort to end
 
 # sort ImagejRois with name in format "Mxxx_Sxx"
 def sortRoisByName(list_roi: List[ImagejRoi]) -> List[ImagejRoi]:
-    def get_m_s_numbers(roi_name):
-        # Extract M and S numbers from name
-        name = roi_name.replace(" ", "").upper()
-        
-        # Handle possible format variations (M-S or M_S)
-        if "-" in name:
-            parts = name.split("-")
-        else:
-            parts = name.split("_")
-            
-        if len(parts) != 2 or not parts[0].startswith("M") or not parts[1].startswith("S"):
-            return (float('inf'), float('inf'))  # Invalid format sorts to end
-        
-        try:
-            m_num = int(parts[0][1:])  # Number after 'M'
-            s_num = int(parts[1][1:])  # Number after 'S' 
-            return (m_num, s_num)
-        except ValueError:
-            return (float('inf'), float('inf'))  # Invalid numbers sort to end
-    
     # Sort using M number as primary key, S number as secondary key
-    return sorted(list_roi, key=lambda roi: get_m_s_numbers(roi.name))
\ No newline at end of file
+    return sorted(list_roi, key=lambda roi: getImagejRoiNameNumbers(roi.name))
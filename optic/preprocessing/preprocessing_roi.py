@@ -66,6 +66,60 @@ def convertROIContourToFilledForRECT(
     roi_filled = np.column_stack((x_indices, y_indices))
     return roi_filled
 
+# bounding box of ROI contour clipped to the image, (x_start, y_start, x_end, y_end), None if outside
+def getROIContourBBox(
+        roi_contour: np.ndarray,
+        width: int,
+        height: int
+        ) -> Optional[Tuple[int, int, int, int]]:
+    x_start, y_start = max(int(np.floor(np.min(roi_contour[:, 0]))), 0), max(int(np.floor(np.min(roi_contour[:, 1]))), 0)
+    x_end, y_end = min(int(np.ceil(np.max(roi_contour[:, 0]))) + 1, width), min(int(np.ceil(np.max(roi_contour[:, 1]))) + 1, height)
+    if x_end <= x_start or y_end <= y_start:
+        return None
+    return x_start, y_start, x_end, y_end
+
+# same as convertROIContourToFilled, but rasterized inside the bounding box of the contour
+def convertROIContourToFilledInBBox(
+        roi_contour: np.ndarray[int, int],
+        width: int,
+        height: int
+        ) -> np.ndarray[int, int]:
+    roi_contour = np.asarray(roi_contour)
+    bbox = getROIContourBBox(roi_contour, width, height)
+    if bbox is None:
+        return np.zeros((0, 2), dtype=np.intp)
+    x_start, y_start, x_end, y_end = bbox
+    img = np.zeros((y_end - y_start, x_end - x_start), dtype=np.uint8)
+    cv2.fillPoly(img, [(roi_contour - [x_start, y_start]).astype(np.int32)], 1)
+    y, x = np.where(img > 0)
+    roi_filled = np.column_stack((x + x_start, y + y_start))
+    return roi_filled
+
+# same as convertROIContourToFilledForRECT, but rasterized inside the bounding box of the contour
+def convertROIContourToFilledForRECTInBBox(
+        roi_contour: np.ndarray[int, int],
+        width: int,
+        height: int
+        ) -> np.ndarray[int, int]:
+    import rasterio.features
+    from rasterio.transform import Affine
+    from shapely.geometry import Polygon
+
+    roi_contour = np.asarray(roi_contour)
+    bbox = getROIContourBBox(roi_contour, width, height)
+    if bbox is None:
+        return np.zeros((0, 2), dtype=np.intp)
+    x_start, y_start, x_end, y_end = bbox
+    polygon = Polygon(roi_contour)
+    mask = rasterio.features.rasterize(
+        [(polygon, 1)],
+        out_shape=(y_end - y_start, x_end - x_start),
+        transform=Affine.translation(x_start, y_start),
+    )
+    y_indices, x_indices = np.where(mask > 0)
+    roi_filled = np.column_stack((x_indices + x_start, y_indices + y_start))
+    return roi_filled
+
 # update ROI Image, show only choosed celltype, show registered ROI image or not
 def updateROIImage(
         data_manager: DataManager, 
@@ -75,27 +129,41 @@ def updateROIImage(
         value: int=50, 
         reg: bool=False
         ) -> Dict[str, np.ndarray]:
+    from ..utils.roi_store import toROIStore
     dict_im_roi, dict_im_roi_reg = {}, {}
-    dict_roi_display = control_manager.getSharedAttr(app_key, "dict_roi_display")
+    # display mask is indexed by row, which is the ROI ID
+    mask_display_row = control_manager.table_controls[app_key].getROIDisplayMask()
 
-    roi_img = np.zeros(data_manager.getImageSize(app_key), dtype=dtype)
-    for roiId, coords in data_manager.getDictROICoords(app_key).items():
-        if all(dict_roi_display[roiId].values()):
-            xpix, ypix = coords["xpix"], coords["ypix"]
-            roi_img[ypix, xpix] = value # XY reversed
-    dict_im_roi["all"] = roi_img
+    roi_store = toROIStore(data_manager.getDictROICoords(app_key))
+    mask_display = mask_display_row[roi_store.roi_ids]
+    dict_im_roi["all"] = roi_store.toImage(data_manager.getImageSize(app_key), value=value, dtype=dtype, mask_row=mask_display)
     # for registered ROI image
     if reg:
-        roi_img = np.zeros(data_manager.getImageSize(app_key), dtype=dtype)
-        for roiId, coords in data_manager.getDictROICoordsRegistered(app_key).items():
-            if all(dict_roi_display[roiId].values()):
-                xpix, ypix = coords["xpix"], coords["ypix"]
-                roi_img[ypix, xpix] = value # XY reversed
-        dict_im_roi_reg["all"] = roi_img
+        roi_store_reg = toROIStore(data_manager.getDictROICoordsRegistered(app_key))
+        mask_display_reg = mask_display_row[roi_store_reg.roi_ids]
+        dict_im_roi_reg["all"] = roi_store_reg.toImage(data_manager.getImageSize(app_key), value=value, dtype=dtype, mask_row=mask_display_reg)
         return dict_im_roi, dict_im_roi_reg
     else:
         return dict_im_roi
     
+# ROI image of one t_plane of dict_roi_coords_xyct, xpix is the first axis
+def getROIImageXYCT(
+    dict_roi_coords: Optional[Dict[int, Dict[Literal["xpix", "ypix", "med"], np.ndarray]]],
+    shape: Tuple[int, int],
+    dtype: str="uint8",
+    value: int=50,
+    ) -> np.ndarray:
+    from ..utils.roi_store import ROIStore
+    roi_img = np.zeros(shape, dtype=dtype)
+    if isinstance(dict_roi_coords, ROIStore):
+        xpix, ypix = dict_roi_coords.getPixels()
+        roi_img[xpix, ypix] = value
+    elif dict_roi_coords is not None:
+        for roiId, coords in dict_roi_coords.items():
+            xpix, ypix = coords["xpix"], coords["ypix"]
+            roi_img[xpix, ypix] = value
+    return roi_img
+
 # update ROI Image for MicrogliaTracking
 def updateROIImageForXYCT(
     data_manager: DataManager, 
@@ -109,26 +177,14 @@ def updateROIImageForXYCT(
     dict_im_roi, dict_im_roi_reg = {}, {}
     dict_roi_coords_xyct = data_manager.getDictROICoordsXYCT()
     dict_roi_coords_xyct_reg = data_manager.getDictROICoordsXYCTRegistered()
-    roi_img = np.zeros(data_manager.getImageSize(app_key), dtype=dtype)
 
     dict_roi_coords_xyct_tplane = dict_roi_coords_xyct.get(t_plane, None)
     dict_roi_coords_xyct_reg_tplane = dict_roi_coords_xyct_reg.get(t_plane, None)
 
-    if dict_roi_coords_xyct_tplane is not None:
-        for roiId, coords in dict_roi_coords_xyct_tplane.items():
-            xpix, ypix = coords["xpix"], coords["ypix"]
-            roi_img[xpix, ypix] = value
-
-    dict_im_roi["all"] = roi_img
+    dict_im_roi["all"] = getROIImageXYCT(dict_roi_coords_xyct_tplane, data_manager.getImageSize(app_key), dtype, value)
     # for registered ROI image
     if reg:
-        roi_img = np.zeros(data_manager.getImageSize(app_key), dtype=dtype)
-        if dict_roi_coords_xyct_reg_tplane is not None:
-            for roiId, coords in dict_roi_coords_xyct_reg_tplane.items():
-                xpix, ypix = coords["xpix"], coords["ypix"]
-                roi_img[xpix, ypix] = value
-
-        dict_im_roi_reg["all"] = roi_img
+        dict_im_roi_reg["all"] = getROIImageXYCT(dict_roi_coords_xyct_reg_tplane, data_manager.getImageSize(app_key), dtype, value)
         return dict_im_roi, dict_im_roi_reg
     else:
         return dict_im_roi
\ No newline at end of file
@@ -2,11 +2,13 @@ from __future__ import annotations
 from ..type_definitions import *
 import datetime
 import numpy as np
-from PyQt5.QtCore import Qt
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    from ..gui.table_model import ROITableModel
 
-# convert contents of QTableWidget into dict_roicheck
+# convert contents of the ROI table into dict_roicheck
 def convertTableDataToDictROICheck(
-        q_table: QTableWidget, 
+        q_table: QTableView, 
         table_columns: TableColumns, 
         local_var: bool=False
         ) -> Dict[str, Any]:
@@ -15,33 +17,26 @@ def convertTableDataToDictROICheck(
         cell_type_keys = ROICheckMatKeysLocal.cell_type_keys # local variables
     
     dict_roicheck = {}
-    row_count = q_table.rowCount()
+    table_model: ROITableModel = q_table.model()
+    row_count = table_model.rowCount()
     # process each column
     for col_name, col_info in table_columns.getColumns().items():
         if col_info['type'] == 'celltype':
-            selected_rows = []
-            for row in range(row_count):
-                radio_button = q_table.cellWidget(row, col_info['order'])
-                if radio_button and radio_button.isChecked():
-                    selected_rows.append([row])
+            selected_rows = np.flatnonzero(table_model.getMaskOfColumn(col_name)).astype(np.int32)
+            # (n, 1) like the list of [row], (0,) if empty
+            selected_rows = selected_rows.reshape(-1, 1) if len(selected_rows) else np.array([], dtype=np.int32)
 
-            dict_roicheck[col_name] = np.array(selected_rows, dtype=np.int32)
+            dict_roicheck[col_name] = selected_rows
 
             if local_var:
                 if col_name in cell_type_keys:
-                    dict_roicheck[cell_type_keys[col_name]] = np.array(selected_rows, dtype=np.int32)
+                    dict_roicheck[cell_type_keys[col_name]] = selected_rows.copy()
         
         elif col_info['type'] == 'checkbox':
-            dict_roicheck[col_name] = np.zeros((row_count, 1), dtype=np.bool_)
-            for row in range(row_count):
-                item = q_table.item(row, col_info['order'])
-                dict_roicheck[col_name][row] = item.checkState() == Qt.Checked if item else False
+            dict_roicheck[col_name] = table_model.getCheckboxStatesOfColumn(col_name).reshape(row_count, 1).copy()
         
         elif col_info['type'] == 'string':
-            dict_roicheck[col_name] = np.empty((row_count, 1), dtype=object)
-            for row in range(row_count):
-                item = q_table.item(row, col_info['order'])
-                dict_roicheck[col_name][row] = item.text() if item else ''
+            dict_roicheck[col_name] = table_model.getStringsOfColumn(col_name).reshape(row_count, 1).copy()
 
     dict_roicheck["TableColumns"] = table_columns.getColumns()
 
@@ -87,40 +82,33 @@ def convertMatROICheckToDictROICheck(mat_roicheck: Dict[str, Any]) -> Dict[str,
         dict_roicheck[key_] = value_
     return dict_roicheck
 
-# convert contents of QTableWidget into dict_roitracking
+# convert contents of the ROI tables into dict_roitracking
 def convertTableDataToDictROITracking(
-        q_table_pri: QTableWidget, 
-        q_table_sec: QTableWidget, 
+        q_table_pri: QTableView, 
+        q_table_sec: QTableView, 
         table_columns: TableColumns, 
         local_var: bool=False
         ) -> Dict[str, np.ndarray]:
     # celltype, checkbox, string
     dict_roi_tracking = convertTableDataToDictROICheck(q_table_pri, table_columns, local_var)
-    row_count_pri = q_table_pri.rowCount()
-    row_count_sec = q_table_sec.rowCount()
+    table_model_pri: ROITableModel = q_table_pri.model()
+    row_count_pri = table_model_pri.rowCount()
+    row_count_sec = q_table_sec.model().rowCount()
     for col_name, col_info in table_columns.getColumns().items():        
         # Cell ID
         if col_info['type'] == 'id':
-            values = []
-            for row in range(row_count_pri):
-                item = q_table_pri.item(row, col_info['order'])
-                value = int(item.text()) if item else np.nan
-                values.append([value])
-            dict_roi_tracking[col_name] = np.array(values)
-        # Cell ID Match
+            dict_roi_tracking[col_name] = table_model_pri.cell_ids.reshape(row_count_pri, 1).copy() if row_count_pri else np.array([])
+        # Cell ID Match, NaN if empty or out of "sec" ROIs
         elif col_info['type'] == 'id_match':
-            values = []
-            for row in range(row_count_pri):
-                item = q_table_pri.item(row, col_info['order'])
-                try:
-                    value = int(item.text()) if item else np.nan
-                    if value >= 0 and value < row_count_sec: # check if the value is valid
-                        values.append([value])
-                    else:
-                        values.append([np.nan])
-                except (ValueError, AttributeError):
-                    values.append([np.nan])
-            dict_roi_tracking[col_name] = np.array(values)
+            id_match = table_model_pri.id_match
+            mask_valid = (id_match >= 0) & (id_match < row_count_sec)
+            if row_count_pri == 0:
+                values = np.array([])
+            elif mask_valid.all():
+                values = id_match.reshape(row_count_pri, 1).copy()
+            else:
+                values = np.where(mask_valid, id_match, np.nan).reshape(row_count_pri, 1)
+            dict_roi_tracking[col_name] = values
     return dict_roi_tracking
 
 # dict_roitracking -> mat_roitracking
@@ -201,8 +189,35 @@ def convertDictROICoordsXYCTToArrayROICoordsXYCT(dict_roi_coords_xyct: Dict[int,
     arr_roi_coords_xyct = np.array(arr_roi_coords_xyct, dtype=object)
     return arr_roi_coords_xyct
 
+# ROITracks -> arr_roi_matching_id, arr_roi_matching_match, same layout as convertDictROIMathingToArrayROIMatching
+# all t_plane pairs are written, matches of non-consecutive t_planes are derived from the tracks
+def convertROITracksToArrayROIMatching(roi_tracks: ROITracks) -> Tuple[np.ndarray, np.ndarray]:
+    t_planes = roi_tracks.getPlanes()
+    arr_roi_matching_id = [roi_tracks.getROIIdList(t_plane) for t_plane in t_planes]
+    arr_roi_matching_match = []
+    for i, t_plane_pri in enumerate(t_planes[:-1]): # last t_plane does not have match
+        roi_ids_pri = roi_tracks.getROIIdList(t_plane_pri)
+        arr_roi_matching_match_pri = []
+        for t_plane_sec in t_planes[i + 1:]:
+            if not roi_ids_pri: # no ROI in the plane
+                arr_roi_matching_match_pri.append(np.array([[]]))
+                continue
+            # empty array for missing ROI number, -1 for ROI without match
+            arr_roi_matching_match_pri_sec = [np.array([])] * (max(roi_ids_pri) + 1)
+            for roi_id_pri, roi_id_sec in zip(roi_ids_pri, roi_tracks.getMatchArray(t_plane_pri, t_plane_sec).tolist()):
+                arr_roi_matching_match_pri_sec[roi_id_pri] = roi_id_sec
+            arr_roi_matching_match_pri.append(np.array(arr_roi_matching_match_pri_sec, dtype=object))
+        arr_roi_matching_match.append(np.array(arr_roi_matching_match_pri, dtype=object))
+
+    arr_roi_matching_id = np.array(arr_roi_matching_id, dtype=object)
+    arr_roi_matching_match = np.array(arr_roi_matching_match, dtype=object)
+    return arr_roi_matching_id, arr_roi_matching_match
+
 # dict_roi_matching["id"], dict_roi_matching["match"] -> arr_roi_matching_id, arr_roi_matching_match
-def convertDictROIMathingToArrayROIMatching(dict_roi_matching: Dict[str, Dict[int, List[int] | Dict[int, Dict[int, Optional[int]]]]]) -> np.ndarray:
+def convertDictROIMathingToArrayROIMatching(dict_roi_matching: Dict[str, Dict[int, List[int] | Dict[int, Dict[int, Optional[int]]]]] | ROITracks) -> np.ndarray:
+    from ..utils.roi_tracks import ROITracks
+    if isinstance(dict_roi_matching, ROITracks):
+        return convertROITracksToArrayROIMatching(dict_roi_matching)
     arr_roi_matching_id = []
     arr_roi_matching_match = []
     for t_plane in dict_roi_matching["id"].keys():
@@ -234,7 +249,7 @@ def convertDictROIMathingToArrayROIMatching(dict_roi_matching: Dict[str, Dict[in
 
 # convert dict_roi_matching and dict_roi_coords_xyct to save appropriately as .mat file
 def convertContentsOfDictROIMatchingAndDictROICoordsToArray(
-    dict_roi_matching: Dict[str, Dict[int, List[int] | Dict[int, Dict[int, Optional[int]]]]],
+    dict_roi_matching: Dict[str, Dict[int, List[int] | Dict[int, Dict[int, Optional[int]]]]] | ROITracks,
     dict_roi_coords_xyct: Dict[int, Dict[int, Dict[Literal["xpix", "ypix", "med"], np.ndarray[np.int32]]]],
     dict_roi_coords_xyct_reg: Dict[int, Dict[int, Dict[Literal["xpix", "ypix", "med"], np.ndarray[np.int32]]]],
 ) -> Tuple[np.ndarray, Dict]:
@@ -245,7 +260,10 @@ def convertContentsOfDictROIMatchingAndDictROICoordsToArray(
     # dict_roi_matching["id"], dict_roi_matching["match"] -> arr_roi_matching_id, arr_roi_matching_match
     arr_roi_matching_id, arr_roi_matching_match = convertDictROIMathingToArrayROIMatching(dict_roi_matching)
 
+    from ..utils.roi_tracks import ROITracks
     dict_roi_matching_converted = {"id": arr_roi_matching_id, "match": arr_roi_matching_match}
+    if isinstance(dict_roi_matching, ROITracks):
+        dict_roi_matching_converted["note"] = "match of all t plane pairs, pairs of non-consecutive t planes are derived from the tracks of consecutive t planes"
     return dict_roi_matching_converted, arr_roi_coords_xyct, arr_roi_coords_xyct_reg
 
 # convert dict_roi_matching and dict_roi_coords_xyct to mat_microglia_tracking 
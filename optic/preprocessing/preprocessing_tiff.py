@@ -69,4 +69,49 @@ def getTiffStackShape(path: str) -> Tuple[int, int, int, int, int]:
             if axis in dims:
                 dims[axis] = size
    
-    return (dims['X'], dims['Y'], dims['C'], dims['Z'], dims['T'])
\ No newline at end of file
+    return (dims['X'], dims['Y'], dims['C'], dims['Z'], dims['T'])
+
+
+# (X, Y) plane of a XYCZT stack, black image if out of index
+def getPlaneFromXYCZTStack(img_stack: np.ndarray, plane_z: int, plane_t: int, channel: int) -> np.ndarray:
+    try:
+        return img_stack[:, :, channel, plane_z, plane_t]
+    except IndexError:
+        return np.zeros(img_stack.shape[:2], dtype=np.uint8)
+
+# integer dtypes whose values index a LUT directly
+LUT_DTYPES = (np.dtype(np.uint8), np.dtype(np.uint16))
+
+# per-channel min, max and histogram of a XYCZT stack (ndarray or LazyTiffStack), read plane by plane
+# returns {"min": (C,), "max": (C,), "hist": list of (n_bin,) int64 or None}, one bin per value for uint8 / uint16 stacks
+def calculateTiffStackStats(
+        img_stack: np.ndarray,
+        callback_progress: Optional[Callable[[int, int], None]]=None
+        ) -> Dict[str, Any]:
+    num_c, num_z, num_t = img_stack.shape[2:5]
+    dtype = np.dtype(img_stack.dtype)
+    use_hist = dtype in LUT_DTYPES
+    n_bin = 1 << (8 * dtype.itemsize)
+    arr_min = np.full(num_c, np.inf)
+    arr_max = np.full(num_c, -np.inf)
+    list_hist = [np.zeros(n_bin, dtype=np.int64) for _ in range(num_c)] if use_hist else None
+    # LazyTiffStack reads past its plane cache, the planes on display are not evicted
+    if hasattr(img_stack, "iterPlanes"):
+        iter_planes = img_stack.iterPlanes()
+    else:
+        iter_planes = (((c, z, t), img_stack[:, :, c, z, t]) for c in range(num_c) for z in range(num_z) for t in range(num_t))
+    num_total = num_c * num_z * num_t
+    for num_done, ((c, _, _), plane) in enumerate(iter_planes, 1):
+        plane = np.asarray(plane)
+        if use_hist:
+            list_hist[c] += np.bincount(plane.ravel(), minlength=n_bin)
+        else:
+            arr_min[c] = min(arr_min[c], plane.min())
+            arr_max[c] = max(arr_max[c], plane.max())
+        if callback_progress:
+            callback_progress(num_done, num_total)
+    if use_hist:
+        for c, hist in enumerate(list_hist):
+            idx_nonzero = np.flatnonzero(hist)
+            arr_min[c], arr_max[c] = (idx_nonzero[0], idx_nonzero[-1]) if len(idx_nonzero) else (0, 0)
+    return {"min": arr_min, "max": arr_max, "hist": list_hist}
@@ -4,14 +4,17 @@ dir_parent = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__f
 dir_cascade = os.path.join(dir_parent, "external", "cascade")
 
 import numpy as np
-from typing import Tuple
+from typing import Callable, Optional, Tuple
 from cascade2p import cascade
 from cascade2p.utils_discrete_spikes import infer_discrete_spikes
 
 # run Cascade model and predict spike_prob and spikes
+# ROIs are processed in chunks of n_roi_chunk, callback_progress(n_roi_done, n_roi) is called after each chunk
 def runCascade(
     traces: np.ndarray,
     model_name: str,
+    n_roi_chunk: int=64,
+    callback_progress: Optional[Callable[[int, int], None]]=None,
 ) -> Tuple[np.ndarray, np.ndarray]:
     model_folder=f"{dir_cascade}/Pretrained_models"
     # download model if not exists
@@ -20,19 +23,30 @@ def runCascade(
         model_folder=model_folder,
         verbose=1
     )
-    spike_prob = cascade.predict(
-        model_name=model_name, 
-        traces=traces, 
-        model_folder=model_folder,
-    )
-    # infer discrete spikes from spike_prob
-    discrete_approximation, spike_time_estimates = infer_discrete_spikes(
-        spike_prob, 
-        model_name, 
-        model_folder
-    )
-    # convert spike_prob to 0/1 spikes array
-    spike_events = np.zeros_like(spike_prob, dtype=int)
-    for i, spike_time in enumerate(spike_time_estimates):
-        spike_events[i][spike_time] = 1
-    return spike_prob, spike_events
\ No newline at end of file
+    traces = np.asarray(traces)
+    n_roi = traces.shape[0]
+    list_spike_prob, list_spike_events = [], []
+    # ROIs are predicted independently, chunks give the same result as a single call
+    for idx_start in range(0, n_roi, n_roi_chunk):
+        spike_prob = cascade.predict(
+            model_name=model_name, 
+            traces=traces[idx_start:idx_start + n_roi_chunk], 
+            model_folder=model_folder,
+        )
+        # infer discrete spikes from spike_prob
+        discrete_approximation, spike_time_estimates = infer_discrete_spikes(
+            spike_prob, 
+            model_name, 
+            model_folder
+        )
+        # convert spike_prob to 0/1 spikes array
+        spike_events = np.zeros_like(spike_prob, dtype=int)
+        for i, spike_time in enumerate(spike_time_estimates):
+            spike_events[i][spike_time] = 1
+        list_spike_prob.append(spike_prob)
+        list_spike_events.append(spike_events)
+        if callback_progress:
+            callback_progress(min(idx_start + n_roi_chunk, n_roi), n_roi)
+    if not list_spike_prob:
+        return np.zeros(traces.shape, dtype=float), np.zeros(traces.shape, dtype=int)
+    return np.concatenate(list_spike_prob, axis=0), np.concatenate(list_spike_events, axis=0)
\ No newline at end of file
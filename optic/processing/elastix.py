@@ -129,8 +129,10 @@ def calculateStackTransform(
     idx_ref: int,
     axis: Literal["t", "z"],
     output_directory: str,
+    callback_progress: Optional[Callable[[int, int], None]]=None,
 ) -> Dict[str, elastixParameterObject]:
     dict_transform_parameters = {}
+    num_total = img_stack.shape[3] * img_stack.shape[4]
 
     if axis == "t": # register t-axis
         for z in range(img_stack.shape[3]):
@@ -140,6 +142,8 @@ def calculateStackTransform(
                 transform_parameters = calculateSingleTransform(img_fix, img_mov, parameter_object, output_directory)
                 dict_transform_parameters[f"z{z}_t{t}"] = transform_parameters
                 print("calculating", "z:", z, "t:", t)
+                if callback_progress:
+                    callback_progress(len(dict_transform_parameters), num_total)
     elif axis == "z": # register z-axis
         for t in range(img_stack.shape[4]):
             img_fix = img_stack[:, :, channel_ref, idx_ref, t]
@@ -148,6 +152,8 @@ def calculateStackTransform(
                 transform_parameters = calculateSingleTransform(img_fix, img_mov, parameter_object, output_directory)
                 dict_transform_parameters[f"z{z}_t{t}"] = transform_parameters
                 print("calculating", "z:", z, "t:", t)
+                if callback_progress:
+                    callback_progress(len(dict_transform_parameters), num_total)
     print("transform parameters calculation completed")
     return dict_transform_parameters
 
@@ -156,9 +162,11 @@ def applyStackTransform(
     img_stack: np.ndarray[np.uint8, Tuple[int, int, int, int, int]], # XYCZT
     dict_transform_parameters: Dict[str, elastixParameterObject],
     output_directory: str,
+    callback_progress: Optional[Callable[[int, int], None]]=None,
 ) -> np.ndarray[np.uint8, Tuple[int, int]]:
-    img_stack_reg = np.zeros_like(img_stack)
+    img_stack_reg = np.zeros(img_stack.shape, dtype=img_stack.dtype) # img_stack may be a lazy stack
     num_c, num_z, num_t = img_stack.shape[2], img_stack.shape[3], img_stack.shape[4]
+    num_done = 0
     for c in range(num_c):
         for z in range(num_z):
             for t in range(num_t):
@@ -167,6 +175,9 @@ def applyStackTransform(
                 img_reg = applySingleTransform(img_mov, transform_parameters, output_directory)
                 img_stack_reg[:, :, c, z, t] = img_reg
                 print("applying", "c", c, "z:", z, "t:", t)
+                num_done += 1
+                if callback_progress:
+                    callback_progress(num_done, num_c * num_z * num_t)
     print("image transformation completed")
     return img_stack_reg
 
@@ -178,9 +189,17 @@ def runStackRegistration(
     idx_ref: int,
     axis: Literal["t", "z"],
     output_directory: str,
+    callback_progress: Optional[Callable[[str, int, int], None]]=None,
 ) -> Tuple[Dict[str, elastixParameterObject], np.ndarray[np.uint8, Tuple[int, int]]]:
-    dict_transform_parameters = calculateStackTransform(img_stack, parameter_object, channel_ref, idx_ref, axis, output_directory)
-    img_stack_reg = applyStackTransform(img_stack, dict_transform_parameters, output_directory)
+    # callback_progress(step, done, total), step is "calculate" or "apply"
+    dict_transform_parameters = calculateStackTransform(
+        img_stack, parameter_object, channel_ref, idx_ref, axis, output_directory,
+        callback_progress=(lambda done, total: callback_progress("calculate", done, total)) if callback_progress else None
+        )
+    img_stack_reg = applyStackTransform(
+        img_stack, dict_transform_parameters, output_directory,
+        callback_progress=(lambda done, total: callback_progress("apply", done, total)) if callback_progress else None
+        )
     return dict_transform_parameters, img_stack_reg
 
 # duplicate transform parameters for apply to image stack ex) XYCT -> XYCZT
@@ -351,8 +370,8 @@ def applyDictROICoordsTransform(
     path_points_txt: str,
     output_directory: str,
     xy_reverse: bool = False
-) -> dict:
-    dict_roi_coords_reg = {}
+) -> ROIStore:
+    from ..utils.roi_store import ROIStore, toROIStore
     x_max, y_max = img_mov.shape[0] - 1, img_mov.shape[1] - 1
     
     parameter_object_inverse = makeElastixParameterObjectInversed(parameter_map)
@@ -363,28 +382,14 @@ def applyDictROICoordsTransform(
         output_directory
     )
 
-    # Collect all points from all ROIs
-    all_xpix_ypix = []
-    all_med = []
-    roi_indices = []
-    roi_npix = []  # Number of pixels per ROI
-    
-    for roi_id, dict_coords in dict_roi_coords.items():
-        if xy_reverse:
-            med = np.array([dict_coords["med"]])[:, [1, 0]]
-            xpix_ypix = np.array([dict_coords["ypix"], dict_coords["xpix"]]).T
-        else:
-            med = np.array([dict_coords["med"]])
-            xpix_ypix = np.array([dict_coords["xpix"], dict_coords["ypix"]]).T
-        
-        all_xpix_ypix.append(xpix_ypix)
-        all_med.append(med)
-        roi_indices.append(roi_id)
-        roi_npix.append(len(xpix_ypix))
-    
-    # Concatenate all points
-    all_xpix_ypix_concat = np.vstack(all_xpix_ypix)
-    all_med_concat = np.vstack(all_med)
+    # all points of all ROIs, already concatenated in ROIStore
+    roi_store = toROIStore(dict_roi_coords)
+    if xy_reverse:
+        all_med_concat = roi_store.med[:, [1, 0]]
+        all_xpix_ypix_concat = np.column_stack((roi_store.ypix, roi_store.xpix))
+    else:
+        all_med_concat = roi_store.med
+        all_xpix_ypix_concat = np.column_stack((roi_store.xpix, roi_store.ypix))
     
     # Transform all xpix_ypix at once
     print(f"Transforming {len(all_xpix_ypix_concat)} pixel coordinates...")
@@ -406,33 +411,18 @@ def applyDictROICoordsTransform(
         output_directory
     )
     
-    # Split results back to individual ROIs
-    idx_start = 0
-    for i, roi_id in enumerate(roi_indices):
-        npix = roi_npix[i]
-        xpix_ypix_reg = all_xpix_ypix_reg[idx_start:idx_start + npix]
-        med_reg = all_med_reg[i]
-        
-        # Clip the coords
-        med_reg = np.clip(med_reg, 0, [x_max, y_max])
-        xpix_ypix_reg = np.clip(xpix_ypix_reg, [0, 0], [x_max, y_max])
-        
-        # If npix is 1, convert to 2d array
-        if xpix_ypix_reg.ndim == 1:
-            xpix_ypix_reg = np.array([xpix_ypix_reg])
-        
-        if xy_reverse:
-            med_reg = med_reg[::-1]
-            xpix_ypix_reg = xpix_ypix_reg[:, [1, 0]]
-        
-        dict_roi_coords_reg[roi_id] = {
-            "xpix": xpix_ypix_reg[:, 0], 
-            "ypix": xpix_ypix_reg[:, 1], 
-            "med": med_reg
-        }
-        
-        idx_start += npix
-    
+    # Clip the coords, offsets of ROIs are unchanged
+    all_xpix_ypix_reg = np.clip(np.asarray(all_xpix_ypix_reg).reshape(-1, 2), [0, 0], [x_max, y_max])
+    all_med_reg = np.clip(np.asarray(all_med_reg).reshape(-1, 2), [0, 0], [x_max, y_max])
+    if xy_reverse:
+        all_med_reg = all_med_reg[:, [1, 0]]
+        all_xpix_ypix_reg = all_xpix_ypix_reg[:, [1, 0]]
+
+    dict_roi_coords_reg = ROIStore(
+        roi_store.roi_ids.copy(), roi_store.offsets.copy(),
+        all_xpix_ypix_reg[:, 0], all_xpix_ypix_reg[:, 1], all_med_reg,
+        {key: value.copy() for key, value in roi_store.columns.items()},
+        )
     return dict_roi_coords_reg
 
 """
@@ -67,4 +67,42 @@ def extractEventAlignedData(data: np.ndarray,
         if start >= 0 and end <= len(data):
             segment = data[start:end]
             extracted_segments.append(segment)
-    return extracted_segments
\ No newline at end of file
+    return extracted_segments
+class UnionFind:
+    """
+    Disjoint sets of hashable items, with path halving and union by size.
+    Items are added on first use.
+    """
+    def __init__(self):
+        self.parent = {}
+        self.size = {}
+
+    def add(self, item) -> None:
+        if item not in self.parent:
+            self.parent[item] = item
+            self.size[item] = 1
+
+    def find(self, item):
+        self.add(item)
+        parent = self.parent
+        while parent[item] != item:
+            parent[item] = parent[parent[item]]
+            item = parent[item]
+        return item
+
+    def union(self, item_a, item_b):
+        root_a, root_b = self.find(item_a), self.find(item_b)
+        if root_a == root_b:
+            return root_a
+        if self.size[root_a] < self.size[root_b]:
+            root_a, root_b = root_b, root_a
+        self.parent[root_b] = root_a
+        self.size[root_a] += self.size[root_b]
+        return root_a
+
+    # root -> items, in order of insertion
+    def groups(self) -> dict:
+        dict_group = {}
+        for item in self.parent:
+            dict_group.setdefault(self.find(item), []).append(item)
+        return dict_group
@@ -0,0 +1,61 @@
+from __future__ import annotations
+from ..type_definitions import *
+import threading
+import weakref
+from collections import OrderedDict
+import numpy as np
+from ..preprocessing.preprocessing_image import downsampleImage2x
+from ..preprocessing.preprocessing_tiff import getPlaneFromXYCZTStack
+
+class ImagePyramidCache:
+    """
+    2x-downsampled pyramid levels of the (X, Y) planes of XYCZT stacks.
+    Levels are built lazily from the next lower level and kept in a LRU cache within a budget in bytes.
+    Thread-safe, also used by the PlanePrefetcher worker.
+
+    Args:
+        cache_mb (float): budget of the LRU cache of downsampled planes, 0 keeps nothing.
+    """
+    def __init__(self, cache_mb: float=0):
+        self.cache_bytes_max = int(cache_mb * 1024**2)
+        # (id(stack), channel, z, t, level) -> (weak reference to the stack, plane), the reference detects reuse of the id
+        self.cache_planes: OrderedDict[Tuple[int, int, int, int, int], Tuple[weakref.ref, np.ndarray]] = OrderedDict()
+        self.cache_bytes = 0
+        self.lock = threading.Lock()
+
+    # (X, Y) plane of pyramid level, level 0 is the full plane
+    def getPlane(self, img_stack: np.ndarray, plane_z: int, plane_t: int, channel: int, level: int=0) -> np.ndarray:
+        if level <= 0:
+            return getPlaneFromXYCZTStack(img_stack, plane_z, plane_t, channel)
+        key = (id(img_stack), channel, plane_z, plane_t, level)
+        with self.lock:
+            entry = self.cache_planes.get(key)
+            if entry is not None and entry[0]() is img_stack:
+                self.cache_planes.move_to_end(key)
+                return entry[1]
+        plane = downsampleImage2x(np.asarray(self.getPlane(img_stack, plane_z, plane_t, channel, level - 1)))
+        self.addPlaneToCache(key, img_stack, plane)
+        return plane
+
+    def addPlaneToCache(self, key: Tuple[int, int, int, int, int], img_stack: np.ndarray, plane: np.ndarray) -> None:
+        if plane.nbytes > self.cache_bytes_max:
+            return
+        try:
+            ref_stack = weakref.ref(img_stack)
+        except TypeError: # not weak-referenceable, not cached
+            return
+        plane.flags.writeable = False
+        with self.lock:
+            entry_old = self.cache_planes.pop(key, None)
+            if entry_old is not None:
+                self.cache_bytes -= entry_old[1].nbytes
+            self.cache_planes[key] = (ref_stack, plane)
+            self.cache_bytes += plane.nbytes
+            while self.cache_bytes > self.cache_bytes_max:
+                _, (_, plane_old) = self.cache_planes.popitem(last=False)
+                self.cache_bytes -= plane_old.nbytes
+
+    def clearCache(self) -> None:
+        with self.lock:
+            self.cache_planes.clear()
+            self.cache_bytes = 0
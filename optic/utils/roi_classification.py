@@ -0,0 +1,172 @@
+from __future__ import annotations
+from ..type_definitions import *
+import numpy as np
+
+class ROIClassification:
+    """
+    Celltype and checkbox state of the ROIs of one app_key, shared by the ROI table, views and ROIcheck IO.
+    Per-celltype counts are kept up to date on every change, skip masks are cached until the next change.
+
+    Attributes:
+        list_celltype (List[str]): celltype names, index is the celltype code, -1 for unclassified.
+        list_checkbox (List[str]): checkbox names, column of checkbox_states.
+        cell_ids (np.ndarray): (N,) ROI ID of each row.
+        celltype_codes (np.ndarray): (N,) int16 celltype code of each row.
+        checkbox_states (np.ndarray): (N, n_checkbox) bool.
+        counts (np.ndarray): (n_celltype + 1,) number of rows of each code, "Unclassified" first.
+        mask_display_celltype (np.ndarray): (N,) bool, celltype of the row is displayed.
+        mask_display_checkbox (np.ndarray): (N,) bool, checkboxes of the row match the displayed checkboxes.
+    """
+    def __init__(
+            self,
+            list_celltype: List[str],
+            list_checkbox: List[str],
+            len_row: int=0,
+            code_default: int=-1,
+            checkbox_default: Optional[List[bool]]=None
+            ):
+        self.list_celltype = list(list_celltype)
+        self.list_checkbox = list(list_checkbox)
+        self.version = 0 # incremented on every change
+        self.dict_skip_mask: Dict[Tuple[str, ...], Tuple[int, np.ndarray]] = {} # skipped names -> (version, mask)
+        self.initialize(len_row, code_default, checkbox_default)
+
+    def initialize(self, len_row: int, code_default: int=-1, checkbox_default: Optional[List[bool]]=None) -> None:
+        if checkbox_default is None:
+            checkbox_default = [False] * len(self.list_checkbox)
+        self.len_row = len_row
+        self.setCellIds(np.arange(len_row, dtype=np.int64))
+        self.celltype_codes: np.ndarray = np.full(len_row, code_default, dtype=np.int16)
+        self.checkbox_states: np.ndarray = np.tile(np.asarray(checkbox_default, dtype=bool), (len_row, 1)).reshape(len_row, len(self.list_checkbox))
+        self.mask_display_celltype: np.ndarray = np.ones(len_row, dtype=bool)
+        self.mask_display_checkbox: np.ndarray = np.ones(len_row, dtype=bool)
+        self.recountCelltypes()
+
+    """
+    row / ID index
+    """
+    def setCellIds(self, cell_ids: np.ndarray) -> None:
+        self.cell_ids = np.asarray(cell_ids, dtype=np.int64)
+        n_id = int(self.cell_ids.max()) + 1 if len(self.cell_ids) else 0
+        self.row_of_id: np.ndarray = np.full(n_id, -1, dtype=np.int64)
+        self.row_of_id[self.cell_ids] = np.arange(len(self.cell_ids))
+
+    def getRowFromId(self, cell_id: int) -> Optional[int]:
+        if not 0 <= cell_id < len(self.row_of_id) or self.row_of_id[cell_id] < 0:
+            return None
+        return int(self.row_of_id[cell_id])
+
+    def getIdFromRow(self, row: int) -> int:
+        return int(self.cell_ids[row])
+
+    """
+    celltype
+    """
+    def getCelltypeCode(self, celltype: str) -> int:
+        return self.list_celltype.index(celltype)
+
+    def getCelltypeOfRow(self, row: int) -> Optional[str]:
+        code = int(self.celltype_codes[row])
+        return self.list_celltype[code] if code >= 0 else None
+
+    def recountCelltypes(self) -> None:
+        self.counts: np.ndarray = np.bincount(self.celltype_codes.astype(np.int64) + 1, minlength=len(self.list_celltype) + 1)
+        self.version += 1
+
+    # O(1), False if unchanged
+    def setCelltypeOfRow(self, row: int, code: int) -> bool:
+        code_old = int(self.celltype_codes[row])
+        if code_old == code:
+            return False
+        self.celltype_codes[row] = code
+        self.counts[code_old + 1] -= 1
+        self.counts[code + 1] += 1
+        self.version += 1
+        return True
+
+    # O(len(rows))
+    def setCelltypeOfRows(self, rows: np.ndarray, code: int) -> None:
+        rows = np.unique(np.asarray(rows, dtype=np.int64))
+        if len(rows) == 0:
+            return
+        self.counts -= np.bincount(self.celltype_codes[rows].astype(np.int64) + 1, minlength=len(self.counts))
+        self.counts[code + 1] += len(rows)
+        self.celltype_codes[rows] = code
+        self.version += 1
+
+    def setCelltypeCodes(self, celltype_codes: np.ndarray) -> None:
+        self.celltype_codes[:] = celltype_codes
+        self.recountCelltypes()
+
+    # number of ROIs of each celltype and "Unclassified"
+    def getCounts(self) -> Dict[str, int]:
+        dict_count = {celltype: int(self.counts[i + 1]) for i, celltype in enumerate(self.list_celltype)}
+        dict_count["Unclassified"] = int(self.counts[0])
+        return dict_count
+
+    """
+    checkbox
+    """
+    def setCheckboxOfRow(self, row: int, idx_checkbox: int, state: bool) -> None:
+        self.checkbox_states[row, idx_checkbox] = state
+        self.version += 1
+
+    def setCheckboxOfRows(self, rows: np.ndarray, idx_checkbox: int, state: Union[bool, np.ndarray]) -> None:
+        self.checkbox_states[np.asarray(rows, dtype=np.int64), idx_checkbox] = state
+        self.version += 1
+
+    def getCheckboxStatesOfRow(self, row: int) -> Dict[str, bool]:
+        return {checkbox: bool(self.checkbox_states[row, i]) for i, checkbox in enumerate(self.list_checkbox)}
+
+    """
+    masks
+    """
+    # (N,) bool, rows of the celltype or with the checkbox checked
+    def getMaskOfColumn(self, col_name: str) -> np.ndarray:
+        if col_name in self.list_celltype:
+            return self.celltype_codes == self.list_celltype.index(col_name)
+        elif col_name in self.list_checkbox:
+            return self.checkbox_states[:, self.list_checkbox.index(col_name)].copy()
+        return np.zeros(self.len_row, dtype=bool)
+
+    def isRowOfColumn(self, row: int, col_name: str) -> bool:
+        if col_name in self.list_celltype:
+            return int(self.celltype_codes[row]) == self.list_celltype.index(col_name)
+        elif col_name in self.list_checkbox:
+            return bool(self.checkbox_states[row, self.list_checkbox.index(col_name)])
+        return False
+
+    # ROIs not selectable, True for rows of a skipped celltype or with a skipped checkbox checked
+    def getSkipMask(self, skip_roi_types: Dict[str, bool]) -> np.ndarray:
+        key_skip = tuple(sorted(name for name, skip in skip_roi_types.items() if skip))
+        version, mask_skip = self.dict_skip_mask.get(key_skip, (-1, None))
+        if version == self.version:
+            return mask_skip
+        mask_skip = np.zeros(self.len_row, dtype=bool)
+        for name in key_skip:
+            mask_skip |= self.getMaskOfColumn(name)
+        self.dict_skip_mask[key_skip] = (self.version, mask_skip)
+        return mask_skip
+
+    """
+    display
+    """
+    # unclassified ROIs are hidden, all ROIs are hidden if no celltype is visible
+    def updateDisplayWithCelltype(self, dict_celltype_visibility: Dict[str, bool]) -> None:
+        visible_codes = np.array([dict_celltype_visibility.get(celltype, False) for celltype in self.list_celltype] + [False], dtype=bool)
+        self.mask_display_celltype = visible_codes[self.celltype_codes]
+
+    # rows with all visible checkboxes checked, all ROIs if no checkbox is visible
+    def updateDisplayWithCheckbox(self, dict_checkbox_visibility: Dict[str, bool]) -> None:
+        idx_visible = [i for i, checkbox in enumerate(self.list_checkbox) if dict_checkbox_visibility.get(checkbox, False)]
+        self.mask_display_checkbox = self.checkbox_states[:, idx_visible].all(axis=1)
+
+    def updateDisplayOfRow(self, row: int, dict_celltype_visibility: Dict[str, bool], dict_checkbox_visibility: Dict[str, bool]) -> None:
+        self.mask_display_celltype[row] = dict_celltype_visibility.get(self.getCelltypeOfRow(row), False)
+        self.mask_display_checkbox[row] = all(
+            self.checkbox_states[row, i] for i, checkbox in enumerate(self.list_checkbox) if dict_checkbox_visibility.get(checkbox, False)
+            )
+
+    # (N,) bool, ROIs displayed on the view
+    def getDisplayMask(self) -> np.ndarray:
+        return self.mask_display_celltype & self.mask_display_checkbox
@@ -0,0 +1,116 @@
+from __future__ import annotations
+from ..type_definitions import *
+import numpy as np
+from .roi_store import ROIStore
+
+# contour variants of getROIContour, "dilate" for display, "edge" for ImageJ export
+CONTOUR_METHODS = ("dilate", "edge")
+# ROIs per job of computeROIContours
+CONTOUR_CHUNK_SIZE = 256
+
+class ROIContourCache:
+    """
+    Contours of the ROIs of one ROIStore, per getROIContour method.
+    Entries follow the version of the store, only ROIs edited since the last access are dropped,
+    the whole cache is dropped if the change log of the store does not reach back far enough.
+    Only used from the GUI thread, bulk computation runs on snapshots of the pixels (see getMissingROIs, setContours).
+
+    Args:
+        roi_store (ROIStore): ROIs of the contours.
+    """
+    def __init__(self, roi_store: ROIStore):
+        self.roi_store = roi_store
+        self.dict_contour: Dict[str, Dict[int, Tuple[np.ndarray, np.ndarray]]] = {method: {} for method in CONTOUR_METHODS}
+        self.version: int = roi_store.version
+
+    # drop contours of ROIs changed in the store
+    def update(self) -> None:
+        roi_store = self.roi_store
+        if self.version == roi_store.version:
+            return
+        set_roi_id = roi_store.getChangedROIIds(self.version)
+        for dict_contour_method in self.dict_contour.values():
+            if set_roi_id is None:
+                dict_contour_method.clear()
+            else:
+                for roi_id in set_roi_id:
+                    dict_contour_method.pop(roi_id, None)
+        self.version = roi_store.version
+
+    # (xpix, ypix) of the contour, computed on first access
+    def getContour(self, roi_id: int, method: Literal["dilate", "edge"]="dilate") -> Tuple[np.ndarray, np.ndarray]:
+        self.update()
+        contour = self.dict_contour[method].get(roi_id)
+        if contour is None:
+            coords = self.roi_store[roi_id]
+            contour = calculateROIContour(coords["xpix"], coords["ypix"], method)
+            self.dict_contour[method][roi_id] = contour
+        return contour
+
+    # contours of all ROIs, missing ones are computed in parallel
+    def getContours(self, method: Literal["dilate", "edge"]="dilate", max_workers: Optional[int]=None) -> Dict[int, Tuple[np.ndarray, np.ndarray]]:
+        version, list_roi = self.getMissingROIs(method)
+        if list_roi:
+            self.setContours(method, computeROIContours(list_roi, method, max_workers), version)
+        return {roi_id: self.dict_contour[method][roi_id] for roi_id in self.roi_store if roi_id in self.dict_contour[method]}
+
+    # contours computed so far, e.g. to hand to a save task
+    def getCachedContours(self, method: Literal["dilate", "edge"]="dilate") -> Dict[int, Tuple[np.ndarray, np.ndarray]]:
+        self.update()
+        return dict(self.dict_contour[method])
+
+    # (version, [(roi_id, xpix, ypix), ...]) of ROIs without contour, pixels are copied for computation in a worker thread
+    def getMissingROIs(self, method: Literal["dilate", "edge"]="dilate") -> Tuple[int, List[Tuple[int, np.ndarray, np.ndarray]]]:
+        self.update()
+        dict_contour_method = self.dict_contour[method]
+        list_roi = []
+        for roi_id in self.roi_store:
+            if roi_id in dict_contour_method:
+                continue
+            coords = self.roi_store[roi_id]
+            list_roi.append((roi_id, np.array(coords["xpix"]), np.array(coords["ypix"])))
+        return self.roi_store.version, list_roi
+
+    # add contours computed from the store of version, contours of ROIs edited since then are discarded
+    def setContours(self, method: Literal["dilate", "edge"], dict_contour: Dict[int, Tuple[np.ndarray, np.ndarray]], version: int) -> None:
+        self.update()
+        set_roi_id = self.roi_store.getChangedROIIds(version)
+        if set_roi_id is None:
+            return
+        dict_contour_method = self.dict_contour[method]
+        for roi_id, contour in dict_contour.items():
+            if roi_id not in set_roi_id and roi_id in self.roi_store:
+                dict_contour_method.setdefault(roi_id, contour)
+
+# contour cache of roi_store, created on first use and kept with the store
+def getROIContourCache(roi_store: ROIStore) -> ROIContourCache:
+    if roi_store.contour_cache is None:
+        roi_store.contour_cache = ROIContourCache(roi_store)
+    return roi_store.contour_cache
+
+# getROIContour as int64 arrays, empty for ROIs without pixels
+def calculateROIContour(xpix: np.ndarray, ypix: np.ndarray, method: Literal["dilate", "edge"]="dilate") -> Tuple[np.ndarray, np.ndarray]:
+    from ..preprocessing.preprocessing_roi import getROIContour
+    if len(xpix) == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    xpix_contour, ypix_contour = getROIContour(np.asarray(xpix), np.asarray(ypix), method=method)
+    return np.asarray(xpix_contour, dtype=np.int64), np.asarray(ypix_contour, dtype=np.int64)
+
+# contours of [(roi_id, xpix, ypix), ...] in chunks on a thread pool, OpenCV releases the GIL
+def computeROIContours(
+        list_roi: List[Tuple[int, np.ndarray, np.ndarray]],
+        method: Literal["dilate", "edge"]="dilate",
+        max_workers: Optional[int]=None,
+        chunk_size: int=CONTOUR_CHUNK_SIZE,
+        ) -> Dict[int, Tuple[np.ndarray, np.ndarray]]:
+    import os
+    from concurrent.futures import ThreadPoolExecutor
+    def _computeChunk(chunk: List[Tuple[int, np.ndarray, np.ndarray]]) -> List[Tuple[int, Tuple[np.ndarray, np.ndarray]]]:
+        return [(roi_id, calculateROIContour(xpix, ypix, method)) for roi_id, xpix, ypix in chunk]
+
+    list_chunk = [list_roi[i:i+chunk_size] for i in range(0, len(list_roi), chunk_size)]
+    max_workers = min(max_workers or os.cpu_count() or 1, len(list_chunk))
+    if max_workers <= 1:
+        return dict(item for chunk in list_chunk for item in _computeChunk(chunk))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return dict(item for list_item in executor.map(_computeChunk, list_chunk) for item in list_item)
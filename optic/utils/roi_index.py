@@ -0,0 +1,126 @@
+from __future__ import annotations
+from ..type_definitions import *
+import numpy as np
+from .roi_store import ROIStore
+
+# number of nearest ROIs queried at once when some ROIs are skipped
+KDTREE_QUERY_K = 16
+
+class ROIHitIndex:
+    """
+    Click hit-testing for the ROIs of one ROIStore.
+    A click on an ROI pixel is resolved with an int32 label image (ROI ID per pixel, -1 for background),
+    other clicks with a cKDTree over med.
+    Single ROI edits of the store only repaint the bounding box of the edited ROIs, the tree is rebuilt on the next query.
+
+    Args:
+        roi_store (ROIStore): ROIs, label image is indexed [ypix, xpix] like the view.
+    """
+    def __init__(self, roi_store: ROIStore):
+        self.roi_store = roi_store
+        self.label: np.ndarray = np.full((0, 0), -1, dtype=np.int32)
+        self.dict_bbox: Dict[int, Tuple[int, int, int, int]] = {} # roi_id -> (y_start, y_end, x_start, x_end)
+        self.kdtree = None
+        self.version: int = -1
+        self.version_kdtree: int = -1
+        self.build()
+
+    # full build of label image and bounding boxes
+    def build(self) -> None:
+        roi_store = self.roi_store
+        xpix, ypix = roi_store.xpix.astype(np.int64), roi_store.ypix.astype(np.int64)
+        height = int(ypix.max()) + 1 if len(ypix) else 0
+        width = int(xpix.max()) + 1 if len(xpix) else 0
+        self.label = roi_store.toLabelImage((height, width))
+        self.dict_bbox = {}
+        npix = roi_store.npix
+        rows = np.flatnonzero(npix > 0)
+        if len(rows):
+            starts = roi_store.offsets[rows]
+            y_start, y_end = np.minimum.reduceat(ypix, starts), np.maximum.reduceat(ypix, starts) + 1
+            x_start, x_end = np.minimum.reduceat(xpix, starts), np.maximum.reduceat(xpix, starts) + 1
+            # reduceat runs to the next start, so empty rows in between are skipped with rows
+            self.dict_bbox = dict(zip(roi_store.roi_ids[rows].tolist(), zip(y_start.tolist(), y_end.tolist(), x_start.tolist(), x_end.tolist())))
+        self.version = roi_store.version
+
+    # follow the store, repaint only the region of changed ROIs if the change log allows it
+    def update(self) -> None:
+        roi_store = self.roi_store
+        if self.version == roi_store.version:
+            return
+        set_roi_id = roi_store.getChangedROIIds(self.version)
+        if set_roi_id is None:
+            self.build()
+            return
+        height, width = self.label.shape
+        list_bbox = []
+        for roi_id in set_roi_id:
+            if roi_id in self.dict_bbox:
+                list_bbox.append(self.dict_bbox.pop(roi_id))
+            if roi_id in roi_store:
+                coords = roi_store[roi_id]
+                if len(coords["xpix"]) == 0:
+                    continue
+                xpix, ypix = np.asarray(coords["xpix"], dtype=np.int64), np.asarray(coords["ypix"], dtype=np.int64)
+                bbox = (int(ypix.min()), int(ypix.max()) + 1, int(xpix.min()), int(xpix.max()) + 1)
+                if bbox[1] > height or bbox[3] > width: # outside the label image, size changes
+                    self.build()
+                    return
+                self.dict_bbox[roi_id] = bbox
+                list_bbox.append(bbox)
+        if list_bbox:
+            y_start, y_end = min(b[0] for b in list_bbox), max(b[1] for b in list_bbox)
+            x_start, x_end = min(b[2] for b in list_bbox), max(b[3] for b in list_bbox)
+            # repaint the region from all ROIs, so that ROIs under the edited ones reappear
+            self.label[y_start:y_end, x_start:x_end] = -1
+            xpix, ypix = roi_store.xpix, roi_store.ypix
+            mask_pixel = (ypix >= y_start) & (ypix < y_end) & (xpix >= x_start) & (xpix < x_end)
+            roi_ids_pixel = roi_store.roi_ids[roi_store.getPixelRows()[mask_pixel]]
+            self.label[ypix[mask_pixel], xpix[mask_pixel]] = roi_ids_pixel
+        self.version = roi_store.version
+
+    def getKDTree(self) -> Any:
+        from scipy.spatial import cKDTree
+        if self.kdtree is None or self.version_kdtree != self.roi_store.version:
+            self.kdtree = cKDTree(np.asarray(self.roi_store.med, dtype=np.float64)) if len(self.roi_store) else None
+            self.version_kdtree = self.roi_store.version
+        return self.kdtree
+
+    # ROI ID at (x, y), -1 if none
+    def getROIAt(self, x: int, y: int) -> int:
+        self.update()
+        height, width = self.label.shape
+        if 0 <= y < height and 0 <= x < width:
+            return int(self.label[y, x])
+        return -1
+
+    # ROI under (x, y), otherwise the ROI with the closest med, skipped ROIs are never returned
+    def findROI(self, x: int, y: int, mask_skip: Optional[np.ndarray]=None) -> Optional[int]:
+        """
+        Args:
+            mask_skip (np.ndarray): (n_roi_id_max,) bool indexed by ROI ID, True for ROIs not to select.
+        """
+        def _isSkipped(roi_id: int) -> bool:
+            return mask_skip is not None and 0 <= roi_id < len(mask_skip) and bool(mask_skip[roi_id])
+
+        roi_id = self.getROIAt(x, y)
+        if roi_id >= 0 and not _isSkipped(roi_id):
+            return roi_id
+        kdtree = self.getKDTree()
+        if kdtree is None:
+            return None
+        roi_ids = self.roi_store.roi_ids
+        k = min(KDTREE_QUERY_K if mask_skip is not None else 1, len(roi_ids))
+        _, rows = kdtree.query((x, y), k=k)
+        for row in np.atleast_1d(rows).tolist():
+            if not _isSkipped(int(roi_ids[row])):
+                return int(roi_ids[row])
+        # all nearest ROIs are skipped, search the rest
+        mask_in_range = (roi_ids >= 0) & (roi_ids < len(mask_skip))
+        mask_valid = np.ones(len(roi_ids), dtype=bool)
+        mask_valid[mask_in_range] = ~np.asarray(mask_skip, dtype=bool)[roi_ids[mask_in_range]]
+        if not mask_valid.any():
+            return None
+        med = np.asarray(self.roi_store.med, dtype=np.float64)[mask_valid]
+        distance = (med[:, 0] - x) ** 2 + (med[:, 1] - y) ** 2
+        return int(roi_ids[mask_valid][np.argmin(distance)])
@@ -0,0 +1,367 @@
+from __future__ import annotations
+from ..type_definitions import *
+from collections.abc import MutableMapping
+import numpy as np
+
+class ROIStore(MutableMapping):
+    """
+    ROI coordinates of one FOV in flat arrays, drop-in for dict_roi_coords (Dict[roi_id, Dict["xpix", "ypix", "med"]]).
+    xpix / ypix of all ROIs are concatenated, the ROI in row i owns pixels offsets[i]:offsets[i+1].
+    store[roi_id] returns a read-only {"xpix", "ypix", "med"} (ROICoordsView) whose arrays are read-only views into the flat arrays,
+    an ROI is changed by assigning a new dict, store[roi_id] = {...}, which also resets its metadata columns.
+    Assignments are buffered and merged into the flat arrays on the next bulk access,
+    so ROIs can be added one by one without copying all pixels each time.
+
+    Attributes:
+        roi_ids (np.ndarray): (N,) ROI IDs, in insertion order.
+        offsets (np.ndarray): (N+1,) start of each ROI in xpix / ypix.
+        xpix, ypix (np.ndarray): (total pixels,) concatenated coordinates.
+        med (np.ndarray): (N, 2) median (x, y) of each ROI.
+        columns (Dict[str, np.ndarray]): per-ROI metadata, (N,) each, e.g. npix, radius of Suite2p stat.
+    """
+    def __init__(
+            self,
+            roi_ids : Optional[np.ndarray]=None,
+            offsets : Optional[np.ndarray]=None,
+            xpix    : Optional[np.ndarray]=None,
+            ypix    : Optional[np.ndarray]=None,
+            med     : Optional[np.ndarray]=None,
+            columns : Optional[Dict[str, np.ndarray]]=None,
+            ):
+        self._roi_ids = np.asarray(roi_ids if roi_ids is not None else [], dtype=np.int64)
+        self._offsets = np.asarray(offsets if offsets is not None else [0], dtype=np.int64)
+        self._xpix = np.asarray(xpix) if xpix is not None else np.zeros(0, dtype=np.int32)
+        self._ypix = np.asarray(ypix) if ypix is not None else np.zeros(0, dtype=np.int32)
+        self._med = np.asarray(med).reshape(-1, 2) if med is not None else np.zeros((0, 2), dtype=np.int32)
+        self._columns = {key: np.asarray(value) for key, value in (columns or {}).items()}
+        self._dict_row: Optional[Dict[int, int]] = None # roi_id -> row, built on demand
+        self._dict_pending: Dict[int, Dict[str, Any]] = {} # written but not yet merged ROIs
+        self.version = 0 # incremented on every change, for caches built from the store
+        self._list_change: List[Tuple[int, int]] = [] # (version, roi_id) of single ROI edits, for incremental cache updates
+        self._version_log_start = 0 # changes before this version are no longer logged
+        self.contour_cache = None # ROIContourCache, created by getROIContourCache
+
+    """
+    construction
+    """
+    # from dict_roi_coords or Suite2p stat, Dict[roi_id, Dict["xpix", "ypix", "med", ...]]
+    # column_keys: scalar fields copied to columns, None for no columns, "all" for all numeric scalars shared by every ROI
+    @classmethod
+    def fromDictROICoords(cls, dict_roi_coords: Dict[int, Dict[str, Any]], column_keys: Union[List[str], Literal["all"], None]=None) -> ROIStore:
+        roi_ids = np.fromiter(dict_roi_coords.keys(), dtype=np.int64, count=len(dict_roi_coords))
+        list_coords = list(dict_roi_coords.values())
+        if not list_coords:
+            return cls()
+        list_xpix = [np.asarray(coords["xpix"]).ravel() for coords in list_coords]
+        list_ypix = [np.asarray(coords["ypix"]).ravel() for coords in list_coords]
+        npix = np.fromiter((len(xpix) for xpix in list_xpix), dtype=np.int64, count=len(list_xpix))
+        offsets = np.concatenate(([0], np.cumsum(npix)))
+        med = np.array([np.asarray(coords["med"]).ravel()[:2] for coords in list_coords])
+        if column_keys is None:
+            column_keys = []
+        elif column_keys == "all":
+            column_keys = [
+                key for key, value in list_coords[0].items()
+                if key not in ["xpix", "ypix", "med"] and np.ndim(value) == 0 and isinstance(value, (int, float, np.number))
+                and all(key in coords for coords in list_coords)
+                ]
+        columns = {key: np.array([coords[key] for coords in list_coords]) for key in column_keys}
+        return cls(roi_ids, offsets, np.concatenate(list_xpix), np.concatenate(list_ypix), med, columns)
+
+    # from label image (y, x), 0 is background, ROI IDs are given in order of labels like convertCellposeMaskToDictROICoords
+    @classmethod
+    def fromLabelImage(cls, mask: np.ndarray, dtype: str="uint16") -> ROIStore:
+        mask_flat = np.asarray(mask).ravel()
+        idx_pixel = np.flatnonzero(mask_flat)
+        labels = mask_flat[idx_pixel]
+        order = np.argsort(labels, kind="stable") # pixels of each ROI stay in row-major order
+        idx_pixel, labels = idx_pixel[order], labels[order]
+        ypix, xpix = np.divmod(idx_pixel, mask.shape[1]) # XY reversed
+        xpix, ypix = xpix.astype(dtype), ypix.astype(dtype)
+        if len(labels) == 0:
+            return cls(xpix=xpix, ypix=ypix)
+        idx_start = np.flatnonzero(np.r_[True, labels[1:] != labels[:-1]])
+        offsets = np.append(idx_start, len(labels)).astype(np.int64)
+        med = np.column_stack((calculateSegmentMedian(xpix, offsets), calculateSegmentMedian(ypix, offsets))).astype(int)
+        return cls(np.arange(len(idx_start)), offsets, xpix, ypix, med)
+
+    def copy(self) -> ROIStore:
+        self.consolidate()
+        return ROIStore(
+            self._roi_ids.copy(), self._offsets.copy(), self._xpix.copy(), self._ypix.copy(), self._med.copy(),
+            {key: value.copy() for key, value in self._columns.items()},
+            )
+
+    """
+    dict-compatible access
+    """
+    def __getitem__(self, roi_id: int) -> ROICoordsView:
+        if roi_id in self._dict_pending:
+            return ROICoordsView(self._dict_pending[roi_id])
+        row = self.getRowIndex().get(roi_id)
+        if row is None:
+            raise KeyError(roi_id)
+        start, end = self._offsets[row], self._offsets[row + 1]
+        return ROICoordsView({"xpix": self._xpix[start:end], "ypix": self._ypix[start:end], "med": self._med[row]})
+
+    def __setitem__(self, roi_id: int, coords: Dict[str, Any]) -> None:
+        self._dict_pending[roi_id] = {"xpix": np.asarray(coords["xpix"]).ravel(), "ypix": np.asarray(coords["ypix"]).ravel(), "med": np.asarray(coords["med"]).ravel()[:2]}
+        self.logChange(roi_id)
+
+    def __delitem__(self, roi_id: int) -> None:
+        self.consolidate()
+        row = self.getRowIndex().get(roi_id)
+        if row is None:
+            raise KeyError(roi_id)
+        mask_row = np.ones(len(self._roi_ids), dtype=bool)
+        mask_row[row] = False
+        self.applyRowMask(mask_row, log_change=False)
+        self.logChange(roi_id)
+
+    def __contains__(self, roi_id: object) -> bool:
+        return roi_id in self._dict_pending or roi_id in self.getRowIndex()
+
+    def __iter__(self) -> Iterator[int]:
+        self.consolidate()
+        return iter(self._roi_ids.tolist())
+
+    def __len__(self) -> int:
+        self.consolidate()
+        return len(self._roi_ids)
+
+    def __repr__(self) -> str:
+        return f"ROIStore({len(self)} ROIs, {len(self.xpix)} pixels)"
+
+    def getRowIndex(self) -> Dict[int, int]:
+        if self._dict_row is None:
+            self._dict_row = {roi_id: row for row, roi_id in enumerate(self._roi_ids.tolist())}
+        return self._dict_row
+
+    # changes are logged per ROI, the log is dropped when it grows large and caches rebuild instead
+    def logChange(self, roi_id: int, max_log: int=4096) -> None:
+        self.version += 1
+        self._list_change.append((self.version, roi_id))
+        if len(self._list_change) > max_log:
+            self._list_change = []
+            self._version_log_start = self.version
+
+    # ROI IDs changed after version, None if the log does not reach back that far
+    def getChangedROIIds(self, version: int) -> Optional[set]:
+        if version < self._version_log_start:
+            return None
+        return {roi_id for version_change, roi_id in self._list_change if version_change > version}
+
+    """
+    flat arrays
+    """
+    @property
+    def roi_ids(self) -> np.ndarray:
+        self.consolidate()
+        return self._roi_ids
+
+    @property
+    def offsets(self) -> np.ndarray:
+        self.consolidate()
+        return self._offsets
+
+    @property
+    def xpix(self) -> np.ndarray:
+        self.consolidate()
+        return self._xpix
+
+    @property
+    def ypix(self) -> np.ndarray:
+        self.consolidate()
+        return self._ypix
+
+    @property
+    def med(self) -> np.ndarray:
+        self.consolidate()
+        return self._med
+
+    @property
+    def columns(self) -> Dict[str, np.ndarray]:
+        self.consolidate()
+        return self._columns
+
+    @property
+    def npix(self) -> np.ndarray:
+        return np.diff(self.offsets)
+
+    def setColumn(self, key: str, values: np.ndarray) -> None:
+        values = np.asarray(values)
+        if len(values) != len(self):
+            raise ValueError(f"column {key} has {len(values)} values, {len(self)} ROIs")
+        self._columns[key] = values
+        self.version += 1
+
+    def getColumn(self, key: str) -> np.ndarray:
+        return self.columns[key]
+
+    # merge buffered writes into the flat arrays, replaced ROIs keep their position, new ROIs are appended
+    def consolidate(self) -> None:
+        if not self._dict_pending:
+            return
+        dict_pending, self._dict_pending = self._dict_pending, {}
+        dict_row = self.getRowIndex()
+        n_row = len(self._roi_ids)
+        # pieces of the new flat arrays, unchanged runs of rows are copied as one slice
+        list_xpix, list_ypix, list_npix = [], [], []
+        rows_replaced = sorted(dict_row[roi_id] for roi_id in dict_pending if roi_id in dict_row)
+        if rows_replaced: # views handed out before keep their values
+            self._med = self._med.copy()
+            # metadata of the old ROI (npix, radius, ...) does not describe the new pixels
+            for key, values in self._columns.items():
+                values = values.copy()
+                values[rows_replaced] = getColumnFillValue(values)
+                self._columns[key] = values
+        row_prev = 0
+        for row in rows_replaced + [n_row]:
+            start, end = self._offsets[row_prev], self._offsets[row]
+            list_xpix.append(self._xpix[start:end])
+            list_ypix.append(self._ypix[start:end])
+            list_npix.append(np.diff(self._offsets[row_prev:row + 1]))
+            if row < n_row:
+                coords = dict_pending[int(self._roi_ids[row])]
+                list_xpix.append(coords["xpix"])
+                list_ypix.append(coords["ypix"])
+                list_npix.append([len(coords["xpix"])])
+                self._med[row] = coords["med"]
+            row_prev = row + 1
+        list_roi_id_new = [roi_id for roi_id in dict_pending if roi_id not in dict_row]
+        for roi_id in list_roi_id_new:
+            list_xpix.append(dict_pending[roi_id]["xpix"])
+            list_ypix.append(dict_pending[roi_id]["ypix"])
+            list_npix.append([len(dict_pending[roi_id]["xpix"])])
+        self._xpix = np.concatenate(list_xpix) if list_xpix else self._xpix
+        self._ypix = np.concatenate(list_ypix) if list_ypix else self._ypix
+        self._offsets = np.concatenate(([0], np.cumsum(np.concatenate(list_npix)))).astype(np.int64)
+        if list_roi_id_new:
+            med_new = np.array([dict_pending[roi_id]["med"] for roi_id in list_roi_id_new])
+            self._med = np.concatenate((self._med, med_new.astype(np.result_type(self._med, med_new)))) if len(self._med) else med_new
+            self._roi_ids = np.concatenate((self._roi_ids, np.array(list_roi_id_new, dtype=np.int64)))
+            for key, values in self._columns.items():
+                self._columns[key] = np.concatenate((values, np.full(len(list_roi_id_new), getColumnFillValue(values), dtype=values.dtype)))
+            for roi_id in list_roi_id_new:
+                dict_row[roi_id] = len(dict_row)
+
+    # keep rows where mask_row is True
+    def applyRowMask(self, mask_row: np.ndarray, log_change: bool=True) -> None:
+        self.consolidate()
+        if log_change:
+            for roi_id in self._roi_ids[~np.asarray(mask_row, dtype=bool)].tolist():
+                self.logChange(roi_id)
+        mask_pixel = np.repeat(mask_row, self.npix)
+        npix = self.npix[mask_row]
+        self._roi_ids = self._roi_ids[mask_row]
+        self._offsets = np.concatenate(([0], np.cumsum(npix))).astype(np.int64)
+        self._xpix, self._ypix = self._xpix[mask_pixel], self._ypix[mask_pixel]
+        self._med = self._med[mask_row]
+        self._columns = {key: values[mask_row] for key, values in self._columns.items()}
+        self._dict_row = None
+
+    """
+    bulk operations
+    """
+    # rows of roi_ids, KeyError if missing
+    def getRows(self, roi_ids: Any) -> np.ndarray:
+        self.consolidate()
+        dict_row = self.getRowIndex()
+        return np.array([dict_row[roi_id] for roi_id in roi_ids], dtype=np.int64)
+
+    # row of each pixel, (total pixels,)
+    def getPixelRows(self) -> np.ndarray:
+        return np.repeat(np.arange(len(self.roi_ids)), self.npix)
+
+    # xpix, ypix of ROIs where mask_row is True, all ROIs if None
+    def getPixels(self, mask_row: Optional[np.ndarray]=None) -> Tuple[np.ndarray, np.ndarray]:
+        if mask_row is None:
+            return self.xpix, self.ypix
+        mask_pixel = np.repeat(np.asarray(mask_row, dtype=bool), self.npix)
+        return self.xpix[mask_pixel], self.ypix[mask_pixel]
+
+    # ROI image (height, width), value on pixels of ROIs where mask_row is True
+    def toImage(self, shape: Tuple[int, int], value: int=50, dtype: str="uint8", mask_row: Optional[np.ndarray]=None) -> np.ndarray:
+        img = np.zeros(shape, dtype=dtype)
+        xpix, ypix = self.getPixels(mask_row)
+        img[ypix, xpix] = value # XY reversed
+        return img
+
+    # label image (height, width) of ROI IDs, -1 for background, later ROIs are on top
+    def toLabelImage(self, shape: Tuple[int, int], mask_row: Optional[np.ndarray]=None) -> np.ndarray:
+        img = np.full(shape, -1, dtype=np.int32)
+        roi_ids_pixel = self.roi_ids[self.getPixelRows()]
+        if mask_row is not None:
+            mask_pixel = np.repeat(np.asarray(mask_row, dtype=bool), self.npix)
+            img[self.ypix[mask_pixel], self.xpix[mask_pixel]] = roi_ids_pixel[mask_pixel]
+        else:
+            img[self.ypix, self.xpix] = roi_ids_pixel
+        return img
+
+    # new store with transformed pixels and med, func_transform(xy: (n, 2)) -> (n, 2), called once for all pixels
+    def transformed(self, func_transform: Callable[[np.ndarray], np.ndarray], func_transform_med: Optional[Callable[[np.ndarray], np.ndarray]]=None) -> ROIStore:
+        xy = func_transform(np.column_stack((self.xpix, self.ypix)))
+        med = (func_transform_med or func_transform)(self.med)
+        return ROIStore(self.roi_ids.copy(), self.offsets.copy(), xy[:, 0], xy[:, 1], med, {key: value.copy() for key, value in self.columns.items()})
+
+class ROICoordsView(dict):
+    """
+    Read-only {"xpix", "ypix", "med"} of one ROI of ROIStore, arrays are read-only views.
+    Writes raise TypeError as they would be lost, assign a new dict to the store instead.
+    copy() and copy.deepcopy() return plain writable dicts.
+    """
+    def __init__(self, coords: Dict[str, np.ndarray]):
+        dict_view = {}
+        for key, value in coords.items():
+            value = value.view()
+            value.flags.writeable = False
+            dict_view[key] = value
+        super().__init__(dict_view)
+
+    def _raiseReadOnly(self, *args, **kwargs) -> None:
+        raise TypeError("ROIStore entries are read-only, assign a new dict with store[roi_id] = {...}")
+
+    __setitem__ = __delitem__ = _raiseReadOnly
+    update = setdefault = pop = popitem = clear = _raiseReadOnly
+    __ior__ = _raiseReadOnly
+
+    def copy(self) -> Dict[str, np.ndarray]:
+        return {key: value.copy() for key, value in self.items()}
+
+    def __deepcopy__(self, memo: Dict[int, Any]) -> Dict[str, np.ndarray]:
+        return self.copy()
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        return (dict, (dict(self),))
+
+# fill value of a metadata column for ROIs added later
+def getColumnFillValue(values: np.ndarray) -> Any:
+    if values.dtype.kind == "f":
+        return np.nan
+    elif values.dtype.kind in ["U", "S", "O"]:
+        return ""
+    return 0
+
+# median of each segment values[offsets[i]:offsets[i+1]], same as np.median per segment, nan for empty segments
+def calculateSegmentMedian(values: np.ndarray, offsets: np.ndarray) -> np.ndarray:
+    npix = np.diff(offsets)
+    rows = np.repeat(np.arange(len(npix)), npix)
+    values_sorted = values[np.lexsort((values, rows))].astype(np.float64)
+    med = np.full(len(npix), np.nan)
+    is_nonempty = npix > 0
+    idx_low = offsets[:-1][is_nonempty] + (npix[is_nonempty] - 1) // 2
+    idx_high = offsets[:-1][is_nonempty] + npix[is_nonempty] // 2
+    med[is_nonempty] = (values_sorted[idx_low] + values_sorted[idx_high]) / 2
+    return med
+
+# ROIStore of dict_roi_coords, returned as is if already converted
+def toROIStore(dict_roi_coords: Dict[int, Dict[str, Any]] | ROIStore) -> ROIStore:
+    if isinstance(dict_roi_coords, ROIStore):
+        return dict_roi_coords
+    return ROIStore.fromDictROICoords(dict_roi_coords)
+
+# med (n, 2) of roi_ids, without per-ROI dicts for ROIStore
+def getROIMedArray(dict_roi_coords: Dict[int, Dict[str, Any]] | ROIStore, roi_ids: Any) -> np.ndarray:
+    if isinstance(dict_roi_coords, ROIStore):
+        return dict_roi_coords.med[dict_roi_coords.getRows(roi_ids)]
+    return np.array([dict_roi_coords[roi_id]["med"] for roi_id in roi_ids])
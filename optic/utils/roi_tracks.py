@@ -0,0 +1,308 @@
+from __future__ import annotations
+from ..type_definitions import *
+import numpy as np
+
+# matches are edited between consecutive t_planes only, matches across gaps follow from the tracks
+MSG_NON_ADJACENT_PAIR = "Matches between non-consecutive t planes follow from the tracks, edit the matches of consecutive t planes instead."
+
+class ROITracks:
+    """
+    ROI matching of MicrogliaTracking as tracks, replaces dict_roi_matching ({"id": ..., "match": ...}).
+    Each t_plane holds its ROI IDs and, aligned with them, the track ID of each ROI.
+    ROIs with the same track ID are the same cell and a track has at most one ROI per t_plane,
+    so the match of a t_plane pair is derived on demand instead of being stored for every pair.
+    Matches are edited between consecutive t_planes, which leaves the matches of other consecutive pairs unchanged.
+
+    Attributes:
+        dict_roi_ids (Dict[int, np.ndarray]): t_plane -> (N,) ROI IDs, in insertion order.
+        dict_track_ids (Dict[int, np.ndarray]): t_plane -> (N,) track IDs.
+        n_track (int): next free track ID.
+    """
+    def __init__(self, n_plane: int=0):
+        self.dict_roi_ids: Dict[int, np.ndarray] = {t_plane: np.zeros(0, dtype=np.int64) for t_plane in range(n_plane)}
+        self.dict_track_ids: Dict[int, np.ndarray] = {t_plane: np.zeros(0, dtype=np.int64) for t_plane in range(n_plane)}
+        self.n_track = 0
+        self.version = 0 # incremented on every change
+
+    """
+    construction
+    """
+    # every ROI is its own track
+    @classmethod
+    def fromROIIds(cls, dict_roi_ids: Dict[int, List[int]]) -> ROITracks:
+        roi_tracks = cls()
+        for t_plane, roi_ids in dict_roi_ids.items():
+            roi_tracks.setPlane(t_plane, roi_ids)
+        return roi_tracks
+
+    # from Cellpose masks (t, y, x), ROI IDs are given in order of labels, ROIs with the same label are one track
+    @classmethod
+    def fromLabelImages(cls, masks: np.ndarray[np.uint16, Tuple[int, int, int]]) -> ROITracks:
+        roi_tracks = cls()
+        for t_plane, mask in enumerate(masks):
+            labels = np.unique(mask)
+            labels = labels[labels != 0].astype(np.int64) # cellpose mask's 0 is background
+            roi_tracks.setPlane(t_plane, np.arange(len(labels)), labels)
+        return roi_tracks
+
+    # from the pairwise layout, Dict["id", Dict[t_plane, List[roi_id]]], "match", Dict[t_plane_pri, Dict[t_plane_sec, Dict[roi_id, Optional[roi_id]]]]
+    @classmethod
+    def fromDictROIMatching(cls, dict_roi_matching: Dict[str, Dict[int, List[int] | Dict[int, Dict[int, Optional[int]]]]]) -> ROITracks:
+        """
+        Matched ROIs are joined with union-find, pairs of close t_planes first.
+        A match that would put two ROIs of one t_plane into one track is dropped,
+        matches which are not transitive are completed, see getChangedMatches to report them.
+        """
+        from .data_utils import UnionFind
+        dict_roi_ids = {t_plane: list(dict.fromkeys(int(roi_id) for roi_id in roi_ids)) for t_plane, roi_ids in dict_roi_matching["id"].items()}
+        union_find = UnionFind()
+        dict_root_planes: Dict[Tuple[int, int], set] = {} # root -> t_planes of the track
+        for t_plane, roi_ids in dict_roi_ids.items():
+            for roi_id in roi_ids:
+                union_find.add((t_plane, roi_id))
+                dict_root_planes[(t_plane, roi_id)] = {t_plane}
+
+        list_pair = [(t_plane_pri, t_plane_sec) for t_plane_pri in dict_roi_matching["match"] for t_plane_sec in dict_roi_matching["match"][t_plane_pri]]
+        for t_plane_pri, t_plane_sec in sorted(list_pair, key=lambda pair: (abs(pair[1] - pair[0]), pair)):
+            for roi_id_pri, roi_id_sec in dict_roi_matching["match"][t_plane_pri][t_plane_sec].items():
+                item_pri, item_sec = (t_plane_pri, roi_id_pri), (t_plane_sec, roi_id_sec)
+                if roi_id_sec is None or item_pri not in union_find.parent or item_sec not in union_find.parent:
+                    continue
+                root_pri, root_sec = union_find.find(item_pri), union_find.find(item_sec)
+                if root_pri == root_sec or not dict_root_planes[root_pri].isdisjoint(dict_root_planes[root_sec]):
+                    continue
+                set_plane = dict_root_planes.pop(root_pri) | dict_root_planes.pop(root_sec)
+                dict_root_planes[union_find.union(root_pri, root_sec)] = set_plane
+
+        roi_tracks = cls()
+        dict_root_track: Dict[Tuple[int, int], int] = {}
+        for t_plane, roi_ids in dict_roi_ids.items():
+            track_ids = [dict_root_track.setdefault(union_find.find((t_plane, roi_id)), len(dict_root_track)) for roi_id in roi_ids]
+            roi_tracks.setPlane(t_plane, roi_ids, track_ids)
+        return roi_tracks
+
+    def copy(self) -> ROITracks:
+        roi_tracks = ROITracks()
+        roi_tracks.dict_roi_ids = {t_plane: roi_ids.copy() for t_plane, roi_ids in self.dict_roi_ids.items()}
+        roi_tracks.dict_track_ids = {t_plane: track_ids.copy() for t_plane, track_ids in self.dict_track_ids.items()}
+        roi_tracks.n_track = self.n_track
+        return roi_tracks
+
+    def __repr__(self) -> str:
+        return f"ROITracks(n_plane={len(self.dict_roi_ids)}, n_roi={sum(len(roi_ids) for roi_ids in self.dict_roi_ids.values())})"
+
+    """
+    t_planes and ROIs
+    """
+    def getPlanes(self) -> List[int]:
+        return sorted(self.dict_roi_ids.keys())
+
+    def getNumPlanes(self) -> int:
+        return len(self.dict_roi_ids)
+
+    def getROIIds(self, t_plane: int) -> np.ndarray:
+        return self.dict_roi_ids.get(t_plane, np.zeros(0, dtype=np.int64))
+
+    def getROIIdList(self, t_plane: int) -> List[int]:
+        return self.getROIIds(t_plane).tolist()
+
+    def getTrackIds(self, t_plane: int) -> np.ndarray:
+        return self.dict_track_ids.get(t_plane, np.zeros(0, dtype=np.int64))
+
+    # row of ROI in t_plane, None if not found
+    def getRow(self, t_plane: int, roi_id: int) -> Optional[int]:
+        rows = np.flatnonzero(self.getROIIds(t_plane) == roi_id)
+        return int(rows[0]) if len(rows) else None
+
+    def hasROI(self, t_plane: int, roi_id: int) -> bool:
+        return self.getRow(t_plane, roi_id) is not None
+
+    def newTrackId(self) -> int:
+        self.n_track += 1
+        return self.n_track - 1
+
+    # replace ROIs of t_plane, each ROI is a new track if track_ids is None
+    def setPlane(self, t_plane: int, roi_ids: List[int] | np.ndarray, track_ids: Optional[List[int] | np.ndarray]=None) -> None:
+        roi_ids = np.asarray(roi_ids, dtype=np.int64).ravel()
+        if track_ids is None:
+            track_ids = np.arange(self.n_track, self.n_track + len(roi_ids), dtype=np.int64)
+        track_ids = np.asarray(track_ids, dtype=np.int64).ravel()
+        if len(roi_ids) != len(track_ids):
+            raise ValueError(f"length of roi_ids and track_ids differs: {len(roi_ids)} != {len(track_ids)}")
+        self.dict_roi_ids[t_plane] = roi_ids
+        self.dict_track_ids[t_plane] = track_ids
+        if len(track_ids):
+            self.n_track = max(self.n_track, int(track_ids.max()) + 1)
+        self.version += 1
+
+    # append ROI to t_plane, as a new track if track_id is None
+    def addROI(self, t_plane: int, roi_id: int, track_id: Optional[int]=None) -> None:
+        if self.hasROI(t_plane, roi_id):
+            raise ValueError(f"ROI {roi_id} already exists in t_plane {t_plane}")
+        if track_id is None:
+            track_id = self.newTrackId()
+        self.setPlane(t_plane, np.append(self.getROIIds(t_plane), roi_id), np.append(self.getTrackIds(t_plane), track_id))
+
+    # the rest of the track stays matched
+    def removeROI(self, t_plane: int, roi_id: int) -> None:
+        row = self.getRow(t_plane, roi_id)
+        if row is None:
+            raise KeyError(roi_id)
+        self.dict_roi_ids[t_plane] = np.delete(self.dict_roi_ids[t_plane], row)
+        self.dict_track_ids[t_plane] = np.delete(self.dict_track_ids[t_plane], row)
+        self.version += 1
+
+    """
+    matching
+    """
+    # t_plane pairs shown in the tables, t_plane_pri < t_plane_sec
+    def hasPair(self, t_plane_pri: int, t_plane_sec: int) -> bool:
+        return t_plane_pri in self.dict_roi_ids and t_plane_sec in self.dict_roi_ids and t_plane_pri < t_plane_sec
+
+    # matched ROI ID in t_plane_sec of each ROI of t_plane_pri, -1 if not matched
+    def getMatchArray(self, t_plane_pri: int, t_plane_sec: int) -> np.ndarray:
+        track_ids_pri = self.getTrackIds(t_plane_pri)
+        track_ids_sec, roi_ids_sec = self.getTrackIds(t_plane_sec), self.getROIIds(t_plane_sec)
+        arr_match = np.full(len(track_ids_pri), -1, dtype=np.int64)
+        if len(track_ids_sec) == 0:
+            return arr_match
+        order = np.argsort(track_ids_sec)
+        track_ids_sec_sorted = track_ids_sec[order]
+        idx = np.searchsorted(track_ids_sec_sorted, track_ids_pri).clip(max=len(order) - 1)
+        mask_hit = track_ids_sec_sorted[idx] == track_ids_pri
+        arr_match[mask_hit] = roi_ids_sec[order[idx[mask_hit]]]
+        return arr_match
+
+    # Dict[roi_id_pri, Optional[roi_id_sec]], in order of ROIs of t_plane_pri
+    def getMatch(self, t_plane_pri: int, t_plane_sec: int) -> Dict[int, Optional[int]]:
+        return {
+            roi_id_pri: (roi_id_sec if roi_id_sec >= 0 else None)
+            for roi_id_pri, roi_id_sec in zip(self.getROIIdList(t_plane_pri), self.getMatchArray(t_plane_pri, t_plane_sec).tolist())
+            }
+
+    def getMatchedROIId(self, t_plane_pri: int, roi_id_pri: int, t_plane_sec: int) -> Optional[int]:
+        row = self.getRow(t_plane_pri, roi_id_pri)
+        if row is None:
+            return None
+        rows_sec = np.flatnonzero(self.getTrackIds(t_plane_sec) == self.dict_track_ids[t_plane_pri][row])
+        return int(self.dict_roi_ids[t_plane_sec][rows_sec[0]]) if len(rows_sec) else None
+
+    # matches of the pairwise layout which differ in the tracks, dropped conflicting and completed non-transitive matches
+    # (t_plane_pri, t_plane_sec, roi_id_pri, roi_id_sec of dict_roi_matching, roi_id_sec of the tracks), None for not matched
+    def getChangedMatches(
+            self, 
+            dict_roi_matching: Dict[str, Dict[int, List[int] | Dict[int, Dict[int, Optional[int]]]]]
+            ) -> List[Tuple[int, int, int, Optional[int], Optional[int]]]:
+        list_change = []
+        for t_plane_pri, dict_match_pri in dict_roi_matching["match"].items():
+            for t_plane_sec, dict_match in dict_match_pri.items():
+                for roi_id_pri, roi_id_sec_track in self.getMatch(t_plane_pri, t_plane_sec).items():
+                    roi_id_sec = dict_match.get(roi_id_pri)
+                    roi_id_sec = int(roi_id_sec) if roi_id_sec is not None else None
+                    if roi_id_sec != roi_id_sec_track:
+                        list_change.append((t_plane_pri, t_plane_sec, roi_id_pri, roi_id_sec, roi_id_sec_track))
+        return list_change
+
+    # t_planes next to each other, in either order
+    def isAdjacentPair(self, t_plane_pri: int, t_plane_sec: int) -> bool:
+        t_planes = self.getPlanes()
+        if t_plane_pri not in self.dict_roi_ids or t_plane_sec not in self.dict_roi_ids:
+            return False
+        return abs(t_planes.index(t_plane_pri) - t_planes.index(t_plane_sec)) == 1
+
+    def checkAdjacentPair(self, t_plane_pri: int, t_plane_sec: int) -> None:
+        if not self.isAdjacentPair(t_plane_pri, t_plane_sec):
+            raise ValueError(f"t{t_plane_pri} - t{t_plane_sec}: {MSG_NON_ADJACENT_PAIR}")
+
+    # t_planes from t_plane_sec on, seen from t_plane_pri, where a track is cut by a match of the pair
+    def getPlanesFrom(self, t_plane_pri: int, t_plane_sec: int) -> List[int]:
+        if t_plane_pri < t_plane_sec:
+            return [t_plane for t_plane in self.getPlanes() if t_plane >= t_plane_sec]
+        return [t_plane for t_plane in self.getPlanes() if t_plane <= t_plane_sec]
+
+    # replace track IDs in t_planes, dict_track: Dict[track_id_old, track_id_new]
+    def replaceTrackIds(self, t_planes: List[int], dict_track: Dict[int, int]) -> None:
+        if not dict_track:
+            return
+        track_ids_old = np.fromiter(dict_track.keys(), dtype=np.int64, count=len(dict_track))
+        track_ids_new = np.fromiter(dict_track.values(), dtype=np.int64, count=len(dict_track))
+        order = np.argsort(track_ids_old)
+        track_ids_old, track_ids_new = track_ids_old[order], track_ids_new[order]
+        for t_plane in t_planes:
+            track_ids = self.dict_track_ids[t_plane]
+            idx = np.searchsorted(track_ids_old, track_ids).clip(max=len(track_ids_old) - 1)
+            mask_hit = track_ids_old[idx] == track_ids
+            track_ids[mask_hit] = track_ids_new[idx[mask_hit]]
+        self.version += 1
+
+    # match roi_id_pri to roi_id_sec, None to unmatch
+    def setMatch(self, t_plane_pri: int, t_plane_sec: int, roi_id_pri: int, roi_id_sec: Optional[int]) -> None:
+        """
+        Tracks are cut before t_plane_sec (after it, if t_plane_pri > t_plane_sec):
+        the part of the track of roi_id_pri from t_plane_sec on becomes a new track,
+        and the part of the track of roi_id_sec from t_plane_sec on joins the track of roi_id_pri.
+        ROIs of the other parts stay matched as they were.
+        The t_planes must be consecutive, ValueError otherwise.
+        """
+        self.checkAdjacentPair(t_plane_pri, t_plane_sec)
+        row_pri = self.getRow(t_plane_pri, roi_id_pri)
+        if row_pri is None:
+            raise KeyError(roi_id_pri)
+        track_id_pri = int(self.dict_track_ids[t_plane_pri][row_pri])
+        if roi_id_sec is not None:
+            row_sec = self.getRow(t_plane_sec, roi_id_sec)
+            if row_sec is None:
+                raise KeyError(roi_id_sec)
+            track_id_sec = int(self.dict_track_ids[t_plane_sec][row_sec])
+            if track_id_sec == track_id_pri: # already matched
+                return
+        elif not np.any(self.getTrackIds(t_plane_sec) == track_id_pri): # not matched
+            return
+        t_planes = self.getPlanesFrom(t_plane_pri, t_plane_sec)
+        self.replaceTrackIds(t_planes, {track_id_pri: self.newTrackId()})
+        if roi_id_sec is not None:
+            self.replaceTrackIds(t_planes, {track_id_sec: track_id_pri})
+
+    # parts of tracks in t_planes become new tracks
+    def cutTracks(self, t_planes: List[int], track_ids_cut: List[int]) -> None:
+        dict_track = {track_id: self.n_track + i for i, track_id in enumerate(track_ids_cut)}
+        self.n_track += len(track_ids_cut)
+        self.replaceTrackIds(t_planes, dict_track)
+
+    # unmatch all ROIs of the t_plane pair, tracks are cut as in setMatch
+    def clearMatch(self, t_plane_pri: int, t_plane_sec: int) -> None:
+        self.checkAdjacentPair(t_plane_pri, t_plane_sec)
+        track_ids_cut = np.intersect1d(self.getTrackIds(t_plane_pri), self.getTrackIds(t_plane_sec)).tolist()
+        self.cutTracks(self.getPlanesFrom(t_plane_pri, t_plane_sec), track_ids_cut)
+
+    # replace all matches of the t_plane pair, Dict[roi_id_pri, roi_id_sec]
+    def setMatches(self, t_plane_pri: int, t_plane_sec: int, dict_match: Dict[int, int]) -> None:
+        self.checkAdjacentPair(t_plane_pri, t_plane_sec)
+        t_planes = self.getPlanesFrom(t_plane_pri, t_plane_sec)
+        # cut the matched tracks and the tracks of the new matches, so that they have no ROI from t_plane_sec on
+        dict_track_pri = dict(zip(self.getROIIdList(t_plane_pri), self.getTrackIds(t_plane_pri).tolist()))
+        track_ids_cut = np.union1d(
+            np.intersect1d(self.getTrackIds(t_plane_pri), self.getTrackIds(t_plane_sec)),
+            [dict_track_pri[roi_id_pri] for roi_id_pri in dict_match.keys()],
+            ).astype(np.int64).tolist()
+        self.cutTracks(t_planes, track_ids_cut)
+        # then the parts of the tracks of matched ROIs are joined at once
+        dict_track_sec = dict(zip(self.getROIIdList(t_plane_sec), self.getTrackIds(t_plane_sec).tolist()))
+        dict_track = {dict_track_sec[roi_id_sec]: dict_track_pri[roi_id_pri] for roi_id_pri, roi_id_sec in dict_match.items()}
+        self.replaceTrackIds(t_planes, dict_track)
+
+# one line per changed match of getChangedMatches, at most max_lines lines, None for all
+def formatChangedMatches(list_change: List[Tuple[int, int, int, Optional[int], Optional[int]]], max_lines: Optional[int]=None) -> str:
+    list_line = [
+        f"t{t_plane_pri} ROI {roi_id_pri} - t{t_plane_sec}: {roi_id_sec if roi_id_sec is not None else 'none'} -> {roi_id_sec_track if roi_id_sec_track is not None else 'none'}"
+        for t_plane_pri, t_plane_sec, roi_id_pri, roi_id_sec, roi_id_sec_track in list_change[:max_lines]
+        ]
+    if max_lines is not None and len(list_change) > max_lines:
+        list_line.append(f"... and {len(list_change) - max_lines} more")
+    return "\n".join(list_line)
+
+# ROITracks from dict_roi_matching of the pairwise layout, ROITracks as is
+def toROITracks(dict_roi_matching: Dict[str, Dict[int, List[int] | Dict[int, Dict[int, Optional[int]]]]] | ROITracks) -> ROITracks:
+    if isinstance(dict_roi_matching, ROITracks):
+        return dict_roi_matching
+    return ROITracks.fromDictROIMatching(dict_roi_matching)
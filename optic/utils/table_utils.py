@@ -25,6 +25,11 @@ def clearColumnCells(
     q_table: 'QTableWidget',
     idx_col: int
 ) -> None:
+    from ..gui.table_model import ROITableModel
+    table_model = q_table.model()
+    if isinstance(table_model, ROITableModel):
+        table_model.clearColumn(idx_col)
+        return
     for row in range(q_table.rowCount()):
         cell_widget = q_table.cellWidget(row, idx_col)
         if cell_widget:
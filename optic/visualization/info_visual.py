@@ -1,6 +1,9 @@
 from __future__ import annotations
 from ..type_definitions import *
 from collections import Counter
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    from ..gui.table_model import ROITableModel
 
 # Display Z,T plane number
 def updateZPlaneDisplay(widget_manager: WidgetManager, app_key: str, z: int) -> None:
@@ -53,25 +56,11 @@ def countROIs(config_manager: ConfigManager, widget_manager: WidgetManager, app_
     table_columns = config_manager.getTableColumns(app_key).getColumns()
     celltype_columns = [col_name for col_name, col_info in table_columns.items() if col_info['type'] == 'celltype']
 
-    roi_counts = {col_name: 0 for col_name in celltype_columns}
-    roi_counts["Unclassified"] = 0
-    total_rois = 0
-
-    q_table = widget_manager.dict_table[app_key]
-    for row in range(q_table.rowCount()):
-        total_rois += 1
-        classified = False
-        for col_name in celltype_columns:
-            col_index = table_columns[col_name]['order']
-            radio_button = q_table.cellWidget(row, col_index)
-            if radio_button and radio_button.isChecked():
-                roi_counts[col_name] += 1
-                classified = True
-                break
-        if not classified:
-            roi_counts["Unclassified"] += 1
-
-    roi_counts["All"] = total_rois
+    table_model: ROITableModel = widget_manager.dict_table[app_key].model()
+    dict_count = table_model.countCelltypes()
+    roi_counts = {col_name: dict_count.get(col_name, 0) for col_name in celltype_columns}
+    roi_counts["Unclassified"] = dict_count["Unclassified"]
+    roi_counts["All"] = table_model.rowCount()
 
     return roi_counts
 
@@ -0,0 +1,104 @@
+from __future__ import annotations
+from ..type_definitions import *
+import threading
+import traceback
+from collections import OrderedDict
+import numpy as np
+
+class PlanePrefetcher:
+    """
+    RGB planes of a XYCZT stack, rendered ahead of the Z/T slider on a background thread.
+    Rendered planes are kept in a LRU cache within a budget in bytes, the GUI thread takes them with get().
+    A new prefetch request supersedes the older one, its planes not started yet are dropped.
+    Jobs are pure numpy functions, they must not touch Qt widgets or DataManager.
+
+    Args:
+        cache_mb (float): budget of the LRU cache of rendered planes, 0 disables prefetching.
+        n_plane (int): number of planes rendered ahead in the direction of travel.
+    """
+    def __init__(self, cache_mb: float=0, n_plane: int=4):
+        self.cache_bytes_max = int(cache_mb * 1024**2)
+        self.n_plane = n_plane
+        self.cache_planes: OrderedDict[Tuple[Any, ...], np.ndarray] = OrderedDict()
+        self.cache_bytes = 0
+        self.set_key_pending: set = set()
+        self.generation = 0 # incremented on every prefetch request
+        self.lock = threading.Lock()
+        self.executor = None # single worker thread, created on first request
+        self.plane_last: Optional[Tuple[int, int]] = None
+        self.direction: Tuple[int, int] = (0, 1) # (dz, dt) of the last move
+
+    def isEnabled(self) -> bool:
+        return self.cache_bytes_max > 0 and self.n_plane > 0
+
+    # rendered plane of key, None if not rendered yet
+    def get(self, key: Tuple[Any, ...]) -> Optional[np.ndarray]:
+        with self.lock:
+            rgb = self.cache_planes.get(key)
+            if rgb is not None:
+                self.cache_planes.move_to_end(key)
+            return rgb
+
+    # direction of travel, from the last displayed plane
+    def updateDirection(self, plane_z: int, plane_t: int) -> Tuple[int, int]:
+        if self.plane_last is not None:
+            dz, dt = plane_z - self.plane_last[0], plane_t - self.plane_last[1]
+            if dz or dt:
+                self.direction = (int(np.sign(dz)), int(np.sign(dt)))
+        self.plane_last = (plane_z, plane_t)
+        return self.direction
+
+    # render planes of [(key, func), ...] in the background, in the given order
+    def prefetch(self, list_job: List[Tuple[Tuple[Any, ...], Callable[[], np.ndarray]]]) -> None:
+        if not self.isEnabled():
+            return
+        from concurrent.futures import ThreadPoolExecutor
+        with self.lock:
+            self.generation += 1
+            generation = self.generation
+            list_job = [(key, func) for key, func in list_job if key not in self.cache_planes and key not in self.set_key_pending]
+            self.set_key_pending.update(key for key, _ in list_job)
+        if not list_job:
+            return
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="PlanePrefetcher")
+        for key, func in list_job:
+            self.executor.submit(self.renderPlane, key, func, generation)
+
+    # worker thread
+    def renderPlane(self, key: Tuple[Any, ...], func: Callable[[], np.ndarray], generation: int) -> None:
+        try:
+            if generation != self.generation: # superseded by a newer request
+                return
+            rgb = func()
+            rgb.flags.writeable = False
+            self.addPlaneToCache(key, rgb)
+        except Exception:
+            traceback.print_exc()
+        finally:
+            with self.lock:
+                self.set_key_pending.discard(key)
+
+    def addPlaneToCache(self, key: Tuple[Any, ...], rgb: np.ndarray) -> None:
+        if rgb.nbytes > self.cache_bytes_max:
+            return
+        with self.lock:
+            if key in self.cache_planes:
+                return
+            self.cache_planes[key] = rgb
+            self.cache_bytes += rgb.nbytes
+            while self.cache_bytes > self.cache_bytes_max:
+                _, rgb_old = self.cache_planes.popitem(last=False)
+                self.cache_bytes -= rgb_old.nbytes
+
+    def clearCache(self) -> None:
+        with self.lock:
+            self.generation += 1
+            self.cache_planes.clear()
+            self.cache_bytes = 0
+
+    def shutdown(self) -> None:
+        self.clearCache()
+        if self.executor is not None:
+            self.executor.shutdown(wait=False)
+            self.executor = None
@@ -0,0 +1,110 @@
+from __future__ import annotations
+from ..type_definitions import *
+import numpy as np
+from ..utils.roi_index import ROIHitIndex
+from ..utils.roi_contour import getROIContourCache
+
+class ROIOverlay:
+    """
+    RGBA overlay of the ROIs of one ROIStore, rendered with numpy.
+    Filled ROIs are taken from the label image of the ROIHitIndex of the store,
+    contours from a label image built from the ROIContourCache of the store.
+    Both are mapped to colors with a palette indexed by ROI ID (see makeROIPalette),
+    so changes of color, opacity, visibility or selection only rebuild the palette.
+
+    Args:
+        roi_index (ROIHitIndex): hit-testing index of the store, its label image follows edits of the store.
+    """
+    def __init__(self, roi_index: ROIHitIndex):
+        self.roi_index = roi_index
+        self.roi_store = roi_index.roi_store
+        self.label_contour: np.ndarray = np.full((0, 0), -1, dtype=np.int32)
+        self.version_contour: int = -1
+        self.rgba: np.ndarray = np.zeros((0, 0, 4), dtype=np.uint8)
+
+    # label image (y, x) of ROI IDs, -1 for background
+    def getLabel(self, contour: bool=False) -> np.ndarray:
+        if contour:
+            self.updateContours()
+            return self.label_contour
+        self.roi_index.update()
+        return self.roi_index.label
+
+    # contour label image, rebuilt when the store changes, only contours of edited ROIs are recomputed
+    def updateContours(self) -> None:
+        roi_store = self.roi_store
+        if self.version_contour == roi_store.version:
+            return
+        self.label_contour = makeLabelImageFromPixels(getROIContourCache(roi_store).getContours("dilate"))
+        self.version_contour = roi_store.version
+
+    # (xpix, ypix) of the filled ROI or of its contour
+    def getPixels(self, roi_id: int, contour: bool=False) -> Tuple[np.ndarray, np.ndarray]:
+        if roi_id not in self.roi_store:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        if contour:
+            return getROIContourCache(self.roi_store).getContour(roi_id, "dilate")
+        coords = self.roi_store[roi_id]
+        return np.asarray(coords["xpix"], dtype=np.int64), np.asarray(coords["ypix"], dtype=np.int64)
+
+    # (height, width, 4) RGBA image of all ROIs, the buffer is reused by the next call
+    # step > 1 samples every step-th pixel of the label, for views of a pyramid level of the image
+    def render(self, palette: np.ndarray, shape: Tuple[int, int], contour: bool=False, step: int=1) -> np.ndarray:
+        height, width = shape
+        if self.rgba.shape != (height, width, 4):
+            self.rgba = np.zeros((height, width, 4), dtype=np.uint8)
+        else:
+            self.rgba[:] = 0
+        label = self.getLabel(contour)
+        if step > 1:
+            label = label[::step, ::step]
+        h, w = min(height, label.shape[0]), min(width, label.shape[1])
+        # label -1 wraps to the last entry of the palette, the transparent background
+        np.take(palette, label[:h, :w], axis=0, out=self.rgba[:h, :w], mode="wrap")
+        return self.rgba
+
+# label image (y, x) from pixels of ROIs, later ROIs are on top, pixels out of the image are dropped
+def makeLabelImageFromPixels(dict_pixels: Dict[int, Tuple[np.ndarray, np.ndarray]]) -> np.ndarray:
+    if not dict_pixels:
+        return np.full((0, 0), -1, dtype=np.int32)
+    xpix = np.concatenate([pixels[0] for pixels in dict_pixels.values()])
+    ypix = np.concatenate([pixels[1] for pixels in dict_pixels.values()])
+    roi_ids = np.repeat(np.fromiter(dict_pixels.keys(), dtype=np.int32, count=len(dict_pixels)), [len(pixels[0]) for pixels in dict_pixels.values()])
+    mask_valid = (xpix >= 0) & (ypix >= 0)
+    xpix, ypix, roi_ids = xpix[mask_valid], ypix[mask_valid], roi_ids[mask_valid]
+    label = np.full((int(ypix.max()) + 1 if len(ypix) else 0, int(xpix.max()) + 1 if len(xpix) else 0), -1, dtype=np.int32)
+    label[ypix, xpix] = roi_ids
+    return label
+
+# (n_id + 1, 4) RGBA palette indexed by ROI ID, the last entry is the transparent background (label -1)
+def makeROIPalette(
+        roi_ids: np.ndarray,
+        colors: np.ndarray,
+        alpha: Union[int, np.ndarray],
+        ) -> np.ndarray:
+    """
+    Args:
+        roi_ids (np.ndarray): (N,) ROI IDs.
+        colors (np.ndarray): (N, 3) RGB of each ROI.
+        alpha (int | np.ndarray): opacity of all ROIs or (N,) of each ROI, 0 for hidden ROIs.
+    """
+    roi_ids = np.asarray(roi_ids, dtype=np.int64)
+    n_id = int(roi_ids.max()) + 1 if len(roi_ids) else 0
+    palette = np.zeros((n_id + 1, 4), dtype=np.uint8)
+    if len(roi_ids):
+        palette[roi_ids, :3] = np.asarray(colors, dtype=np.uint8).reshape(-1, 3)
+        palette[roi_ids, 3] = alpha
+    return palette
+
+# overwrite pixels of one ROI, e.g. selected ROI, pixels out of the image are dropped
+def paintROIPixels(
+        rgba: np.ndarray,
+        xpix: np.ndarray,
+        ypix: np.ndarray,
+        color: Tuple[int, int, int],
+        opacity: int
+        ) -> None:
+    height, width = rgba.shape[:2]
+    xpix, ypix = np.asarray(xpix, dtype=np.int64), np.asarray(ypix, dtype=np.int64)
+    mask_valid = (xpix >= 0) & (xpix < width) & (ypix >= 0) & (ypix < height)
+    rgba[ypix[mask_valid], xpix[mask_valid]] = (*color, opacity)
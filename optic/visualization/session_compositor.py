@@ -0,0 +1,85 @@
+from __future__ import annotations
+from ..type_definitions import *
+import numpy as np
+from ..utils.roi_store import ROIStore, toROIStore
+
+class SessionCompositor:
+    """
+    Additive composite of the background and ROI layers of the sessions of CheckMultiSessionROICoordinates.
+    Each layer is rendered once into a premultiplied uint8 RGB buffer (session color * intensity / 255 * alpha / 255)
+    and kept until its source, color or opacity changes, so toggling sessions, celltypes or the background
+    only re-runs one saturating integer add over the cached buffers.
+
+    Args:
+        shape (Tuple[int, int]): (height, width) of the composite.
+    """
+    def __init__(self, shape: Tuple[int, int]):
+        self.shape = tuple(shape)
+        # (session_key, "bg" | "roi") -> (key of the source, premultiplied (height, width, 3) uint8)
+        self.dict_layer: Dict[Tuple[str, str], Tuple[Tuple[Any, ...], np.ndarray]] = {}
+        self.acc: np.ndarray = np.zeros((*self.shape, 3), dtype=np.uint16)
+        self.rgb: np.ndarray = np.zeros((*self.shape, 3), dtype=np.uint8)
+
+    # background layer of the session, the grayscale image (0-255) is colorized with the session color
+    # the image is identified by object, kept alive by the cache entry
+    def getBackgroundLayer(self, session_key: str, bg_image: np.ndarray, color: Tuple[int, int, int], alpha: int) -> np.ndarray:
+        key = (bg_image, tuple(color), alpha)
+        layer = self.getCachedLayer(session_key, "bg", key)
+        if layer is None:
+            intensity = np.clip(np.asarray(bg_image), 0, 255).astype(np.uint32)
+            h, w = min(self.shape[0], intensity.shape[0]), min(self.shape[1], intensity.shape[1])
+            layer = np.zeros((*self.shape, 3), dtype=np.uint8)
+            # intensity * color * alpha / 255**2, in integers
+            layer[:h, :w] = divideRound(intensity[:h, :w, None] * (np.asarray(color, dtype=np.uint32) * alpha), 255 * 255)
+            self.dict_layer[(session_key, "bg")] = (key, layer)
+        return layer
+
+    # ROI layer of the session, pixels of visible ROIs in the session color, overlapping ROIs are painted once
+    def getROILayer(
+            self,
+            session_key: str,
+            dict_roi_coords: Union[Dict[int, Dict[str, Any]], ROIStore],
+            dict_roi_visibility: Dict[int, bool],
+            color: Tuple[int, int, int],
+            alpha: int,
+            ) -> np.ndarray:
+        roi_store = toROIStore(dict_roi_coords)
+        mask_row = np.fromiter((dict_roi_visibility.get(roi_id, False) for roi_id in roi_store.roi_ids.tolist()), dtype=bool, count=len(roi_store.roi_ids))
+        key = (roi_store, roi_store.version, mask_row.tobytes(), tuple(color), alpha)
+        layer = self.getCachedLayer(session_key, "roi", key)
+        if layer is None:
+            xpix, ypix = roi_store.getPixels(mask_row)
+            xpix, ypix = np.asarray(xpix, dtype=np.int64), np.asarray(ypix, dtype=np.int64)
+            mask_valid = (xpix >= 0) & (xpix < self.shape[1]) & (ypix >= 0) & (ypix < self.shape[0])
+            layer = np.zeros((*self.shape, 3), dtype=np.uint8)
+            layer[ypix[mask_valid], xpix[mask_valid]] = divideRound(np.asarray(color, dtype=np.uint32) * alpha, 255)
+            self.dict_layer[(session_key, "roi")] = (key, layer)
+        return layer
+
+    def getCachedLayer(self, session_key: str, layer_type: str, key: Tuple[Any, ...]) -> Optional[np.ndarray]:
+        entry = self.dict_layer.get((session_key, layer_type))
+        if entry is None or not isSameLayerKey(entry[0], key):
+            return None
+        return entry[1]
+
+    # sum of the layers saturated at 255, the returned buffer is reused by the next call
+    def composite(self, list_layer: List[np.ndarray]) -> np.ndarray:
+        self.acc[:] = 0
+        for layer in list_layer:
+            np.add(self.acc, layer, out=self.acc)
+        np.minimum(self.acc, 255, out=self.acc)
+        self.rgb[:] = self.acc
+        return self.rgb
+
+    def clearCache(self) -> None:
+        self.dict_layer.clear()
+
+# round(values / divisor) of non-negative integers as uint8, values up to 255 * divisor
+def divideRound(values: np.ndarray, divisor: int) -> np.ndarray:
+    return ((values + divisor // 2) // divisor).astype(np.uint8)
+
+# keys of layers, sources (images, ROI stores) are compared by identity
+def isSameLayerKey(key_a: Tuple[Any, ...], key_b: Tuple[Any, ...]) -> bool:
+    return len(key_a) == len(key_b) and all(
+        a is b if isinstance(a, (np.ndarray, ROIStore)) else a == b for a, b in zip(key_a, key_b)
+        )
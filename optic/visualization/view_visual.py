@@ -4,9 +4,15 @@ from PyQt5.QtGui import QPainter, QPen, QColor, QImage, QPixmap, QTransform
 from PyQt5.QtCore import Qt
 from PyQt5.QtWidgets import QGraphicsScene, QGraphicsView
 import numpy as np
+from functools import lru_cache, partial
 from ..config.constants import ChannelKeys, PenColors, PenWidth
 from .view_visual_roi import updateLayerROI_Suite2pROICuration, updateLayerROI_Suite2pROITracking, updateLayerROI_MicrogliaTracking, updateLayerROI_TIFStackExplorer
 from ..preprocessing.preprocessing_roi import updateROIImage
+from ..preprocessing.preprocessing_tiff import LUT_DTYPES, getPlaneFromXYCZTStack
+from ..preprocessing.preprocessing_image import downsampleImageToLevel, getPyramidLevelShape
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    from ..utils.image_pyramid import ImagePyramidCache
 
 """
 update View
@@ -21,48 +27,42 @@ def updateView_Suite2pROICuration(
         control_manager: ControlManager, 
         app_key: AppKeys,
         ) -> None:
-    # background image
-    bg_image_chan1 = None
-    bg_image_chan2 = None
-    bg_image_chan3 = None  # optional
-
-    # chan 1
+    # background images, None for hidden channels
+    image_chan1 = None
+    image_chan2 = None
+    image_chan3 = None  # optional
     if view_control.getBackgroundVisibility(ChannelKeys.CHAN1):
-        image_type = view_control.getBackgroundImageType()
-        bg_image_chan1 = adjustChannelContrast(
-            image=data_manager.getDictBackgroundImage(app_key).get(image_type),
-            min_val_slider=view_control.getBackgroundContrastValue(ChannelKeys.CHAN1, 'min'),
-            max_val_slider=view_control.getBackgroundContrastValue(ChannelKeys.CHAN1, 'max'),
-            )
-    # chan 2
+        image_chan1 = data_manager.getDictBackgroundImage(app_key).get(view_control.getBackgroundImageType())
     if view_control.getBackgroundVisibility(ChannelKeys.CHAN2) and data_manager.getNChannels(app_key) == 2:
-        bg_image_chan2 = adjustChannelContrast(
-            image=data_manager.getDictBackgroundImageChannel2(app_key).get("meanImg"),
-            min_val_slider=view_control.getBackgroundContrastValue(ChannelKeys.CHAN2, 'min'),
-            max_val_slider=view_control.getBackgroundContrastValue(ChannelKeys.CHAN2, 'max'),
-            )
-    # optional
+        image_chan2 = data_manager.getDictBackgroundImageChannel2(app_key).get("meanImg")
     if view_control.getBackgroundVisibility(ChannelKeys.CHAN3) and isinstance(data_manager.getBackgroundImageOptional(app_key), np.ndarray):
-        bg_image_chan3 = adjustChannelContrast(
-            image=data_manager.getBackgroundImageOptional(app_key),
-            min_val_slider=view_control.getBackgroundContrastValue(ChannelKeys.CHAN3, 'min'),
-            max_val_slider=view_control.getBackgroundContrastValue(ChannelKeys.CHAN3, 'max'),
-            )
-
-    # convert mono images to RGB image
+        image_chan3 = data_manager.getBackgroundImageOptional(app_key)
+    list_channel = [(ChannelKeys.CHAN1, image_chan1), (ChannelKeys.CHAN2, image_chan2), (ChannelKeys.CHAN3, image_chan3)]
     (width, height) = view_control.getImageSize()
-    bg_image = convertMonoImageToRGBImage(
-        image_g=bg_image_chan1, 
-        image_r=bg_image_chan2, 
-        image_b=bg_image_chan3,
-        height=height,
-        width=width,
-        dtype=np.uint8)
+
+    def _render() -> QPixmap:
+        bg_image_chan1, bg_image_chan2, bg_image_chan3 = [
+            adjustChannelContrast(
+                image=image,
+                min_val_slider=view_control.getBackgroundContrastValue(channel_key, 'min'),
+                max_val_slider=view_control.getBackgroundContrastValue(channel_key, 'max'),
+                ) if image is not None else None
+            for channel_key, image in list_channel
+            ]
+        # convert mono images to RGB image
+        bg_image = convertMonoImageToRGBImage(
+            image_g=bg_image_chan1, 
+            image_r=bg_image_chan2, 
+            image_b=bg_image_chan3,
+            height=height,
+            width=width,
+            dtype=np.uint8)
+        qimage = QImage(bg_image.data, width, height, width * 3, QImage.Format_RGB888)
+        return QPixmap.fromImage(qimage)
 
     # update background layer
-    qimage = QImage(bg_image.data, width, height, width * 3, QImage.Format_RGB888)
-    pixmap = QPixmap.fromImage(qimage)
-    view_control.layer_bg.setPixmap(pixmap)
+    key = (width, height) + tuple(getBackgroundChannelKey(view_control, channel_key, image) for channel_key, image in list_channel)
+    view_control.setBackgroundPixmap(key, _render)
 
     # update ROI layer
     updateLayerROI_Suite2pROICuration(view_control, data_manager, control_manager, app_key)
@@ -77,9 +77,9 @@ def updateView_Suite2pROITracking(
         app_key: AppKeys,
         app_key_sec: AppKeys = None,
         ) -> None:
-    bg_image_chan1 = None
-    bg_image_chan2 = None
-    bg_image_chan3 = None # optional
+    image_chan1 = None
+    image_chan2 = None
+    image_chan3 = None # ROI image
 
     # chan 1 (Green)
     idx_channel = view_control.bg_image_idx_channel
@@ -87,68 +87,78 @@ def updateView_Suite2pROITracking(
         image_type = view_control.getBackgroundImageType()
         if idx_channel == 0:
             if view_control.getShowRegImBG():
-                image = data_manager.getDictBackgroundImageRegistered(app_key).get(image_type) 
+                image_chan1 = data_manager.getDictBackgroundImageRegistered(app_key).get(image_type) 
             else:
-                image = data_manager.getDictBackgroundImage(app_key).get(image_type)
+                image_chan1 = data_manager.getDictBackgroundImage(app_key).get(image_type)
         # chan 2 with dual channel imaging
         elif idx_channel == 1:
             if view_control.getShowRegImBG():
-                image = data_manager.getDictBackgroundImageChannel2Registered(app_key).get("meanImg") # image_type is fixed to "meanImg"
+                image_chan1 = data_manager.getDictBackgroundImageChannel2Registered(app_key).get("meanImg") # image_type is fixed to "meanImg"
             else:
-                image = data_manager.getDictBackgroundImageChannel2(app_key).get("meanImg")
-        bg_image_chan1 = adjustChannelContrast(
-            image=image,
-            min_val_slider=view_control.getBackgroundContrastValue(ChannelKeys.CHAN1, 'min'),
-            max_val_slider=view_control.getBackgroundContrastValue(ChannelKeys.CHAN1, 'max'),
-            )
+                image_chan1 = data_manager.getDictBackgroundImageChannel2(app_key).get("meanImg")
     # chan 2 (Red), "sec" image, only for "pri" view
     if view_control.getBackgroundVisibility(ChannelKeys.CHAN2) and app_key == "pri":
         idx_channel_sec = control_manager.view_controls.get(app_key_sec).bg_image_idx_channel
         image_type = control_manager.view_controls[app_key_sec].getBackgroundImageType()
         if idx_channel_sec == 0:
             if view_control.getShowRegImBG():
-                image = data_manager.getDictBackgroundImageRegistered(app_key_sec).get(image_type)
+                image_chan2 = data_manager.getDictBackgroundImageRegistered(app_key_sec).get(image_type)
             else:
-                image = data_manager.getDictBackgroundImage(app_key_sec).get(image_type)
+                image_chan2 = data_manager.getDictBackgroundImage(app_key_sec).get(image_type)
         elif idx_channel_sec == 1:
             if view_control.getShowRegImBG():
-                image = data_manager.getDictBackgroundImageChannel2Registered(app_key_sec).get("meanImg") # image_type is fixed to "meanImg"
+                image_chan2 = data_manager.getDictBackgroundImageChannel2Registered(app_key_sec).get("meanImg") # image_type is fixed to "meanImg"
             else:
-                image = data_manager.getDictBackgroundImageChannel2(app_key_sec).get("meanImg")
-        bg_image_chan2 = adjustChannelContrast(
-            image=image,
-            min_val_slider=view_control.getBackgroundContrastValue(ChannelKeys.CHAN2, 'min'),
-            max_val_slider=view_control.getBackgroundContrastValue(ChannelKeys.CHAN2, 'max'),
-            )
+                image_chan2 = data_manager.getDictBackgroundImageChannel2(app_key_sec).get("meanImg")
     # ROI image, only "pri" view
     if app_key_sec:
         if view_control.getBackgroundVisibility(ChannelKeys.CHAN3):
             control_manager.view_controls[app_key_sec].updateROIImage() # update ROI image for pri view
             if view_control.getShowRegImROI():
-                image = data_manager.getDictROIImageRegistered(app_key_sec).get("all")
+                image_chan3 = data_manager.getDictROIImageRegistered(app_key_sec).get("all")
             else:
-                image = data_manager.getDictROIImage(app_key_sec).get("all")
+                image_chan3 = data_manager.getDictROIImage(app_key_sec).get("all")
+    (width, height) = view_control.getImageSize()
+
+    def _render() -> QPixmap:
+        bg_image_chan1, bg_image_chan2, bg_image_chan3 = None, None, None
+        if image_chan1 is not None:
+            bg_image_chan1 = adjustChannelContrast(
+                image=image_chan1,
+                min_val_slider=view_control.getBackgroundContrastValue(ChannelKeys.CHAN1, 'min'),
+                max_val_slider=view_control.getBackgroundContrastValue(ChannelKeys.CHAN1, 'max'),
+                )
+        if image_chan2 is not None:
+            bg_image_chan2 = adjustChannelContrast(
+                image=image_chan2,
+                min_val_slider=view_control.getBackgroundContrastValue(ChannelKeys.CHAN2, 'min'),
+                max_val_slider=view_control.getBackgroundContrastValue(ChannelKeys.CHAN2, 'max'),
+                )
+        if image_chan3 is not None:
             bg_image_chan3 = adjustChannelContrast(
-                image=image,
+                image=image_chan3,
                 min_val_slider=view_control.getBackgroundContrastValue(ChannelKeys.CHAN3, 'min'),
                 max_val_slider=view_control.getBackgroundContrastValue(ChannelKeys.CHAN3, 'max'),
                 scaling=False,
                 )
-            
-
-    (width, height) = view_control.getImageSize()
-    bg_image = convertMonoImageToRGBImage(
-        image_g=bg_image_chan1, 
-        image_r=bg_image_chan2, 
-        image_b=bg_image_chan3,
-        height=height,
-        width=width,
-        dtype=np.uint8)
-
-    # update background layer
-    qimage = QImage(bg_image.data, width, height, width * 3, QImage.Format_RGB888)
-    pixmap = QPixmap.fromImage(qimage)
-    view_control.layer_bg.setPixmap(pixmap)
+        bg_image = convertMonoImageToRGBImage(
+            image_g=bg_image_chan1, 
+            image_r=bg_image_chan2, 
+            image_b=bg_image_chan3,
+            height=height,
+            width=width,
+            dtype=np.uint8)
+        qimage = QImage(bg_image.data, width, height, width * 3, QImage.Format_RGB888)
+        return QPixmap.fromImage(qimage)
+
+    # update background layer, the ROI image is recomputed on every redraw and identified by content
+    key = (
+        width, height,
+        getBackgroundChannelKey(view_control, ChannelKeys.CHAN1, image_chan1),
+        getBackgroundChannelKey(view_control, ChannelKeys.CHAN2, image_chan2),
+        getBackgroundChannelKey(view_control, ChannelKeys.CHAN3, image_chan3, by_content=True),
+        )
+    view_control.setBackgroundPixmap(key, _render)
 
     # update ROI layer
     updateLayerROI_Suite2pROITracking(view_control, data_manager, control_manager, app_key, app_key_sec)
@@ -163,72 +173,54 @@ def updateView_MicrogliaTracking(
         app_key: AppKeys,
         app_key_sec: AppKeys = None,
         ) -> None:
-    bg_image_chan1 = None
-    bg_image_chan2 = None
-    bg_image_chan3 = None 
     plane_z = view_control.getPlaneZ()
     plane_t = view_control.getPlaneT()
-    min_val_image = np.min(data_manager.getTiffStack(app_key))
-    max_val_image = np.max(data_manager.getTiffStack(app_key))
+    # chan 1 (Green), chan 2 (Red), planes may have been rendered ahead by the prefetcher
+    key_plane, img_stack, list_setting, level = getTiffPlaneRenderSettings(view_control, data_manager, app_key, CHANNELS_RGB_XYCT, plane_z, plane_t)
+    # ROI image (Blue), only "pri" view
+    image_roi = None
+    if app_key_sec and view_control.getBackgroundVisibility(ChannelKeys.CHAN3):
+        control_manager.view_controls[app_key_sec].updateROIImageForXYCT() # update ROI image for pri view
+        if view_control.getShowRegImROI():
+            image_roi = data_manager.getDictROIImageRegistered(app_key_sec).get("all")
+        else:
+            image_roi = data_manager.getDictROIImage(app_key_sec).get("all")
 
-    # chan 1
-    if view_control.getBackgroundVisibility(ChannelKeys.CHAN1):
-        bg_image_chan1 = adjustChannelContrast(
-            image=data_manager.getImageFromXYCZTTiffStack(app_key, plane_z, plane_t, 0, view_control.getShowRegStack()),
-            min_val_slider=view_control.getBackgroundContrastValue(ChannelKeys.CHAN1, 'min'),
-            max_val_slider=view_control.getBackgroundContrastValue(ChannelKeys.CHAN1, 'max'),
-            min_val_image=min_val_image,
-            max_val_image=max_val_image
-            )
-    # chan 2
-    if view_control.getBackgroundVisibility(ChannelKeys.CHAN2):
-        bg_image_chan2 = adjustChannelContrast(
-            image=data_manager.getImageFromXYCZTTiffStack(app_key, plane_z, plane_t, 1, view_control.getShowRegStack()),
-            min_val_slider=view_control.getBackgroundContrastValue(ChannelKeys.CHAN2, 'min'),
-            max_val_slider=view_control.getBackgroundContrastValue(ChannelKeys.CHAN2, 'max'),
-            min_val_image=min_val_image,
-            max_val_image=max_val_image
-            )
-    # ROI image, only "pri" view
-    if app_key_sec:
-        if view_control.getBackgroundVisibility(ChannelKeys.CHAN3):
-            control_manager.view_controls[app_key_sec].updateROIImageForXYCT() # update ROI image for pri view
-            if view_control.getShowRegImROI():
-                image = data_manager.getDictROIImageRegistered(app_key_sec).get("all")
-            else:
-                image = data_manager.getDictROIImage(app_key_sec).get("all")
-            if image is None:
-                bg_image_chan3 = None
-            else:
-                bg_image_chan3 = adjustChannelContrast(
-                    image=image,
-                    min_val_slider=view_control.getBackgroundContrastValue(ChannelKeys.CHAN3, 'min'),
-                    max_val_slider=view_control.getBackgroundContrastValue(ChannelKeys.CHAN3, 'max'),
-                    scaling=False,
-                    )
+    # Caution !!! width and height are swapped between TIFF and QImage, planes are written transposed
+    # zoomed out, the pyramid level of the planes is rendered
+    (height, width) = getPyramidLevelShape(view_control.getImageSize()[::-1], level)
 
-    (width, height) = view_control.getImageSize()
-    bg_image = convertMonoImageToRGBImage(
-        image_g=bg_image_chan1, 
-        image_r=bg_image_chan2, 
-        image_b=bg_image_chan3, 
-        height=height,
-        width=width,
+    def _render() -> QPixmap:
+        bg_image = view_control.getBackgroundImageBuffer(height, width)
+        rgb = view_control.plane_prefetcher.get(key_plane)
+        if rgb is not None:
+            bg_image[...] = rgb
+        else:
+            renderTiffPlaneRGB(img_stack, plane_z, plane_t, list_setting, out=bg_image, level=level, pyramid_cache=view_control.image_pyramid_cache)
+        if image_roi is None:
+            bg_image[:, :, 2] = 0
+        else:
+            adjustChannelContrast(
+                image=downsampleImageToLevel(image_roi.T, level),
+                min_val_slider=view_control.getBackgroundContrastValue(ChannelKeys.CHAN3, 'min'),
+                max_val_slider=view_control.getBackgroundContrastValue(ChannelKeys.CHAN3, 'max'),
+                scaling=False,
+                out=bg_image[:, :, 2],
+                )
+        # Create QImage
+        qimage = QImage(
+            bg_image.data,
+            width,
+            height,
+            width * 3,
+            QImage.Format_RGB888
         )
+        return QPixmap.fromImage(qimage)
 
-    # Caution !!! width and height are swapped between TIFF and QImage
-    bg_image_corrected = np.ascontiguousarray(bg_image.transpose(1, 0, 2))
-
-    # Create QImage
-    qimage = QImage(
-        bg_image_corrected.data,
-        width,
-        height,
-        width * 3,
-        QImage.Format_RGB888
-    )
-    pixmap = QPixmap.fromImage(qimage)
-    view_control.layer_bg.setPixmap(pixmap)
+    # update background layer, the ROI image is recomputed on every redraw and identified by content
+    key = key_plane + (getBackgroundChannelKey(view_control, ChannelKeys.CHAN3, image_roi, by_content=True),)
+    view_control.setBackgroundPixmap(key, _render, level=level)
+    prefetchTiffPlanes(view_control, data_manager, app_key, CHANNELS_RGB_XYCT)
 
     try:
         updateLayerROI_MicrogliaTracking(view_control, data_manager, control_manager, app_key, app_key_sec)
@@ -245,62 +237,34 @@ def updateView_TIFStackExplorer(
         control_manager: ControlManager, 
         app_key: AppKeys,
         ) -> None:
-    bg_image_chan1 = None
-    bg_image_chan2 = None
-    bg_image_chan3 = None 
     plane_z = view_control.getPlaneZ()
     plane_t = view_control.getPlaneT()
-    min_val_image = np.min(data_manager.getTiffStack(app_key))
-    max_val_image = np.max(data_manager.getTiffStack(app_key))
-
-    if view_control.getBackgroundVisibility(ChannelKeys.CHAN1):
-        bg_image_chan1 = adjustChannelContrast(
-            image=data_manager.getImageFromXYCZTTiffStack(app_key, plane_z, plane_t, 0, view_control.show_reg_stack),
-            min_val_slider=view_control.getBackgroundContrastValue(ChannelKeys.CHAN1, 'min'),
-            max_val_slider=view_control.getBackgroundContrastValue(ChannelKeys.CHAN1, 'max'),
-            min_val_image=min_val_image,
-            max_val_image=max_val_image
-            )
-    if view_control.getBackgroundVisibility(ChannelKeys.CHAN2):
-        bg_image_chan2 = adjustChannelContrast(
-            image=data_manager.getImageFromXYCZTTiffStack(app_key, plane_z, plane_t, 1, view_control.show_reg_stack),
-            min_val_slider=view_control.getBackgroundContrastValue(ChannelKeys.CHAN2, 'min'),
-            max_val_slider=view_control.getBackgroundContrastValue(ChannelKeys.CHAN2, 'max'),
-            min_val_image=min_val_image,
-            max_val_image=max_val_image
-            )
-    if view_control.getBackgroundVisibility(ChannelKeys.CHAN3):
-        bg_image_chan3 = adjustChannelContrast(
-            image=data_manager.getImageFromXYCZTTiffStack(app_key, plane_z, plane_t, 2, view_control.show_reg_stack),
-            min_val_slider=view_control.getBackgroundContrastValue(ChannelKeys.CHAN3, 'min'),
-            max_val_slider=view_control.getBackgroundContrastValue(ChannelKeys.CHAN3, 'max'),
-            min_val_image=min_val_image,
-            max_val_image=max_val_image
-            )
-
-    (width, height) = view_control.getImageSize()
-    bg_image = convertMonoImageToRGBImage(
-        image_g=bg_image_chan1, 
-        image_r=bg_image_chan2, 
-        image_b=bg_image_chan3, 
-        height=height,
-        width=width,
+    # chan 1 (Green), chan 2 (Red), chan 3 (Blue), planes may have been rendered ahead by the prefetcher
+    key_plane, img_stack, list_setting, level = getTiffPlaneRenderSettings(view_control, data_manager, app_key, CHANNELS_RGB_XYCZT, plane_z, plane_t)
+
+    # Caution !!! width and height are swapped between TIFF and QImage, planes are written transposed
+    # zoomed out, the pyramid level of the planes is rendered
+    (height, width) = getPyramidLevelShape(view_control.getImageSize()[::-1], level)
+
+    def _render() -> QPixmap:
+        bg_image = view_control.getBackgroundImageBuffer(height, width)
+        rgb = view_control.plane_prefetcher.get(key_plane)
+        if rgb is not None:
+            bg_image[...] = rgb
+        else:
+            renderTiffPlaneRGB(img_stack, plane_z, plane_t, list_setting, out=bg_image, level=level, pyramid_cache=view_control.image_pyramid_cache)
+        qimage = QImage(
+            bg_image.data,
+            width,
+            height,
+            width * 3,
+            QImage.Format_RGB888
         )
+        return QPixmap.fromImage(qimage)
 
     # update background layer
-    # Caution !!! width and height are swapped between TIFF and QImage
-    bg_image_corrected = np.ascontiguousarray(bg_image.transpose(1, 0, 2))
-
-    # Create QImage
-    qimage = QImage(
-        bg_image_corrected.data,
-        width,
-        height,
-        width * 3,
-        QImage.Format_RGB888
-    )
-    pixmap = QPixmap.fromImage(qimage)
-    view_control.layer_bg.setPixmap(pixmap)
+    view_control.setBackgroundPixmap(key_plane, _render, level=level)
+    prefetchTiffPlanes(view_control, data_manager, app_key, CHANNELS_RGB_XYCZT)
 
     # update ROI layer
     updateLayerROI_TIFStackExplorer(view_control, data_manager, control_manager, app_key)
@@ -348,6 +312,137 @@ def convertMonoImageToRGBImage(
 
     return rgb_image
 
+# key of one channel of the background pixmap cache, None if the channel is hidden
+# images are identified by id (valid while image_version of DataManager is unchanged), or by content if they are recomputed on every redraw
+def getBackgroundChannelKey(
+        view_control: ViewControl,
+        channel_key: str,
+        image: Optional[np.ndarray],
+        by_content: bool = False,
+        ) -> Optional[Tuple[Any, ...]]:
+    if image is None:
+        return None
+    if by_content:
+        import hashlib
+        image = np.ascontiguousarray(image)
+        id_image = (image.shape, image.dtype.str, hashlib.blake2b(image.data, digest_size=16).digest())
+    else:
+        id_image = id(image)
+    return (
+        channel_key,
+        id_image,
+        view_control.getBackgroundContrastValue(channel_key, 'min'),
+        view_control.getBackgroundContrastValue(channel_key, 'max'),
+        )
+
+# (channel_key, idx_channel, idx_rgb) of TIFF stack views, Blue of MicrogliaTracking is the ROI image
+CHANNELS_RGB_XYCZT = ((ChannelKeys.CHAN1, 0, 1), (ChannelKeys.CHAN2, 1, 0), (ChannelKeys.CHAN3, 2, 2))
+CHANNELS_RGB_XYCT = ((ChannelKeys.CHAN1, 0, 1), (ChannelKeys.CHAN2, 1, 0))
+
+# background key of the plane, displayed stack, (idx_channel, idx_rgb, contrast) of renderTiffPlaneRGB and pyramid level for the zoom of the view
+# contrast is None for hidden channels
+def getTiffPlaneRenderSettings(
+        view_control: ViewControl, 
+        data_manager: DataManager, 
+        app_key: AppKeys,
+        list_channel_rgb: Tuple[Tuple[str, int, int], ...],
+        plane_z: int,
+        plane_t: int,
+        ) -> Tuple[Tuple[Any, ...], np.ndarray, List[Tuple[int, int, Optional[Tuple[float, float, Optional[float], Optional[float]]]]], int]:
+    show_reg_stack = view_control.getShowRegStack()
+    img_stack = data_manager.getTiffStackRegistered(app_key) if show_reg_stack else data_manager.getTiffStack(app_key)
+    # per-channel min/max, None while the stats task is running
+    stats = data_manager.getTiffStackStats(app_key, show_reg_stack)
+    if stats is None and img_stack is not None:
+        view_control.startTiffStackStats(app_key, img_stack)
+    list_setting = []
+    for channel_key, idx_channel, idx_rgb in list_channel_rgb:
+        contrast = None
+        if view_control.getBackgroundVisibility(channel_key):
+            contrast = (
+                view_control.getBackgroundContrastValue(channel_key, 'min'),
+                view_control.getBackgroundContrastValue(channel_key, 'max'),
+                *getChannelRange(stats, idx_channel),
+                )
+        list_setting.append((idx_channel, idx_rgb, contrast))
+    level = view_control.getPyramidLevel()
+    # the stack is identified by id and image_version, planes of a replaced stack prefetched in flight never match
+    key = (view_control.getImageSize(), id(img_stack), data_manager.getImageVersion(), plane_z, plane_t, tuple(list_setting), level)
+    return key, img_stack, list_setting, level
+
+# RGB (Y, X, 3) of one plane of a XYCZT stack, channels not in list_setting are left as they are
+# level > 0 renders the pyramid level of the plane, contrast is applied to the downsampled plane
+# pure numpy, also run by the PlanePrefetcher in its worker thread
+def renderTiffPlaneRGB(
+        img_stack: np.ndarray,
+        plane_z: int,
+        plane_t: int,
+        list_setting: List[Tuple[int, int, Optional[Tuple[float, float, Optional[float], Optional[float]]]]],
+        out: Optional[np.ndarray] = None,
+        level: int = 0,
+        pyramid_cache: Optional[ImagePyramidCache] = None,
+        ) -> np.ndarray:
+    if out is None:
+        out = np.zeros((*getPyramidLevelShape((img_stack.shape[1], img_stack.shape[0]), level), 3), dtype=np.uint8)
+    for idx_channel, idx_rgb, contrast in list_setting:
+        if contrast is None:
+            out[:, :, idx_rgb] = 0
+            continue
+        min_val_slider, max_val_slider, min_val_image, max_val_image = contrast
+        if pyramid_cache is not None:
+            plane = pyramid_cache.getPlane(img_stack, plane_z, plane_t, idx_channel, level)
+        else:
+            plane = downsampleImageToLevel(getPlaneFromXYCZTStack(img_stack, plane_z, plane_t, idx_channel), level)
+        adjustChannelContrast(
+            image=plane.T,
+            min_val_slider=min_val_slider,
+            max_val_slider=max_val_slider,
+            min_val_image=min_val_image,
+            max_val_image=max_val_image,
+            out=out[:, :, idx_rgb],
+            )
+    return out
+
+# render the next planes in the direction of travel of the Z/T slider in the background
+def prefetchTiffPlanes(
+        view_control: ViewControl, 
+        data_manager: DataManager, 
+        app_key: AppKeys,
+        list_channel_rgb: Tuple[Tuple[str, int, int], ...],
+        ) -> None:
+    plane_prefetcher = view_control.plane_prefetcher
+    if not plane_prefetcher.isEnabled():
+        return
+    plane_z, plane_t = view_control.getPlaneZ(), view_control.getPlaneT()
+    dz, dt = plane_prefetcher.updateDirection(plane_z, plane_t)
+    size_z, size_t = view_control.tiff_shape[3], view_control.tiff_shape[4]
+    list_job = []
+    for i in range(1, plane_prefetcher.n_plane + 1):
+        z, t = plane_z + dz * i, plane_t + dt * i
+        if not (0 <= z < size_z and 0 <= t < size_t):
+            break
+        key_plane, img_stack, list_setting, level = getTiffPlaneRenderSettings(view_control, data_manager, app_key, list_channel_rgb, z, t)
+        list_job.append((key_plane, partial(renderTiffPlaneRGB, img_stack, z, t, list_setting, level=level, pyramid_cache=view_control.image_pyramid_cache)))
+    plane_prefetcher.prefetch(list_job)
+
+# min, max of the channel from calculateTiffStackStats, None if not available
+def getChannelRange(stats: Optional[Dict[str, Any]], idx_channel: int) -> Tuple[Optional[float], Optional[float]]:
+    if stats is None or idx_channel >= len(stats["min"]):
+        return None, None
+    return stats["min"][idx_channel], stats["max"][idx_channel]
+
+# uint8 / uint16 value -> uint8 LUT of the contrast range, cached for recently used slider values
+# max_val < min_val inverts the image like the float path of adjustChannelContrast
+@lru_cache(maxsize=64)
+def makeContrastLUT(min_val: float, max_val: float, n_entry: int) -> np.ndarray:
+    values = np.arange(n_entry, dtype=np.float32)
+    if max_val != min_val:
+        lut = (np.clip((values - min_val) / (max_val - min_val), 0, 1) * 255).astype(np.uint8)
+    else:
+        lut = np.where(values > min_val, 255, 0).astype(np.uint8)
+    lut.flags.writeable = False
+    return lut
+
 def adjustChannelContrast(
         image: np.ndarray, 
         min_val_slider: float,  # 0-255
@@ -355,13 +450,31 @@ def adjustChannelContrast(
         min_val_image: float = None,
         max_val_image: float = None,
         scaling: bool = True,
+        out: Optional[np.ndarray] = None,
         ) -> np.ndarray:
+    """
+    uint8 / uint16 images are mapped with a LUT in a single pass, other dtypes with float32 arithmetic.
+    The result is written to out (uint8, same shape as image) if given.
+    """
     try:
         # Get image min/max values if not provided
-        if min_val_image is None:
-            min_val_image = np.min(image)
-        if max_val_image is None:
-            max_val_image = np.max(image)
+        if scaling:
+            if min_val_image is None:
+                min_val_image = np.min(image)
+            if max_val_image is None:
+                max_val_image = np.max(image)
+
+        if np.dtype(image.dtype) in LUT_DTYPES:
+            n_entry = 1 << (8 * image.dtype.itemsize)
+            if scaling:
+                min_val = min_val_image + (min_val_slider / 255) * (max_val_image - min_val_image)
+                max_val = min_val_image + (max_val_slider / 255) * (max_val_image - min_val_image)
+            elif max_val_slider > min_val_slider:
+                min_val, max_val = min_val_slider, max_val_slider
+            else:
+                min_val, max_val = n_entry, n_entry # black image
+            lut = makeContrastLUT(float(min_val), float(max_val), n_entry)
+            return np.take(lut, image, out=out, mode="clip")
 
         image_float = image.astype(np.float32)
 
@@ -390,6 +503,9 @@ def adjustChannelContrast(
                 
             image_uint8 = np.clip(image_scaled, 0, 255).astype(np.uint8)
 
+        if out is not None:
+            out[...] = image_uint8
+            return out
         return image_uint8
 
     except Exception as e:
@@ -1,14 +1,21 @@
 from __future__ import annotations
 from ..type_definitions import *
-from PyQt5.QtCore import Qt
-from PyQt5.QtGui import QPen, QColor, QPainter, QPixmap
+from PyQt5.QtGui import QPen, QColor, QPainter, QPixmap, QImage
 from PyQt5.QtWidgets import QGraphicsPixmapItem
-from ..preprocessing.preprocessing_roi import getROIContour
+from .roi_overlay import makeROIPalette, paintROIPixels
+from ..utils.roi_store import ROIStore
 from ..config.constants import PenColors, PenWidth
+from ..preprocessing.preprocessing_image import getPyramidLevelShape
 import numpy as np
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    from ..gui.table_model import ROITableModel
 
 """
 update layer_roi
+layer_roi holds all ROIs and is re-rendered only when its key changes (display, colors, opacity, ROI edits),
+layer_roi_highlight holds the selected ROIs over their bounding box, so selecting a ROI costs work proportional to the ROI.
+The selected ROI is left out of layer_roi only if the highlight does not cover it (contours, transparent highlight).
 """
 # update layer_roi for Suite2pROICuration
 def updateLayerROI_Suite2pROICuration(
@@ -19,46 +26,36 @@ def updateLayerROI_Suite2pROICuration(
         draw_selected_roi: bool = True
         ) -> None:
     width, height = view_control.getImageSize()
-    pixmap = QPixmap(width, height)
-    pixmap.fill(Qt.transparent) 
-
-    painter = QPainter(pixmap)
-    painter.setRenderHint(QPainter.Antialiasing)
-    dict_roi_display = control_manager.getSharedAttr(app_key, "dict_roi_display")
+    mask_display = control_manager.table_controls[app_key].getROIDisplayMask()
     ROISelectedId = control_manager.getSharedAttr(app_key, "roi_selected_id")
+    roi_store = data_manager.getDictROICoords(app_key)
+    roi_overlay = view_control.getROIOverlay(roi_store)
+    contour_all = bool(view_control.getROIDisplayProp("contour_all"))
+    contour_selected = bool(view_control.getROIDisplayProp("contour_selected"))
+    highlight_opacity = view_control.getHighlightOpacity()
     
-    # draw all ROIs except selected ROI
-    dict_roi_coords = data_manager.getDictROICoords(app_key)
-    for roiId, dict_roi_coords_single in dict_roi_coords.items():
-        # check the all values of dict_roi_display[roiId] are True
-        if all(dict_roi_display[roiId].values()) and roiId != ROISelectedId: 
-            color = view_control.getROIColor(roiId)
-            opacity = view_control.getROIOpacity()
-            # draw contour of all ROIs except selected ROI
-            if view_control.getROIDisplayProp("contour_all"):
-                drawROIContour(painter, dict_roi_coords_single, color, opacity)
-            else:
-                drawROI(painter, dict_roi_coords_single, color, opacity)
-
+    # all ROIs, displayed ROIs are opaque in the palette
+    covered = draw_selected_roi and not contour_all and not contour_selected and highlight_opacity >= 255
+    roi_ids = roi_store.roi_ids
+    alpha = np.where(mask_display[roi_ids] & (roi_ids != getHiddenROIId(ROISelectedId, covered)), view_control.getROIOpacity(), 0)
+    palette = makeROIPalette(roi_ids, getROIColorArray(view_control.roi_colors, roi_ids), alpha)
+    key = (roi_overlay, roi_store.version, contour_all, height, width, palette.tobytes())
+    # draw contour of all ROIs
+    updateLayerROIStatic(view_control, key, lambda: convertRGBAImageToPixmap(roi_overlay.render(palette, (height, width), contour=contour_all)))
+
+    list_highlight = []
     # draw selected ROI
-    if draw_selected_roi:
-        dict_roi_coords_selected = dict_roi_coords[ROISelectedId]
-        color_selected = view_control.getROIColor(ROISelectedId)
-        opacity_selected = view_control.getHighlightOpacity()
+    if draw_selected_roi and ROISelectedId is not None:
         # draw contour of selected ROI
-        if view_control.getROIDisplayProp("contour_selected"):
-            drawROIContour(painter, dict_roi_coords_selected, color_selected, opacity_selected)
-        else:
-            drawROI(painter, dict_roi_coords_selected, color_selected, opacity_selected)
+        xpix, ypix = roi_overlay.getPixels(ROISelectedId, contour=contour_selected)
+        list_highlight.append((xpix, ypix, view_control.getROIColor(ROISelectedId), highlight_opacity))
 
     # draw next ROI of selected ROI, with White color
-    if view_control.getROIDisplayProp("contour_next"):
-        dict_roi_coords_selected_next = dict_roi_coords.get(ROISelectedId+1)
-        if dict_roi_coords_selected_next:
-            drawROIContour(painter, dict_roi_coords_selected_next, (255, 255, 255), opacity_selected)
+    if view_control.getROIDisplayProp("contour_next") and ROISelectedId is not None and ROISelectedId + 1 in roi_store:
+        xpix, ypix = roi_overlay.getPixels(ROISelectedId + 1, contour=True)
+        list_highlight.append((xpix, ypix, (255, 255, 255), highlight_opacity))
 
-    painter.end()
-    view_control.layer_roi.setPixmap(pixmap)
+    updateLayerROIHighlight(view_control, list_highlight)
 
 # update layer_roi for Suite2pROITracking
 def updateLayerROI_Suite2pROITracking(
@@ -70,35 +67,44 @@ def updateLayerROI_Suite2pROITracking(
         draw_selected_roi: bool = True
         ) -> None:
     width, height = view_control.getImageSize()
-    pixmap = QPixmap(width, height)
-    pixmap.fill(Qt.transparent) 
-
-    painter = QPainter(pixmap)
-    painter.setRenderHint(QPainter.Antialiasing)
-    dict_roi_display = control_manager.getSharedAttr(app_key_pri, "dict_roi_display")
+    mask_display = control_manager.table_controls[app_key_pri].getROIDisplayMask()
     ROISelectedId = control_manager.getSharedAttr(app_key_pri, "roi_selected_id")
 
     if view_control.show_reg_im_roi:
-        dict_roi_coords = data_manager.getDictROICoordsRegistered(app_key_pri)
+        roi_store = data_manager.getDictROICoordsRegistered(app_key_pri)
     else:
-        dict_roi_coords = data_manager.getDictROICoords(app_key_pri)
+        roi_store = data_manager.getDictROICoords(app_key_pri)
+    roi_overlay = view_control.getROIOverlay(roi_store, reg=view_control.show_reg_im_roi)
     
-    for roiId, dict_roi_coords_single in dict_roi_coords.items():
-        if all(dict_roi_display[roiId].values()) and roiId != ROISelectedId:
-            color = view_control.getROIColor(roiId)
-            opacity = view_control.getROIOpacity()
-            drawROI(painter, dict_roi_coords_single, color, opacity)
+    covered = view_control.getHighlightOpacity() >= 255
+    roi_ids = roi_store.roi_ids
+    alpha = np.where(mask_display[roi_ids] & (roi_ids != getHiddenROIId(ROISelectedId, covered)), view_control.getROIOpacity(), 0)
+    palette = makeROIPalette(roi_ids, getROIColorArray(view_control.roi_colors, roi_ids), alpha)
 
-    # draw selected ROI, on "pri" view, draw also "sec" selected ROI
-    highlightROISelectedWithTracking(view_control, painter, data_manager, control_manager, app_key_pri, app_key_sec)
+    # ROI pairs, the selected pair is drawn again on the highlight layer
+    list_pair, pair_selected = getROIPairsOnlyDisplay(view_control, data_manager, control_manager, ROISelectedId, app_key_pri, app_key_sec)
+    if view_control.getROIPairOpacity() < 255 and pair_selected is not None:
+        list_pair = [pair for pair in list_pair if pair != pair_selected]
+    key = (roi_overlay, roi_store.version, height, width, palette.tobytes(), tuple(list_pair), view_control.getROIPairOpacity())
 
     # draw ROI pairs
-    drawROIPairsOnlyDisplay(view_control, painter, data_manager, control_manager, ROISelectedId, app_key_pri, app_key_sec)
+    def _render() -> QPixmap:
+        pixmap = convertRGBAImageToPixmap(roi_overlay.render(palette, (height, width)))
+        painter = QPainter(pixmap)
+        painter.setRenderHint(QPainter.Antialiasing)
+        for coords_pri, coords_sec in list_pair:
+            drawROIPair(painter, coords_pri, coords_sec, view_control.getROIPairOpacity())
+        painter.end()
+        return pixmap
+    updateLayerROIStatic(view_control, key, _render)
 
-    painter.end()
     from ..visualization.view_visual import resetZoomView
     resetZoomView(view_control.q_view, view_control.q_scene.sceneRect())
-    view_control.layer_roi.setPixmap(pixmap)
+
+    # draw selected ROI, on "pri" view, draw also "sec" selected ROI
+    list_highlight = getROIHighlightsWithTracking(view_control, data_manager, control_manager, app_key_pri, app_key_sec)
+    list_pair_highlight = [pair_selected] if pair_selected is not None else []
+    updateLayerROIHighlight(view_control, list_highlight, list_pair_highlight)
 
 # update layer_roi for MicrogliaTracking
 def updateLayerROI_MicrogliaTracking(
@@ -109,12 +115,10 @@ def updateLayerROI_MicrogliaTracking(
         app_key_sec: AppKeys = None,
         draw_selected_roi: bool = True
         ) -> None:
-    width, height = view_control.getImageSize()
-    pixmap = QPixmap(width, height)
-    pixmap.fill(Qt.transparent) 
-
-    painter = QPainter(pixmap)
-    painter.setRenderHint(QPainter.Antialiasing)
+    from ..utils.roi_store import toROIStore
+    # all ROIs are drawn at the pyramid level of the background, the highlight layer at full resolution
+    level = view_control.getPyramidLevel()
+    height, width = getPyramidLevelShape(view_control.getImageSize()[::-1], level)
     ROISelectedId = control_manager.getSharedAttr(app_key, "roi_selected_id")
     plane_t = view_control.getPlaneT()
     
@@ -124,24 +128,47 @@ def updateLayerROI_MicrogliaTracking(
     else:
         dict_roi_coords_xyct = data_manager.getDictROICoordsXYCT()
     dict_roi_coords_xyct_tplane = dict_roi_coords_xyct.get(plane_t)
-    if not len(dict_roi_coords_xyct_tplane) == 0:
-        for roiId, dict_roi_coords_single in dict_roi_coords_xyct_tplane.items():
-            if roiId != ROISelectedId:
-                color = view_control.getROIColorXYCT(plane_t, roiId)
-                opacity = view_control.getROIOpacity()
-                drawROI(painter, dict_roi_coords_single, color, opacity)
-
-        # draw selected ROI
-        if draw_selected_roi and ROISelectedId is not None:
-            highlightROISelectedWithTrackingXYCT(view_control, painter, data_manager, control_manager, app_key, app_key_sec, plane_t)
-            
-        # draw ROI pairs
-        if app_key_sec is not None:
-            plane_t_sec = control_manager.view_controls[app_key_sec].getPlaneT()
-            drawROIPairsXYCT(view_control, painter, data_manager, control_manager, ROISelectedId, app_key, app_key_sec, plane_t, plane_t_sec)
-
-    painter.end()
-    view_control.layer_roi.setPixmap(pixmap)
+    if len(dict_roi_coords_xyct_tplane) == 0:
+        updateLayerROIStatic(view_control, ("empty", height, width, level), lambda: convertRGBAImageToPixmap(np.zeros((height, width, 4), dtype=np.uint8)), level)
+        updateLayerROIHighlight(view_control, [])
+        return
+    # plain dict coordinates are converted to ROIStore once and put back, as for click hit-testing
+    roi_store = dict_roi_coords_xyct_tplane
+    if not isinstance(roi_store, ROIStore):
+        roi_store = dict_roi_coords_xyct[plane_t] = toROIStore(roi_store)
+    roi_overlay = view_control.getROIOverlay(roi_store, reg=view_control.getShowRegImROI(), t_plane=plane_t)
+
+    covered = draw_selected_roi and view_control.getHighlightOpacity() >= 255
+    roi_ids = roi_store.roi_ids
+    alpha = np.where(roi_ids != getHiddenROIId(ROISelectedId, covered), view_control.getROIOpacity(), 0)
+    palette = makeROIPalette(roi_ids, getROIColorArray(view_control.roi_colors_xyct[plane_t], roi_ids), alpha)
+
+    # ROI pairs, the selected pair is drawn again on the highlight layer
+    list_pair, pair_selected = [], None
+    if app_key_sec is not None:
+        plane_t_sec = control_manager.view_controls[app_key_sec].getPlaneT()
+        list_pair, pair_selected = getROIPairsXYCT(view_control, data_manager, ROISelectedId, plane_t, plane_t_sec)
+    key = (roi_overlay, roi_store.version, height, width, level, palette.tobytes(), tuple(list_pair), view_control.getROIPairOpacity())
+
+    # draw ROI pairs
+    def _render() -> QPixmap:
+        pixmap = convertRGBAImageToPixmap(roi_overlay.render(palette, (height, width), step=1 << level))
+        if list_pair:
+            painter = QPainter(pixmap)
+            painter.setRenderHint(QPainter.Antialiasing)
+            painter.scale(1 / (1 << level), 1 / (1 << level))
+            for coords_pri, coords_sec in list_pair:
+                drawROIPair(painter, coords_pri, coords_sec, view_control.getROIPairOpacity())
+            painter.end()
+        return pixmap
+    updateLayerROIStatic(view_control, key, _render, level)
+
+    # draw selected ROI
+    list_highlight = []
+    if draw_selected_roi and ROISelectedId is not None:
+        list_highlight = getROIHighlightsWithTrackingXYCT(view_control, data_manager, control_manager, app_key, app_key_sec, plane_t)
+    list_pair_highlight = [pair_selected] if pair_selected is not None else []
+    updateLayerROIHighlight(view_control, list_highlight, list_pair_highlight)
 
 # update layer_roi for TIFStackExplorer
 def updateLayerROI_TIFStackExplorer(
@@ -151,59 +178,92 @@ def updateLayerROI_TIFStackExplorer(
         app_key: AppKeys,
         draw_selected_roi: bool = True
     ) -> None:
-    width, height = view_control.getImageSize()
-    pixmap = QPixmap(width, height)
-    pixmap.fill(Qt.transparent) 
-
-    painter = QPainter(pixmap)
-    painter.setRenderHint(QPainter.Antialiasing)
+    level = view_control.getPyramidLevel()
+    height, width = getPyramidLevelShape(view_control.getImageSize()[::-1], level)
     # roi_display = control_manager.getSharedAttr(app_key, "roi_display")
     # ROISelectedId = control_manager.getSharedAttr(app_key, "roi_selected_id")
     
-    # draw all ROIs except selected ROI
-    dict_roi_coords = data_manager.getDictROICoords(app_key)
-    if dict_roi_coords is not None:
-        for roiId, dict_roi_coords_single in dict_roi_coords.items():
-            color = (0, 0, 255) # hardcoded !!!
-            opacity = 255 # hardcoded !!!
-            drawROI(painter, dict_roi_coords_single, color, opacity)
-
-    painter.end()
-    view_control.layer_roi.setPixmap(pixmap)
+    # draw all ROIs
+    roi_store = data_manager.getDictROICoords(app_key)
+    if roi_store is not None and len(roi_store):
+        roi_overlay = view_control.getROIOverlay(roi_store)
+        palette = makeROIPalette(roi_store.roi_ids, np.tile((0, 0, 255), (len(roi_store), 1)), 255) # hardcoded !!!
+        key = (roi_overlay, roi_store.version, height, width, level, palette.tobytes())
+        updateLayerROIStatic(view_control, key, lambda: convertRGBAImageToPixmap(roi_overlay.render(palette, (height, width), step=1 << level)), level)
+    else:
+        updateLayerROIStatic(view_control, ("empty", height, width, level), lambda: convertRGBAImageToPixmap(np.zeros((height, width, 4), dtype=np.uint8)), level)
+
+# layer_roi is rendered only if key differs from the key of its current pixmap
+# pixmaps of pyramid level are 2**level times smaller than the image and scaled back on the scene
+def updateLayerROIStatic(view_control: ViewControl, key: Tuple[Any, ...], func_render: Callable[[], QPixmap], level: int=0) -> None:
+    if view_control.layer_roi_key == key:
+        return
+    view_control.layer_roi.setScale(1 << level)
+    view_control.layer_roi.setPixmap(func_render())
+    view_control.layer_roi_key = key
+
+# layer_roi_highlight, a pixmap over the bounding box of the highlighted ROIs and ROI pairs
+def updateLayerROIHighlight(
+        view_control: ViewControl,
+        list_highlight: List[Tuple[np.ndarray, np.ndarray, Tuple[int, int, int], int]],
+        list_pair: List[Tuple[Tuple[int, int], Tuple[int, int]]] = [],
+        ) -> None:
+    """
+    Args:
+        list_highlight: (xpix, ypix, color, opacity) of each highlighted ROI, later ROIs are on top.
+        list_pair: (coords_pri, coords_sec) of each highlighted ROI pair, drawn over the ROIs.
+    """
+    width, height = view_control.getImageSize()
+    list_x = [np.asarray(xpix, dtype=np.int64) for xpix, _, _, _ in list_highlight]
+    list_y = [np.asarray(ypix, dtype=np.int64) for _, ypix, _, _ in list_highlight]
+    # margin for the pen and markers of the pairs
+    margin = PenWidth.ROI_PAIR * 2
+    for coords_pri, coords_sec in list_pair:
+        list_x.append(np.array([coords_pri[0] - margin, coords_pri[0] + margin, coords_sec[0] - margin, coords_sec[0] + margin]))
+        list_y.append(np.array([coords_pri[1] - margin, coords_pri[1] + margin, coords_sec[1] - margin, coords_sec[1] + margin]))
+    xpix_all = np.concatenate(list_x) if list_x else np.zeros(0, dtype=np.int64)
+    ypix_all = np.concatenate(list_y) if list_y else np.zeros(0, dtype=np.int64)
+    if len(xpix_all) == 0:
+        view_control.layer_roi_highlight.setPixmap(QPixmap())
+        return
+    x_min, x_max = max(int(xpix_all.min()), 0), min(int(xpix_all.max()), width - 1)
+    y_min, y_max = max(int(ypix_all.min()), 0), min(int(ypix_all.max()), height - 1)
+    if x_min > x_max or y_min > y_max:
+        view_control.layer_roi_highlight.setPixmap(QPixmap())
+        return
+
+    rgba = np.zeros((y_max - y_min + 1, x_max - x_min + 1, 4), dtype=np.uint8)
+    for xpix, ypix, color, opacity in list_highlight:
+        paintROIPixels(rgba, np.asarray(xpix, dtype=np.int64) - x_min, np.asarray(ypix, dtype=np.int64) - y_min, color, opacity)
+    pixmap = convertRGBAImageToPixmap(rgba)
+    if list_pair:
+        painter = QPainter(pixmap)
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.translate(-x_min, -y_min)
+        for coords_pri, coords_sec in list_pair:
+            drawROIPair(painter, coords_pri, coords_sec, view_control.getROIPairOpacity())
+        painter.end()
+    view_control.layer_roi_highlight.setPixmap(pixmap)
+    view_control.layer_roi_highlight.setOffset(x_min, y_min)
+
+# ROI ID left out of layer_roi, -1 if the highlight covers the selected ROI
+def getHiddenROIId(ROISelectedId: Optional[int], covered: bool) -> int:
+    if covered or ROISelectedId is None:
+        return -1
+    return ROISelectedId
 
 """
 ROI drawing functions
 """
-# draw single ROI
-def drawROI(
-        painter: QPainter, 
-        dict_roi_coords_single: Dict[Literal["xpix", "ypix", "med"], np.ndarray[np.int32], Tuple[int]],
-        color: Tuple[int, int, int],
-        opacity: int
-        ) -> None:
-    xpix, ypix = dict_roi_coords_single["xpix"], dict_roi_coords_single["ypix"]
-    
-    pen = QPen(QColor(*color, opacity))
-    painter.setPen(pen)
-    
-    for x, y in zip(xpix, ypix):
-        painter.drawPoint(int(x), int(y))
-
-# draw single ROI contour
-def drawROIContour(
-        painter: QPainter, 
-        dict_roi_coords_single: Dict[Literal["xpix", "ypix", "med"], np.ndarray[np.int32], Tuple[int]],
-        color: Tuple[int, int, int],
-        opacity: int
-        ) -> None:
-    xpix, ypix = dict_roi_coords_single["xpix"], dict_roi_coords_single["ypix"]
-    xpix_contour, ypix_contour = getROIContour(xpix, ypix)
-    
-    pen = QPen(QColor(*color, opacity))
-    painter.setPen(pen)
-    
-    for x, y in zip(xpix_contour, ypix_contour):
-        painter.drawPoint(int(x), int(y))
+# (N, 3) RGB of roi_ids from dict of ROI colors
+def getROIColorArray(dict_roi_color: Dict[int, Tuple[int, int, int]], roi_ids: np.ndarray) -> np.ndarray:
+    return np.array([dict_roi_color[roi_id] for roi_id in roi_ids.tolist()], dtype=np.uint8).reshape(-1, 3)
+
+# RGBA image (height, width, 4) to QPixmap, QPixmap.fromImage copies the data
+def convertRGBAImageToPixmap(rgba: np.ndarray) -> QPixmap:
+    height, width = rgba.shape[:2]
+    qimage = QImage(rgba.data, width, height, width * 4, QImage.Format_RGBA8888)
+    return QPixmap.fromImage(qimage)
 
 # draw single ROI pair
 def drawROIPair(
@@ -256,32 +316,27 @@ def findClosestROI(
 def shouldSkipROI(
         roi_id: int, 
         table_columns: TableColumns, 
-        q_table: QTableWidget, 
+        q_table: QTableView, 
         skip_roi_types: Dict[str, bool],
         ) -> bool:
+    table_model: ROITableModel = q_table.model()
+    if not 0 <= roi_id < table_model.rowCount():
+        return False
     for celltype, skip in skip_roi_types.items():
-        if skip:
-            for col_name, col_info in table_columns.getColumns().items():
-                if col_name == celltype:
-                    if col_info['type'] == 'celltype':
-                        radio_button = q_table.cellWidget(roi_id, col_info['order'])
-                        if radio_button and radio_button.isChecked():
-                            return True
-                    elif col_info['type'] == 'checkbox':
-                        checkbox_item = q_table.item(roi_id, col_info['order'])
-                        if checkbox_item and checkbox_item.checkState() == Qt.Checked:
-                            return True
+        if skip and celltype in table_columns.getColumns():
+            if table_model.isRowOfColumn(roi_id, celltype):
+                return True
     return False
 
-# highlight selected ROI with tracking
-def highlightROISelectedWithTracking(
+# highlighted ROIs with tracking, (xpix, ypix, color, opacity)
+def getROIHighlightsWithTracking(
         view_control: ViewControl, 
-        painter: QPainter, 
         data_manager: DataManager, 
         control_manager: ControlManager, 
         app_key_pri: AppKeys,
         app_key_sec: AppKeys = None,
-        ) -> None:
+        ) -> List[Tuple[np.ndarray, np.ndarray, Tuple[int, int, int], int]]:
+    list_highlight = []
     # pri selected ROI
     ROISelectedId = control_manager.getSharedAttr(app_key_pri, "roi_selected_id")
     if ROISelectedId is not None:
@@ -291,7 +346,7 @@ def highlightROISelectedWithTracking(
             dict_roi_coords_single = data_manager.getDictROICoords(app_key_pri)[ROISelectedId]
         color = view_control.getROIColor(ROISelectedId)
         opacity = view_control.getHighlightOpacity()
-        drawROI(painter, dict_roi_coords_single, color, opacity)
+        list_highlight.append((dict_roi_coords_single["xpix"], dict_roi_coords_single["ypix"], color, opacity))
 
     # sec selected ROI
     if app_key_sec is not None:
@@ -303,18 +358,19 @@ def highlightROISelectedWithTracking(
                 dict_roi_coords_single = data_manager.getDictROICoords(app_key_sec)[ROISelectedId]
             color = (0, 0, 255) # hardcoded !!!
             opacity = view_control.getHighlightOpacity()
-            drawROI(painter, dict_roi_coords_single, color, opacity)
+            list_highlight.append((dict_roi_coords_single["xpix"], dict_roi_coords_single["ypix"], color, opacity))
+    return list_highlight
 
-# highlight selected ROI with tracking for XYCT stack
-def highlightROISelectedWithTrackingXYCT(
+# highlighted ROIs with tracking for XYCT stack, (xpix, ypix, color, opacity)
+def getROIHighlightsWithTrackingXYCT(
     view_control: ViewControl, 
-    painter: QPainter, 
     data_manager: DataManager, 
     control_manager: ControlManager, 
     app_key: AppKeys,
     app_key_sec: AppKeys = None,
     plane_t: int = 0,
-   ) -> None:
+   ) -> List[Tuple[np.ndarray, np.ndarray, Tuple[int, int, int], int]]:
+    list_highlight = []
     ROISelectedId = control_manager.getSharedAttr(app_key, "roi_selected_id")
     # draw selected ROI
     if ROISelectedId is not None:
@@ -326,7 +382,7 @@ def highlightROISelectedWithTrackingXYCT(
         dict_roi_coords_selected = dict_roi_coords_xyct_tplane[ROISelectedId]
         color_selected = view_control.getROIColorXYCT(plane_t, ROISelectedId)
         opacity_selected = view_control.getHighlightOpacity()
-        drawROI(painter, dict_roi_coords_selected, color_selected, opacity_selected)
+        list_highlight.append((dict_roi_coords_selected["xpix"], dict_roi_coords_selected["ypix"], color_selected, opacity_selected))
 
     if app_key_sec:
         view_control_sec = control_manager.view_controls[app_key_sec]
@@ -342,78 +398,68 @@ def highlightROISelectedWithTrackingXYCT(
                 dict_roi_coords_single = dict_roi_coords_xyct_tplane[ROISelectedId]
                 color = (0, 0, 255) # blue
                 opacity = view_control_sec.getHighlightOpacity()
-                drawROI(painter, dict_roi_coords_single, color, opacity)
+                list_highlight.append((dict_roi_coords_single["xpix"], dict_roi_coords_single["ypix"], color, opacity))
+    return list_highlight
 
-
-# draw ROI pairs
-def drawROIPairsOnlyDisplay(
+# ROI pairs with both ROIs displayed and the pair of the selected ROI, as (coords_pri, coords_sec)
+def getROIPairsOnlyDisplay(
         view_control: ViewControl, 
-        painter: QPainter, 
         data_manager: DataManager, 
         control_manager: ControlManager, 
         ROISelectedId: int,
         app_key_pri: AppKeys,
         app_key_sec: AppKeys
-        ) -> None:
+        ) -> Tuple[List[Tuple[Tuple[int, int], Tuple[int, int]]], Optional[Tuple[Tuple[int, int], Tuple[int, int]]]]:
+    list_pair, pair_selected = [], None
     if view_control.show_roi_pair and app_key_sec is not None:
-        dict_roi_display_pri = control_manager.getSharedAttr(app_key_pri, "dict_roi_display")
-        dict_roi_display_sec = control_manager.getSharedAttr(app_key_sec, "dict_roi_display")
         try:
             table_control_pri = control_manager.table_controls[app_key_pri]
             table_control_sec = control_manager.table_controls[app_key_sec]
+            mask_display_pri = table_control_pri.getROIDisplayMask()
+            mask_display_sec = table_control_sec.getROIDisplayMask()
             roiId_pairs = table_control_pri.getMatchedROIPairs(table_control_sec)
             # all ROI pairs
             for roiId_pri, roiId_sec in roiId_pairs:
-                coords_pri = data_manager.getDictROICoords(app_key_pri)[roiId_pri]["med"]
+                coords_pri = tuple(int(v) for v in data_manager.getDictROICoords(app_key_pri)[roiId_pri]["med"])
                 if view_control.show_reg_im_roi:
-                    coords_sec = data_manager.getDictROICoordsRegistered(app_key_sec)[roiId_sec]["med"]
+                    coords_sec = tuple(int(v) for v in data_manager.getDictROICoordsRegistered(app_key_sec)[roiId_sec]["med"])
                 else:
-                    coords_sec = data_manager.getDictROICoords(app_key_sec)[roiId_sec]["med"]
+                    coords_sec = tuple(int(v) for v in data_manager.getDictROICoords(app_key_sec)[roiId_sec]["med"])
                 # show only if both ROIs are displayed
-                if all(dict_roi_display_pri[roiId_pri].values()) and all(dict_roi_display_sec[roiId_sec].values()) and roiId_pri != ROISelectedId:
-                    drawROIPair(painter, coords_pri, coords_sec, view_control.getROIPairOpacity())
-                elif roiId_pri == ROISelectedId:
-                    coords_pri_selected, coords_sec_selected = coords_pri, coords_sec
+                if mask_display_pri[roiId_pri] and mask_display_sec[roiId_sec]:
+                    list_pair.append((coords_pri, coords_sec))
+                if roiId_pri == ROISelectedId:
+                    pair_selected = (coords_pri, coords_sec)
         except (TypeError, KeyError):
             pass
-        # selected ROI pair 
-        try:
-            drawROIPair(painter, coords_pri_selected, coords_sec_selected, view_control.getROIPairOpacity())
-        except (NameError, UnboundLocalError):
-            pass
+    return list_pair, pair_selected
 
-# draw ROI pairs for XYCT stack
-def drawROIPairsXYCT(
+# ROI pairs of plane_t and plane_t_sec for XYCT stack and the pair of the selected ROI, as (coords_pri, coords_sec)
+def getROIPairsXYCT(
         view_control: ViewControl, 
-        painter: QPainter, 
         data_manager: DataManager, 
-        control_manager: ControlManager, 
         ROISelectedId: int,
-        app_key_pri: AppKeys,
-        app_key_sec: AppKeys,
         plane_t: int,
         plane_t_sec: int
-        ) -> None:
-    if view_control.show_roi_pair and app_key_sec is not None:
+        ) -> Tuple[List[Tuple[Tuple[int, int], Tuple[int, int]]], Optional[Tuple[Tuple[int, int], Tuple[int, int]]]]:
+    list_pair, pair_selected = [], None
+    if view_control.show_roi_pair:
         try:
-            roiId_pairs = data_manager.getDictROIMatching()["match"][plane_t][plane_t_sec]
-            roiId_pairs = {k:v for k,v in roiId_pairs.items() if v != None} # remove None values
+            roi_tracks = data_manager.getDictROIMatching()
+            if not roi_tracks.hasPair(plane_t, plane_t_sec):
+                return list_pair, pair_selected
+            roiId_pairs = {k:v for k,v in roi_tracks.getMatch(plane_t, plane_t_sec).items() if v != None} # remove None values
+            if view_control.getShowRegImROI():
+                dict_roi_coords_xyct = data_manager.getDictROICoordsXYCTRegistered()
+            else:
+                dict_roi_coords_xyct = data_manager.getDictROICoordsXYCT()
             # all ROI pairs
             for roiId_pri, roiId_sec in roiId_pairs.items():
-                if view_control.getShowRegImROI():
-                    coords_pri = data_manager.getDictROICoordsXYCTRegistered()[plane_t][roiId_pri]["med"]
-                    coords_sec = data_manager.getDictROICoordsXYCTRegistered()[plane_t_sec][roiId_sec]["med"]
-                else:
-                    coords_pri = data_manager.getDictROICoordsXYCT()[plane_t][roiId_pri]["med"]
-                    coords_sec = data_manager.getDictROICoordsXYCT()[plane_t_sec][roiId_sec]["med"]
-
-                drawROIPair(painter, coords_pri, coords_sec, view_control.getROIPairOpacity())
+                coords_pri = tuple(int(v) for v in dict_roi_coords_xyct[plane_t][roiId_pri]["med"])
+                coords_sec = tuple(int(v) for v in dict_roi_coords_xyct[plane_t_sec][roiId_sec]["med"])
+                list_pair.append((coords_pri, coords_sec))
                 if roiId_pri == ROISelectedId:
-                    coords_pri_selected, coords_sec_selected = coords_pri, coords_sec
+                    pair_selected = (coords_pri, coords_sec)
         except (TypeError, KeyError) as e:
             pass
-        # selected ROI pair 
-        try:
-            drawROIPair(painter, coords_pri_selected, coords_sec_selected, view_control.getROIPairOpacity())
-        except (NameError, UnboundLocalError):
-            pass
\ No newline at end of file
+    return list_pair, pair_selected
@@ -0,0 +1,103 @@
+import os
+import numpy as np
+import pytest
+from scipy.io import savemat
+from optic.io import cache_io
+from optic.io.cache_io import saveSidecarCache, loadSidecarCache, getSidecarCachePath, clearSidecarCache
+
+N_ROI, N_FRAME = 5, 40
+
+@pytest.fixture
+def source(tmp_path):
+    rng = np.random.default_rng(0)
+    dict_Fall = {
+        "F": rng.standard_normal((N_ROI, N_FRAME)).astype(np.float32),
+        "Fneu": rng.standard_normal((N_ROI, N_FRAME)).astype(np.float32),
+        "iscell": np.column_stack((rng.integers(0, 2, N_ROI), rng.random(N_ROI))),
+        "ops": {"fs": 30.0, "nframes": N_FRAME, "meanImg": rng.random((8, 8))},
+        "stat": {
+            roi_id: {
+                "xpix": rng.integers(0, 8, 3 + roi_id),
+                "ypix": rng.integers(0, 8, 3 + roi_id),
+                "med": rng.integers(0, 8, 2),
+                "npix": 3 + roi_id,
+                "radius": float(roi_id),
+                }
+            for roi_id in range(N_ROI)
+            },
+        }
+    path_src = str(tmp_path / "Fall.mat")
+    savemat(path_src, {"F": dict_Fall["F"]})
+    dict_im_bg = {"meanImg": rng.integers(0, 256, (8, 8)).astype(np.uint8)}
+    return path_src, dict_Fall, dict_im_bg
+
+def test_sidecar_round_trip(source):
+    path_src, dict_Fall, dict_im_bg = source
+    assert saveSidecarCache(path_src, dict_Fall, dict_im_bg) == getSidecarCachePath(path_src)
+    dict_cache = loadSidecarCache(path_src)
+    assert dict_cache is not None
+    dict_Fall_cache = dict_cache["dict_Fall"]
+    for key in ["F", "Fneu", "iscell"]:
+        np.testing.assert_array_equal(dict_Fall_cache[key], dict_Fall[key])
+    assert dict_Fall_cache["ops"]["fs"] == 30.0 and dict_Fall_cache["ops"]["nframes"] == N_FRAME
+    np.testing.assert_array_equal(dict_Fall_cache["ops"]["meanImg"], dict_Fall["ops"]["meanImg"])
+    assert len(dict_Fall_cache["stat"]) == N_ROI
+    for roi_id, roi_stat in dict_Fall["stat"].items():
+        for key, value in roi_stat.items():
+            np.testing.assert_array_equal(dict_Fall_cache["stat"][roi_id][key], value)
+    np.testing.assert_array_equal(dict_cache["im_bg"]["meanImg"], dict_im_bg["meanImg"])
+
+# a rewrite of the source, even of the same size, invalidates the cache
+def test_sidecar_stale_after_source_rewrite(source):
+    path_src, dict_Fall, dict_im_bg = source
+    saveSidecarCache(path_src, dict_Fall, dict_im_bg)
+    st = os.stat(path_src)
+    os.utime(path_src, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    assert loadSidecarCache(path_src) is None
+
+def test_sidecar_stale_after_size_change(source):
+    path_src, dict_Fall, dict_im_bg = source
+    saveSidecarCache(path_src, dict_Fall, dict_im_bg)
+    st = os.stat(path_src)
+    with open(path_src, "ab") as f:
+        f.write(b"\0" * 8)
+    os.utime(path_src, ns=(st.st_atime_ns, st.st_mtime_ns))
+    assert loadSidecarCache(path_src) is None
+
+def test_sidecar_stale_after_version_change(source, monkeypatch):
+    path_src, dict_Fall, dict_im_bg = source
+    saveSidecarCache(path_src, dict_Fall, dict_im_bg)
+    monkeypatch.setattr(cache_io, "CACHE_VERSION", cache_io.CACHE_VERSION + 1)
+    assert loadSidecarCache(path_src) is None
+
+def test_sidecar_missing_or_cleared(source):
+    path_src, dict_Fall, dict_im_bg = source
+    assert loadSidecarCache(path_src) is None
+    saveSidecarCache(path_src, dict_Fall, dict_im_bg)
+    clearSidecarCache(path_src)
+    assert loadSidecarCache(path_src) is None
+
+# unfinished entries of saves in progress are kept, those left over from a crashed session are removed
+def test_evict_skips_entries_in_progress(source):
+    path_src, dict_Fall, dict_im_bg = source
+    path_cache = saveSidecarCache(path_src, dict_Fall, dict_im_bg)
+    path_tmp_new, path_tmp_old = f"{path_cache}.tmp1_2", f"{path_cache}.tmp3_4"
+    for path_tmp in [path_tmp_new, path_tmp_old]:
+        os.makedirs(path_tmp)
+        np.save(f"{path_tmp}/F.npy", dict_Fall["F"])
+    time_old = os.stat(path_tmp_old).st_mtime - cache_io.CACHE_TMP_MAX_AGE_S - 1
+    os.utime(path_tmp_old, (time_old, time_old))
+    cache_io.evictSidecarCache(cache_io.getSidecarCacheDir(path_src), max_bytes=0)
+    assert os.path.isdir(path_tmp_new) and not os.path.exists(path_tmp_old)
+    assert not os.path.exists(path_cache)
+
+# the access time is written to a temporary file which replaces the manifest
+def test_load_replaces_manifest(source, monkeypatch):
+    path_src, dict_Fall, dict_im_bg = source
+    path_cache = saveSidecarCache(path_src, dict_Fall, dict_im_bg)
+    list_replace = []
+    os_replace = os.replace
+    monkeypatch.setattr(cache_io.os, "replace", lambda src, dst: (list_replace.append((src, dst)), os_replace(src, dst)))
+    assert loadSidecarCache(path_src) is not None
+    assert list_replace == [(cache_io.getTmpPath(f"{path_cache}/{cache_io.CACHE_MANIFEST}"), f"{path_cache}/{cache_io.CACHE_MANIFEST}")]
+    assert not any(".tmp" in name for name in os.listdir(path_cache))
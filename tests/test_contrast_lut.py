@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("PyQt5")
+from optic.visualization.view_visual import adjustChannelContrast
+
+# slider (min, max) pairs, an inverted range inverts the image
+SLIDER_RANGES = [(0, 255), (30, 200), (100, 101), (200, 50)]
+
+# uint8 / uint16 images go through the LUT, the same values as float32 take the float path
+@pytest.mark.parametrize("dtype", [np.uint8, np.uint16])
+@pytest.mark.parametrize("scaling", [True, False])
+@pytest.mark.parametrize("slider", SLIDER_RANGES)
+def test_lut_matches_float_path(dtype, scaling, slider):
+    rng = np.random.default_rng(0)
+    image = rng.integers(0, np.iinfo(dtype).max, (64, 48), endpoint=True).astype(dtype)
+    image[0, 0], image[0, 1] = 3, 250
+    min_val_slider, max_val_slider = slider
+    image_lut = adjustChannelContrast(image, min_val_slider, max_val_slider, scaling=scaling)
+    image_float = adjustChannelContrast(image.astype(np.float32), min_val_slider, max_val_slider, scaling=scaling)
+    assert image_lut.dtype == np.uint8 and image_lut.shape == image.shape
+    # float32 rounding of the thresholds may move values on a bin edge by one step
+    assert np.abs(image_lut.astype(np.int16) - image_float).max() <= 1
+
+# empty slider range, black image without scaling
+@pytest.mark.parametrize("dtype", [np.uint8, np.uint16, np.float32])
+def test_empty_slider_range(dtype):
+    image = np.arange(256).reshape(16, 16).astype(dtype)
+    assert not adjustChannelContrast(image, 128, 128, scaling=False).any()
+
+def test_lut_writes_to_out():
+    image = np.arange(256, dtype=np.uint8).reshape(16, 16)
+    out = np.zeros((16, 16, 3), dtype=np.uint8)
+    result = adjustChannelContrast(image, 0, 255, min_val_image=0, max_val_image=255, out=out[:, :, 1])
+    np.testing.assert_array_equal(out[:, :, 1], image)
+    assert not out[:, :, [0, 2]].any() and np.shares_memory(result, out)
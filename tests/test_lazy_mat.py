@@ -0,0 +1,98 @@
+import numpy as np
+import pytest
+from scipy.io import loadmat, savemat
+from optic.io.lazy_mat import LazyTraceArray, closeLazyFall, loadFallMatLazy
+
+N_ROI, N_FRAME = 7, 50
+
+def makeFall(rng: np.random.Generator) -> dict:
+    return {
+        "F": rng.standard_normal((N_ROI, N_FRAME)).astype(np.float32),
+        "Fneu": rng.standard_normal((N_ROI, N_FRAME)).astype(np.float32),
+        "spks": rng.random((N_ROI, N_FRAME)).astype(np.float32),
+        "iscell": np.column_stack((rng.integers(0, 2, N_ROI), rng.random(N_ROI))),
+        "ops": {"fs": 30.0, "nframes": N_FRAME, "nchannels": 1, "meanImg": rng.random((8, 8))},
+        }
+
+# uncompressed traces are memory-mapped, compressed ones fall back to loadmat, both must read the same values
+@pytest.mark.parametrize("do_compression", [False, True])
+def test_lazy_v5_matches_loadmat(tmp_path, do_compression):
+    path_fall = str(tmp_path / "Fall.mat")
+    savemat(path_fall, makeFall(np.random.default_rng(0)), do_compression=do_compression)
+    Fall_ref = loadmat(path_fall, simplify_cells=True)
+    Fall = loadFallMatLazy(path_fall, n_cache_rows=2)
+    try:
+        for key in ["F", "Fneu", "spks"]:
+            traces = Fall[key]
+            assert traces.shape == Fall_ref[key].shape
+            np.testing.assert_array_equal(np.asarray(traces), Fall_ref[key])
+            for roi_id in [0, 3, N_ROI - 1, -1, 3]:
+                np.testing.assert_array_equal(traces[roi_id], Fall_ref[key][roi_id])
+            np.testing.assert_array_equal(traces[1:6:2], Fall_ref[key][1:6:2])
+            np.testing.assert_allclose(traces.mean(axis=0), Fall_ref[key].mean(axis=0), rtol=1e-5)
+        assert isinstance(Fall["F"], LazyTraceArray) != do_compression
+        np.testing.assert_array_equal(Fall["iscell"], Fall_ref["iscell"])
+        assert Fall["ops"]["fs"] == Fall_ref["ops"]["fs"]
+        np.testing.assert_array_equal(Fall["ops"]["meanImg"], Fall_ref["ops"]["meanImg"])
+    finally:
+        closeLazyFall(Fall)
+
+def test_lazy_rows_are_read_only(tmp_path):
+    path_fall = str(tmp_path / "Fall.mat")
+    savemat(path_fall, makeFall(np.random.default_rng(1)))
+    Fall = loadFallMatLazy(path_fall)
+    row = Fall["F"][2]
+    with pytest.raises(ValueError):
+        row[0] = 0
+    closeLazyFall(Fall)
+    assert Fall["F"].dataset is None
+
+# MAT v7.3 stores (nROIs, nframes) matrices transposed, as MATLAB does
+def test_lazy_v73_matches_source(tmp_path):
+    h5py = pytest.importorskip("h5py")
+    path_fall = str(tmp_path / "Fall.mat")
+    Fall_ref = makeFall(np.random.default_rng(2))
+    with h5py.File(path_fall, "w", userblock_size=512) as h5file:
+        for key in ["F", "Fneu", "spks", "iscell"]:
+            dataset = h5file.create_dataset(key, data=np.asarray(Fall_ref[key]).T)
+            dataset.attrs["MATLAB_class"] = np.bytes_("single" if key != "iscell" else "double")
+        group_ops = h5file.create_group("ops")
+        group_ops.attrs["MATLAB_class"] = np.bytes_("struct")
+        for key, value in Fall_ref["ops"].items():
+            dataset = group_ops.create_dataset(key, data=np.asarray(value, dtype=np.float64).T)
+            dataset.attrs["MATLAB_class"] = np.bytes_("double")
+    Fall = loadFallMatLazy(path_fall, n_cache_rows=2)
+    try:
+        for key in ["F", "Fneu", "spks"]:
+            assert isinstance(Fall[key], LazyTraceArray)
+            assert Fall[key].shape == (N_ROI, N_FRAME)
+            np.testing.assert_array_equal(np.asarray(Fall[key]), Fall_ref[key])
+            np.testing.assert_array_equal(Fall[key][4], Fall_ref[key][4])
+        np.testing.assert_array_equal(Fall["iscell"], Fall_ref["iscell"])
+        assert Fall["ops"]["fs"] == 30.0
+        np.testing.assert_array_equal(Fall["ops"]["meanImg"], Fall_ref["ops"]["meanImg"])
+    finally:
+        closeLazyFall(Fall)
+
+# index arrays, masks and (rows, cols) tuples read only the selected rows and follow numpy indexing
+def test_lazy_fancy_index_matches_numpy(tmp_path):
+    h5py = pytest.importorskip("h5py")
+    rng = np.random.default_rng(3)
+    arr = rng.standard_normal((N_ROI, N_FRAME)).astype(np.float32)
+    mask = rng.random(N_ROI) > 0.5
+    list_key = [
+        [4, 0, 4, -1], np.array([], dtype=int), mask, np.array([[1, 2], [6, 1]]),
+        (2, slice(3, 9)), ([0, 5], slice(None, None, 4)), (mask, 7), ([1, 3], [2, 8]), (slice(1, 5), [0, 49]),
+        (Ellipsis, 3), (np.int64(-2),),
+        ]
+    path_h5 = str(tmp_path / "traces.h5")
+    with h5py.File(path_h5, "w") as h5file:
+        h5file.create_dataset("F", data=arr.T)
+    with h5py.File(path_h5, "r") as h5file:
+        for traces in [LazyTraceArray(arr), LazyTraceArray(h5file["F"], transposed=True)]:
+            for key in list_key:
+                np.testing.assert_array_equal(traces[key], arr[key])
+            with pytest.raises(IndexError):
+                traces[[N_ROI]]
+            with pytest.raises(IndexError):
+                traces[mask[:-1]]
@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("cv2")
+from optic.preprocessing.preprocessing_roi import convertROIContourToFilled, convertROIContourToFilledInBBox
+
+WIDTH, HEIGHT = 64, 48
+
+# polygons inside, on the border of and partly or fully outside the image
+CONTOURS = [
+    np.array([[10, 10], [20, 10], [20, 18], [10, 18]]),
+    np.array([[5, 30], [25, 40], [12, 47], [3, 38], [8, 33]]),
+    np.array([[0, 0], [WIDTH - 1, 0], [WIDTH - 1, HEIGHT - 1], [0, HEIGHT - 1]]),
+    np.array([[-5, 20], [10, 25], [-3, 40]]),
+    np.array([[55, 40], [70, 42], [60, 55]]),
+    np.array([[30, 30]]),
+    np.array([[100, 100], [110, 100], [105, 110]]),
+    ]
+
+def sortPixels(roi_filled: np.ndarray) -> np.ndarray:
+    return roi_filled[np.lexsort((roi_filled[:, 0], roi_filled[:, 1]))]
+
+# rasterizing inside the bounding box gives the same pixels as a full-image fill
+@pytest.mark.parametrize("roi_contour", CONTOURS)
+def test_bbox_fill_matches_full_fill(roi_contour):
+    roi_filled_full = convertROIContourToFilled(roi_contour.astype(np.int32), WIDTH, HEIGHT)
+    roi_filled_bbox = convertROIContourToFilledInBBox(roi_contour, WIDTH, HEIGHT)
+    assert roi_filled_bbox.shape[1] == 2
+    np.testing.assert_array_equal(sortPixels(roi_filled_bbox), sortPixels(roi_filled_full))
+
+def test_bbox_fill_random_polygons():
+    rng = np.random.default_rng(0)
+    for _ in range(50):
+        center = rng.integers(-10, [WIDTH + 10, HEIGHT + 10])
+        angle = np.sort(rng.random(rng.integers(3, 9)) * 2 * np.pi)
+        radius = rng.integers(1, 15, len(angle))
+        roi_contour = np.round(center + np.column_stack((np.cos(angle), np.sin(angle))) * radius[:, None]).astype(np.int32)
+        np.testing.assert_array_equal(
+            sortPixels(convertROIContourToFilledInBBox(roi_contour, WIDTH, HEIGHT)),
+            sortPixels(convertROIContourToFilled(roi_contour, WIDTH, HEIGHT)),
+            )
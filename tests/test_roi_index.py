@@ -0,0 +1,55 @@
+import numpy as np
+from optic.utils.roi_store import ROIStore
+from optic.utils.roi_index import ROIHitIndex
+
+SHAPE = (32, 40)
+
+def makeDictROICoords(rng: np.random.Generator, n_roi: int=12) -> dict:
+    dict_roi_coords = {}
+    for roi_id in range(n_roi):
+        x0, y0 = rng.integers(0, SHAPE[1] - 6), rng.integers(0, SHAPE[0] - 6)
+        xx, yy = np.meshgrid(np.arange(x0, x0 + rng.integers(1, 6)), np.arange(y0, y0 + rng.integers(1, 6)))
+        dict_roi_coords[roi_id * 2] = {
+            "xpix": xx.ravel(), "ypix": yy.ravel(), "med": np.array([int(np.median(xx)), int(np.median(yy))]),
+            "npix": xx.size, "radius": float(roi_id),
+            }
+    return dict_roi_coords
+
+# label image of dict_roi_coords, later ROIs are on top
+def makeLabelImageFromDict(dict_roi_coords: dict) -> np.ndarray:
+    label = np.full(SHAPE, -1, dtype=np.int32)
+    for roi_id, coords in dict_roi_coords.items():
+        label[coords["ypix"], coords["xpix"]] = roi_id
+    return label
+
+# the incrementally updated label image equals a full rebuild after every edit
+def test_hit_index_follows_edits():
+    rng = np.random.default_rng(3)
+    dict_roi_coords = makeDictROICoords(rng)
+    roi_store = ROIStore.fromDictROICoords(dict_roi_coords)
+    roi_index = ROIHitIndex(roi_store)
+    dict_new = makeDictROICoords(rng, 4)
+    for roi_id, coords in [(6, dict_new[0]), (200, dict_new[2]), (10, None), (6, dict_new[6])]:
+        if coords is None:
+            del roi_store[roi_id], dict_roi_coords[roi_id]
+        else:
+            roi_store[roi_id] = dict_roi_coords[roi_id] = coords
+        roi_index.update()
+        # the label image grows with the ROIs but is not cropped after deletions
+        label_ref = makeLabelImageFromDict(dict_roi_coords)
+        height, width = roi_index.label.shape
+        np.testing.assert_array_equal(roi_index.label, label_ref[:height, :width])
+        assert (label_ref[height:] == -1).all() and (label_ref[:, width:] == -1).all()
+
+def test_hit_index_find_roi():
+    dict_roi_coords = {
+        0: {"xpix": np.array([1, 2]), "ypix": np.array([1, 1]), "med": np.array([1, 1])},
+        1: {"xpix": np.array([10]), "ypix": np.array([10]), "med": np.array([10, 10])},
+        2: {"xpix": np.array([11]), "ypix": np.array([12]), "med": np.array([11, 12])},
+        }
+    roi_index = ROIHitIndex(ROIStore.fromDictROICoords(dict_roi_coords))
+    assert roi_index.getROIAt(2, 1) == 0
+    assert roi_index.getROIAt(5, 5) == -1
+    assert roi_index.findROI(9, 9) == 1
+    assert roi_index.findROI(10, 10, mask_skip=np.array([False, True, False])) == 2
+    assert roi_index.findROI(10, 10, mask_skip=np.array([True, True, True])) is None
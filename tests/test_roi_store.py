@@ -0,0 +1,77 @@
+import copy
+import numpy as np
+import pytest
+from optic.utils.roi_store import ROIStore, toROIStore, getROIMedArray
+
+SHAPE = (32, 40)
+
+def makeDictROICoords(rng: np.random.Generator, n_roi: int=12) -> dict:
+    dict_roi_coords = {}
+    for roi_id in range(n_roi):
+        x0, y0 = rng.integers(0, SHAPE[1] - 6), rng.integers(0, SHAPE[0] - 6)
+        xx, yy = np.meshgrid(np.arange(x0, x0 + rng.integers(1, 6)), np.arange(y0, y0 + rng.integers(1, 6)))
+        dict_roi_coords[roi_id * 2] = {
+            "xpix": xx.ravel(), "ypix": yy.ravel(), "med": np.array([int(np.median(xx)), int(np.median(yy))]),
+            "npix": xx.size, "radius": float(roi_id),
+            }
+    return dict_roi_coords
+
+# label image of dict_roi_coords, later ROIs are on top
+def makeLabelImageFromDict(dict_roi_coords: dict) -> np.ndarray:
+    label = np.full(SHAPE, -1, dtype=np.int32)
+    for roi_id, coords in dict_roi_coords.items():
+        label[coords["ypix"], coords["xpix"]] = roi_id
+    return label
+
+def assertSameROIs(roi_store: ROIStore, dict_roi_coords: dict) -> None:
+    assert list(roi_store) == list(dict_roi_coords)
+    for roi_id, coords in dict_roi_coords.items():
+        for key in ["xpix", "ypix", "med"]:
+            np.testing.assert_array_equal(roi_store[roi_id][key], coords[key])
+    np.testing.assert_array_equal(roi_store.toLabelImage(SHAPE), makeLabelImageFromDict(dict_roi_coords))
+
+def test_store_matches_dict():
+    dict_roi_coords = makeDictROICoords(np.random.default_rng(0))
+    roi_store = ROIStore.fromDictROICoords(dict_roi_coords, column_keys="all")
+    assertSameROIs(roi_store, dict_roi_coords)
+    assert sorted(roi_store.columns) == ["npix", "radius"]
+    np.testing.assert_array_equal(roi_store.npix, [len(coords["xpix"]) for coords in dict_roi_coords.values()])
+    np.testing.assert_array_equal(getROIMedArray(roi_store, [4, 0]), getROIMedArray(dict_roi_coords, [4, 0]))
+    assert toROIStore(roi_store) is roi_store
+    assert ROIStore.fromDictROICoords(dict_roi_coords).columns == {}
+
+def test_store_edits_match_dict():
+    rng = np.random.default_rng(1)
+    dict_roi_coords = makeDictROICoords(rng)
+    roi_store = ROIStore.fromDictROICoords(dict_roi_coords, column_keys=["radius"])
+    dict_new = makeDictROICoords(rng, 3)
+    # replace, add, delete, then replace a pending ROI again
+    roi_store[4] = dict_roi_coords[4] = dict_new[0]
+    roi_store[101] = dict_roi_coords[101] = dict_new[2]
+    del roi_store[0], dict_roi_coords[0]
+    roi_store[101] = dict_roi_coords[101] = dict_new[4]
+    assertSameROIs(roi_store, dict_roi_coords)
+    radius = dict(zip(roi_store.roi_ids.tolist(), roi_store.getColumn("radius").tolist()))
+    assert np.isnan(radius[4]) and np.isnan(radius[101]) and radius[2] == 1.0
+
+def test_store_entries_are_read_only():
+    roi_store = ROIStore.fromDictROICoords(makeDictROICoords(np.random.default_rng(2)))
+    coords = roi_store[2]
+    with pytest.raises(TypeError):
+        coords["xpix"] = np.zeros(1)
+    with pytest.raises(ValueError):
+        coords["xpix"][0] = 0
+    coords_copy = copy.deepcopy(coords)
+    coords_copy["xpix"][0] = -1
+    assert type(coords_copy) is dict and roi_store[2]["xpix"][0] != -1
+
+def test_store_from_label_image():
+    mask = np.zeros(SHAPE, dtype=np.uint16)
+    mask[2:5, 3:7], mask[10:12, 20:21], mask[30, 39] = 3, 1, 7
+    roi_store = ROIStore.fromLabelImage(mask)
+    assert roi_store.roi_ids.tolist() == [0, 1, 2]
+    for roi_id, label in enumerate([1, 3, 7]):
+        ypix, xpix = np.nonzero(mask == label)
+        np.testing.assert_array_equal(roi_store[roi_id]["xpix"], xpix)
+        np.testing.assert_array_equal(roi_store[roi_id]["ypix"], ypix)
+        np.testing.assert_array_equal(roi_store[roi_id]["med"], [int(np.median(xpix)), int(np.median(ypix))])
@@ -0,0 +1,113 @@
+import numpy as np
+import pytest
+from optic.utils.roi_tracks import ROITracks, toROITracks, formatChangedMatches
+
+# three t_planes, ROI 0 is tracked through all of them, ROI 1 of t0 only to t1
+DICT_ROI_MATCHING = {
+    "id": {0: [0, 1, 2], 1: [10, 11, 12], 2: [20, 21]},
+    "match": {
+        0: {1: {0: 10, 1: 11, 2: None}, 2: {0: 20, 1: None, 2: None}},
+        1: {2: {10: 20, 11: None, 12: 21}},
+        },
+    }
+
+# pairwise layout of all t_plane pairs derived from the tracks
+def getPairwiseMatches(roi_tracks: ROITracks) -> dict:
+    return {
+        (t_plane_pri, t_plane_sec): roi_tracks.getMatch(t_plane_pri, t_plane_sec)
+        for t_plane_pri in roi_tracks.getPlanes() for t_plane_sec in roi_tracks.getPlanes() if roi_tracks.hasPair(t_plane_pri, t_plane_sec)
+        }
+
+def test_tracks_round_trip_pairwise_layout():
+    roi_tracks = ROITracks.fromDictROIMatching(DICT_ROI_MATCHING)
+    for t_plane_pri, dict_match_pri in DICT_ROI_MATCHING["match"].items():
+        for t_plane_sec, dict_match in dict_match_pri.items():
+            assert roi_tracks.getMatch(t_plane_pri, t_plane_sec) == dict_match
+    assert roi_tracks.getMatchedROIId(2, 20, 0) == 0
+    assert roi_tracks.getChangedMatches(DICT_ROI_MATCHING) == []
+    assert toROITracks(roi_tracks) is roi_tracks
+
+# 12 -> 21 is completed to 2 -> 21, 1 -> 21 conflicts with the track of 0 in t2 and is dropped
+def test_tracks_report_changed_matches():
+    dict_roi_matching = {
+        "id": {0: [0, 1, 2], 1: [10, 12], 2: [20, 21]},
+        "match": {
+            0: {1: {0: 10, 1: None, 2: 12}, 2: {0: 20, 1: 21, 2: None}},
+            1: {2: {10: 20, 12: 21}},
+            },
+        }
+    roi_tracks = ROITracks.fromDictROIMatching(dict_roi_matching)
+    list_change = roi_tracks.getChangedMatches(dict_roi_matching)
+    assert sorted(list_change) == [(0, 2, 1, 21, None), (0, 2, 2, None, 21)]
+    assert formatChangedMatches(list_change, max_lines=1).splitlines()[-1] == "... and 1 more"
+
+def test_tracks_set_match_cuts_and_joins():
+    roi_tracks = ROITracks.fromDictROIMatching(DICT_ROI_MATCHING)
+    # t0 ROI 1 now matches t1 ROI 12, ROI 12 brings its match t2 ROI 21 along
+    roi_tracks.setMatch(0, 1, 1, 12)
+    assert roi_tracks.getMatch(0, 1) == {0: 10, 1: 12, 2: None}
+    assert roi_tracks.getMatch(0, 2) == {0: 20, 1: 21, 2: None}
+    assert roi_tracks.getMatch(1, 2) == {10: 20, 11: None, 12: 21}
+    # unmatching 0 -> 10 keeps 10 -> 20
+    roi_tracks.setMatch(0, 1, 0, None)
+    assert roi_tracks.getMatch(0, 1) == {0: None, 1: 12, 2: None}
+    assert roi_tracks.getMatch(0, 2) == {0: None, 1: 21, 2: None}
+    assert roi_tracks.getMatch(1, 2)[10] == 20
+
+def test_tracks_set_matches_equals_single_matches():
+    roi_tracks_bulk = ROITracks.fromDictROIMatching(DICT_ROI_MATCHING)
+    roi_tracks_single = roi_tracks_bulk.copy()
+    dict_match = {10: 21, 12: 20}
+    roi_tracks_bulk.setMatches(1, 2, dict_match)
+    roi_tracks_single.clearMatch(1, 2)
+    for roi_id_pri, roi_id_sec in dict_match.items():
+        roi_tracks_single.setMatch(1, 2, roi_id_pri, roi_id_sec)
+    assert getPairwiseMatches(roi_tracks_bulk) == getPairwiseMatches(roi_tracks_single)
+    assert roi_tracks_bulk.getMatch(1, 2) == {10: 21, 11: None, 12: 20}
+
+def test_tracks_add_remove_roi():
+    roi_tracks = ROITracks.fromROIIds({0: [0, 1], 1: [5]})
+    assert roi_tracks.getMatch(0, 1) == {0: None, 1: None}
+    roi_tracks.addROI(1, 6, track_id=int(roi_tracks.getTrackIds(0)[1]))
+    assert roi_tracks.getMatch(0, 1) == {0: None, 1: 6}
+    roi_tracks.removeROI(1, 6)
+    assert roi_tracks.getMatch(0, 1) == {0: None, 1: None}
+    masks = np.zeros((2, 4, 4), dtype=np.uint16)
+    masks[0, 0, 0], masks[0, 3, 3], masks[1, 1, 1] = 1, 2, 2
+    roi_tracks = ROITracks.fromLabelImages(masks)
+    assert roi_tracks.getMatch(0, 1) == {0: None, 1: 0}
+
+# matches of consecutive pairs (0,1), (1,2), (2,3), ROI i of each t_plane is one track
+def makeChainTracks() -> ROITracks:
+    return ROITracks.fromDictROIMatching({
+        "id": {t_plane: [0, 1] for t_plane in range(4)},
+        "match": {t_plane: {t_plane + 1: {0: 0, 1: 1}} for t_plane in range(3)},
+        })
+
+# edits of one consecutive pair leave the other consecutive pairs unchanged
+def test_tracks_edit_keeps_untouched_pairs():
+    for edit in [
+            lambda roi_tracks: roi_tracks.clearMatch(1, 2),
+            lambda roi_tracks: roi_tracks.setMatch(1, 2, 0, None),
+            lambda roi_tracks: roi_tracks.setMatch(1, 2, 0, 1),
+            lambda roi_tracks: roi_tracks.setMatch(2, 1, 1, 0),
+            lambda roi_tracks: roi_tracks.setMatches(1, 2, {0: 1, 1: 0}),
+            ]:
+        roi_tracks = makeChainTracks()
+        edit(roi_tracks)
+        assert roi_tracks.getMatch(0, 1) == {0: 0, 1: 1}
+        assert roi_tracks.getMatch(2, 3) == {0: 0, 1: 1}
+
+# non-consecutive pairs follow from the tracks and can not be edited
+def test_tracks_reject_non_adjacent_edits():
+    roi_tracks = makeChainTracks()
+    assert roi_tracks.isAdjacentPair(1, 2) and roi_tracks.isAdjacentPair(2, 1)
+    assert not roi_tracks.isAdjacentPair(0, 2) and not roi_tracks.isAdjacentPair(0, 4)
+    for edit in [
+            lambda: roi_tracks.clearMatch(0, 2),
+            lambda: roi_tracks.setMatch(0, 2, 0, None),
+            lambda: roi_tracks.setMatches(0, 3, {0: 1}),
+            ]:
+        with pytest.raises(ValueError):
+            edit()
+    assert getPairwiseMatches(roi_tracks) == getPairwiseMatches(makeChainTracks())
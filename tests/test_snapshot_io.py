@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+import tifffile
+from optic.io import snapshot_io
+from optic.io.snapshot_io import getArrayHash, writeBlobHDF5
+from optic.io.lazy_tiff import openLazyTiffStack
+
+h5py = pytest.importorskip("h5py")
+
+# blocks of a few bytes, so that every array is written in several blocks
+@pytest.fixture(autouse=True)
+def small_blocks(monkeypatch):
+    monkeypatch.setattr(snapshot_io, "BLOB_BLOCK_BYTES", 64)
+
+def test_blob_round_trip_and_dedup(tmp_path):
+    rng = np.random.default_rng(0)
+    arr = rng.integers(0, 1000, (9, 7, 2, 3, 4)).astype(np.uint16)
+    with h5py.File(tmp_path / "store.h5", "w") as f:
+        path_blob = writeBlobHDF5(f, arr)
+        np.testing.assert_array_equal(f[path_blob][()], arr)
+        assert writeBlobHDF5(f, arr.copy()) == path_blob
+        assert writeBlobHDF5(f, arr + 1) != path_blob
+        assert len(f[snapshot_io.BLOB_GROUP]) == 2
+
+# lazy stacks are read by planes, their blob holds the same data but is keyed apart from ndarrays
+def test_blob_of_lazy_tiff_stack(tmp_path):
+    arr = np.random.default_rng(1).integers(0, 1000, (9, 7, 2, 3, 4)).astype(np.uint16)
+    path_tiff = str(tmp_path / "stack.tif")
+    tifffile.imwrite(path_tiff, np.moveaxis(arr, [0, 1, 2, 3, 4], [4, 3, 2, 1, 0]), imagej=True, metadata={"axes": "TZCYX"})
+    img_stack, _ = openLazyTiffStack(path_tiff)
+    with h5py.File(tmp_path / "store.h5", "w") as f:
+        path_blob = writeBlobHDF5(f, img_stack)
+        np.testing.assert_array_equal(f[path_blob][()], arr)
+        assert writeBlobHDF5(f, img_stack) == path_blob
+    assert getArrayHash(img_stack) != getArrayHash(arr)
+    img_stack.close()